@@ -9,21 +9,40 @@ Vercel AI SDK v5 Data Stream Protocol using Server-Sent Events (SSE).
 
 Key components:
 - /api/hello: Health check endpoint
+- /api/ready: Readiness endpoint, 200 once the agent, engine and schema are warm
 - /api/chat: Main chat endpoint that processes messages and returns AI responses
   with both reasoning (thinking) and text content
+- /api/traces: Recent request traces (local runtime only)
+- /api/metrics: Prometheus metrics (latency, agent steps, tools, SQL, tokens, pool)
+- /api/ingest/vital-signs, /api/ingest/labor-progress: batch ingestion of
+  monitor readings
 """
 
 import os
 import sys
 import io
+import time
+from contextlib import asynccontextmanager
 
 # fmt: off
-from fastapi import FastAPI, Request, Query
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, Request, Query, Body
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from vercel_ai_sdk_mate.api import RequestBody  # Parses AI SDK request format
 
 from obnexus.utils import debug
+from obnexus.stage_timer import StageTimer
+from obnexus.stage_timer import current_stage_timer
+from obnexus.tracing import start_trace
+from obnexus.tracing import instrument_sqlalchemy
+from obnexus.tracing import exporter
+from obnexus import metrics
+from obnexus import write_operations
+from obnexus.runtime import runtime
+from obnexus.warmup import Warmup
+from obnexus.result_sets import ResultSetRegistry
+from obnexus.rate_limiter import is_shed, SHED_MESSAGE
 from obnexus.ai_sdk_adapter import debug_ai_sdk_request
+from obnexus.ai_sdk_adapter import convert_data_parts
 from obnexus.ai_sdk_adapter import ai_sdk_message_with_reasoning_generator
 from obnexus.ai_sdk_adapter import get_last_user_message_text
 from obnexus.ai_sdk_adapter import request_body_to_agent_history
@@ -37,7 +56,49 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-app = FastAPI()
+# Resolve the lazy parts of ``one`` before the first chat request needs them
+warmup = Warmup(one)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start warming up in the background, so the server accepts connections
+    (and /api/ready) right away.
+    """
+    warmup.start()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Emit a tracing span for every SQL statement (no-op outside traced requests)
+instrument_sqlalchemy()
+# Count connection pool checkouts for /api/metrics
+metrics.instrument_pool()
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Record request count and latency (until the response starts) per route.
+    """
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # use the route template, not the raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics.http_requests_total.inc(method=request.method, path=path, status=status)
+        metrics.http_request_duration_seconds.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            path=path,
+        )
 
 
 @app.get("/api/hello")
@@ -55,6 +116,77 @@ async def hello_world():
     )
 
 
+@app.get("/api/ready")
+async def ready():
+    """
+    Readiness endpoint: 200 once the warm-up succeeded, 503 while it is
+    running or if a step failed. The body lists each step's status and time.
+
+    Also starts the warm-up if the platform did not run the lifespan hook.
+    """
+    warmup.start()
+    return JSONResponse(
+        content=warmup.to_dict(),
+        status_code=200 if warmup.is_ready else 503,
+    )
+
+
+@app.get("/api/traces")
+async def get_traces(limit: int = Query(20)):
+    """
+    Return the most recent request traces (spans with timings) as JSON.
+
+    Only available in the local runtime: traces contain SQL statements and
+    tool arguments.
+    """
+    if not runtime.is_local():
+        return JSONResponse(content={"error": "Not found"}, status_code=404)
+    return JSONResponse(content=exporter.get_traces(limit=limit))
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Return all metrics in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(
+        content=metrics.registry.render(),
+        media_type=metrics.CONTENT_TYPE,
+    )
+
+
+@app.post("/api/ingest/vital-signs")
+def ingest_vital_signs(readings: list[dict] = Body(..., embed=True)):
+    """
+    Insert a batch of vital sign readings: ``{"readings": [{...}, ...]}``.
+
+    A sync endpoint, so FastAPI runs the database work in its thread pool.
+    See :func:`obnexus.write_operations.ingest_vital_signs`.
+    """
+    return JSONResponse(
+        content=write_operations.ingest_vital_signs(
+            engine=one.engine,
+            readings=readings,
+            ward_views=one.ward_views,
+        ),
+    )
+
+
+@app.post("/api/ingest/labor-progress")
+def ingest_labor_progress(readings: list[dict] = Body(..., embed=True)):
+    """
+    Insert a batch of labor progress assessments: ``{"readings": [{...}, ...]}``.
+
+    See :func:`obnexus.write_operations.ingest_labor_progress`.
+    """
+    return JSONResponse(
+        content=write_operations.ingest_labor_progress(
+            engine=one.engine,
+            readings=readings,
+        ),
+    )
+
+
 @app.post("/api/chat")
 async def handle_chat_data(request: Request, protocol: str = Query("data")):
     """
@@ -75,21 +207,33 @@ async def handle_chat_data(request: Request, protocol: str = Query("data")):
         request: The incoming HTTP request containing chat messages
         protocol: Stream protocol version (default: "data" for AI SDK v5)
     """
-    # --- Log incoming request for troubleshooting
-    request_body_data = await debug_ai_sdk_request(request=request)
+    # --- Time and trace each stage of this request (model and tool calls are added
+    # by agent hooks, SQL statements by SQLAlchemy events).
+    # The context variables only live as long as this request's task.
+    trace = start_trace("POST /api/chat", protocol=protocol)
+    timer = StageTimer(trace=trace)
+    current_stage_timer.set(timer)
+
+    with timer.stage("parse"):
+        # --- Log incoming request for troubleshooting
+        request_body_data = await debug_ai_sdk_request(request=request)
 
-    # --- Parse the incoming request into AI SDK format
-    request_body = RequestBody(**request_body_data)
+        # --- Parse the incoming request into AI SDK format
+        # (cited tables of previous answers come back as data-table parts)
+        request_body = RequestBody(**convert_data_parts(request_body_data))
 
-    # --- Extract the last user message ---
-    last_user_message = get_last_user_message_text(request_body)
+        # --- Extract the last user message ---
+        last_user_message = get_last_user_message_text(request_body)
 
     if not last_user_message:
         # Return error if no message found
         response = StreamingResponse(
-            ai_sdk_message_with_reasoning_generator(
-                reasoning_text="",
-                output_text="Error: No message content found in request.",
+            timer.timed_iter(
+                "sse_encode",
+                ai_sdk_message_with_reasoning_generator(
+                    reasoning_text="",
+                    output_text="Error: No message content found in request.",
+                ),
             ),
             media_type="text/event-stream",
         )
@@ -104,11 +248,12 @@ async def handle_chat_data(request: Request, protocol: str = Query("data")):
     # Clear previous messages and restore history from the frontend request.
     # The frontend sends all previous messages in request_body.messages.
     # We convert them to agent format and load them before processing the new message.
-    agent.messages.clear()
+    with timer.stage("history_load"):
+        agent.messages.clear()
 
-    # Load conversation history (all messages except the last one, which is the current input)
-    history_messages = request_body_to_agent_history(request_body)
-    agent.messages.extend(history_messages)
+        # Load conversation history (all messages except the last one, which is the current input)
+        history_messages = request_body_to_agent_history(request_body)
+        agent.messages.extend(history_messages)
 
     debug(f"[Agent] Loaded {len(history_messages)} history messages")
 
@@ -119,22 +264,45 @@ async def handle_chat_data(request: Request, protocol: str = Query("data")):
     old_stdout = sys.stdout
     sys.stdout = io.StringIO()
     try:
-        agent(last_user_message)
+        with timer.stage("agent"):
+            # UUIDs in tool results are shown to the model as short aliases,
+            # kept per chat so they stay valid in the following turns
+            # query results are registered to be cited by placeholder in the answer
+            result_sets = ResultSetRegistry()
+            try:
+                agent(
+                    last_user_message,
+                    invocation_state={
+                        "uuid_aliases": one.alias_store.get(request_body.id),
+                        "result_sets": result_sets,
+                        "result_cursors": one.cursor_store.get(request_body.id),
+                    },
+                )
+            except Exception as e:
+                # a model call was shed by the client-side rate limiter
+                if not is_shed(e):
+                    raise
+                agent.messages.append({"role": "assistant", "content": [{"text": SHED_MESSAGE}]})
     finally:
         sys.stdout = old_stdout
 
     # --- Extract thinking and answer from agent response ---
-    full_text = extract_text_from_messages(agent.messages, msg_count_before)
-    thinking, answer = parse_response_text(full_text)
+    with timer.stage("extract"):
+        full_text = extract_text_from_messages(agent.messages, msg_count_before)
+        thinking, answer = parse_response_text(full_text)
 
     debug(f"[Agent] Thinking: {len(thinking)} chars")
     debug(f"[Agent] Answer: {len(answer)} chars")
 
     # --- Return SSE response with reasoning and text ---
     response = StreamingResponse(
-        ai_sdk_message_with_reasoning_generator(
-            reasoning_text=thinking,
-            output_text=answer,
+        timer.timed_iter(
+            "sse_encode",
+            ai_sdk_message_with_reasoning_generator(
+                reasoning_text=thinking,
+                output_text=answer,
+                result_sets=result_sets,
+            ),
         ),
         media_type="text/event-stream",
     )
@@ -6,6 +6,14 @@ import Image from "next/image";
 import { useState } from "react";
 
 import { Markdown } from "./markdown";
+import {
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableHeader,
+  TableRow,
+} from "@/components/ui/table";
 import { cn } from "@/lib/utils";
 import { CDN_ASSETS } from "@/lib/constants";
 
@@ -56,6 +64,45 @@ const ReasoningBlock = ({ text }: { text: string }) => {
   );
 };
 
+/**
+ * Query result cited in an answer, sent by the backend as a `data-table` part
+ * in place of its `{{table:N}}` placeholder.
+ */
+type DataTable = {
+  number: number;
+  columns: string[];
+  rows: (string | number | boolean | null)[][];
+};
+
+const DataTableBlock = ({ table }: { table: DataTable }) => {
+  return (
+    <div className="glass-card bg-slate-950/40 border-cyan-500/30 overflow-hidden">
+      <Table className="text-xs">
+        <TableHeader>
+          <TableRow className="border-cyan-500/30">
+            {table.columns.map((column, index) => (
+              <TableHead key={index} className="h-8 px-2 text-cyan-300 font-bold">
+                {column}
+              </TableHead>
+            ))}
+          </TableRow>
+        </TableHeader>
+        <TableBody>
+          {table.rows.map((row, rowIndex) => (
+            <TableRow key={rowIndex} className="border-slate-700/40">
+              {row.map((value, index) => (
+                <TableCell key={index} className="px-2 py-1 text-slate-100">
+                  {value === null ? "" : String(value)}
+                </TableCell>
+              ))}
+            </TableRow>
+          ))}
+        </TableBody>
+      </Table>
+    </div>
+  );
+};
+
 export const PreviewMessage = ({
   message,
   append,
@@ -103,6 +150,12 @@ export const PreviewMessage = ({
                     <ReasoningBlock key={index} text={part.text} />
                   );
                 }
+                // Render a cited query result
+                if (part.type === 'data-table' && part.data) {
+                  return (
+                    <DataTableBlock key={index} table={part.data as DataTable} />
+                  );
+                }
                 // Render text content
                 if (part.type === 'text' && part.text) {
                   return (
@@ -20,11 +20,17 @@ Dependencies:
 import sys
 import json
 import uuid
+import typing as T
 
 from fastapi import Request
 import vercel_ai_sdk_mate.api as vercel_ai_sdk_mate
 
 from .utils import debug
+from .sql_utils import format_records
+from .result_sets import ResultSet, split_answer
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .result_sets import ResultSetRegistry
 
 
 def part_to_bedrock_content(part: vercel_ai_sdk_mate.T_PART) -> dict:
@@ -180,6 +186,44 @@ def request_body_to_agent_history(
     return messages
 
 
+def convert_data_parts(request_body_data: dict) -> dict:
+    """
+    Make a raw AI SDK request body parsable as ``RequestBody``, which only
+    knows text and reasoning parts.
+
+    The frontend sends every previous message back with its parts, including
+    the ``data-table`` parts streamed by :func:`ai_sdk_message_with_reasoning_generator`.
+    Each of them becomes a text part with the table in Markdown, so in the
+    following turns the model sees the table the nurse saw. Other part types
+    (e.g. ``step-start``) are dropped.
+
+    Args:
+        request_body_data: The JSON request body, as sent by the frontend.
+
+    Returns:
+        dict: A copy of the request body with only text and reasoning parts.
+    """
+    kept_types = {
+        vercel_ai_sdk_mate.MessagePartTypeEnum.TEXT.value,
+        vercel_ai_sdk_mate.MessagePartTypeEnum.REASONING.value,
+    }
+    messages = []
+    for message in request_body_data.get("messages", []):
+        parts = []
+        for part in message.get("parts", []):
+            if part.get("type") in kept_types:
+                parts.append(part)
+            elif part.get("type") == "data-table":
+                data = part.get("data") or {}
+                text = format_records(
+                    columns=data.get("columns", []),
+                    records=data.get("rows", []),
+                )
+                parts.append({"type": "text", "text": text})
+        messages.append({**message, "parts": parts})
+    return {**request_body_data, "messages": messages}
+
+
 async def debug_ai_sdk_request(request: Request) -> dict:
     """
     Debug: Log incoming request for troubleshooting
@@ -220,7 +264,11 @@ def ai_sdk_message_generator(output_text: str):
     yield "data: [DONE]\n\n"
 
 
-def ai_sdk_message_with_reasoning_generator(reasoning_text: str, output_text: str):
+def ai_sdk_message_with_reasoning_generator(
+    reasoning_text: str,
+    output_text: str,
+    result_sets: T.Optional["ResultSetRegistry"] = None,
+):
     """
     Stream response with both reasoning (thinking) and text using AI SDK v5 Data Stream Protocol.
 
@@ -233,6 +281,11 @@ def ai_sdk_message_with_reasoning_generator(reasoning_text: str, output_text: st
     1. reasoning-start -> reasoning-delta -> reasoning-end (if reasoning_text is provided)
     2. text-start -> text-delta -> text-end
     3. finish-message
+
+    If ``result_sets`` is given, every ``{{table:N}}`` placeholder of the
+    response cites a stored query result (see :mod:`obnexus.result_sets`):
+    the text is split around it and the table is sent in its place as a
+    ``data-table`` part, ``{"number", "columns", "rows"}``.
     """
     # Send reasoning/thinking content first (if provided)
     if reasoning_text:
@@ -247,17 +300,28 @@ def ai_sdk_message_with_reasoning_generator(reasoning_text: str, output_text: st
         # Reasoning Phase 3: Signal that reasoning block is complete
         yield f'data: {json.dumps({"type": "reasoning-end", "id": reasoning_id})}\n\n'
 
-    # Send main text response
-    text_id = str(uuid.uuid4())
+    segments = [output_text]
+    if result_sets is not None:
+        segments = split_answer(output_text, result_sets) or segments
+
+    for segment in segments:
+        # Cited result set: send the stored table instead of text
+        if isinstance(segment, ResultSet):
+            part = {"type": "data-table", "id": str(uuid.uuid4()), "data": segment.to_dict()}
+            yield f"data: {json.dumps(part)}\n\n"
+            continue
+
+        # Send main text response
+        text_id = str(uuid.uuid4())
 
-    # Text Phase 1: Signal that a new text block is starting
-    yield f'data: {json.dumps({"type": "text-start", "id": text_id})}\n\n'
+        # Text Phase 1: Signal that a new text block is starting
+        yield f'data: {json.dumps({"type": "text-start", "id": text_id})}\n\n'
 
-    # Text Phase 2: Send the actual text content
-    yield f'data: {json.dumps({"type": "text-delta", "id": text_id, "delta": output_text})}\n\n'
+        # Text Phase 2: Send the actual text content
+        yield f'data: {json.dumps({"type": "text-delta", "id": text_id, "delta": segment})}\n\n'
 
-    # Text Phase 3: Signal that the text block is complete
-    yield f'data: {json.dumps({"type": "text-end", "id": text_id})}\n\n'
+        # Text Phase 3: Signal that the text block is complete
+        yield f'data: {json.dumps({"type": "text-end", "id": text_id})}\n\n'
 
     # Signal that the entire message generation is finished
     yield f'data: {json.dumps({"type": "finish", "finishReason": "stop"})}\n\n'
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+"""
+In-memory bed occupancy index.
+
+"Any beds available?" is the most frequent question on the ward, and
+answering it from the database always means joining ``bed``, ``room`` and
+``admission``. :class:`BedIndex` keeps every bed in process, bucketed by
+``(status, room_type)`` and ``(status, floor)``, so availability lookups
+are dictionary hits instead of SQL round trips.
+
+Consistency:
+
+- The index is loaded once with a single query.
+- Our own writes (``assign_bed``) update it in place.
+- Writes made by other systems are picked up by :meth:`BedIndex.maybe_reconcile`,
+  which reloads the index from the database when it is older than
+  ``reconcile_interval`` seconds. No background thread is needed, which
+  keeps it safe for serverless runtimes.
+"""
+
+import time
+import typing as T
+import threading
+import dataclasses
+
+import sqlalchemy as sa
+from tabulate import tabulate
+
+BED_SQL = """
+SELECT
+    b.bed_id,
+    b.bed_label,
+    b.status,
+    b.current_admission_id,
+    r.room_id,
+    r.room_number,
+    r.room_type,
+    r.floor
+FROM bed b
+JOIN room r ON r.room_id = b.room_id
+ORDER BY r.room_number, b.bed_label
+"""
+
+
+@dataclasses.dataclass
+class BedRecord:
+    """
+    One bed and the room it belongs to.
+    """
+
+    bed_id: str
+    bed_label: str
+    status: str
+    current_admission_id: T.Optional[str]
+    room_id: str
+    room_number: str
+    room_type: str
+    floor: int
+
+
+class BedIndex:
+    """
+    Bed occupancy index with O(1) lookups by status, room type and floor.
+
+    :param engine: SQLAlchemy engine used to load and reconcile the index.
+    :param reconcile_interval: Reload from the database when the index is
+        older than this many seconds. ``0`` disables reconciliation.
+    """
+
+    def __init__(
+        self,
+        engine: "sa.Engine",
+        reconcile_interval: float = 60,
+    ):
+        self.engine = engine
+        self.reconcile_interval = reconcile_interval
+        self.loaded_at: float = 0.0
+        self._lock = threading.RLock()
+        self._beds: dict[str, BedRecord] = {}
+        self._by_admission: dict[str, str] = {}
+        self._by_room_type: dict[tuple[str, str], dict[str, BedRecord]] = {}
+        self._by_floor: dict[tuple[str, int], dict[str, BedRecord]] = {}
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self._beds)
+
+    def _add(self, bed: BedRecord):
+        self._beds[bed.bed_id] = bed
+        self._by_room_type.setdefault((bed.status, bed.room_type), {})[bed.bed_id] = bed
+        self._by_floor.setdefault((bed.status, bed.floor), {})[bed.bed_id] = bed
+        if bed.current_admission_id is not None:
+            self._by_admission[bed.current_admission_id] = bed.bed_id
+
+    def _remove(self, bed: BedRecord):
+        del self._beds[bed.bed_id]
+        self._by_room_type[(bed.status, bed.room_type)].pop(bed.bed_id, None)
+        self._by_floor[(bed.status, bed.floor)].pop(bed.bed_id, None)
+        if self._by_admission.get(bed.current_admission_id) == bed.bed_id:
+            del self._by_admission[bed.current_admission_id]
+
+    def reload(self) -> int:
+        """
+        Rebuild the index from the database.
+
+        :return: Number of beds whose status or occupant changed.
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(sa.text(BED_SQL)).fetchall()
+        beds = [BedRecord(**row._mapping) for row in rows]
+
+        with self._lock:
+            old = self._beds
+            n_changed = sum(
+                1
+                for bed in beds
+                if bed.bed_id not in old
+                or old[bed.bed_id].status != bed.status
+                or old[bed.bed_id].current_admission_id != bed.current_admission_id
+            )
+            n_changed += len(set(old) - {bed.bed_id for bed in beds})
+
+            self._beds = {}
+            self._by_admission = {}
+            self._by_room_type = {}
+            self._by_floor = {}
+            for bed in beds:
+                self._add(bed)
+            self.loaded_at = time.time()
+        return n_changed
+
+    def maybe_reconcile(self) -> bool:
+        """
+        Reload the index if it is older than ``reconcile_interval``.
+
+        :return: True if the index was reloaded.
+        """
+        if self.reconcile_interval and time.time() - self.loaded_at >= self.reconcile_interval:
+            self.reload()
+            return True
+        return False
+
+    def get(self, bed_id: str) -> T.Optional[BedRecord]:
+        return self._beds.get(bed_id)
+
+    def set_status(
+        self,
+        bed_id: str,
+        status: str,
+        current_admission_id: T.Optional[str] = None,
+    ):
+        """
+        Update one bed in place. Unknown beds are ignored, the next
+        reconciliation will pick them up.
+        """
+        with self._lock:
+            bed = self._beds.get(bed_id)
+            if bed is None:
+                return
+            self._remove(bed)
+            self._add(
+                dataclasses.replace(
+                    bed,
+                    status=status,
+                    current_admission_id=current_admission_id,
+                )
+            )
+
+    def apply_assignment(
+        self,
+        admission_id: str,
+        bed_id: str,
+    ):
+        """
+        Mirror a successful :func:`obnexus.write_operations.assign_bed`:
+        release the admission's old bed (if any) and occupy the new one.
+        """
+        with self._lock:
+            old_bed_id = self._by_admission.get(admission_id)
+            if old_bed_id is not None and old_bed_id != bed_id:
+                self.set_status(old_bed_id, "available", None)
+            self.set_status(bed_id, "occupied", admission_id)
+
+    def find(
+        self,
+        status: str = "available",
+        room_type: T.Optional[str] = None,
+        floor: T.Optional[int] = None,
+    ) -> list[BedRecord]:
+        """
+        Find beds by status, optionally filtered by room type and floor.
+        """
+        self.maybe_reconcile()
+        with self._lock:
+            if room_type is not None:
+                beds = self._by_room_type.get((status, room_type), {}).values()
+                if floor is not None:
+                    beds = [bed for bed in beds if bed.floor == floor]
+            elif floor is not None:
+                beds = self._by_floor.get((status, floor), {}).values()
+            else:
+                beds = [bed for bed in self._beds.values() if bed.status == status]
+            return sorted(beds, key=lambda bed: (bed.room_number, bed.bed_label))
+
+    def find_available(
+        self,
+        room_type: T.Optional[str] = None,
+        floor: T.Optional[int] = None,
+    ) -> list[BedRecord]:
+        """
+        Find available beds, optionally filtered by room type and floor.
+        """
+        return self.find(status="available", room_type=room_type, floor=floor)
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        """
+        Number of beds per room type and status, e.g.
+        ``{"labor": {"available": 1, "occupied": 2}}``.
+        """
+        self.maybe_reconcile()
+        with self._lock:
+            result: dict[str, dict[str, int]] = {}
+            for (status, room_type), beds in sorted(self._by_room_type.items()):
+                if beds:
+                    result.setdefault(room_type, {})[status] = len(beds)
+            return result
+
+
+def format_beds(beds: T.Sequence[BedRecord]) -> str:
+    """
+    Format beds as a Markdown table, same style as
+    :func:`obnexus.sql_utils.format_result`.
+    """
+    if len(beds) == 0:
+        return "No result"
+    columns = ["bed_id", "bed_label", "room_number", "room_type", "floor", "status"]
+    rows = [[getattr(bed, column) for column in columns] for bed in beds]
+    return tabulate(rows, headers=columns, tablefmt="pipe")
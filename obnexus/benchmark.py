@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+
+"""
+Offline end-to-end benchmark of the ``/api/chat`` endpoint.
+
+Every real run hits Bedrock, so the backend's own overhead is hidden behind
+seconds of model latency. This module swaps in:
+
+- a :class:`~obnexus.tests.scripted_model.ScriptedModel` replaying a fixed
+  tool-call sequence (optionally with simulated model latency)
+- the SQLite sample ward from :mod:`obnexus.tests.sample_db`
+
+and drives concurrent requests through the FastAPI app in process, reporting
+p50 / p95 / p99 latency, throughput and the time spent in each stage recorded
+by :mod:`obnexus.stage_timer` (parse, history load, model calls, tool calls,
+SSE encode).
+
+Usage::
+
+    from api.index import app
+    from obnexus.one.api import one
+    from obnexus.benchmark import use_offline_backend, run_chat_benchmark
+
+    use_offline_backend(one)
+    report = run_chat_benchmark(app, n_requests=200, concurrency=8)
+    print(report.to_markdown())
+"""
+
+import io
+import time
+import uuid
+import asyncio
+import typing as T
+import contextlib
+import dataclasses
+from functools import cached_property
+
+import httpx
+import numpy as np
+import sqlalchemy as sa
+from tabulate import tabulate
+
+from .config.conf_00_def import Config
+from .stage_timer import StageTimer, add_listener, remove_listener
+from .slow_query_log import SlowQueryLog
+from .rate_limiter import RateLimiter
+from .tests.sample_db import new_sample_engine
+from .tests.scripted_model import ScriptedModel, ScriptedStep, ScriptedToolCall
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from fastapi import FastAPI
+    from .one.one_00_main import One
+
+#: Typical two-step turn: look up beds and patients in parallel, then answer.
+DEFAULT_STEPS = [
+    ScriptedStep(
+        text="<thinking>Check free labor beds and the patients currently in labor.</thinking>",
+        tool_calls=[
+            ScriptedToolCall(name="find_available_beds", input={"room_type": "labor"}),
+            ScriptedToolCall(
+                name="execute_sql_query",
+                input={
+                    "sql": (
+                        "SELECT p.name, a.admission_id, b.bed_label, r.room_number "
+                        "FROM admission a "
+                        "JOIN patient p ON p.patient_id = a.patient_id "
+                        "LEFT JOIN bed b ON b.bed_id = a.current_bed_id "
+                        "LEFT JOIN room r ON r.room_id = b.room_id "
+                        "WHERE a.status = 'in_labor' "
+                        "ORDER BY r.room_number"
+                    )
+                },
+            ),
+        ],
+    ),
+    ScriptedStep(
+        text=(
+            "<thinking>Both labor rooms are occupied.</thinking>"
+            "All labor beds are occupied. Patients in labor are in rooms 201 and 202."
+        ),
+    ),
+]
+
+DEFAULT_MESSAGE = "Any labor beds available? Who is currently in labor?"
+
+#: Stages reported, in request order.
+STAGES = (
+    "parse",
+    "history_load",
+    "agent",
+    "model_call",
+    "tool_call",
+    "extract",
+    "sse_encode",
+    "total",
+)
+
+
+def reset_cached_properties(one: "One"):
+    """
+    Drop every cached property of ``one``, so that nothing (agent, indexes,
+    per chat stores, ...) is carried over from a previous run.
+    """
+    for klass in type(one).__mro__:
+        for name, value in vars(klass).items():
+            if isinstance(value, cached_property):
+                one.__dict__.pop(name, None)
+
+
+def use_offline_backend(
+    one: "One",
+    engine: T.Optional["sa.Engine"] = None,
+    model: T.Optional[ScriptedModel] = None,
+    latency: float = 0.0,
+):
+    """
+    Point the ``one`` singleton at a local database and a scripted model.
+
+    Only cached properties are overridden, nothing is written to disk and no
+    environment variable or AWS credential is needed.
+
+    :param one: The :class:`~obnexus.one.one_00_main.One` instance used by the API.
+    :param engine: Database to use. Defaults to a fresh in-memory sample ward.
+    :param model: Model to use. Defaults to a :class:`ScriptedModel` replaying
+        :data:`DEFAULT_STEPS`.
+    :param latency: Simulated model latency in seconds, used with the default model.
+    """
+    if engine is None:
+        engine = new_sample_engine()
+    if model is None:
+        model = ScriptedModel(steps=DEFAULT_STEPS, latency=latency)
+    reset_cached_properties(one)
+    one.__dict__["config"] = Config(model_id="scripted")
+    one.__dict__["engine"] = engine
+    one.__dict__["model"] = model
+    one.__dict__["slow_query_log"] = SlowQueryLog()
+    # the scripted model has no quota
+    one.__dict__["rate_limiter"] = RateLimiter()
+
+
+def new_chat_request_body(
+    text: str,
+    history: T.Sequence[tuple[str, str]] = (),
+) -> dict:
+    """
+    Build a Vercel AI SDK v5 ``/api/chat`` request body.
+
+    :param text: The new user message.
+    :param history: Previous ``(role, text)`` messages.
+    """
+    messages = [
+        {
+            "id": str(uuid.uuid4()),
+            "role": role,
+            "parts": [{"type": "text", "text": message}],
+        }
+        for role, message in [*history, ("user", text)]
+    ]
+    return {"id": str(uuid.uuid4()), "messages": messages, "trigger": "submit-message"}
+
+
+@dataclasses.dataclass
+class ChatBenchmarkReport:
+    """
+    Result of one :func:`run_chat_load` run. Times are in seconds.
+    """
+
+    n_requests: int
+    concurrency: int
+    wall_seconds: float
+    latencies: list[float]
+    n_errors: int = 0
+    stages: dict[str, list[float]] = dataclasses.field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """Successful requests per second."""
+        return len(self.latencies) / self.wall_seconds if self.wall_seconds else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        return float(np.percentile(self.latencies, q))
+
+    def summary(self) -> dict:
+        """Latency and stage timings in milliseconds."""
+        return {
+            "n_requests": self.n_requests,
+            "n_errors": self.n_errors,
+            "concurrency": self.concurrency,
+            "throughput_rps": round(self.throughput, 2),
+            "latency_ms": {
+                "p50": round(self.percentile(50) * 1000, 3),
+                "p95": round(self.percentile(95) * 1000, 3),
+                "p99": round(self.percentile(99) * 1000, 3),
+                "max": round(max(self.latencies, default=0.0) * 1000, 3),
+            },
+            "stage_ms": {
+                name: {
+                    "mean": round(float(np.mean(values)) * 1000, 3),
+                    "p95": round(float(np.percentile(values, 95)) * 1000, 3),
+                }
+                for name, values in self.stages.items()
+                if values
+            },
+        }
+
+    def to_markdown(self) -> str:
+        summary = self.summary()
+        latency = summary["latency_ms"]
+        lines = [
+            f"requests: {self.n_requests}, errors: {self.n_errors}, "
+            f"concurrency: {self.concurrency}, throughput: {summary['throughput_rps']} req/s",
+            f"latency (ms): p50={latency['p50']} p95={latency['p95']} "
+            f"p99={latency['p99']} max={latency['max']}",
+            "",
+        ]
+        rows = [
+            [name, values["mean"], values["p95"]]
+            for name, values in summary["stage_ms"].items()
+        ]
+        lines.append(tabulate(rows, headers=["stage", "mean_ms", "p95_ms"], tablefmt="pipe"))
+        return "\n".join(lines)
+
+
+async def run_chat_load(
+    app: "FastAPI",
+    body: dict,
+    n_requests: int = 100,
+    concurrency: int = 8,
+) -> ChatBenchmarkReport:
+    """
+    Send ``n_requests`` ``/api/chat`` requests, at most ``concurrency`` at a time,
+    through the ASGI app in process (no network).
+
+    A request counts as an error if the status is not 200 or the SSE stream
+    does not end with ``[DONE]``.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+
+    stages: dict[str, list[float]] = {name: [] for name in STAGES}
+
+    def collect(timer: StageTimer):
+        for name, seconds in timer.seconds.items():
+            stages.setdefault(name, []).append(seconds)
+
+    latencies: list[float] = []
+    n_errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(client: httpx.AsyncClient):
+        nonlocal n_errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json=body)
+            elapsed = time.perf_counter() - start
+        if response.status_code == 200 and response.text.rstrip().endswith("data: [DONE]"):
+            latencies.append(elapsed)
+        else:
+            n_errors += 1
+
+    add_listener(collect)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            start = time.perf_counter()
+            await asyncio.gather(*[send(client) for _ in range(n_requests)])
+            wall_seconds = time.perf_counter() - start
+    finally:
+        remove_listener(collect)
+
+    return ChatBenchmarkReport(
+        n_requests=n_requests,
+        concurrency=concurrency,
+        wall_seconds=wall_seconds,
+        latencies=latencies,
+        n_errors=n_errors,
+        stages={name: values for name, values in stages.items() if values},
+    )
+
+
+def run_chat_benchmark(
+    app: "FastAPI",
+    message: str = DEFAULT_MESSAGE,
+    n_requests: int = 100,
+    concurrency: int = 8,
+    warmup: int = 2,
+    quiet: bool = True,
+) -> ChatBenchmarkReport:
+    """
+    Synchronous wrapper of :func:`run_chat_load`.
+
+    :param warmup: Requests sent (and discarded) before measuring, so that
+        lazy initialization (agent, indexes) is not counted.
+    :param quiet: Discard the request logs the API writes to stderr.
+    """
+    body = new_chat_request_body(message)
+    redirect = contextlib.redirect_stderr(io.StringIO()) if quiet else contextlib.nullcontext()
+    with redirect:
+        if warmup:
+            asyncio.run(run_chat_load(app, body, n_requests=warmup, concurrency=1))
+        return asyncio.run(
+            run_chat_load(app, body, n_requests=n_requests, concurrency=concurrency)
+        )
@@ -88,8 +88,53 @@ class Config:
         aws_region: AWS region for all AWS services (e.g., "us-east-1")
         aws_access_key_id: AWS access key. None means use default credential chain.
         aws_secret_access_key: AWS secret key. None means use default credential chain.
-        model_id: Bedrock model ID
+        model_id: Bedrock model ID, used for simple lookup turns
+        complex_model_id: Bedrock model ID for write and multi-step turns
+            (see :mod:`obnexus.model_router`). None uses ``model_id`` for all turns.
+        failover_model_id: GLM model ID taking over when Bedrock is slow or
+            failing (see :mod:`obnexus.failover_model`). None, or no
+            ``z_ai_api_key``, disables the failover.
+        failover_first_token_seconds: Also send the request to the failover
+            model if Bedrock produced no token within this many seconds.
+        failover_failure_threshold: Consecutive failures after which a model
+            provider is skipped for ``failover_reset_seconds``.
+        failover_reset_seconds: Time a failing provider is skipped before a
+            trial request.
         max_message_length: Maximum allowed characters in user message. Prevents abuse.
+        max_tool_workers: Maximum number of read-only tool calls the agent runs
+            concurrently within one step. Keep it below the DB connection pool size.
+        bed_index_reconcile_seconds: Reload the in-memory bed index from the
+            database when it is older than this many seconds.
+        schedule_index_reconcile_seconds: Reload the in-memory order / shift
+            schedule index from the database when it is older than this many seconds.
+        slow_query_threshold_seconds: Agent SQL queries taking at least this long
+            are written to the slow-query log with their query plan.
+        ward_views_refresh_seconds: Recompute the ward summary tables (``mv_*``)
+            before the agent reads them when the last full refresh is older
+            than this many seconds.
+        bedrock_max_pool_connections: Size of the Bedrock Runtime client's
+            connection pool. Keep it above the number of concurrent chats.
+        bedrock_max_attempts: Attempts per Bedrock call, including the first,
+            with adaptive retries.
+        bedrock_connect_timeout_seconds: Bedrock connect timeout.
+        bedrock_read_timeout_seconds: Bedrock read timeout. Long enough for a
+            full (non streamed) model response.
+        model_requests_per_minute: Client-side limit of model calls per minute,
+            kept below the Bedrock RPM quota. ``0`` disables it.
+        model_tokens_per_minute: Client-side limit of model tokens (input and
+            output) per minute, kept below the Bedrock TPM quota. ``0`` disables it.
+        model_rate_limit_max_wait_seconds: Model calls that would wait longer
+            for the rate limiter are rejected right away.
+        retention_days: Readings of admissions discharged more than this many
+            days ago are rolled up hourly and archived by ``scripts/run_retention.py``.
+        uuid_alias_max_sessions: Number of recent chats whose UUID alias
+            tables (``A17`` -> admission UUID) are kept in memory.
+        result_page_size: Query results longer than this many rows are
+            returned page by page, see :mod:`obnexus.result_cursors`.
+        result_cursor_ttl_seconds: A result cursor not fetched for this long expires.
+        result_cursor_max_rows: Maximum rows kept per result cursor.
+        result_cursor_max_sessions: Number of recent chats whose result
+            cursors are kept in memory.
     """
 
     aws_region: str | None = dataclasses.field(default=None)
@@ -97,12 +142,35 @@ class Config:
     aws_secret_access_key: str | None = dataclasses.field(default=None)
     z_ai_api_key: str | None = dataclasses.field(default=None)
     model_id: str | None = dataclasses.field(default=None)
+    complex_model_id: str | None = dataclasses.field(default=None)
+    failover_model_id: str | None = dataclasses.field(default=None)
+    failover_first_token_seconds: float = dataclasses.field(default=8)
+    failover_failure_threshold: int = dataclasses.field(default=3)
+    failover_reset_seconds: float = dataclasses.field(default=30)
     # max_message_length: int = dataclasses.field(default=1000)
     db_host: str | None = dataclasses.field(default=None)
     db_port: int | None = dataclasses.field(default=None)
     db_user: str | None = dataclasses.field(default=None)
     db_pass: str | None = dataclasses.field(default=None)
     db_name: str | None = dataclasses.field(default=None)
+    max_tool_workers: int = dataclasses.field(default=4)
+    bed_index_reconcile_seconds: int = dataclasses.field(default=60)
+    schedule_index_reconcile_seconds: int = dataclasses.field(default=60)
+    slow_query_threshold_seconds: float = dataclasses.field(default=0.5)
+    ward_views_refresh_seconds: int = dataclasses.field(default=300)
+    bedrock_max_pool_connections: int = dataclasses.field(default=32)
+    bedrock_max_attempts: int = dataclasses.field(default=4)
+    bedrock_connect_timeout_seconds: float = dataclasses.field(default=5)
+    bedrock_read_timeout_seconds: float = dataclasses.field(default=120)
+    model_requests_per_minute: int = dataclasses.field(default=100)
+    model_tokens_per_minute: int = dataclasses.field(default=200_000)
+    model_rate_limit_max_wait_seconds: float = dataclasses.field(default=20)
+    retention_days: int = dataclasses.field(default=30)
+    uuid_alias_max_sessions: int = dataclasses.field(default=1000)
+    result_page_size: int = dataclasses.field(default=20)
+    result_cursor_ttl_seconds: float = dataclasses.field(default=600)
+    result_cursor_max_rows: int = dataclasses.field(default=5000)
+    result_cursor_max_sessions: int = dataclasses.field(default=1000)
 
     @classmethod
     def new_in_local_runtime(cls):
@@ -117,6 +185,8 @@ class Config:
             aws_region="us-east-1",
             z_ai_api_key=os.environ.get("Z_AI_API_KEY"),
             model_id="us.amazon.nova-micro-v1:0",
+            complex_model_id="us.amazon.nova-pro-v1:0",
+            failover_model_id="glm-4.7",
             # model_id="glm-4.7",
             db_host=os.environ["DB_HOST"],
             db_port=int(os.environ["DB_PORT"]),
@@ -136,6 +206,8 @@ class Config:
             aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
             z_ai_api_key=os.environ.get("Z_AI_API_KEY"),
             model_id="us.amazon.nova-micro-v1:0",
+            complex_model_id="us.amazon.nova-pro-v1:0",
+            failover_model_id="glm-4.7",
             # model_id="glm-4.7",
             db_host=os.environ["DB_HOST"],
             db_port=int(os.environ["DB_PORT"]),
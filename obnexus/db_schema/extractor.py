@@ -16,10 +16,8 @@ from .model import (
     DatabaseInfo,
 )
 
-try:
-    from rich import print as rprint
-except ImportError:  # pragma: no cover
-    pass
+# rich is slow to import, for the debug prints below use:
+# from rich import print as rprint
 
 
 def get_sqlalchemy_type_mapping() -> dict[str, LLMTypeEnum]:
@@ -226,10 +224,16 @@ def new_schema_info(
     schema_name: T.Optional[str] = None,
     include: T.Optional[list[str]] = None,
     exclude: T.Optional[list[str]] = None,
+    materialized_view_names: T.Optional[T.Collection[str]] = None,
 ) -> SchemaInfo:
     """
     Create a new SchemaInfo object from a SQLAlchemy Engine and MetaData.
+
+    :param materialized_view_names: Tables to present as materialized views,
+        in addition to the ones the database reports (e.g. summary tables
+        maintained by the application on SQLite).
     """
+    extra_materialized_view_names = set(materialized_view_names or [])
     insp = sa.inspect(engine)
     try:
         view_names = set(insp.get_view_names(schema=schema_name))
@@ -239,6 +243,7 @@ def new_schema_info(
         materialized_view_names = set(insp.get_materialized_view_names())
     except NotImplementedError:  # pragma: no cover
         materialized_view_names = set()
+    materialized_view_names.update(extra_materialized_view_names)
 
     if include is None:  # pragma: no cover
         include = []
@@ -257,7 +262,7 @@ def new_schema_info(
 
         if table_name in view_names:  # pragma: no cover
             object_type = ObjectTypeEnum.VIEW
-        elif table_name in materialized_view_names:  # pragma: no cover
+        elif table_name in materialized_view_names:
             object_type = ObjectTypeEnum.MATERIALIZED_VIEW
         else:
             object_type = ObjectTypeEnum.TABLE
@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+
+"""
+Provider failover and hedged requests between model backends.
+
+``one`` can talk to Bedrock and to the OpenAI-compatible GLM backend.
+:class:`FailoverModel` is a Strands model wrapping both, in order of
+preference:
+
+- **Failover**: if a provider fails before its first token, the next one is
+  tried right away.
+- **Hedging**: if no first token arrives within ``first_token_seconds``, the
+  same request is also sent to the next provider. The first provider to
+  produce a token wins, the other request is cancelled.
+- **Circuit breaker**: every provider has a :class:`CircuitBreaker`. After
+  ``failure_threshold`` consecutive failures it opens and the provider is
+  skipped for ``reset_seconds``; then one trial request is let through
+  (half-open) and its outcome closes or re-opens the circuit.
+
+Once a provider has produced output the response is committed to it: an
+error in the middle of a stream is raised, not failed over, since part of the
+answer was already streamed to the user.
+
+The "first token" is the first content event (or the end of the message),
+not ``messageStart``, which some backends send before the model has started.
+"""
+
+import time
+import typing as T
+import asyncio
+import threading
+import contextvars
+import dataclasses
+
+from strands.models import Model
+
+from . import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+#: Value of the circuit state gauge per state.
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+#: Stream events counting as the first token.
+FIRST_TOKEN_EVENTS = ("contentBlockStart", "contentBlockDelta", "messageStop")
+
+model_provider_requests_total = metrics.registry.counter(
+    "obnexus_model_provider_requests_total",
+    "Model requests by provider and outcome (success, error, cancelled).",
+    ["provider", "outcome"],
+)
+model_provider_first_token_seconds = metrics.registry.histogram(
+    "obnexus_model_provider_first_token_seconds",
+    "Time to the first token of the winning provider, in seconds.",
+    ["provider"],
+)
+model_provider_hedged_total = metrics.registry.counter(
+    "obnexus_model_provider_hedged_total",
+    "Requests sent to a provider as a hedge or failover.",
+    ["provider"],
+)
+model_provider_circuit_state = metrics.registry.gauge(
+    "obnexus_model_provider_circuit_state",
+    "Circuit breaker state per provider: 0 closed, 1 half-open, 2 open.",
+    ["provider"],
+)
+
+
+class CircuitBreaker:
+    """
+    Consecutive failure circuit breaker.
+
+    :param name: Provider name, used as metric label.
+    :param failure_threshold: Consecutive failures opening the circuit.
+    :param reset_seconds: Time the circuit stays open before a trial request.
+    :param clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_seconds: float = 30,
+        clock: T.Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: T.Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self._set_gauge()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if self.clock() - self.opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def _set_gauge(self):
+        model_provider_circuit_state.set(CIRCUIT_STATE_VALUES[self.state], provider=self.name)
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now. In the half-open state only one
+        trial request at a time is allowed.
+        """
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                self._set_gauge()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+            self._set_gauge()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+            self._set_gauge()
+
+    def release(self):
+        """The request was cancelled: it tells nothing about the provider."""
+        with self._lock:
+            self._trial_running = False
+
+
+@dataclasses.dataclass
+class Provider:
+    """
+    A model backend.
+
+    :param name: Provider name, e.g. ``bedrock`` or ``glm``.
+    :param model: Strands model.
+    :param breaker: The provider's circuit breaker.
+    """
+
+    name: str
+    model: Model
+    breaker: CircuitBreaker
+
+
+_DONE = object()
+
+
+class FailoverModel(Model):
+    """
+    Strands :class:`~strands.models.Model` sending each request to the first
+    healthy provider, hedging and failing over to the next ones.
+
+    :param providers: Providers in order of preference.
+    :param first_token_seconds: Hedge to the next provider if no first token
+        arrived within this many seconds. ``None`` disables hedging (failover
+        on errors only).
+    """
+
+    def __init__(
+        self,
+        providers: T.Sequence[Provider],
+        first_token_seconds: T.Optional[float] = 8.0,
+    ):
+        if len(providers) == 0:
+            raise ValueError("providers must not be empty")
+        self.providers = list(providers)
+        self.first_token_seconds = first_token_seconds
+
+    @property
+    def primary(self) -> Provider:
+        return self.providers[0]
+
+    def update_config(self, **model_config: T.Any):
+        self.primary.model.update_config(**model_config)
+
+    def get_config(self) -> T.Any:
+        return self.primary.model.get_config()
+
+    def available_providers(self) -> list[Provider]:
+        """
+        Providers whose circuit allows a request. If every circuit is open,
+        all of them: refusing to answer is worse than trying a degraded provider.
+        """
+        providers = [provider for provider in self.providers if provider.breaker.allow()]
+        return providers or list(self.providers)
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Structured output with failover (no hedging) between providers."""
+        pending = self.available_providers()
+        try:
+            while pending:
+                provider = pending.pop(0)
+                if provider is not self.providers[0]:
+                    model_provider_hedged_total.inc(provider=provider.name)
+                try:
+                    events = []
+                    async for event in provider.model.structured_output(
+                        output_model, prompt, system_prompt=system_prompt, **kwargs
+                    ):
+                        events.append(event)
+                except Exception:
+                    provider.breaker.record_failure()
+                    model_provider_requests_total.inc(provider=provider.name, outcome="error")
+                    if not pending:
+                        raise
+                    continue
+                provider.breaker.record_success()
+                model_provider_requests_total.inc(provider=provider.name, outcome="success")
+                for event in events:
+                    yield event
+                return
+        finally:
+            for provider in pending:
+                provider.breaker.release()
+
+    def _start_stream(
+        self,
+        provider: Provider,
+        queue: asyncio.Queue,
+        args: tuple,
+        kwargs: dict,
+    ) -> threading.Event:
+        """
+        Stream ``provider``'s response in a daemon thread with its own event
+        loop, putting ``(provider, event, error)`` items on ``queue``.
+
+        The caller's loop never waits for the thread: a cancelled request may
+        stay blocked on a slow backend (e.g. a non-streamed Bedrock call) and
+        would otherwise hold up the end of the agent turn.
+
+        :return: Event cancelling the request when set.
+        """
+        loop = asyncio.get_running_loop()
+        cancel = threading.Event()
+
+        def put(item: tuple):
+            if cancel.is_set():
+                return
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # the caller's loop is closed
+                pass
+
+        async def consume():
+            try:
+                async for event in provider.model.stream(
+                    *args, **{**kwargs, "cancel_signal": cancel}
+                ):
+                    if cancel.is_set():
+                        return
+                    put((provider, event, None))
+                put((provider, _DONE, None))
+            except Exception as e:
+                put((provider, None, e))
+
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run,
+            args=(asyncio.run, consume()),
+            name=f"model-{provider.name}",
+            daemon=True,
+        ).start()
+        return cancel
+
+    async def stream(
+        self,
+        messages,
+        tool_specs=None,
+        system_prompt=None,
+        **kwargs,
+    ) -> T.AsyncGenerator[dict, None]:
+        kwargs.pop("cancel_signal", None)
+        args = (messages, tool_specs, system_prompt)
+        pending = self.available_providers()
+        queue: asyncio.Queue = asyncio.Queue()
+        running: dict[str, threading.Event] = {}
+        started_at: dict[str, float] = {}
+        buffers: dict[str, list] = {}
+
+        def launch():
+            provider = pending.pop(0)
+            if started_at:
+                model_provider_hedged_total.inc(provider=provider.name)
+            started_at[provider.name] = time.perf_counter()
+            buffers[provider.name] = []
+            running[provider.name] = self._start_stream(provider, queue, args, kwargs)
+
+        winner: T.Optional[Provider] = None
+        done = False
+        try:
+            launch()
+            deadline = self._hedge_deadline()
+            # race until a provider produces its first token
+            while winner is None:
+                timeout = None
+                if pending and deadline is not None:
+                    timeout = max(0.0, deadline - time.perf_counter())
+                try:
+                    provider, event, error = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    launch()
+                    deadline = self._hedge_deadline()
+                    continue
+                if error is not None:
+                    running.pop(provider.name)
+                    provider.breaker.record_failure()
+                    model_provider_requests_total.inc(provider=provider.name, outcome="error")
+                    if not running:
+                        if not pending:
+                            raise error
+                        launch()
+                        deadline = self._hedge_deadline()
+                    continue
+                if event is _DONE:
+                    winner, done = provider, True
+                    break
+                buffers[provider.name].append(event)
+                if any(key in event for key in FIRST_TOKEN_EVENTS):
+                    winner = provider
+
+            model_provider_first_token_seconds.observe(
+                time.perf_counter() - started_at[winner.name],
+                provider=winner.name,
+            )
+            self._cancel_losers(running, winner)
+            for event in buffers[winner.name]:
+                yield event
+            while not done:
+                provider, event, error = await queue.get()
+                if provider is not winner:
+                    continue
+                if error is not None:
+                    running.pop(winner.name)
+                    winner.breaker.record_failure()
+                    model_provider_requests_total.inc(provider=winner.name, outcome="error")
+                    raise error
+                if event is _DONE:
+                    done = True
+                    break
+                yield event
+            running.pop(winner.name)
+            winner.breaker.record_success()
+            model_provider_requests_total.inc(provider=winner.name, outcome="success")
+        finally:
+            # consumer stopped early or an error was raised
+            for cancel in running.values():
+                cancel.set()
+            for provider in self.providers:
+                if provider.name in running or provider in pending:
+                    provider.breaker.release()
+
+    def _hedge_deadline(self) -> T.Optional[float]:
+        if self.first_token_seconds is None:
+            return None
+        return time.perf_counter() + self.first_token_seconds
+
+    def _cancel_losers(self, running: dict[str, threading.Event], winner: Provider):
+        for provider in self.providers:
+            if provider is winner or provider.name not in running:
+                continue
+            running.pop(provider.name).set()
+            provider.breaker.release()
+            model_provider_requests_total.inc(provider=provider.name, outcome="cancelled")
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+
+"""
+Index advisor for agent-generated SQL.
+
+Aggregates the slow-query log (see :mod:`obnexus.slow_query_log`) into index
+proposals such as ``vital_sign(admission_id, recorded_at)``:
+
+1. Every logged statement is analyzed for the columns it filters on
+   (``WHERE`` / ``ON``) and sorts by (``ORDER BY``), per table. Columns are
+   resolved against the live schema, so aliases and unqualified columns work.
+2. Each table gets one candidate per statement: equality columns first, then
+   one range or sort column, which is the column order a B-tree index can use.
+3. Candidates already covered by the primary key or an existing index (as a
+   prefix) are dropped; the rest are ranked by total logged query time.
+
+:func:`advise_indexes` then measures the logged statements before and after
+creating each index. Without ``apply`` the index is dropped again, so the
+report shows the expected gain without changing the database.
+
+The SQL analysis is a deliberately small set of regular expressions: it
+handles the flat SELECT / JOIN / WHERE / ORDER BY statements the agent writes,
+not arbitrary SQL.
+"""
+
+import re
+import time
+import typing as T
+import dataclasses
+
+import sqlalchemy as sa
+from tabulate import tabulate
+
+from .sql_utils import ensure_valid_select_query
+from .slow_query_log import SlowQuery
+
+#: Maximum number of columns of a proposed index.
+MAX_INDEX_COLUMNS = 3
+#: Number of distinct example statements kept (and timed) per candidate.
+MAX_EXAMPLES = 3
+
+_COMMENT_PATTERN = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+_TABLE_REF_PATTERN = re.compile(
+    r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?",
+    re.I,
+)
+_CONDITION_PATTERN = re.compile(
+    r"\b(?:WHERE|ON)\b(.*?)(?=\b(?:GROUP\s+BY|ORDER\s+BY|LIMIT|HAVING|UNION|WHERE"
+    r"|JOIN|LEFT|RIGHT|INNER|FULL|CROSS)\b|;|$)",
+    re.I | re.S,
+)
+_JOIN_PATTERN = re.compile(
+    r"([A-Za-z_]\w*)\.([A-Za-z_]\w*)\s*=\s*([A-Za-z_]\w*)\.([A-Za-z_]\w*)",
+)
+_PREDICATE_PATTERN = re.compile(
+    r"(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)\s*(=|<>|!=|<=|>=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b|\bLIKE\b)",
+    re.I,
+)
+_ORDER_BY_PATTERN = re.compile(
+    r"\bORDER\s+BY\s+(.*?)(?=\bLIMIT\b|\bOFFSET\b|\)|;|$)",
+    re.I | re.S,
+)
+_ORDER_ITEM_PATTERN = re.compile(r"^\s*(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)")
+
+_EQUALITY_OPERATORS = {"=", "IN", "IS"}
+_NOT_ALIASES = set(
+    "where join left right inner outer full cross on group order limit "
+    "having union natural using as".split()
+)
+
+
+@dataclasses.dataclass
+class ColumnUsage:
+    """
+    How one statement uses the columns of one table, in order of appearance.
+    """
+
+    equality: list[str] = dataclasses.field(default_factory=list)
+    range: list[str] = dataclasses.field(default_factory=list)
+    order_by: list[str] = dataclasses.field(default_factory=list)
+
+    def index_columns(self) -> list[str]:
+        """
+        Columns of the index serving this usage: equality columns first, then
+        one range or sort column.
+        """
+        columns = list(self.equality)
+        for column in self.range + self.order_by:
+            if column not in columns:
+                columns.append(column)
+                break
+        return columns[:MAX_INDEX_COLUMNS]
+
+
+def get_schema_columns(engine: "sa.Engine") -> dict[str, set[str]]:
+    """Column names of every table, keyed by lower case table name."""
+    insp = sa.inspect(engine)
+    return {
+        table.lower(): {column["name"].lower() for column in insp.get_columns(table)}
+        for table in insp.get_table_names()
+    }
+
+
+def get_existing_indexes(engine: "sa.Engine") -> dict[str, list[list[str]]]:
+    """Column lists of all secondary indexes of every table."""
+    insp = sa.inspect(engine)
+    indexes = {}
+    for table in insp.get_table_names():
+        column_lists = []
+        for index in insp.get_indexes(table):
+            column_lists.append([c.lower() for c in index["column_names"] if c])
+        indexes[table.lower()] = column_lists
+    return indexes
+
+
+def get_primary_keys(engine: "sa.Engine") -> dict[str, list[str]]:
+    """Primary key columns of every table."""
+    insp = sa.inspect(engine)
+    return {
+        table.lower(): [
+            c.lower() for c in insp.get_pk_constraint(table).get("constrained_columns") or []
+        ]
+        for table in insp.get_table_names()
+    }
+
+
+def analyze_sql(
+    sql: str,
+    schema: dict[str, set[str]],
+) -> dict[str, ColumnUsage]:
+    """
+    Find the filter and sort columns of each table referenced by ``sql``.
+
+    :param sql: A SELECT statement.
+    :param schema: Output of :func:`get_schema_columns`.
+
+    :return: Column usage keyed by table name. Tables without filter or sort
+        columns are omitted.
+    """
+    sql = _COMMENT_PATTERN.sub(" ", sql)
+    sql = _STRING_PATTERN.sub("''", sql)
+
+    aliases: dict[str, str] = {}
+    for match in _TABLE_REF_PATTERN.finditer(sql):
+        table = match.group(1).lower()
+        if table not in schema:
+            continue
+        aliases[table] = table
+        alias = match.group(2)
+        if alias and alias.lower() not in _NOT_ALIASES:
+            aliases[alias.lower()] = table
+    tables = sorted(set(aliases.values()))
+
+    def resolve(qualifier: T.Optional[str], column: str) -> T.Optional[str]:
+        column = column.lower()
+        if qualifier:
+            table = aliases.get(qualifier.lower())
+            if table is not None and column in schema[table]:
+                return table
+            return None
+        candidates = [table for table in tables if column in schema[table]]
+        return candidates[0] if len(candidates) == 1 else None
+
+    usages: dict[str, ColumnUsage] = {}
+
+    def add(kind: str, qualifier: T.Optional[str], column: str):
+        table = resolve(qualifier, column)
+        if table is None:
+            return
+        columns = getattr(usages.setdefault(table, ColumnUsage()), kind)
+        if column.lower() not in columns:
+            columns.append(column.lower())
+
+    for condition in _CONDITION_PATTERN.finditer(sql):
+        text = condition.group(1)
+        for match in _JOIN_PATTERN.finditer(text):
+            add("equality", match.group(1), match.group(2))
+            add("equality", match.group(3), match.group(4))
+        text = _JOIN_PATTERN.sub(" ", text)
+        for match in _PREDICATE_PATTERN.finditer(text):
+            operator = match.group(3).upper()
+            kind = "equality" if operator in _EQUALITY_OPERATORS else "range"
+            add(kind, match.group(1), match.group(2))
+
+    for order_by in _ORDER_BY_PATTERN.finditer(sql):
+        for item in order_by.group(1).split(","):
+            match = _ORDER_ITEM_PATTERN.match(item)
+            if match:
+                add("order_by", match.group(1), match.group(2))
+
+    return usages
+
+
+@dataclasses.dataclass
+class IndexCandidate:
+    """
+    A proposed index and the logged statements that would use it.
+    """
+
+    table: str
+    columns: list[str]
+    n_queries: int = 0
+    total_seconds: float = 0.0
+    examples: list[str] = dataclasses.field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return f"ix_{self.table}_{'_'.join(self.columns)}"
+
+    @property
+    def create_sql(self) -> str:
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+    @property
+    def drop_sql(self) -> str:
+        return f"DROP INDEX IF EXISTS {self.name}"
+
+    def __str__(self) -> str:
+        return f"{self.table}({', '.join(self.columns)})"
+
+
+def is_covered(
+    columns: T.Sequence[str],
+    existing: T.Iterable[T.Sequence[str]],
+    primary_key: T.Sequence[str] = (),
+) -> bool:
+    """
+    True if an existing index starts with ``columns``, or if ``columns`` starts
+    with the whole primary key (a primary key lookup finds at most one row).
+    """
+    if primary_key and set(primary_key) <= set(columns[: len(primary_key)]):
+        return True
+    return any(list(index[: len(columns)]) == list(columns) for index in existing)
+
+
+def propose_indexes(
+    engine: "sa.Engine",
+    entries: T.Iterable[SlowQuery],
+) -> list[IndexCandidate]:
+    """
+    Aggregate slow queries into index candidates, most total time first.
+    """
+    schema = get_schema_columns(engine)
+    existing = get_existing_indexes(engine)
+    primary_keys = get_primary_keys(engine)
+    candidates: dict[tuple[str, tuple[str, ...]], IndexCandidate] = {}
+    for entry in entries:
+        for table, usage in analyze_sql(entry.sql, schema).items():
+            columns = usage.index_columns()
+            if not columns or is_covered(
+                columns,
+                existing=existing.get(table, []),
+                primary_key=primary_keys.get(table, []),
+            ):
+                continue
+            key = (table, tuple(columns))
+            candidate = candidates.get(key)
+            if candidate is None:
+                candidate = candidates[key] = IndexCandidate(table=table, columns=columns)
+            candidate.n_queries += 1
+            candidate.total_seconds += entry.seconds
+            if entry.sql not in candidate.examples and len(candidate.examples) < MAX_EXAMPLES:
+                candidate.examples.append(entry.sql)
+    return sorted(
+        candidates.values(),
+        key=lambda candidate: candidate.total_seconds,
+        reverse=True,
+    )
+
+
+def time_query(
+    conn: "sa.Connection",
+    sql: str,
+    repeat: int = 3,
+) -> float:
+    """Best wall-clock time of ``repeat`` runs of a SELECT statement, in seconds."""
+    ensure_valid_select_query(sql)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.exec_driver_sql(sql).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@dataclasses.dataclass
+class IndexAdvice:
+    """
+    Measured effect of one index candidate on its example statements.
+    """
+
+    candidate: IndexCandidate
+    before_seconds: float
+    after_seconds: float
+    applied: bool
+
+    @property
+    def speedup(self) -> float:
+        if self.after_seconds <= 0:
+            return float("inf")
+        return self.before_seconds / self.after_seconds
+
+
+def evaluate_index(
+    engine: "sa.Engine",
+    candidate: IndexCandidate,
+    apply: bool = False,
+    repeat: int = 3,
+) -> IndexAdvice:
+    """
+    Time the candidate's example statements without and with the index.
+
+    :param apply: Keep the index. Otherwise it is dropped after measuring.
+    """
+    with engine.connect() as conn:
+        before = sum(time_query(conn, sql, repeat) for sql in candidate.examples)
+        conn.exec_driver_sql(candidate.create_sql)
+        # refresh planner statistics so the new index is considered
+        conn.exec_driver_sql(f"ANALYZE {candidate.table}")
+        conn.commit()
+        try:
+            after = sum(time_query(conn, sql, repeat) for sql in candidate.examples)
+        finally:
+            if not apply:
+                conn.exec_driver_sql(candidate.drop_sql)
+            conn.commit()
+    return IndexAdvice(
+        candidate=candidate,
+        before_seconds=before,
+        after_seconds=after,
+        applied=apply,
+    )
+
+
+@dataclasses.dataclass
+class AdvisorReport:
+    """
+    Outcome of :func:`advise_indexes`.
+    """
+
+    n_queries: int
+    advices: list[IndexAdvice]
+
+    def to_markdown(self) -> str:
+        if not self.advices:
+            return f"No index proposed for {self.n_queries} slow queries"
+        rows = [
+            [
+                str(advice.candidate),
+                advice.candidate.n_queries,
+                round(advice.candidate.total_seconds * 1000, 3),
+                round(advice.before_seconds * 1000, 3),
+                round(advice.after_seconds * 1000, 3),
+                round(advice.speedup, 2),
+                "yes" if advice.applied else "no",
+            ]
+            for advice in self.advices
+        ]
+        headers = [
+            "index",
+            "queries",
+            "logged_ms",
+            "before_ms",
+            "after_ms",
+            "speedup",
+            "applied",
+        ]
+        lines = [tabulate(rows, headers=headers, tablefmt="pipe"), ""]
+        for advice in self.advices:
+            lines.append(f"    {advice.candidate.create_sql};")
+        return "\n".join(lines)
+
+
+def advise_indexes(
+    engine: "sa.Engine",
+    entries: T.Sequence[SlowQuery],
+    apply: bool = False,
+    top: int = 5,
+    repeat: int = 3,
+) -> AdvisorReport:
+    """
+    Propose indexes for the logged slow queries and measure their effect.
+
+    :param engine: Database the queries ran against.
+    :param entries: Slow-query log entries.
+    :param apply: Create the proposed indexes for good.
+    :param top: Evaluate at most this many candidates (by total logged time).
+    :param repeat: Runs per statement when timing, the best run counts.
+    """
+    candidates = propose_indexes(engine, entries)[:top]
+    advices = [
+        evaluate_index(engine, candidate, apply=apply, repeat=repeat)
+        for candidate in candidates
+    ]
+    return AdvisorReport(n_queries=len(entries), advices=advices)
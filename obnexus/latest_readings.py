@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Latest-reading projections of the time-series tables.
+
+"What are patient X's current vitals?" otherwise needs
+``ORDER BY recorded_at DESC LIMIT 1`` over the admission's full
+``vital_sign`` history, and the ward-wide version needs a window function
+over every reading. The projections keep one row per admission, the most
+recent reading:
+
+- ``vital_sign_latest``: latest ``vital_sign`` row per admission
+- ``labor_progress_latest``: latest ``labor_progress`` row per admission
+
+They have the same columns as their source table, with ``admission_id`` as
+primary key. New readings are written through
+:func:`obnexus.write_operations.record_vital_sign` /
+:func:`obnexus.write_operations.record_labor_progress`, which insert the
+reading and upsert the projection in one transaction. The upsert only
+replaces the projected row if the new reading is not older, so late
+readings never hide newer ones.
+
+The tables are created and filled from the full history by migration
+``0005`` (see :mod:`obnexus.migrations`); :meth:`LatestProjection.rebuild`
+does the same after a bulk load.
+"""
+
+import typing as T
+import dataclasses
+
+import sqlalchemy as sa
+
+
+@dataclasses.dataclass(frozen=True)
+class LatestProjection:
+    """
+    One row per admission: the most recent reading of ``source``.
+
+    :param name: Projection table name.
+    :param source: Time-series table.
+    :param id_column: Primary key of ``source``, used to break ties.
+    :param columns: Column definitions of ``source`` used in ``CREATE TABLE``.
+    """
+
+    name: str
+    source: str
+    id_column: str
+    columns: tuple[str, ...]
+
+    @property
+    def column_names(self) -> list[str]:
+        return [column.split()[0] for column in self.columns]
+
+    @property
+    def create_sql(self) -> str:
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.name} "
+            f"({', '.join(self.columns)}, PRIMARY KEY (admission_id))"
+        )
+
+    @property
+    def rebuild_sql(self) -> str:
+        names = ", ".join(self.column_names)
+        return f"""
+        INSERT INTO {self.name} ({names})
+        SELECT {names}
+        FROM (
+            SELECT
+                {names},
+                ROW_NUMBER() OVER (
+                    PARTITION BY admission_id ORDER BY recorded_at DESC, {self.id_column} DESC
+                ) AS rn
+            FROM {self.source}
+        ) ranked
+        WHERE rn = 1
+        """
+
+    @property
+    def upsert_sql(self) -> str:
+        names = self.column_names
+        updates = ", ".join(
+            f"{name} = excluded.{name}" for name in names if name != "admission_id"
+        )
+        return (
+            f"INSERT INTO {self.name} ({', '.join(names)}) "
+            f"VALUES ({', '.join(f':{name}' for name in names)}) "
+            f"ON CONFLICT (admission_id) DO UPDATE SET {updates} "
+            f"WHERE excluded.recorded_at >= {self.name}.recorded_at"
+        )
+
+    def rebuild(self, conn: "sa.Connection"):
+        """Recompute the projection from the full history."""
+        conn.execute(sa.text(f"DELETE FROM {self.name}"))
+        conn.execute(sa.text(self.rebuild_sql))
+
+    def upsert(
+        self,
+        conn: "sa.Connection",
+        rows: T.Sequence[dict],
+    ):
+        """
+        Project new readings (dicts with all source columns). Several rows
+        are written with one executemany call.
+        """
+        if rows:
+            params = [{name: row[name] for name in self.column_names} for row in rows]
+            conn.execute(sa.text(self.upsert_sql), params)
+
+
+VITAL_SIGN_LATEST = LatestProjection(
+    name="vital_sign_latest",
+    source="vital_sign",
+    id_column="vital_id",
+    columns=(
+        "admission_id TEXT NOT NULL",
+        "vital_id TEXT NOT NULL",
+        "recorded_at TIMESTAMP NOT NULL",
+        "bp_systolic INTEGER NOT NULL",
+        "bp_diastolic INTEGER NOT NULL",
+        "heart_rate INTEGER NOT NULL",
+        "temperature FLOAT NOT NULL",
+        "fetal_heart_rate INTEGER NOT NULL",
+        "oxygen_saturation FLOAT NOT NULL",
+    ),
+)
+
+LABOR_PROGRESS_LATEST = LatestProjection(
+    name="labor_progress_latest",
+    source="labor_progress",
+    id_column="progress_id",
+    columns=(
+        "admission_id TEXT NOT NULL",
+        "progress_id TEXT NOT NULL",
+        "recorded_at TIMESTAMP NOT NULL",
+        "cervical_dilation_cm FLOAT NOT NULL",
+        "effacement_pct INTEGER",
+        "station INTEGER",
+        "contraction_freq INTEGER",
+        "membrane_status TEXT NOT NULL",
+        "notes TEXT",
+    ),
+)
+
+PROJECTIONS: list[LatestProjection] = [
+    VITAL_SIGN_LATEST,
+    LABOR_PROGRESS_LATEST,
+]
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+
+"""
+Length-of-stay (LOS) prediction.
+
+A small ridge regression model, trained locally on discharged admissions,
+that predicts the total length of stay (in hours) of an admission from:
+
+- ``patient``: age
+- ``ob_profile``: gravida, para, gestational weeks, fetus count, risk level,
+  complications, planned delivery method
+- ``admission``: actual delivery method (if delivered)
+- ``labor_progress``: maximum cervical dilation recorded so far
+
+Features for all active admissions are loaded with a single query and
+predicted with one matrix multiplication, so refreshing the predictions of
+the whole ward takes milliseconds instead of one LLM reasoning step per
+patient. When there are not enough discharged admissions to train on, a
+baseline model with clinically reasonable coefficients is used.
+"""
+
+import typing as T
+import dataclasses
+from datetime import datetime, timedelta, UTC
+
+import numpy as np
+import sqlalchemy as sa
+
+from .utils import to_naive_datetime
+from .write_operations import update_predictions
+
+#: Valid range of ``admission.predicted_los_hours``, see ``update_prediction``.
+MIN_LOS_HOURS = 6
+MAX_LOS_HOURS = 336
+#: A patient still in the ward is expected to stay at least this much longer.
+MIN_REMAINING_HOURS = 6
+
+FEATURE_NAMES = (
+    "age",
+    "gravida",
+    "is_nulliparous",
+    "gestational_weeks",
+    "is_preterm",
+    "is_multiple",
+    "is_medium_risk",
+    "is_high_risk",
+    "has_complications",
+    "is_c_section",
+    "is_delivered",
+    "max_dilation_cm",
+)
+
+#: Baseline coefficients (hours) used when there is not enough training data.
+BASELINE_INTERCEPT = 48.0
+BASELINE_COEF = {
+    "is_nulliparous": 6.0,
+    "is_preterm": 24.0,
+    "is_multiple": 12.0,
+    "is_medium_risk": 6.0,
+    "is_high_risk": 18.0,
+    "has_complications": 12.0,
+    "is_c_section": 36.0,
+}
+
+FEATURE_SQL = """
+SELECT
+    a.admission_id,
+    a.admit_time,
+    a.status,
+    a.delivery_method_actual,
+    a.actual_discharge_time,
+    p.age,
+    o.gravida,
+    o.para,
+    o.gestational_weeks,
+    o.fetus_count,
+    o.planned_delivery_method,
+    o.risk_level,
+    o.complications,
+    lp.max_dilation_cm
+FROM admission a
+JOIN patient p ON p.patient_id = a.patient_id
+JOIN ob_profile o ON o.ob_id = a.ob_id
+LEFT JOIN (
+    SELECT admission_id, MAX(cervical_dilation_cm) AS max_dilation_cm
+    FROM labor_progress
+    GROUP BY admission_id
+) lp ON lp.admission_id = a.admission_id
+"""
+
+
+@dataclasses.dataclass
+class AdmissionFeatures:
+    """
+    Feature matrix of a set of admissions.
+
+    :param admission_ids: Admission id of each row.
+    :param admit_times: Naive admit datetime of each row.
+    :param X: Feature matrix, columns follow :data:`FEATURE_NAMES`.
+    :param y: Actual LOS in hours (NaN if not discharged yet).
+    """
+
+    admission_ids: list[str]
+    admit_times: list[datetime]
+    X: np.ndarray
+    y: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.admission_ids)
+
+
+def new_admission_features(rows: T.Sequence[T.Any]) -> AdmissionFeatures:
+    """
+    Build :class:`AdmissionFeatures` from rows returned by :data:`FEATURE_SQL`.
+    """
+    admit_times = [to_naive_datetime(row.admit_time) for row in rows]
+
+    def column(name: str, default=0.0) -> np.ndarray:
+        return np.array(
+            [default if getattr(row, name) is None else getattr(row, name) for row in rows],
+            dtype=np.float64,
+        )
+
+    def flag(predicate: T.Callable[[T.Any], bool]) -> np.ndarray:
+        return np.array([predicate(row) for row in rows], dtype=np.float64)
+
+    def delivery_method(row) -> T.Optional[str]:
+        return row.delivery_method_actual or row.planned_delivery_method
+
+    weeks = column("gestational_weeks", default=39.0)
+    features = {
+        "age": column("age", default=30.0),
+        "gravida": column("gravida", default=1.0),
+        "is_nulliparous": (column("para") == 0).astype(np.float64),
+        "gestational_weeks": weeks,
+        "is_preterm": (weeks < 37).astype(np.float64),
+        "is_multiple": (column("fetus_count", default=1.0) > 1).astype(np.float64),
+        "is_medium_risk": flag(lambda row: row.risk_level == "medium"),
+        "is_high_risk": flag(lambda row: row.risk_level == "high"),
+        "has_complications": flag(lambda row: bool(row.complications)),
+        "is_c_section": flag(lambda row: delivery_method(row) == "c_section"),
+        "is_delivered": flag(lambda row: row.delivery_method_actual is not None),
+        "max_dilation_cm": column("max_dilation_cm"),
+    }
+    if rows:
+        X = np.column_stack([features[name] for name in FEATURE_NAMES])
+    else:
+        X = np.zeros((0, len(FEATURE_NAMES)), dtype=np.float64)
+
+    y = np.array(
+        [
+            (
+                (to_naive_datetime(row.actual_discharge_time) - admit_time).total_seconds() / 3600
+                if row.actual_discharge_time is not None
+                else np.nan
+            )
+            for row, admit_time in zip(rows, admit_times)
+        ],
+        dtype=np.float64,
+    )
+    return AdmissionFeatures(
+        admission_ids=[row.admission_id for row in rows],
+        admit_times=admit_times,
+        X=X,
+        y=y,
+    )
+
+
+def load_admission_features(
+    engine: "sa.Engine",
+    discharged: bool,
+) -> AdmissionFeatures:
+    """
+    Load features of all discharged (training) or active (prediction) admissions.
+    """
+    if discharged:
+        where = "WHERE a.status = 'discharged' AND a.actual_discharge_time IS NOT NULL"
+    else:
+        where = "WHERE a.status != 'discharged'"
+    sql = f"{FEATURE_SQL}{where}\nORDER BY a.admission_id"
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text(sql)).fetchall()
+    return new_admission_features(rows)
+
+
+@dataclasses.dataclass
+class LosModel:
+    """
+    Linear LOS model on standardized features.
+
+    ``prediction = ((X - mean) / scale) @ coef + intercept``
+    """
+
+    coef: np.ndarray
+    intercept: float
+    mean: np.ndarray
+    scale: np.ndarray
+    n_samples: int = 0
+
+    @classmethod
+    def baseline(cls) -> "LosModel":
+        """
+        Model with hand-picked coefficients, used when there is no training data.
+        """
+        n = len(FEATURE_NAMES)
+        return cls(
+            coef=np.array([BASELINE_COEF.get(name, 0.0) for name in FEATURE_NAMES]),
+            intercept=BASELINE_INTERCEPT,
+            mean=np.zeros(n),
+            scale=np.ones(n),
+            n_samples=0,
+        )
+
+    @classmethod
+    def fit(
+        cls,
+        X: np.ndarray,
+        y: np.ndarray,
+        alpha: float = 1.0,
+    ) -> "LosModel":
+        """
+        Fit a ridge regression with closed-form least squares.
+
+        The intercept is not penalized. Constant features get a zero weight.
+
+        :param X: Feature matrix, shape ``(n_samples, n_features)``.
+        :param y: Actual LOS in hours, shape ``(n_samples,)``.
+        :param alpha: L2 regularization strength.
+        """
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = (X - mean) / scale
+        y_mean = float(y.mean())
+        A = Z.T @ Z + alpha * np.eye(Z.shape[1])
+        coef = np.linalg.solve(A, Z.T @ (y - y_mean))
+        return cls(
+            coef=coef,
+            intercept=y_mean,
+            mean=mean,
+            scale=scale,
+            n_samples=len(y),
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict total LOS in hours, clipped to the valid range.
+        """
+        raw = ((X - self.mean) / self.scale) @ self.coef + self.intercept
+        return np.clip(raw, MIN_LOS_HOURS, MAX_LOS_HOURS)
+
+
+def train_los_model(
+    engine: "sa.Engine",
+    min_samples: int = 20,
+    alpha: float = 1.0,
+) -> LosModel:
+    """
+    Train a LOS model on discharged admissions.
+
+    Falls back to :meth:`LosModel.baseline` if fewer than ``min_samples``
+    discharged admissions are available.
+    """
+    train = load_admission_features(engine, discharged=True)
+    ok = np.isfinite(train.y) & (train.y > 0)
+    if int(ok.sum()) < min_samples:
+        return LosModel.baseline()
+    return LosModel.fit(train.X[ok], train.y[ok], alpha=alpha)
+
+
+def predict_active_admissions(
+    engine: "sa.Engine",
+    model: LosModel,
+    now: T.Optional[datetime] = None,
+) -> list[dict]:
+    """
+    Predict LOS and discharge time for every active admission.
+
+    The predicted stay is never shorter than the time already spent in the
+    ward plus :data:`MIN_REMAINING_HOURS`.
+
+    :param engine: SQLAlchemy engine instance.
+    :param model: Trained LOS model.
+    :param now: Current time (naive UTC). Defaults to ``datetime.now(UTC)``.
+
+    :return: List of dicts accepted by
+        :func:`obnexus.write_operations.update_predictions`.
+    """
+    if now is None:
+        now = datetime.now(UTC).replace(tzinfo=None)
+    active = load_admission_features(engine, discharged=False)
+    if len(active) == 0:
+        return []
+
+    los = model.predict(active.X)
+    elapsed = np.array(
+        [(now - admit_time).total_seconds() / 3600 for admit_time in active.admit_times]
+    )
+    los = np.maximum(los, elapsed + MIN_REMAINING_HOURS)
+    los = np.clip(np.ceil(los), MIN_LOS_HOURS, MAX_LOS_HOURS).astype(int)
+
+    return [
+        {
+            "admission_id": admission_id,
+            "predicted_los_hours": int(hours),
+            "predicted_discharge_time": admit_time + timedelta(hours=int(hours)),
+        }
+        for admission_id, admit_time, hours in zip(
+            active.admission_ids, active.admit_times, los
+        )
+    ]
+
+
+def refresh_predictions(
+    engine: "sa.Engine",
+    model: T.Optional[LosModel] = None,
+    now: T.Optional[datetime] = None,
+) -> dict:
+    """
+    Re-predict LOS for all active admissions and save them in one transaction.
+
+    :param engine: SQLAlchemy engine instance.
+    :param model: LOS model to use. If None, train one with :func:`train_los_model`.
+    :param now: Current time (naive UTC). Defaults to ``datetime.now(UTC)``.
+
+    :return: dict with success status, message, the number of training samples
+        and the predictions.
+    """
+    if model is None:
+        model = train_los_model(engine)
+    predictions = predict_active_admissions(engine=engine, model=model, now=now)
+    result = update_predictions(engine=engine, predictions=predictions)
+    result["n_training_samples"] = model.n_samples
+    result["predictions"] = [
+        {
+            "admission_id": p["admission_id"],
+            "predicted_los_hours": p["predicted_los_hours"],
+            "predicted_discharge_time": p["predicted_discharge_time"].isoformat(),
+        }
+        for p in predictions
+    ]
+    return result
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+
+"""
+Prometheus-style metrics for the chat backend.
+
+A minimal, dependency-free metrics registry (counters, gauges, histograms
+with labels) rendered in the Prometheus text exposition format by the
+``/api/metrics`` endpoint. It is intentionally tiny: no background threads,
+no multiprocess support, just thread-safe in-process aggregation, which
+matches how the backend runs (one process per serverless instance).
+
+Metrics are fed by:
+
+- ``api/index.py``: HTTP request count and latency (middleware)
+- :class:`MetricsHooks` on the agent: steps per turn, tool calls, tokens
+- :func:`obnexus.sql_utils.execute_and_print_result`: SQL latency and rows
+- :func:`instrument_pool`: connection pool checkouts and checked out connections
+- :class:`obnexus.tool_executor.ReadWriteToolExecutor`: tool calls waiting for a worker
+"""
+
+import math
+import time
+import typing as T
+import threading
+
+import sqlalchemy as sa
+from strands.hooks import (
+    HookRegistry,
+    BeforeInvocationEvent,
+    AfterInvocationEvent,
+    AfterModelCallEvent,
+    BeforeToolCallEvent,
+    AfterToolCallEvent,
+)
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from strands import Agent
+
+#: Latency buckets in seconds, from a fast SQL query to a slow agent turn.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+STEP_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+#: Mapping of Strands usage keys to the ``type`` label of the token counter.
+TOKEN_TYPES = {
+    "inputTokens": "input",
+    "outputTokens": "output",
+    "cacheReadInputTokens": "cache_read",
+    "cacheWriteInputTokens": "cache_write",
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: T.Sequence[str], values: T.Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class of labeled metrics.
+
+    :param name: Metric name, e.g. ``obnexus_tool_calls_total``.
+    :param help: One-line description.
+    :param label_names: Names of the labels every sample must provide.
+    """
+
+    type: str = ""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: T.Sequence[str] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], T.Any] = {}
+
+    def _key(self, labels: dict[str, T.Any]) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"{self.name} expects labels {self.label_names}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render_samples(self) -> list[str]:  # pragma: no cover
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.render_samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: T.Any):
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: T.Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render_samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels: T.Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: T.Any):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: T.Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets.
+
+    :param buckets: Upper bounds of the buckets, ``+Inf`` is added automatically.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: T.Sequence[str] = (),
+        buckets: T.Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name=name, help=help, label_names=label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: T.Any):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (non-cumulative), sum, count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def get_count(self, **labels: T.Any) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def get_sum(self, **labels: T.Any) -> float:
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    def render_samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for upper, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(upper)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together.
+    """
+
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, label_names: T.Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, label_names))
+
+    def gauge(self, name: str, help: str, label_names: T.Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: T.Sequence[str] = (),
+        buckets: T.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, label_names, buckets))
+
+    def clear(self):
+        """Reset all values (for tests)."""
+        for metric in self.metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+#: Content type of :meth:`MetricsRegistry.render`.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "obnexus_http_requests_total",
+    "HTTP requests by route and status code.",
+    ["method", "path", "status"],
+)
+http_request_duration_seconds = registry.histogram(
+    "obnexus_http_request_duration_seconds",
+    "HTTP request latency until the response starts, in seconds.",
+    ["method", "path"],
+)
+agent_steps_per_turn = registry.histogram(
+    "obnexus_agent_steps_per_turn",
+    "Model calls per agent turn.",
+    buckets=STEP_BUCKETS,
+)
+agent_turn_duration_seconds = registry.histogram(
+    "obnexus_agent_turn_duration_seconds",
+    "Agent turn latency, in seconds.",
+)
+tool_calls_total = registry.counter(
+    "obnexus_tool_calls_total",
+    "Tool calls by tool name and result status.",
+    ["tool", "status"],
+)
+tool_call_duration_seconds = registry.histogram(
+    "obnexus_tool_call_duration_seconds",
+    "Tool call latency by tool name, in seconds.",
+    ["tool"],
+)
+tool_queue_depth = registry.gauge(
+    "obnexus_tool_queue_depth",
+    "Read-only tool calls waiting for a worker slot.",
+)
+model_tokens_total = registry.counter(
+    "obnexus_model_tokens_total",
+    "Model tokens by type (input, output, cache_read, cache_write).",
+    ["type"],
+)
+sql_queries_total = registry.counter(
+    "obnexus_sql_queries_total",
+    "Agent SQL queries by status.",
+    ["status"],
+)
+sql_query_duration_seconds = registry.histogram(
+    "obnexus_sql_query_duration_seconds",
+    "Agent SQL query latency (execute and fetch), in seconds.",
+)
+sql_rows_returned = registry.histogram(
+    "obnexus_sql_rows_returned",
+    "Rows returned per agent SQL query.",
+    buckets=ROW_BUCKETS,
+)
+db_pool_checkouts_total = registry.counter(
+    "obnexus_db_pool_checkouts_total",
+    "Connections checked out from the pool.",
+)
+db_pool_checked_out = registry.gauge(
+    "obnexus_db_pool_checked_out",
+    "Connections currently checked out from the pool.",
+)
+
+
+def get_usage(agent: "Agent") -> dict[str, int]:
+    """
+    Snapshot of the token usage accumulated by a Strands agent so far.
+
+    Strands adds a model call's usage to ``agent.event_loop_metrics`` only
+    after the ``AfterModelCallEvent``, and the event itself carries no usage,
+    so hooks compare two snapshots with :func:`usage_since` instead.
+    """
+    return dict(agent.event_loop_metrics.accumulated_usage)
+
+
+def usage_since(agent: "Agent", before: dict[str, int]) -> dict[str, int]:
+    """Token usage of ``agent`` since the :func:`get_usage` snapshot ``before``."""
+    usage = agent.event_loop_metrics.accumulated_usage
+    return {key: value - before.get(key, 0) for key, value in usage.items()}
+
+
+class MetricsHooks:
+    """
+    Strands hook provider recording agent turn, tool and token metrics.
+    """
+
+    def __init__(self):
+        self._tool_started_at: dict[str, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: T.Any):
+        registry.add_callback(BeforeInvocationEvent, self.before_invocation)
+        registry.add_callback(AfterInvocationEvent, self.after_invocation)
+        registry.add_callback(AfterModelCallEvent, self.after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self.before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self.after_tool_call)
+
+    def before_invocation(self, event: BeforeInvocationEvent):
+        event.invocation_state["_metrics_steps"] = 0
+        event.invocation_state["_metrics_started_at"] = time.perf_counter()
+        event.invocation_state["_metrics_usage"] = get_usage(event.agent)
+
+    def after_invocation(self, event: AfterInvocationEvent):
+        steps = event.invocation_state.pop("_metrics_steps", None)
+        started_at = event.invocation_state.pop("_metrics_started_at", None)
+        usage_before = event.invocation_state.pop("_metrics_usage", None)
+        if steps is not None:
+            agent_steps_per_turn.observe(steps)
+        if started_at is not None:
+            agent_turn_duration_seconds.observe(time.perf_counter() - started_at)
+        if usage_before is not None:
+            usage = usage_since(event.agent, usage_before)
+            for key, token_type in TOKEN_TYPES.items():
+                if usage.get(key, 0) > 0:
+                    model_tokens_total.inc(usage[key], type=token_type)
+
+    def after_model_call(self, event: AfterModelCallEvent):
+        if "_metrics_steps" in event.invocation_state:
+            event.invocation_state["_metrics_steps"] += 1
+
+    def before_tool_call(self, event: BeforeToolCallEvent):
+        self._tool_started_at[event.tool_use["toolUseId"]] = time.perf_counter()
+
+    def after_tool_call(self, event: AfterToolCallEvent):
+        name = event.tool_use["name"]
+        tool_calls_total.inc(tool=name, status=event.result.get("status", "unknown"))
+        started_at = self._tool_started_at.pop(event.tool_use["toolUseId"], None)
+        if started_at is not None:
+            tool_call_duration_seconds.observe(time.perf_counter() - started_at, tool=name)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    db_pool_checkouts_total.inc()
+    db_pool_checked_out.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    db_pool_checked_out.dec()
+
+
+def instrument_pool():
+    """
+    Count connection checkouts of every SQLAlchemy pool. Safe to call more than once.
+    """
+    if not sa.event.contains(sa.pool.Pool, "checkout", _on_checkout):
+        sa.event.listen(sa.pool.Pool, "checkout", _on_checkout)
+        sa.event.listen(sa.pool.Pool, "checkin", _on_checkin)
@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+
+"""
+Versioned schema migrations.
+
+The ward database is created from the SQLite source file, and
+:func:`obnexus.tests.db_sync.sync_sqlite_to_postgres` recreates it in
+Postgres with primary keys only. This module ships the indexes and
+constraints the agent's query patterns need, as an ordered list of
+:class:`Migration` objects:
+
+- ``0001``: time-series and status indexes (``vital_sign`` /
+  ``labor_progress`` by admission and time, ``bed.status``,
+  ``admission.status``, ``alert`` by acknowledged and severity)
+- ``0002``: indexes on foreign key columns (Postgres does not create them)
+- ``0003``: foreign key constraints (Postgres only, see below)
+- ``0004``: ward summary tables (see :mod:`obnexus.ward_views`), created and filled
+- ``0005``: latest-reading projections (see :mod:`obnexus.latest_readings`),
+  created and filled
+- ``0006``: archive and hourly rollup tables of the time-series tables (see
+  :mod:`obnexus.retention`)
+- ``0007``: one reading per admission and time: unique indexes on
+  ``vital_sign`` / ``labor_progress`` ``(admission_id, recorded_at)``, which
+  replace the plain ones of ``0001`` (see
+  :func:`obnexus.write_operations.ingest_vital_signs`)
+
+Applied versions are recorded in the ``schema_migrations`` table, so
+:func:`apply_migrations` is safe to run repeatedly and only applies what is
+missing. Index names follow ``ix_<table>_<columns>`` (``ux_`` for unique
+indexes), the same convention as :mod:`obnexus.index_advisor`, which
+recognizes them by their columns.
+
+Every migration is frozen literal SQL: it must keep meaning what it meant
+when it was first applied, so it does not use the live table definitions of
+:mod:`obnexus.ward_views`, :mod:`obnexus.latest_readings` or
+:mod:`obnexus.retention`. A change to those definitions ships as a new
+version.
+
+SQLite cannot add constraints to an existing table. The SQLite source
+database (and :mod:`obnexus.tests.sample_db`) already declares its foreign
+keys in ``CREATE TABLE``, so ``0003`` has no SQLite statements.
+"""
+
+import typing as T
+import dataclasses
+from datetime import datetime, UTC
+
+import sqlalchemy as sa
+
+#: Table recording applied migrations.
+MIGRATIONS_TABLE = "schema_migrations"
+
+
+@dataclasses.dataclass
+class Migration:
+    """
+    One schema change.
+
+    :param version: Unique, increasing version number.
+    :param name: Short description.
+    :param statements: SQL run on every dialect.
+    :param dialect_statements: Extra SQL per dialect name (``sqlite``, ``postgresql``),
+        run after ``statements``.
+    """
+
+    version: int
+    name: str
+    statements: list[str] = dataclasses.field(default_factory=list)
+    dialect_statements: dict[str, list[str]] = dataclasses.field(default_factory=dict)
+
+    def get_statements(self, dialect: str) -> list[str]:
+        return self.statements + self.dialect_statements.get(dialect, [])
+
+
+def create_index_sql(table: str, columns: T.Sequence[str]) -> str:
+    name = f"ix_{table}_{'_'.join(columns)}"
+    return f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+
+
+def add_foreign_key_sql(table: str, column: str, ref_table: str, ref_column: str) -> str:
+    return (
+        f"ALTER TABLE {table} ADD CONSTRAINT fk_{table}_{column} "
+        f"FOREIGN KEY ({column}) REFERENCES {ref_table} ({ref_column})"
+    )
+
+
+#: (table, columns) of the indexes serving the agent's hot queries.
+HOT_INDEXES = [
+    ("vital_sign", ["admission_id", "recorded_at"]),
+    ("labor_progress", ["admission_id", "recorded_at"]),
+    ("bed", ["status"]),
+    ("admission", ["status"]),
+    ("alert", ["acknowledged", "severity"]),
+]
+
+#: (table, columns) of indexes on foreign key columns not covered by HOT_INDEXES.
+FOREIGN_KEY_INDEXES = [
+    ("ob_profile", ["patient_id"]),
+    ("shift", ["provider_id", "shift_date"]),
+    ("admission", ["patient_id"]),
+    ("admission", ["attending_provider_id"]),
+    ("admission", ["primary_nurse_id"]),
+    ("alert", ["admission_id", "triggered_at"]),
+    ("bed", ["room_id"]),
+    ("bed", ["current_admission_id"]),
+    ("medical_order", ["admission_id"]),
+    ("medical_order", ["assigned_provider_id", "scheduled_time"]),
+    ("medical_order", ["assigned_room_id", "scheduled_time"]),
+]
+
+#: (table, column, referenced table, referenced column), as declared in the SQLite source.
+FOREIGN_KEYS = [
+    ("ob_profile", "patient_id", "patient", "patient_id"),
+    ("shift", "provider_id", "provider", "provider_id"),
+    ("admission", "patient_id", "patient", "patient_id"),
+    ("admission", "ob_id", "ob_profile", "ob_id"),
+    ("admission", "attending_provider_id", "provider", "provider_id"),
+    ("admission", "primary_nurse_id", "provider", "provider_id"),
+    ("alert", "admission_id", "admission", "admission_id"),
+    ("alert", "acknowledged_by", "provider", "provider_id"),
+    ("bed", "room_id", "room", "room_id"),
+    ("bed", "current_admission_id", "admission", "admission_id"),
+    ("labor_progress", "admission_id", "admission", "admission_id"),
+    ("medical_order", "admission_id", "admission", "admission_id"),
+    ("medical_order", "assigned_provider_id", "provider", "provider_id"),
+    ("medical_order", "assigned_room_id", "room", "room_id"),
+    ("vital_sign", "admission_id", "admission", "admission_id"),
+]
+
+#: Statements of migration ``0004``, frozen as they shipped.
+WARD_SUMMARY_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS mv_census_by_status (
+        status TEXT NOT NULL,
+        n_admissions INTEGER NOT NULL,
+        n_high_risk INTEGER NOT NULL,
+        PRIMARY KEY (status)
+    )
+    """,
+    "DELETE FROM mv_census_by_status",
+    """
+    INSERT INTO mv_census_by_status (status, n_admissions, n_high_risk)
+    SELECT
+        a.status,
+        COUNT(*) AS n_admissions,
+        SUM(CASE WHEN o.risk_level = 'high' THEN 1 ELSE 0 END) AS n_high_risk
+    FROM admission a
+    JOIN ob_profile o ON o.ob_id = a.ob_id
+    GROUP BY a.status
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mv_bed_occupancy (
+        room_type TEXT NOT NULL,
+        floor INTEGER NOT NULL,
+        n_beds INTEGER NOT NULL,
+        n_available INTEGER NOT NULL,
+        n_occupied INTEGER NOT NULL,
+        n_other INTEGER NOT NULL,
+        PRIMARY KEY (room_type, floor)
+    )
+    """,
+    "DELETE FROM mv_bed_occupancy",
+    """
+    INSERT INTO mv_bed_occupancy (room_type, floor, n_beds, n_available, n_occupied, n_other)
+    SELECT
+        r.room_type,
+        r.floor,
+        COUNT(*) AS n_beds,
+        SUM(CASE WHEN b.status = 'available' THEN 1 ELSE 0 END) AS n_available,
+        SUM(CASE WHEN b.status = 'occupied' THEN 1 ELSE 0 END) AS n_occupied,
+        SUM(CASE WHEN b.status NOT IN ('available', 'occupied') THEN 1 ELSE 0 END) AS n_other
+    FROM bed b
+    JOIN room r ON r.room_id = b.room_id
+    GROUP BY r.room_type, r.floor
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mv_active_alerts (
+        admission_id TEXT NOT NULL,
+        n_active INTEGER NOT NULL,
+        n_critical INTEGER NOT NULL,
+        latest_alert_type TEXT NOT NULL,
+        latest_triggered_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (admission_id)
+    )
+    """,
+    "DELETE FROM mv_active_alerts",
+    """
+    INSERT INTO mv_active_alerts (admission_id, n_active, n_critical, latest_alert_type, latest_triggered_at)
+    SELECT
+        admission_id, n_active, n_critical,
+        alert_type AS latest_alert_type,
+        triggered_at AS latest_triggered_at
+    FROM (
+        SELECT
+            admission_id,
+            COUNT(*) OVER (PARTITION BY admission_id) AS n_active,
+            SUM(CASE WHEN severity = 'critical' THEN 1 ELSE 0 END)
+                OVER (PARTITION BY admission_id) AS n_critical,
+            alert_type,
+            triggered_at,
+            ROW_NUMBER() OVER (
+                PARTITION BY admission_id ORDER BY triggered_at DESC, alert_id
+            ) AS rn
+        FROM alert
+        WHERE NOT acknowledged
+    ) ranked
+    WHERE rn = 1
+    """,
+]
+
+#: Statements of migration ``0005``, frozen as they shipped.
+LATEST_READING_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS vital_sign_latest (
+        admission_id TEXT NOT NULL,
+        vital_id TEXT NOT NULL,
+        recorded_at TIMESTAMP NOT NULL,
+        bp_systolic INTEGER NOT NULL,
+        bp_diastolic INTEGER NOT NULL,
+        heart_rate INTEGER NOT NULL,
+        temperature FLOAT NOT NULL,
+        fetal_heart_rate INTEGER NOT NULL,
+        oxygen_saturation FLOAT NOT NULL,
+        PRIMARY KEY (admission_id)
+    )
+    """,
+    "DELETE FROM vital_sign_latest",
+    """
+    INSERT INTO vital_sign_latest (admission_id, vital_id, recorded_at, bp_systolic, bp_diastolic, heart_rate, temperature, fetal_heart_rate, oxygen_saturation)
+    SELECT admission_id, vital_id, recorded_at, bp_systolic, bp_diastolic, heart_rate, temperature, fetal_heart_rate, oxygen_saturation
+    FROM (
+        SELECT
+            admission_id, vital_id, recorded_at, bp_systolic, bp_diastolic, heart_rate, temperature, fetal_heart_rate, oxygen_saturation,
+            ROW_NUMBER() OVER (
+                PARTITION BY admission_id ORDER BY recorded_at DESC, vital_id DESC
+            ) AS rn
+        FROM vital_sign
+    ) ranked
+    WHERE rn = 1
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS labor_progress_latest (
+        admission_id TEXT NOT NULL,
+        progress_id TEXT NOT NULL,
+        recorded_at TIMESTAMP NOT NULL,
+        cervical_dilation_cm FLOAT NOT NULL,
+        effacement_pct INTEGER,
+        station INTEGER,
+        contraction_freq INTEGER,
+        membrane_status TEXT NOT NULL,
+        notes TEXT,
+        PRIMARY KEY (admission_id)
+    )
+    """,
+    "DELETE FROM labor_progress_latest",
+    """
+    INSERT INTO labor_progress_latest (admission_id, progress_id, recorded_at, cervical_dilation_cm, effacement_pct, station, contraction_freq, membrane_status, notes)
+    SELECT admission_id, progress_id, recorded_at, cervical_dilation_cm, effacement_pct, station, contraction_freq, membrane_status, notes
+    FROM (
+        SELECT
+            admission_id, progress_id, recorded_at, cervical_dilation_cm, effacement_pct, station, contraction_freq, membrane_status, notes,
+            ROW_NUMBER() OVER (
+                PARTITION BY admission_id ORDER BY recorded_at DESC, progress_id DESC
+            ) AS rn
+        FROM labor_progress
+    ) ranked
+    WHERE rn = 1
+    """,
+]
+
+#: Statements of migration ``0006``, frozen as they shipped.
+ARCHIVE_ROLLUP_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS vital_sign_archive (
+        admission_id TEXT NOT NULL,
+        vital_id TEXT NOT NULL,
+        recorded_at TIMESTAMP NOT NULL,
+        bp_systolic INTEGER NOT NULL,
+        bp_diastolic INTEGER NOT NULL,
+        heart_rate INTEGER NOT NULL,
+        temperature FLOAT NOT NULL,
+        fetal_heart_rate INTEGER NOT NULL,
+        oxygen_saturation FLOAT NOT NULL,
+        PRIMARY KEY (vital_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vital_sign_hourly (
+        admission_id TEXT NOT NULL,
+        hour TIMESTAMP NOT NULL,
+        n_readings INTEGER NOT NULL,
+        bp_systolic_min FLOAT,
+        bp_systolic_avg FLOAT,
+        bp_systolic_max FLOAT,
+        bp_diastolic_min FLOAT,
+        bp_diastolic_avg FLOAT,
+        bp_diastolic_max FLOAT,
+        heart_rate_min FLOAT,
+        heart_rate_avg FLOAT,
+        heart_rate_max FLOAT,
+        temperature_min FLOAT,
+        temperature_avg FLOAT,
+        temperature_max FLOAT,
+        fetal_heart_rate_min FLOAT,
+        fetal_heart_rate_avg FLOAT,
+        fetal_heart_rate_max FLOAT,
+        oxygen_saturation_min FLOAT,
+        oxygen_saturation_avg FLOAT,
+        oxygen_saturation_max FLOAT,
+        PRIMARY KEY (admission_id, hour)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS labor_progress_archive (
+        admission_id TEXT NOT NULL,
+        progress_id TEXT NOT NULL,
+        recorded_at TIMESTAMP NOT NULL,
+        cervical_dilation_cm FLOAT NOT NULL,
+        effacement_pct INTEGER,
+        station INTEGER,
+        contraction_freq INTEGER,
+        membrane_status TEXT NOT NULL,
+        notes TEXT,
+        PRIMARY KEY (progress_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS labor_progress_hourly (
+        admission_id TEXT NOT NULL,
+        hour TIMESTAMP NOT NULL,
+        n_readings INTEGER NOT NULL,
+        cervical_dilation_cm_min FLOAT,
+        cervical_dilation_cm_avg FLOAT,
+        cervical_dilation_cm_max FLOAT,
+        effacement_pct_min FLOAT,
+        effacement_pct_avg FLOAT,
+        effacement_pct_max FLOAT,
+        station_min FLOAT,
+        station_avg FLOAT,
+        station_max FLOAT,
+        contraction_freq_min FLOAT,
+        contraction_freq_avg FLOAT,
+        contraction_freq_max FLOAT,
+        PRIMARY KEY (admission_id, hour)
+    )
+    """,
+]
+
+#: Statements of migration ``0007``, frozen as they shipped. The unique
+#: indexes include the partition key, so Postgres accepts them on the
+#: partitioned tables.
+UNIQUE_READING_SQL = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_vital_sign_admission_id_recorded_at "
+    "ON vital_sign (admission_id, recorded_at)",
+    "DROP INDEX IF EXISTS ix_vital_sign_admission_id_recorded_at",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_labor_progress_admission_id_recorded_at "
+    "ON labor_progress (admission_id, recorded_at)",
+    "DROP INDEX IF EXISTS ix_labor_progress_admission_id_recorded_at",
+]
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        name="hot time-series and status indexes",
+        statements=[create_index_sql(table, columns) for table, columns in HOT_INDEXES],
+    ),
+    Migration(
+        version=2,
+        name="foreign key column indexes",
+        statements=[
+            create_index_sql(table, columns) for table, columns in FOREIGN_KEY_INDEXES
+        ],
+    ),
+    Migration(
+        version=3,
+        name="foreign key constraints",
+        dialect_statements={
+            "postgresql": [add_foreign_key_sql(*fk) for fk in FOREIGN_KEYS],
+        },
+    ),
+    Migration(
+        version=4,
+        name="ward summary tables",
+        statements=WARD_SUMMARY_SQL,
+    ),
+    Migration(
+        version=5,
+        name="latest reading projections",
+        statements=LATEST_READING_SQL,
+    ),
+    Migration(
+        version=6,
+        name="time-series archive and hourly rollup tables",
+        statements=ARCHIVE_ROLLUP_SQL,
+    ),
+    Migration(
+        version=7,
+        name="unique reading time per admission",
+        statements=UNIQUE_READING_SQL,
+    ),
+]
+
+
+def ensure_migrations_table(engine: "sa.Engine"):
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+                "version INTEGER PRIMARY KEY, "
+                "name TEXT NOT NULL, "
+                "applied_at TEXT NOT NULL)"
+            )
+        )
+
+
+def get_applied_versions(engine: "sa.Engine") -> set[int]:
+    """Versions recorded in the migrations table (created if missing)."""
+    ensure_migrations_table(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text(f"SELECT version FROM {MIGRATIONS_TABLE}")).fetchall()
+    return {row[0] for row in rows}
+
+
+def apply_migrations(
+    engine: "sa.Engine",
+    migrations: T.Sequence[Migration] = MIGRATIONS,
+    target: T.Optional[int] = None,
+    verbose: bool = True,
+) -> list[int]:
+    """
+    Apply all pending migrations in version order. Each migration runs in
+    its own transaction, together with its record in the migrations table.
+
+    :param engine: Database to migrate (SQLite or Postgres).
+    :param migrations: Migrations to consider.
+    :param target: Stop after this version. None applies everything.
+    :param verbose: Print each applied migration.
+
+    :return: Versions applied by this call.
+    """
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions: {versions}")
+
+    applied = get_applied_versions(engine)
+    dialect = engine.dialect.name
+    newly_applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if target is not None and migration.version > target:
+            break
+        if migration.version in applied:
+            continue
+        with engine.begin() as conn:
+            for statement in migration.get_statements(dialect):
+                conn.execute(sa.text(statement))
+            conn.execute(
+                sa.text(
+                    f"INSERT INTO {MIGRATIONS_TABLE} (version, name, applied_at) "
+                    "VALUES (:version, :name, :applied_at)"
+                ),
+                {
+                    "version": migration.version,
+                    "name": migration.name,
+                    "applied_at": datetime.now(UTC).isoformat(),
+                },
+            )
+        if verbose:
+            print(f"  Applied migration {migration.version:04d}: {migration.name}")
+        newly_applied.append(migration.version)
+    return newly_applied
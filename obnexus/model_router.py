@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+Per-turn model routing.
+
+Most ward questions are lookups ("how many beds are free on floor 2?") that
+a small, fast model answers well. Writes (assign a bed, schedule a C-section)
+and multi-step reasoning (plan, compare, recommend) need a more capable model.
+:func:`classify_turn` sorts each user turn into a route with cheap text
+heuristics, and :class:`ModelRouterHooks` switches the agent's model at the
+start of the turn:
+
+- ``lookup``: ``config.model_id``
+- ``complex``: ``config.complex_model_id`` (the lookup model if not set)
+
+A short confirmation ("yes", "go ahead") is routed as ``complex``: it is the
+answer to "Should I assign bed 203-A?", and the next step is the write.
+
+Each turn's route, latency, tokens and estimated cost are recorded per route,
+as metrics and in :meth:`ModelRouter.stats`, so the split can be tuned.
+"""
+
+import re
+import time
+import typing as T
+import threading
+import dataclasses
+
+from strands.hooks import (
+    HookRegistry,
+    BeforeInvocationEvent,
+    AfterInvocationEvent,
+)
+
+from . import metrics
+
+ROUTE_LOOKUP = "lookup"
+ROUTE_COMPLEX = "complex"
+
+#: Verbs of the write tools and related requests.
+WRITE_PATTERN = re.compile(
+    r"\b(assign|transfer|move|schedule|book|create|order|alert|update|predict|"
+    r"refresh|discharge|cancel|reserve|notify)\w*\b",
+    re.IGNORECASE,
+)
+#: Requests that need reasoning over several results.
+MULTI_STEP_PATTERN = re.compile(
+    r"\b(why|compare|plan|recommend|suggest|should|best|optimi[sz]e|prioriti[sz]e|"
+    r"trend|estimate|explain|then)\w*\b",
+    re.IGNORECASE,
+)
+#: Short replies confirming a proposed action.
+CONFIRMATION_PATTERN = re.compile(
+    r"^\s*(yes|yeah|yep|ok|okay|sure|confirm(ed)?|go ahead|do it|please do|proceed)\b",
+    re.IGNORECASE,
+)
+#: Turns with more words than this are treated as multi-step.
+MAX_LOOKUP_WORDS = 40
+
+#: USD per million (input, output) tokens, for the cost estimate.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "us.amazon.nova-micro-v1:0": (0.035, 0.14),
+    "us.amazon.nova-lite-v1:0": (0.06, 0.24),
+    "us.amazon.nova-pro-v1:0": (0.8, 3.2),
+}
+
+model_route_turns_total = metrics.registry.counter(
+    "obnexus_model_route_turns_total",
+    "Agent turns by model route and model id.",
+    ["route", "model"],
+)
+model_route_turn_duration_seconds = metrics.registry.histogram(
+    "obnexus_model_route_turn_duration_seconds",
+    "Agent turn latency by model route, in seconds.",
+    ["route"],
+)
+model_route_tokens_total = metrics.registry.counter(
+    "obnexus_model_route_tokens_total",
+    "Model tokens by model route and type (input, output).",
+    ["route", "type"],
+)
+model_route_cost_usd_total = metrics.registry.counter(
+    "obnexus_model_route_cost_usd_total",
+    "Estimated model cost by model route, in USD.",
+    ["route"],
+)
+
+
+def classify_turn(text: str) -> str:
+    """
+    Route of a user turn: :data:`ROUTE_LOOKUP` or :data:`ROUTE_COMPLEX`.
+    """
+    if not text.strip():
+        return ROUTE_COMPLEX
+    if CONFIRMATION_PATTERN.match(text):
+        return ROUTE_COMPLEX
+    if WRITE_PATTERN.search(text) or MULTI_STEP_PATTERN.search(text):
+        return ROUTE_COMPLEX
+    if len(text.split()) > MAX_LOOKUP_WORDS or text.count("?") > 1:
+        return ROUTE_COMPLEX
+    return ROUTE_LOOKUP
+
+
+def get_user_text(messages: T.Optional[T.Sequence[dict]]) -> str:
+    """Text of the last user message with text content."""
+    for message in reversed(messages or []):
+        if message.get("role") != "user":
+            continue
+        texts = [block["text"] for block in message.get("content", []) if "text" in block]
+        if texts:
+            return "\n".join(texts)
+    return ""
+
+
+@dataclasses.dataclass
+class Route:
+    """
+    A model choice.
+
+    :param name: Route name.
+    :param model: Strands model used for the route's turns.
+    :param model_id: Model id, used for metrics and pricing.
+    """
+
+    name: str
+    model: T.Any
+    model_id: str
+
+    def estimate_cost(self, input_tokens: int, output_tokens: int) -> float:
+        input_price, output_price = MODEL_PRICES.get(self.model_id, (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+@dataclasses.dataclass
+class RouteStats:
+    """Accumulated turns of one route."""
+
+    turns: int = 0
+    seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "turns": self.turns,
+            "avg_seconds": self.seconds / self.turns if self.turns else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": self.cost_usd,
+        }
+
+
+class ModelRouter:
+    """
+    Pick a model per turn and account for it.
+
+    :param routes: Route per name, must contain :data:`ROUTE_LOOKUP` and
+        :data:`ROUTE_COMPLEX`.
+    :param classifier: Function mapping the user's text to a route name.
+    """
+
+    def __init__(
+        self,
+        routes: T.Sequence[Route],
+        classifier: T.Callable[[str], str] = classify_turn,
+    ):
+        self.routes = {route.name: route for route in routes}
+        missing = {ROUTE_LOOKUP, ROUTE_COMPLEX} - set(self.routes)
+        if missing:
+            raise ValueError(f"Missing routes: {sorted(missing)}")
+        self.classifier = classifier
+        self._stats = {name: RouteStats() for name in self.routes}
+        self._lock = threading.Lock()
+
+    def route(self, text: str) -> Route:
+        return self.routes[self.classifier(text)]
+
+    def record(
+        self,
+        route: Route,
+        seconds: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+    ):
+        cost = route.estimate_cost(input_tokens, output_tokens)
+        with self._lock:
+            stats = self._stats[route.name]
+            stats.turns += 1
+            stats.seconds += seconds
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost_usd += cost
+        model_route_turns_total.inc(route=route.name, model=route.model_id)
+        model_route_turn_duration_seconds.observe(seconds, route=route.name)
+        model_route_tokens_total.inc(input_tokens, route=route.name, type="input")
+        model_route_tokens_total.inc(output_tokens, route=route.name, type="output")
+        model_route_cost_usd_total.inc(cost, route=route.name)
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+
+class ModelRouterHooks:
+    """
+    Strands hook provider switching the agent's model per turn. The turn's
+    tokens are taken from the agent's usage metrics (see
+    :func:`obnexus.metrics.usage_since`).
+    """
+
+    def __init__(self, router: ModelRouter):
+        self.router = router
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: T.Any):
+        registry.add_callback(BeforeInvocationEvent, self.before_invocation)
+        registry.add_callback(AfterInvocationEvent, self.after_invocation)
+
+    def before_invocation(self, event: BeforeInvocationEvent):
+        route = self.router.route(get_user_text(event.messages))
+        event.agent.model = route.model
+        event.invocation_state["_route"] = route
+        event.invocation_state["_route_started_at"] = time.perf_counter()
+        event.invocation_state["_route_usage"] = metrics.get_usage(event.agent)
+
+    def after_invocation(self, event: AfterInvocationEvent):
+        route = event.invocation_state.pop("_route", None)
+        started_at = event.invocation_state.pop("_route_started_at", None)
+        usage_before = event.invocation_state.pop("_route_usage", None)
+        if route is None or started_at is None or usage_before is None:
+            return
+        usage = metrics.usage_since(event.agent, usage_before)
+        self.router.record(
+            route,
+            seconds=time.perf_counter() - started_at,
+            input_tokens=usage.get("inputTokens", 0),
+            output_tokens=usage.get("outputTokens", 0),
+        )
@@ -7,9 +7,11 @@ This module provides a high-level wrapper around the boto3 Bedrock Runtime
 Converse API, making it easier to manage multi-turn conversations with AI models.
 
 Key features:
-- Manages conversation history automatically
+- Manages conversation history automatically, within an optional window
 - Converts raw API responses to typed dataclasses (via boto3_dataclass library)
 - Provides convenient methods for sending text messages
+- Streams responses (``ConverseStream``), from sync or asyncio code
+- Optional, size-capped debug logging (off by default)
 
 Dependencies:
 - boto3_dataclass: https://github.com/MacHu-GWU/boto3_dataclass-project
@@ -20,6 +22,9 @@ Dependencies:
 
 import typing as T
 import sys
+import json
+import asyncio
+import threading
 import dataclasses
 
 from func_args.api import (
@@ -28,8 +33,6 @@ from func_args.api import (
 )  # OPT marks optional fields, remove_optional strips them
 import boto3_dataclass_bedrock_runtime  # Typed dataclass wrappers for Bedrock responses
 
-from rich import print as rprint  # Pretty printing for debugging
-
 from .utils import debug
 
 if T.TYPE_CHECKING:  # pragma: no cover
@@ -43,6 +46,116 @@ if T.TYPE_CHECKING:  # pragma: no cover
     )
 
 
+def apply_history_window(
+    messages: list["MessageUnionTypeDef"],
+    max_messages: T.Optional[int],
+) -> list["MessageUnionTypeDef"]:
+    """
+    Keep the most recent ``max_messages`` messages of a conversation.
+
+    The window always starts at a user message that is not a tool result:
+    Bedrock requires the conversation to start with a user message, and a
+    tool result without its tool use request is rejected. So the window may
+    be shorter than ``max_messages``, but it never splits a turn.
+
+    Args:
+        messages: Conversation history, oldest first.
+        max_messages: Window size. None keeps the whole history.
+
+    Returns:
+        The messages in the window (``messages`` itself if nothing is dropped).
+    """
+    if max_messages is None or len(messages) <= max_messages:
+        return messages
+    start = len(messages) - max_messages
+    while start < len(messages):
+        message = messages[start]
+        if message["role"] == "user" and not any(
+            "toolResult" in block for block in message["content"]
+        ):
+            break
+        start += 1
+    return messages[start:]
+
+
+@dataclasses.dataclass
+class StreamResult:
+    """
+    Outcome of a streamed response, available once the stream is consumed.
+
+    Attributes:
+        message: The complete assistant message, as appended to the history.
+        stop_reason: Why the model stopped (e.g., "end_turn", "tool_use").
+        usage: Token usage (``inputTokens``, ``outputTokens``, ...).
+        metrics: Server side metrics (``latencyMs``).
+    """
+
+    message: dict = dataclasses.field(default_factory=dict)
+    stop_reason: T.Optional[str] = None
+    usage: dict = dataclasses.field(default_factory=dict)
+    metrics: dict = dataclasses.field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return "".join(block.get("text", "") for block in self.message.get("content", []))
+
+
+class _MessageBuilder:
+    """
+    Assemble the assistant message from ``ConverseStream`` events.
+    """
+
+    def __init__(self):
+        self.result = StreamResult(message={"role": "assistant", "content": []})
+        self._block: T.Optional[dict] = None
+        self._tool_input: list[str] = []
+
+    def add(self, event: dict) -> T.Optional[str]:
+        """
+        Process one stream event.
+
+        Returns:
+            The text delta carried by the event, if any.
+        """
+        if "messageStart" in event:
+            self.result.message["role"] = event["messageStart"]["role"]
+        elif "contentBlockStart" in event:
+            tool_use = event["contentBlockStart"].get("start", {}).get("toolUse")
+            if tool_use is not None:
+                self._block = {"toolUse": {**tool_use, "input": {}}}
+                self._tool_input = []
+        elif "contentBlockDelta" in event:
+            delta = event["contentBlockDelta"]["delta"]
+            if "text" in delta:
+                if self._block is None:
+                    self._block = {"text": ""}
+                self._block["text"] += delta["text"]
+                return delta["text"]
+            if "toolUse" in delta:
+                self._tool_input.append(delta["toolUse"].get("input", ""))
+        elif "contentBlockStop" in event:
+            self._close_block()
+        elif "messageStop" in event:
+            self._close_block()
+            self.result.stop_reason = event["messageStop"].get("stopReason")
+        elif "metadata" in event:
+            self.result.usage = event["metadata"].get("usage", {})
+            self.result.metrics = event["metadata"].get("metrics", {})
+        return None
+
+    def _close_block(self):
+        if self._block is None:
+            return
+        if "toolUse" in self._block:
+            raw_input = "".join(self._tool_input)
+            self._block["toolUse"]["input"] = json.loads(raw_input) if raw_input else {}
+        self.result.message["content"].append(self._block)
+        self._block = None
+
+
+_DONE = object()
+
+
 @dataclasses.dataclass
 class ChatSession:
     """
@@ -52,11 +165,20 @@ class ChatSession:
     - Automatic conversation history management
     - Typed responses via boto3_dataclass
     - Simple interface for sending messages
+    - Streamed responses, as sync or async iterators of text deltas
+
+    A failed or abandoned turn is rolled back: the history is left as it was
+    before the turn.
 
     Attributes:
         client: The boto3 Bedrock Runtime client instance.
         model_id: The Bedrock model ID (e.g., "us.amazon.nova-micro-v1:0").
         system: Optional system prompt blocks that define AI behavior.
+        max_history_messages: History window, see :func:`apply_history_window`.
+            None keeps the whole conversation.
+        verbose: Log requests and responses to stderr.
+        log_max_chars: Requests and responses are truncated to this many
+            characters in the log.
 
     Example:
         >>> session = ChatSession(
@@ -66,6 +188,8 @@ class ChatSession:
         ... )
         >>> response = session.send_text_message("Hello!")
         >>> print(response.output.message.content[0].text)
+        >>> for text in session.stream_text_message("And in French?"):
+        ...     print(text, end="")
     """
 
     # Required: boto3 Bedrock Runtime client
@@ -74,16 +198,64 @@ class ChatSession:
     model_id: str = dataclasses.field()
     # Optional: System prompt defining AI behavior and context
     system: T.Sequence["SystemContentBlockTypeDef"] = dataclasses.field(default=OPT)
+    # Optional: Number of most recent messages kept in the history
+    max_history_messages: T.Optional[int] = dataclasses.field(default=None)
+    # Optional: Debug logging, off on the hot path
+    verbose: bool = dataclasses.field(default=False)
+    log_max_chars: int = dataclasses.field(default=2000)
 
     # Internal: Unique session identifier (can be overwritten for session continuity)
     _session_id: str = dataclasses.field(init=False)
     # Internal: Accumulated conversation history (user + assistant messages)
     _messages: list["MessageUnionTypeDef"] = dataclasses.field(init=False)
+    # Internal: Result of the last streamed response
+    last_stream_result: T.Optional[StreamResult] = dataclasses.field(init=False)
 
     def __post_init__(self):
         """Initialize internal state after dataclass construction."""
+        if self.max_history_messages is not None and self.max_history_messages < 1:
+            raise ValueError("max_history_messages must be at least 1")
         self._session_id = "abc"  # Default session ID, typically overwritten
         self._messages = []  # Start with empty conversation history
+        self.last_stream_result = None
+
+    @property
+    def messages(self) -> list["MessageUnionTypeDef"]:
+        """Conversation history (within the window)."""
+        return self._messages
+
+    def _log(self, title: str, data: T.Any):
+        """Log ``data`` as JSON, truncated to ``log_max_chars``, if verbose."""
+        if not self.verbose:
+            return
+        text = json.dumps(data, default=str, ensure_ascii=False)
+        if len(text) > self.log_max_chars:
+            text = f"{text[: self.log_max_chars]}... ({len(text)} chars)"
+        debug(f"----- {title}: {text}")
+
+    def _start_turn(self, messages: T.Sequence["MessageUnionTypeDef"]) -> tuple[int, dict]:
+        """
+        Append the new messages to the history and build the API request
+        parameters.
+
+        Returns:
+            The history length before the turn (to roll back) and the kwargs.
+        """
+        n_before = len(self._messages)
+        self._messages.extend(messages)
+        kwargs = dict(
+            modelId=self.model_id,
+            messages=self._messages,  # Full conversation history
+            system=self.system,  # System prompt (if any)
+        )
+        kwargs = remove_optional(**kwargs)  # Strip None/OPT values
+        self._log("Converse request", kwargs)
+        return n_before, kwargs
+
+    def _end_turn(self, message: dict):
+        """Append the AI's response to history and apply the history window."""
+        self._messages.append(message)
+        self._messages = apply_history_window(self._messages, self.max_history_messages)
 
     def send_message(
         self,
@@ -106,38 +278,128 @@ class ChatSession:
             ConverseResponse: Typed response with output text, usage stats, etc.
                              Access the response text via: response.output.message.content[0].text
         """
-        print("===== Send message")
+        n_before, kwargs = self._start_turn(messages)
+        try:
+            # Call Bedrock Converse API
+            response = self.client.converse(**kwargs)
+        except Exception:
+            del self._messages[n_before:]
+            raise
 
-        # Append new messages to conversation history
-        self._messages.extend(messages)
+        # Convert raw dict response to typed dataclass for better IDE support
+        response = boto3_dataclass_bedrock_runtime.caster.converse(response)
+        response.boto3_raw_data.pop("ResponseMetadata", None)
+        self._log("Converse response", response.boto3_raw_data)
 
-        # Build API request parameters
-        kwargs = dict(
-            modelId=self.model_id,
-            messages=self._messages,  # Full conversation history
-            system=self.system,  # System prompt (if any)
-        )
-        kwargs = remove_optional(**kwargs)  # Strip None/OPT values
+        # Append AI's response to history for multi-turn context
+        self._end_turn(response.output.message.boto3_raw_data)
 
-        # Debug: Print outgoing request
-        print("----- Converse kwargs:")
-        rprint(kwargs)
+        return response
 
-        # Call Bedrock Converse API
-        response = self.client.converse(**kwargs)
+    def stream_message(
+        self,
+        messages: T.Sequence["MessageUnionTypeDef"],
+    ) -> T.Iterator[str]:
+        """
+        Send message(s) to the AI and stream the response with the Bedrock
+        ConverseStream API.
 
-        # Convert raw dict response to typed dataclass for better IDE support
-        response = boto3_dataclass_bedrock_runtime.caster.converse(response)
+        The complete assistant message is appended to the history once the
+        stream is consumed, and is available with its stop reason and token
+        usage as :attr:`last_stream_result`. If the stream fails or is not
+        consumed to the end, the turn is rolled back.
 
-        # Debug: Print response (excluding metadata noise)
-        print("----- Converse response:")
-        del response.boto3_raw_data["ResponseMetadata"]
-        rprint(response.boto3_raw_data)
+        Args:
+            messages: List of message blocks to send.
 
-        # Append AI's response to history for multi-turn context
-        self._messages.append(response.output.message.boto3_raw_data)
+        Yields:
+            Text deltas of the response, as they arrive.
+        """
+        n_before, kwargs = self._start_turn(messages)
+        completed = False
+        try:
+            response = self.client.converse_stream(**kwargs)
+            builder = _MessageBuilder()
+            for event in response["stream"]:
+                text = builder.add(event)
+                if text:
+                    yield text
+            completed = True
+        finally:
+            if not completed:
+                del self._messages[n_before:]
+        self.last_stream_result = builder.result
+        self._log("ConverseStream response", dataclasses.asdict(builder.result))
+        self._end_turn(builder.result.message)
+
+    async def astream_message(
+        self,
+        messages: T.Sequence["MessageUnionTypeDef"],
+    ) -> T.AsyncIterator[str]:
+        """
+        Asyncio variant of :meth:`stream_message`. The blocking boto3 stream
+        is read in a worker thread, the event loop only awaits the deltas.
 
-        return response
+        Args:
+            messages: List of message blocks to send.
+
+        Yields:
+            Text deltas of the response, as they arrive.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            stream = self.stream_message(messages)
+            try:
+                for text in stream:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+            finally:
+                stream.close()  # rolls the turn back if it was abandoned
+
+        thread = threading.Thread(target=produce, name="chat-session-stream", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join)
+
+    async def asend_message(
+        self,
+        messages: T.Sequence["MessageUnionTypeDef"],
+    ) -> "ConverseResponse":
+        """
+        Asyncio variant of :meth:`send_message`, run in a worker thread.
+        """
+        return await asyncio.to_thread(self.send_message, messages)
+
+    @staticmethod
+    def _text_message(message: str) -> list["MessageUnionTypeDef"]:
+        """Wrap a string in the Bedrock user message format."""
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "text": message,
+                    },
+                ],
+            }
+        ]
 
     def send_text_message(
         self,
@@ -155,18 +417,21 @@ class ChatSession:
         Returns:
             ConverseResponse: The AI's response.
         """
-        return self.send_message(
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "text": message,
-                        },
-                    ],
-                }
-            ],
-        )
+        return self.send_message(messages=self._text_message(message))
+
+    def stream_text_message(self, message: str) -> T.Iterator[str]:
+        """
+        Convenience method to stream the response to a simple text message,
+        see :meth:`stream_message`.
+        """
+        return self.stream_message(messages=self._text_message(message))
+
+    def astream_text_message(self, message: str) -> T.AsyncIterator[str]:
+        """
+        Convenience method to stream the response to a simple text message
+        from asyncio code, see :meth:`astream_message`.
+        """
+        return self.astream_message(messages=self._text_message(message))
 
     def debug_response(self, response: "ConverseResponse") -> str:
         """
@@ -14,9 +14,17 @@ from ..db_schema.api import new_schema_info
 from ..db_schema.api import new_database_info
 from ..db_schema.api import encode_database_info
 from ..sql_utils import execute_and_print_result
+from ..bed_index import BedIndex
+from ..schedule_index import ScheduleIndex
+from ..slow_query_log import SlowQueryLog
+from ..migrations import MIGRATIONS_TABLE
+from ..ward_views import WardViews
+from ..latest_readings import PROJECTIONS
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .one_00_main import One
+    from ..result_sets import ResultSetRegistry
+    from ..result_cursors import ResultCursors
 
 
 class DbMixin:
@@ -62,6 +70,10 @@ class DbMixin:
             engine=self.engine,
             metadata=metadata,
             schema_name=None,
+            # migration bookkeeping is of no use to the agent
+            exclude=[MIGRATIONS_TABLE],
+            materialized_view_names=self.ward_views.names
+            + [projection.name for projection in PROJECTIONS],
         )
         database_info = new_database_info(
             name="healthcare_obstetrics_ward_scheduling_medium_data",
@@ -73,9 +85,60 @@ class DbMixin:
         database_info_str = encode_database_info(database_info=database_info)
         return database_info_str
 
-    def execute_and_print_result(self: "One", sql: str) -> str:
-        """Execute a SELECT query and return results as a Markdown table."""
+    @cached_property
+    def bed_index(self: "One") -> BedIndex:
+        """In-memory bed occupancy index, loaded on first use."""
+        return BedIndex(
+            engine=self.engine,
+            reconcile_interval=self.config.bed_index_reconcile_seconds,
+        )
+
+    @cached_property
+    def schedule_index(self: "One") -> ScheduleIndex:
+        """In-memory room / provider schedule index, loaded on first use."""
+        return ScheduleIndex(
+            engine=self.engine,
+            reconcile_interval=self.config.schedule_index_reconcile_seconds,
+        )
+
+    @cached_property
+    def slow_query_log(self: "One") -> SlowQueryLog:
+        """
+        Log of slow agent SQL queries. Only written to disk in the local
+        runtime (the serverless file system is read-only).
+        """
+        return SlowQueryLog(
+            threshold_seconds=self.config.slow_query_threshold_seconds,
+            path=path_enum.path_slow_query_log if runtime.is_local() else None,
+        )
+
+    @cached_property
+    def ward_views(self: "One") -> WardViews:
+        """Ward summary tables (``mv_*``) maintained on write."""
+        return WardViews(refresh_interval=self.config.ward_views_refresh_seconds)
+
+    def execute_and_print_result(
+        self: "One",
+        sql: str,
+        result_sets: T.Optional["ResultSetRegistry"] = None,
+        cursors: T.Optional["ResultCursors"] = None,
+    ) -> str:
+        """
+        Execute a SELECT query and return results as a Markdown table.
+
+        :param result_sets: Registry of the current chat request, the result
+            is registered in it to be cited by placeholder.
+        :param cursors: Cursors of the current chat. Results longer than
+            ``config.result_page_size`` rows are returned page by page.
+        """
+        if self.ward_views.is_referenced(sql):
+            # pick up writes made outside of this process
+            self.ward_views.maybe_refresh(self.engine)
         return execute_and_print_result(
             engine=self.engine,
             sql=sql,
+            slow_query_log=self.slow_query_log,
+            result_sets=result_sets,
+            cursors=cursors,
+            page_size=self.config.result_page_size,
         )
@@ -6,10 +6,13 @@ import typing as T
 from functools import cached_property
 
 import boto3
+from botocore.config import Config as BotocoreConfig
 
 if T.TYPE_CHECKING:  # pragma: no cover
     from .one_00_main import One
     from mypy_boto3_bedrock_runtime.client import BedrockRuntimeClient
+    from mypy_boto3_bedrock_runtime.type_defs import SystemContentBlockTypeDef
+    from ..multi_round_bedrock_runtime_chat_manager import ChatSession
 
 
 class Boto3Mixin:
@@ -24,6 +27,59 @@ class Boto3Mixin:
             aws_secret_access_key=self.config.aws_secret_access_key,
         )
 
+    @cached_property
+    def bedrock_client_config(self: "One") -> BotocoreConfig:
+        """
+        Connection settings of the Bedrock Runtime client: a connection pool
+        large enough for concurrent chats, TCP keepalive so idle pooled
+        connections survive between requests, adaptive retries (client side
+        rate limiting on throttling) and explicit timeouts.
+        """
+        return BotocoreConfig(
+            max_pool_connections=self.config.bedrock_max_pool_connections,
+            tcp_keepalive=True,
+            retries={
+                "mode": "adaptive",
+                "max_attempts": self.config.bedrock_max_attempts,
+            },
+            connect_timeout=self.config.bedrock_connect_timeout_seconds,
+            read_timeout=self.config.bedrock_read_timeout_seconds,
+            user_agent_extra="strands-agents",
+        )
+
+    @cached_property
     def bedrock_runtime_client(self: "One") -> "BedrockRuntimeClient":
-        """Get the Bedrock Runtime client for invoking models."""
-        return self.boto_ses.client("bedrock-runtime")
+        """
+        The Bedrock Runtime client for invoking models, created once and
+        shared by the agent's model and ``ChatSession`` so they reuse warm
+        connections. boto3 clients are thread safe.
+        """
+        return self.boto_ses.client(
+            "bedrock-runtime",
+            config=self.bedrock_client_config,
+        )
+
+    def new_chat_session(
+        self: "One",
+        system: T.Optional[T.Sequence["SystemContentBlockTypeDef"]] = None,
+        max_history_messages: T.Optional[int] = None,
+        verbose: bool = False,
+    ) -> "ChatSession":
+        """
+        Create a :class:`~obnexus.multi_round_bedrock_runtime_chat_manager.ChatSession`
+        for the configured model on the shared :attr:`bedrock_runtime_client`.
+
+        :param system: System prompt blocks.
+        :param max_history_messages: History window, None keeps the whole conversation.
+        :param verbose: Log requests and responses (truncated) to stderr.
+        """
+        from func_args.api import OPT
+        from ..multi_round_bedrock_runtime_chat_manager import ChatSession
+
+        return ChatSession(
+            client=self.bedrock_runtime_client,
+            model_id=self.config.model_id,
+            system=OPT if system is None else system,
+            max_history_messages=max_history_messages,
+            verbose=verbose,
+        )
@@ -3,64 +3,232 @@
 """AI Agent mixin for the One class."""
 
 import json
+import string
 import typing as T
-from datetime import datetime
+from datetime import datetime, timedelta, UTC
 from functools import cached_property
 
-from strands import Agent, tool
+from strands import Agent, ToolContext, tool
 from strands.models import BedrockModel
-from strands.models.openai import OpenAIModel
 
 from ..paths import path_enum
 from .. import write_operations
+from ..bed_index import format_beds
+from ..schedule_index import format_slots
+from ..tool_executor import ReadWriteToolExecutor
+from ..stage_timer import StageTimingHooks
+from ..tracing import TracingHooks
+from ..metrics import MetricsHooks
+from ..rate_limiter import RateLimiter, RateLimitHooks
+from ..model_router import ModelRouter, ModelRouterHooks, Route, ROUTE_LOOKUP, ROUTE_COMPLEX
+from ..failover_model import CircuitBreaker, Provider, FailoverModel
+from ..uuid_alias import AliasStore, UuidAliasHooks
+from ..result_cursors import CursorStore, fetch_more
 
 if T.TYPE_CHECKING:  # pragma: no cover
+    from strands.models.openai import OpenAIModel
     from .one_00_main import One
 
 
 class AgentMixin:
     """Mixin providing AI agent and tool definitions for database queries."""
 
-    @cached_property
-    def bedrock_model(self: "One") -> BedrockModel:
-        """Create a BedrockModel instance with configured model ID."""
-        return BedrockModel(
+    def new_bedrock_model(self: "One", model_id: str) -> BedrockModel:
+        """
+        Create a BedrockModel instance using the shared :attr:`bedrock_runtime_client`.
+        """
+        model = BedrockModel(
             boto_session=self.boto_ses,
-            model_id=self.config.model_id,
+            boto_client_config=self.bedrock_client_config,
+            model_id=model_id,
         )
+        # BedrockModel always creates its own client, replace it by the shared one
+        model.client = self.bedrock_runtime_client
+        return model
 
     @cached_property
-    def glm_model(self: "One") ->OpenAIModel:
+    def bedrock_model(self: "One") -> BedrockModel:
+        """Create a BedrockModel instance with configured model ID."""
+        return self.new_bedrock_model(self.config.model_id)
+
+    def new_glm_model(self: "One", model_id: str) -> "OpenAIModel":
+        """
+        Create an OpenAI-compatible model for GLM. The openai package is
+        imported here, it takes about a second to import.
+        """
+        from strands.models.openai import OpenAIModel
+
         return OpenAIModel(
             client_args={
                 "api_key": self.config.z_ai_api_key,
                 "base_url": "https://api.z.ai/api/paas/v4/"
             },
-            model_id=self.config.model_id,
+            model_id=model_id,
+        )
+
+    @cached_property
+    def glm_model(self: "One") -> "OpenAIModel":
+        """Create an OpenAI-compatible model for GLM with configured model ID."""
+        return self.new_glm_model(self.config.model_id)
+
+    def new_circuit_breaker(self: "One", name: str) -> CircuitBreaker:
+        return CircuitBreaker(
+            name=name,
+            failure_threshold=self.config.failover_failure_threshold,
+            reset_seconds=self.config.failover_reset_seconds,
+        )
+
+    @cached_property
+    def failover_provider(self: "One") -> T.Optional[Provider]:
+        """
+        GLM backend taking over when Bedrock is slow or failing, shared by
+        all failover models. None if ``config.failover_model_id`` or the
+        Z.AI API key is not set.
+        """
+        if not (self.config.failover_model_id and self.config.z_ai_api_key):
+            return None
+        return Provider(
+            name="glm",
+            model=self.new_glm_model(self.config.failover_model_id),
+            breaker=self.new_circuit_breaker("glm"),
+        )
+
+    def with_failover(self: "One", name: str, model):
+        """
+        Wrap ``model`` in a :class:`~obnexus.failover_model.FailoverModel`
+        hedging and failing over to :attr:`failover_provider`, if configured.
+        """
+        if self.failover_provider is None:
+            return model
+        return FailoverModel(
+            providers=[
+                Provider(name=name, model=model, breaker=self.new_circuit_breaker(name)),
+                self.failover_provider,
+            ],
+            first_token_seconds=self.config.failover_first_token_seconds,
         )
 
     @cached_property
     def model(self: "One"):
-        """Get the model instance (alias for bedrock_model)."""
-        return self.bedrock_model
+        """Get the model instance: bedrock_model, with GLM failover if configured."""
+        return self.with_failover("bedrock", self.bedrock_model)
         # return self.glm_model
 
+    @cached_property
+    def complex_model(self: "One"):
+        """
+        Model for writes and multi-step turns (``config.complex_model_id``),
+        the default model if not configured.
+        """
+        if self.config.complex_model_id in (None, self.config.model_id):
+            return self.model
+        return self.with_failover(
+            "bedrock_complex",
+            self.new_bedrock_model(self.config.complex_model_id),
+        )
+
+    @cached_property
+    def model_router(self: "One") -> ModelRouter:
+        """Pick the model of each agent turn, see :mod:`obnexus.model_router`."""
+        return ModelRouter(
+            routes=[
+                Route(
+                    name=ROUTE_LOOKUP,
+                    model=self.model,
+                    model_id=self.config.model_id,
+                ),
+                Route(
+                    name=ROUTE_COMPLEX,
+                    model=self.complex_model,
+                    model_id=self.config.complex_model_id or self.config.model_id,
+                ),
+            ],
+        )
+
+    @property
+    def read_only_tools(self: "One") -> list:
+        """Tools that never modify the database, safe to run concurrently."""
+        return [
+            self.tool_get_database_schema,
+            self.tool_execute_sql_query,
+            self.tool_fetch_more,
+            self.tool_suggest_alerts,
+            self.tool_find_available_beds,
+            self.tool_find_free_slots,
+        ]
+
+    @property
+    def write_tools(self: "One") -> list:
+        """Tools with side effects, always executed one at a time."""
+        return [
+            self.tool_write_debug_report,
+            self.tool_assign_bed,
+            self.tool_update_prediction,
+            self.tool_refresh_los_predictions,
+            self.tool_create_alert,
+            self.tool_create_order,
+        ]
+
+    @cached_property
+    def tool_executor(self: "One") -> ReadWriteToolExecutor:
+        """Run independent read-only tool calls in parallel, write tools serially."""
+        return ReadWriteToolExecutor(
+            read_only_tool_names=[tool.tool_name for tool in self.read_only_tools],
+            max_workers=self.config.max_tool_workers,
+        )
+
+    @cached_property
+    def rate_limiter(self: "One") -> RateLimiter:
+        """Client-side model RPM / TPM limiter, shared by all chat sessions."""
+        return RateLimiter(
+            requests_per_minute=self.config.model_requests_per_minute,
+            tokens_per_minute=self.config.model_tokens_per_minute,
+            max_wait_seconds=self.config.model_rate_limit_max_wait_seconds,
+        )
+
+    @cached_property
+    def alias_store(self: "One") -> AliasStore:
+        """Per chat UUID alias tables, see :mod:`obnexus.uuid_alias`."""
+        return AliasStore(max_sessions=self.config.uuid_alias_max_sessions)
+
+    @cached_property
+    def cursor_store(self: "One") -> CursorStore:
+        """Per chat query result cursors, see :mod:`obnexus.result_cursors`."""
+        return CursorStore(
+            max_sessions=self.config.result_cursor_max_sessions,
+            ttl_seconds=self.config.result_cursor_ttl_seconds,
+            max_rows=self.config.result_cursor_max_rows,
+        )
+
+    @cached_property
+    def system_prompt(self: "One") -> str:
+        """
+        The agent's system prompt, with the ``$name`` placeholders of
+        ``bi-agent-system-prompt.md`` filled in from the config.
+        """
+        template = string.Template(path_enum.path_bi_agent_system_prompt_content)
+        return template.substitute(
+            retention_days=self.config.retention_days,
+        )
+
     @cached_property
     def agent(self: "One") -> Agent:
         """Create an Agent instance with the configured model."""
         return Agent(
             model=self.model,
-            system_prompt=path_enum.path_bi_agent_system_prompt_content,
+            system_prompt=self.system_prompt,
             tools=[
-                # Read-only tools
-                self.tool_get_database_schema,
-                self.tool_execute_sql_query,
-                self.tool_write_debug_report,
-                # Write operation tools
-                self.tool_assign_bed,
-                self.tool_update_prediction,
-                self.tool_create_alert,
-                self.tool_create_order,
+                *self.read_only_tools,
+                *self.write_tools,
+            ],
+            tool_executor=self.tool_executor,
+            hooks=[
+                StageTimingHooks(),
+                TracingHooks(),
+                MetricsHooks(),
+                RateLimitHooks(self.rate_limiter),
+                ModelRouterHooks(self.model_router),
+                UuidAliasHooks(),
             ],
         )
 
@@ -87,15 +255,17 @@ class AgentMixin:
         Returns:
             A string containing the encoded database schema in compact format.
         """
-        return self.database_info_str
+        return self.database_schema_str
 
     @tool(
         name="execute_sql_query",
+        context=True,
     )
     def tool_execute_sql_query(
         # self: "One",  # keep for IDE type hints, strands @tool doesn't support typed self
         self,  # uncomment this and comment above when running with strands
         sql: str,
+        tool_context: ToolContext,
     ) -> str:
         """
         Execute a SQL SELECT query and return results as a Markdown table.
@@ -109,7 +279,14 @@ class AgentMixin:
             sql: A valid SQL SELECT query string to execute.
 
         Returns:
-            - On success: A Markdown-formatted table with query results
+            - On success: A Markdown-formatted table with query results,
+              preceded by a line like "[Result set {{table:1}}: 12 rows]".
+              Write the placeholder {{table:1}} in your answer to show the
+              table to the nurse instead of copying its rows.
+            - Long results: only the first page of rows, followed by a
+              cursor line like "[Cursor C1: 114 more rows. ...]". Call
+              fetch_more with the cursor to get more rows, do not re-run
+              the query with LIMIT / OFFSET.
             - If no rows match: "No result"
             - On error: An error message describing what went wrong
 
@@ -117,8 +294,165 @@ class AgentMixin:
             Only SELECT queries are supported. Use get_database_schema first to
             understand available tables and columns before constructing queries.
         """
-        return self.execute_and_print_result(sql=sql)
+        return self.execute_and_print_result(
+            sql=sql,
+            result_sets=tool_context.invocation_state.get("result_sets"),
+            cursors=tool_context.invocation_state.get("result_cursors"),
+        )
+
+    @tool(
+        name="fetch_more",
+        context=True,
+    )
+    def tool_fetch_more(
+        self,
+        cursor: str,
+        tool_context: ToolContext,
+        n: int = 20,
+    ) -> str:
+        """
+        Get the next rows of a long execute_sql_query result.
 
+        The rows come from the result kept by the cursor, the query is not
+        executed again. Cursors expire after some minutes without use; then
+        run the query again.
+
+        Args:
+            cursor: Cursor handle from the execute_sql_query result (e.g., "C1").
+            n: Number of rows to get. Default: 20.
+
+        Returns:
+            A Markdown table of the next rows, like execute_sql_query, followed
+            by the cursor line if rows are left, or an error message.
+        """
+        cursors = tool_context.invocation_state.get("result_cursors")
+        if cursors is None:
+            return "Error: no open cursors, run the query again"
+        return fetch_more(
+            cursors=cursors,
+            cursor_id=cursor,
+            n=n,
+            result_sets=tool_context.invocation_state.get("result_sets"),
+        )
+
+    @tool(
+        name="suggest_alerts",
+    )
+    def tool_suggest_alerts(
+        self,
+    ) -> str:
+        """
+        Scan the vital signs of all current patients and suggest high-risk alerts.
+
+        This tool checks every non-discharged admission in one pass, using fixed
+        clinical thresholds and trends over the last 3 readings:
+        - Blood pressure: >= 140/90 warning, >= 160/110 critical, or rising trend
+        - Fetal heart rate: outside 110-160 bpm warning, outside 100-180 critical
+        - Temperature: >= 38.0 C warning, >= 39.0 C critical, or rising trend
+        - SpO2: <= 95% warning, <= 92% critical, or falling trend
+
+        Patients that already have an unacknowledged alert of the same type are
+        skipped. Use this tool instead of querying raw vital_sign rows when the
+        nurse asks who needs special attention or monitoring.
+
+        Returns:
+            JSON string with a list of candidate alerts. Each candidate has
+            admission_id, alert_type, severity and message, and can be passed
+            as-is to create_alert after the nurse confirms.
+        """
+        # numpy based, imported on first use to keep it off the cold start path
+        from ..vital_trends import scan_ward
+
+        candidates = scan_ward(engine=self.engine)
+        return json.dumps(
+            {
+                "success": True,
+                "candidates": [candidate.to_dict() for candidate in candidates],
+            }
+        )
+
+    @tool(
+        name="find_available_beds",
+    )
+    def tool_find_available_beds(
+        self,
+        room_type: T.Optional[str] = None,
+        floor: T.Optional[int] = None,
+    ) -> str:
+        """
+        Find available beds, optionally filtered by room type and floor.
+
+        This tool answers from an in-memory bed index that is kept in sync
+        with the database, so it is much faster than querying the bed and
+        room tables with SQL. Use it whenever the nurse asks about bed
+        availability, or before calling assign_bed.
+
+        Args:
+            room_type: Optional room type filter. One of: "triage", "labor",
+                "delivery", "postpartum", "nicu". Leave empty for all room types.
+            floor: Optional floor number filter. Leave empty for all floors.
+
+        Returns:
+            A Markdown table of available beds (bed_id, bed_label, room_number,
+            room_type, floor, status) followed by the number of available and
+            occupied beds per room type, or "No result" if no bed matches.
+        """
+        beds = self.bed_index.find_available(room_type=room_type, floor=floor)
+        lines = [format_beds(beds), "", "Beds per room type:"]
+        for name, counts in self.bed_index.summary().items():
+            counts_text = ", ".join(f"{status}={n}" for status, n in counts.items())
+            lines.append(f"- {name}: {counts_text}")
+        return "\n".join(lines)
+
+    @tool(
+        name="find_free_slots",
+    )
+    def tool_find_free_slots(
+        self,
+        order_type: str = "consult",
+        provider_id: T.Optional[str] = None,
+        room_id: T.Optional[str] = None,
+        after: T.Optional[str] = None,
+        n: int = 5,
+    ) -> str:
+        """
+        Find the next open time windows for a provider and/or a room.
+
+        This tool answers from an in-memory schedule index of all open orders
+        and provider shifts. A window is open when neither the provider nor
+        the room is booked for another order, and (if the provider has shifts
+        on record) the provider is on duty. Use it before calling create_order
+        to propose a time that does not double book anyone.
+
+        Args:
+            order_type: Type of order to schedule, decides the minimum window
+                length. One of: "c_section" (120 min), "induction" (60 min),
+                "epidural" (30 min), "lab_test" (15 min), "medication" (15 min),
+                "consult" (30 min). Default: "consult".
+            provider_id: Optional UUID of the provider who must be free.
+            room_id: Optional UUID of the room that must be free.
+            after: Earliest start in ISO format (e.g., "2024-01-15T09:00:00").
+                Defaults to now (UTC).
+            n: Maximum number of windows to return. Default: 5.
+
+        Returns:
+            A Markdown table of open windows (start, end, minutes), in
+            chronological order, or "No result" if nothing is open in the
+            next 7 days.
+        """
+        if after:
+            after_dt = datetime.fromisoformat(after)
+        else:
+            after_dt = datetime.now(UTC)
+        slots = self.schedule_index.find_free_slots(
+            after=after_dt,
+            order_type=order_type,
+            provider_id=provider_id,
+            room_id=room_id,
+            n=n,
+            horizon=timedelta(days=7),
+        )
+        return format_slots(slots)
 
     @tool(
         name="write_debug_report",
@@ -192,7 +526,9 @@ class AgentMixin:
                 engine=self.engine,
                 admission_id=admission_id,
                 bed_id=bed_id,
+                ward_views=self.ward_views,
             )
+            self.bed_index.apply_assignment(admission_id=admission_id, bed_id=bed_id)
             return json.dumps(result)
         except ValueError as e:
             return json.dumps({"success": False, "error": str(e)})
@@ -237,6 +573,37 @@ class AgentMixin:
         except ValueError as e:
             return json.dumps({"success": False, "error": str(e)})
 
+    @tool(name="refresh_los_predictions")
+    def tool_refresh_los_predictions(
+        self,
+    ) -> str:
+        """
+        Re-estimate the length of stay (LOS) of ALL current patients at once.
+
+        Use this tool when:
+        - Nurse asks to refresh or recalculate discharge predictions for the ward
+        - Nurse asks "when will beds free up?" and predictions are missing or stale
+
+        The tool uses a statistical model trained on past discharged admissions
+        (features: age, gravida/para, gestational weeks, twins, risk level,
+        complications, delivery method, cervical dilation) and updates
+        predicted_los_hours and predicted_discharge_time of every non-discharged
+        admission in a single transaction. Use update_prediction instead when
+        the nurse gives a specific estimate for one patient.
+
+        Returns:
+            JSON string with success status, number of updated admissions and
+            the new prediction of each admission.
+        """
+        # numpy based, imported on first use to keep it off the cold start path
+        from ..los_model import refresh_predictions
+
+        try:
+            result = refresh_predictions(engine=self.engine)
+            return json.dumps(result)
+        except ValueError as e:
+            return json.dumps({"success": False, "error": str(e)})
+
     @tool(name="create_alert")
     def tool_create_alert(
         self,
@@ -255,7 +622,7 @@ class AgentMixin:
 
         Args:
             admission_id: The UUID of the admission record.
-            alert_type: Type of alert. Must be one of: "high_bp", "abnormal_fhr", "fever", "preterm_risk".
+            alert_type: Type of alert. Must be one of: "high_bp", "abnormal_fhr", "fever", "low_spo2", "preterm_risk".
             severity: Severity level. Must be one of: "warning", "critical".
             message: Descriptive message explaining the alert (e.g., "BP rising trend: 130 -> 138 -> 145").
 
@@ -274,6 +641,7 @@ class AgentMixin:
                 alert_type=alert_type,
                 severity=severity,
                 message=message,
+                ward_views=self.ward_views,
             )
             return json.dumps(result)
         except ValueError as e:
@@ -309,6 +677,9 @@ class AgentMixin:
 
         Returns:
             JSON string with success status, message, and order_id, or error details.
+            Orders that overlap an existing order of the same provider or room
+            are rejected with a "Scheduling conflict" error; use find_free_slots
+            to pick another time.
 
         Example user requests that trigger this tool:
         - "Schedule a C-section for patient Wang tomorrow at 9am"
@@ -326,6 +697,7 @@ class AgentMixin:
                 priority=priority,
                 assigned_room_id=assigned_room_id,
                 notes=notes,
+                schedule_index=self.schedule_index,
             )
             return json.dumps(result)
         except ValueError as e:
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+Monthly range partitioning of the time-series tables on Postgres.
+
+``vital_sign`` and ``labor_progress`` grow with every monitor reading.
+On Postgres they are created as declarative partitioned tables
+(``PARTITION BY RANGE (recorded_at)``) with one partition per month, e.g.
+``vital_sign_y2024m01``, plus a ``_default`` partition catching anything
+outside the created months. Queries filtering on ``recorded_at`` only scan the
+matching months, and indexes created on the parent (see
+:mod:`obnexus.migrations`) are created on every partition.
+
+Postgres requires the partition key in the primary key, so the partitioned
+tables use ``(<id>, recorded_at)`` as primary key.
+
+Partitions are created by :func:`obnexus.tests.db_sync.sync_sqlite_to_postgres`
+for the months present in the data, and ahead of time by
+``scripts/run_retention.py``. Keep the default partition empty: Postgres
+refuses to create a month's partition while the default partition holds rows
+of that month.
+
+SQLite has no partitioning; there, old readings of discharged admissions are
+moved to archive tables instead (see :mod:`obnexus.retention`).
+"""
+
+import typing as T
+from datetime import datetime
+
+import sqlalchemy as sa
+
+#: Partitioned table -> partition key column.
+PARTITIONED_TABLES: dict[str, str] = {
+    "vital_sign": "recorded_at",
+    "labor_progress": "recorded_at",
+}
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def next_month(dt: datetime) -> datetime:
+    if dt.month == 12:
+        return datetime(dt.year + 1, 1, 1)
+    return datetime(dt.year, dt.month + 1, 1)
+
+
+def iter_months(start: datetime, end: datetime) -> T.Iterator[datetime]:
+    """First day of every month from ``start``'s month to ``end``'s month, inclusive."""
+    month = month_start(start)
+    while month <= end:
+        yield month
+        month = next_month(month)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def create_partition_sql(table: str, month: datetime) -> str:
+    start = month_start(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, start)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{next_month(start):%Y-%m-%d}')"
+    )
+
+
+def create_default_partition_sql(table: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+def ensure_partitions(
+    engine: "sa.Engine",
+    start: datetime,
+    end: datetime,
+    tables: T.Iterable[str] = tuple(PARTITIONED_TABLES),
+) -> list[str]:
+    """
+    Create the monthly partitions covering ``start`` to ``end`` (and the
+    default partition) for each table. Existing partitions are kept.
+
+    :return: Names of the partitions, existing or created.
+    :raises ValueError: If the database is not Postgres.
+    """
+    if engine.dialect.name != "postgresql":
+        raise ValueError(f"Partitioning requires Postgres, got: {engine.dialect.name}")
+    names = []
+    with engine.begin() as conn:
+        for table in tables:
+            for month in iter_months(start, end):
+                conn.execute(sa.text(create_partition_sql(table, month)))
+                names.append(partition_name(table, month))
+            conn.execute(sa.text(create_default_partition_sql(table)))
+    return names
+
+
+def get_partitions(engine: "sa.Engine", table: str) -> list[str]:
+    """Names of the partitions of ``table`` (Postgres), sorted."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            sa.text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table"
+            ),
+            {"table": table},
+        ).fetchall()
+    return sorted(row[0] for row in rows)
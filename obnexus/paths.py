@@ -45,6 +45,8 @@ class PathEnum:
 
     dir_tmp = dir_project_root / "tmp"
     path_sqlite_db = dir_tmp / "data.sqlite"
+    dir_sessions = dir_tmp / "sessions"
+    path_slow_query_log = dir_tmp / "slow-queries.jsonl"
 
 
 path_enum = PathEnum()
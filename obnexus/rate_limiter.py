@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+"""
+Client-side rate limiting of model calls.
+
+Bedrock enforces requests-per-minute (RPM) and tokens-per-minute (TPM)
+quotas. When they are exceeded it throttles, and botocore's retries turn the
+throttling into long, unpredictable waits. :class:`RateLimiter` keeps the
+process below the quotas instead: every model call reserves one request and
+its estimated tokens before it is sent, and waits until the reservation fits.
+
+Each quota is a token bucket refilled continuously at ``limit / 60`` per
+second, with a burst of one minute's worth. A reservation may drive the
+bucket negative; the caller then sleeps until the bucket is back at zero.
+Reservations are served in arrival order, so sessions share the quota fairly,
+and a call that would wait longer than ``max_wait_seconds`` is shed right away
+instead of joining the queue, which bounds the tail latency.
+
+Token counts are estimated before the call (prompt size plus an expected
+output size) and corrected with the actual usage afterwards.
+:class:`RateLimitHooks` wires this into the Strands agent, and the wait time,
+queue length and shed calls are exported as metrics. A shed call raises
+:class:`RateLimitExceeded` out of the agent call (see :func:`is_shed`); the API answers with
+:data:`SHED_MESSAGE` then.
+"""
+
+import json
+import time
+import typing as T
+import threading
+
+from strands.hooks import (
+    HookRegistry,
+    BeforeModelCallEvent,
+    AfterInvocationEvent,
+)
+
+from . import metrics
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from strands import Agent
+
+model_rate_limit_wait_seconds = metrics.registry.histogram(
+    "obnexus_model_rate_limit_wait_seconds",
+    "Time model calls waited for the client-side rate limiter, in seconds.",
+)
+model_rate_limit_waiting = metrics.registry.gauge(
+    "obnexus_model_rate_limit_waiting",
+    "Model calls currently waiting for the client-side rate limiter.",
+)
+model_rate_limit_shed_total = metrics.registry.counter(
+    "obnexus_model_rate_limit_shed_total",
+    "Model calls rejected because the rate limiter wait would be too long.",
+)
+
+#: Message returned to the user when a model call is shed.
+SHED_MESSAGE = "The assistant is handling too many requests right now, please try again in a moment."
+
+
+class RateLimitExceeded(Exception):
+    """The call would wait longer than the limiter allows."""
+
+
+def is_shed(error: BaseException) -> bool:
+    """
+    True if ``error`` is a :class:`RateLimitExceeded`, or was caused by one.
+    Strands wraps errors raised after the first model call of an invocation
+    in an ``EventLoopException``.
+    """
+    while error is not None:
+        if isinstance(error, RateLimitExceeded):
+            return True
+        error = error.__cause__
+    return False
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``per_minute / 60`` per second, holding at most
+    ``per_minute``. The level may go negative while calls are queued.
+
+    :param per_minute: Quota per minute.
+    :param now: Current clock value.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self.updated_at = now
+
+    def refill(self, now: float):
+        elapsed = max(0.0, now - self.updated_at)
+        self.level = min(self.per_minute, self.level + elapsed * self.per_minute / 60)
+        self.updated_at = now
+
+    def wait_after(self, cost: float) -> float:
+        """Seconds until the level is back at zero once ``cost`` is taken."""
+        level = self.level - cost
+        return 0.0 if level >= 0 else -level * 60 / self.per_minute
+
+
+class RateLimiter:
+    """
+    Shared requests / tokens per minute limiter.
+
+    :param requests_per_minute: Request quota. ``0`` disables it.
+    :param tokens_per_minute: Token quota (input + output). ``0`` disables it.
+    :param max_wait_seconds: Calls that would wait longer are shed with
+        :class:`RateLimitExceeded`.
+    :param clock: Monotonic clock, replaceable in tests.
+    :param sleep: Sleep function, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_wait_seconds: float = 20,
+        clock: T.Callable[[], float] = time.monotonic,
+        sleep: T.Callable[[float], None] = time.sleep,
+    ):
+        self.max_wait_seconds = max_wait_seconds
+        self.clock = clock
+        self.sleep = sleep
+        now = clock()
+        self.requests = TokenBucket(requests_per_minute, now) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, now) if tokens_per_minute else None
+        self._lock = threading.Lock()
+
+    @property
+    def buckets(self) -> list[tuple[TokenBucket, str]]:
+        return [
+            (bucket, kind)
+            for bucket, kind in [(self.requests, "requests"), (self.tokens, "tokens")]
+            if bucket is not None
+        ]
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve one request and ``tokens`` tokens.
+
+        :return: Seconds to wait before sending the call.
+        :raises RateLimitExceeded: If the wait would exceed ``max_wait_seconds``;
+            nothing is reserved then.
+        """
+        with self._lock:
+            now = self.clock()
+            costs = {"requests": 1, "tokens": tokens}
+            wait = 0.0
+            for bucket, kind in self.buckets:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_after(costs[kind]))
+            if wait > self.max_wait_seconds:
+                raise RateLimitExceeded(
+                    f"Rate limit wait of {wait:.1f} s exceeds {self.max_wait_seconds} s"
+                )
+            for bucket, kind in self.buckets:
+                bucket.level -= costs[kind]
+            return wait
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Reserve a call and wait until it may be sent.
+
+        :return: Seconds waited.
+        :raises RateLimitExceeded: If the call is shed.
+        """
+        try:
+            wait = self.reserve(tokens)
+        except RateLimitExceeded:
+            model_rate_limit_shed_total.inc()
+            raise
+        if wait > 0:
+            model_rate_limit_waiting.inc()
+            try:
+                self.sleep(wait)
+            finally:
+                model_rate_limit_waiting.dec()
+        model_rate_limit_wait_seconds.observe(wait)
+        return wait
+
+    def adjust(self, tokens: int):
+        """
+        Correct a reservation with the actual usage: ``tokens`` more (or,
+        if negative, fewer) tokens than estimated were used.
+        """
+        if self.tokens is None or not tokens:
+            return
+        with self._lock:
+            self.tokens.refill(self.clock())
+            self.tokens.level = min(self.tokens.per_minute, self.tokens.level - tokens)
+
+
+def estimate_input_tokens(messages: T.Sequence[dict], system_prompt: T.Optional[str] = None) -> int:
+    """Rough token count of a prompt: about 4 characters per token."""
+    n_chars = len(json.dumps(messages, default=str, ensure_ascii=False))
+    if system_prompt:
+        n_chars += len(system_prompt)
+    return n_chars // 4 + 1
+
+
+class RateLimitHooks:
+    """
+    Strands hook provider putting every model call of the agent through a
+    :class:`RateLimiter`. A shed call raises :class:`RateLimitExceeded` from
+    the hook, which aborts the agent call.
+
+    Strands adds a call's token usage to the agent's metrics only after the
+    call's own events, so each reservation is corrected with the actual usage
+    when the next call is reserved, or when the invocation ends.
+
+    :param limiter: The shared limiter.
+    :param expected_output_tokens: Output tokens reserved per call before the
+        actual usage is known.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        expected_output_tokens: int = 500,
+    ):
+        self.limiter = limiter
+        self.expected_output_tokens = expected_output_tokens
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: T.Any):
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(AfterInvocationEvent, self.after_invocation)
+
+    def settle(self, agent: "Agent", invocation_state: dict):
+        """Correct the invocation's pending reservation with the tokens actually used."""
+        reserved = invocation_state.pop("_rate_limit_tokens", None)
+        usage_before = invocation_state.pop("_rate_limit_usage", None)
+        if reserved is None or usage_before is None:
+            return
+        usage = metrics.usage_since(agent, usage_before)
+        used = usage.get("inputTokens", 0) + usage.get("outputTokens", 0)
+        if used:
+            self.limiter.adjust(used - reserved)
+
+    def before_model_call(self, event: BeforeModelCallEvent):
+        self.settle(event.agent, event.invocation_state)
+        input_tokens = estimate_input_tokens(
+            event.agent.messages,
+            getattr(event.agent, "system_prompt", None),
+        )
+        tokens = input_tokens + self.expected_output_tokens
+        self.limiter.acquire(tokens)
+        event.invocation_state["_rate_limit_tokens"] = tokens
+        event.invocation_state["_rate_limit_usage"] = metrics.get_usage(event.agent)
+
+    def after_invocation(self, event: AfterInvocationEvent):
+        self.settle(event.agent, event.invocation_state)
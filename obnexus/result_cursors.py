@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+"""
+Stateful result cursors for paging through large query results.
+
+Without cursors the agent either pulls every row of a large result into its
+context, or pages with ``LIMIT`` / ``OFFSET``, which re-runs the full query
+for every page. Instead, ``execute_sql_query`` returns the first page of a
+long result together with a cursor handle::
+
+    [Cursor C1: 114 more rows. Call fetch_more(cursor="C1", n=20) for the next rows.]
+
+The remaining rows are kept in memory, and the ``fetch_more`` tool returns
+the next ``n`` of them without touching the database. The whole kept result is
+registered as one result set (see :mod:`obnexus.result_sets`), and
+``fetch_more`` pages cite that same set; in a later request, whose registry
+does not have it, the rows left are registered once more.
+
+Cursors belong to a chat (:class:`ResultCursors`), since the nurse may ask
+for "the next ones" in the following request. They are bounded in every
+dimension: rows per cursor, cursors per chat (oldest evicted), idle time
+(``ttl_seconds`` since the last fetch) and chats in the :class:`CursorStore`
+(least recently used evicted). Expired cursors of every chat are released
+whenever the store is accessed, not only when their own chat comes back. The
+API passes the chat's cursors to the agent in
+``invocation_state["result_cursors"]``.
+"""
+
+import time
+import typing as T
+import threading
+import dataclasses
+from collections import OrderedDict
+
+from .sql_utils import format_page
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .result_sets import ResultSet, ResultSetRegistry
+
+
+@dataclasses.dataclass
+class ResultCursor:
+    """
+    Rows of a query result not returned yet.
+
+    :param cursor_id: Handle given to the model, e.g. ``C1``.
+    :param sql: The query that produced the rows.
+    :param columns: Column names.
+    :param records: Remaining rows, in order.
+    :param offset: Number of rows of the result returned before ``records``.
+    :param truncated: True if rows beyond the cursor's row limit were dropped.
+    :param accessed_at: Clock value of the last access, for the TTL.
+    :param result_set: Result set holding the cursor's rows, cited by its pages.
+    """
+
+    cursor_id: str
+    sql: str
+    columns: list[str]
+    records: list[T.Sequence[T.Any]]
+    offset: int
+    truncated: bool = False
+    accessed_at: float = 0.0
+    result_set: T.Optional["ResultSet"] = None
+
+    def describe(self, page_size: int) -> str:
+        """Line appended to a page, telling the model how to get the rest."""
+        if not self.records:
+            return "[No more rows.]"
+        text = (
+            f"[Cursor {self.cursor_id}: {len(self.records)} more rows. "
+            f'Call fetch_more(cursor="{self.cursor_id}", n={page_size}) for the next rows.'
+        )
+        if self.truncated:
+            text += " Only these rows are kept, narrow the query to see the others."
+        return text + "]"
+
+
+@dataclasses.dataclass
+class ResultPage:
+    """
+    Rows returned by :meth:`ResultCursors.fetch`.
+
+    :param cursor: The cursor, with the rows left after this page.
+    :param records: The page's rows.
+    :param start: 1-based row number of the first row in the full result.
+    """
+
+    cursor: ResultCursor
+    records: list[T.Sequence[T.Any]]
+    start: int
+
+
+class ResultCursors:
+    """
+    Open cursors of one chat.
+
+    :param ttl_seconds: A cursor not fetched for this long expires.
+    :param max_cursors: Maximum open cursors; opening one more closes the oldest.
+    :param max_rows: Maximum rows kept per cursor.
+    :param clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        max_cursors: int = 20,
+        max_rows: int = 5000,
+        clock: T.Callable[[], float] = time.monotonic,
+    ):
+        if max_cursors < 1:
+            raise ValueError("max_cursors must be at least 1")
+        self.ttl_seconds = ttl_seconds
+        self.max_cursors = max_cursors
+        self.max_rows = max_rows
+        self.clock = clock
+        self._cursors: OrderedDict[str, ResultCursor] = OrderedDict()
+        self._n_opened = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge()
+            return len(self._cursors)
+
+    def purge(self):
+        """Close the expired cursors."""
+        with self._lock:
+            self._purge()
+
+    def _purge(self):
+        now = self.clock()
+        for cursor_id in [
+            cursor_id
+            for cursor_id, cursor in self._cursors.items()
+            if now - cursor.accessed_at >= self.ttl_seconds
+        ]:
+            del self._cursors[cursor_id]
+
+    def open(
+        self,
+        sql: str,
+        columns: T.Sequence[str],
+        records: T.Sequence[T.Sequence[T.Any]],
+        offset: int,
+    ) -> ResultCursor:
+        """
+        Keep the rows of a result after the first ``offset`` (already returned).
+        """
+        with self._lock:
+            self._purge()
+            self._n_opened += 1
+            cursor = ResultCursor(
+                cursor_id=f"C{self._n_opened}",
+                sql=sql,
+                columns=list(columns),
+                records=list(records[: self.max_rows]),
+                offset=offset,
+                truncated=len(records) > self.max_rows,
+                accessed_at=self.clock(),
+            )
+            self._cursors[cursor.cursor_id] = cursor
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+            return cursor
+
+    def fetch(self, cursor_id: str, n: int) -> ResultPage:
+        """
+        Take the next ``n`` rows of a cursor. An exhausted cursor is closed.
+
+        :raises ValueError: If the cursor is unknown or expired, or ``n`` < 1.
+        """
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got: {n}")
+        with self._lock:
+            self._purge()
+            cursor = self._cursors.get(cursor_id.strip())
+            if cursor is None:
+                raise ValueError(
+                    f"Cursor {cursor_id!r} is unknown or expired, run the query again"
+                )
+            records = cursor.records[:n]
+            cursor.records = cursor.records[n:]
+            start = cursor.offset + 1
+            cursor.offset += len(records)
+            cursor.accessed_at = self.clock()
+            if not cursor.records:
+                del self._cursors[cursor.cursor_id]
+            return ResultPage(cursor=cursor, records=records, start=start)
+
+
+class CursorStore:
+    """
+    Cursors of the most recent ``max_sessions`` chats.
+
+    :param max_sessions: Chats kept, least recently used evicted.
+    :param kwargs: Arguments of each chat's :class:`ResultCursors`.
+    """
+
+    def __init__(self, max_sessions: int = 1000, **kwargs: T.Any):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.max_sessions = max_sessions
+        self.kwargs = kwargs
+        self._sessions: OrderedDict[str, ResultCursors] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> ResultCursors:
+        """
+        Cursors of a chat, created if needed. Expired cursors of all chats
+        are closed on the way, so idle chats do not hold on to their rows.
+        """
+        with self._lock:
+            for other in self._sessions.values():
+                other.purge()
+            cursors = self._sessions.get(session_id)
+            if cursors is None:
+                cursors = self._sessions[session_id] = ResultCursors(**self.kwargs)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return cursors
+
+
+def fetch_more(
+    cursors: ResultCursors,
+    cursor_id: str,
+    n: int,
+    result_sets: T.Optional["ResultSetRegistry"] = None,
+) -> str:
+    """
+    Next ``n`` rows of a cursor, formatted like the first page, or an error message.
+    """
+    try:
+        page = cursors.fetch(cursor_id, n)
+    except ValueError as e:
+        return f"Error: {e}"
+    cursor = page.cursor
+    result_set = None
+    if result_sets is not None and page.records:
+        result_set = cursor.result_set
+        if result_set is None or result_sets.get(result_set.number) is not result_set:
+            # a later request: register this page and the rows left, once
+            result_set = result_sets.add(
+                sql=cursor.sql,
+                columns=cursor.columns,
+                records=[*page.records, *cursor.records],
+            )
+            cursor.result_set = result_set
+    return format_page(
+        columns=cursor.columns,
+        records=page.records,
+        start=page.start,
+        cursor=cursor,
+        page_size=n,
+        result_set=result_set,
+    )
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+Numbered result sets, cited by placeholder in the agent's answer.
+
+When the nurse asks for a list ("show all current patients"), the agent
+fetches a table with ``execute_sql_query`` and then used to retype it token by
+token in its answer: thousands of output tokens, the slowest part of the
+turn. Instead, every non-empty query result is registered in the request's
+:class:`ResultSetRegistry` under a number, and the tool result tells the
+model how to cite it::
+
+    [Result set {{table:1}}: 12 rows]
+
+The model writes ``{{table:1}}`` where the table belongs, and
+:func:`obnexus.ai_sdk_adapter.ai_sdk_message_with_reasoning_generator` streams
+the stored rows to the UI as a ``data-table`` part in place of the
+placeholder. :func:`render_answer` expands placeholders into Markdown tables
+for text-only consumers.
+
+The registry lives for one chat request: the API passes it to the agent in
+``invocation_state["result_sets"]``.
+"""
+
+import re
+import typing as T
+import threading
+import dataclasses
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from .sql_utils import format_records
+
+#: Placeholder citing a result set in the answer, e.g. ``{{table:3}}``.
+PLACEHOLDER_PATTERN = re.compile(r"\{\{table:(\d+)\}\}")
+
+
+def placeholder(number: int) -> str:
+    return "{{table:%d}}" % number
+
+
+def to_json_value(value: T.Any) -> T.Any:
+    """Convert a database value to a JSON serializable one."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+@dataclasses.dataclass
+class ResultSet:
+    """
+    A query result kept for the UI.
+
+    :param number: Number cited in the placeholder.
+    :param sql: The query that produced it.
+    :param columns: Column names.
+    :param records: Rows.
+    """
+
+    number: int
+    sql: str
+    columns: list[str]
+    records: list[T.Sequence[T.Any]]
+
+    @property
+    def placeholder(self) -> str:
+        return placeholder(self.number)
+
+    @property
+    def header(self) -> str:
+        """Line prepended to the tool result, telling the model how to cite it."""
+        return f"[Result set {self.placeholder}: {len(self.records)} rows]"
+
+    def to_markdown(self) -> str:
+        return format_records(columns=self.columns, records=self.records)
+
+    def to_dict(self) -> dict:
+        return {
+            "number": self.number,
+            "columns": list(self.columns),
+            "rows": [[to_json_value(value) for value in record] for record in self.records],
+        }
+
+
+class ResultSetRegistry:
+    """
+    Result sets of one chat request.
+
+    :param max_result_sets: Only the most recent result sets are kept; a
+        placeholder citing an evicted one is left as text.
+    """
+
+    def __init__(self, max_result_sets: int = 20):
+        if max_result_sets < 1:
+            raise ValueError("max_result_sets must be at least 1")
+        self.max_result_sets = max_result_sets
+        self._result_sets: dict[int, ResultSet] = {}
+        self._next_number = 1
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._result_sets)
+
+    def add(
+        self,
+        sql: str,
+        columns: T.Sequence[str],
+        records: T.Sequence[T.Sequence[T.Any]],
+    ) -> ResultSet:
+        with self._lock:
+            result_set = ResultSet(
+                number=self._next_number,
+                sql=sql,
+                columns=list(columns),
+                records=list(records),
+            )
+            self._next_number += 1
+            self._result_sets[result_set.number] = result_set
+            while len(self._result_sets) > self.max_result_sets:
+                del self._result_sets[min(self._result_sets)]
+            return result_set
+
+    def get(self, number: int) -> T.Optional[ResultSet]:
+        return self._result_sets.get(number)
+
+
+def split_answer(
+    text: str,
+    result_sets: ResultSetRegistry,
+) -> list[T.Union[str, ResultSet]]:
+    """
+    Split an answer into text and the result sets cited by placeholder.
+    Placeholders of unknown result sets stay in the text.
+    """
+    segments: list[T.Union[str, ResultSet]] = []
+    buffer = ""
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        result_set = result_sets.get(int(match.group(1)))
+        if result_set is None:
+            continue
+        buffer += text[position : match.start()]
+        if buffer.strip():
+            segments.append(buffer)
+        segments.append(result_set)
+        buffer = ""
+        position = match.end()
+    buffer += text[position:]
+    if buffer.strip():
+        segments.append(buffer)
+    return segments
+
+
+def render_answer(text: str, result_sets: ResultSetRegistry) -> str:
+    """Replace the placeholders of an answer with Markdown tables."""
+
+    def replace(match: re.Match) -> str:
+        result_set = result_sets.get(int(match.group(1)))
+        return match.group(0) if result_set is None else result_set.to_markdown()
+
+    return PLACEHOLDER_PATTERN.sub(replace, text)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""
+Retention and hourly rollup of the time-series tables.
+
+Once an admission is discharged its minute-level readings are only needed for
+the occasional look back. :func:`run_retention` handles admissions discharged
+before a cutoff, per time-series table, in one transaction:
+
+1. Downsample their readings into hourly aggregates
+   (``vital_sign_hourly`` / ``labor_progress_hourly``: count, min, avg and max
+   of every measurement per admission and hour).
+2. Move the raw readings to the archive table (``vital_sign_archive`` /
+   ``labor_progress_archive``, same columns as the source).
+
+The hot tables then only hold readings of current and recently discharged
+admissions, which is what the agent queries. On Postgres the hot tables are
+also partitioned by month (see :mod:`obnexus.partitioning`).
+
+The rollup of an admission is recomputed from hot and archived readings, so
+running the job again (e.g. after late readings) is safe. The archive and
+rollup tables are created by migration ``0006`` (see :mod:`obnexus.migrations`).
+"""
+
+import typing as T
+import dataclasses
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from .latest_readings import LatestProjection, VITAL_SIGN_LATEST, LABOR_PROGRESS_LATEST
+
+
+@dataclasses.dataclass(frozen=True)
+class Retention:
+    """
+    Archive and hourly rollup of one time-series table.
+
+    :param table: The time-series table and its columns, described by its
+        latest-reading projection.
+    :param measures: Numeric columns aggregated per hour.
+    """
+
+    table: LatestProjection
+    measures: tuple[str, ...]
+
+    @property
+    def source(self) -> str:
+        return self.table.source
+
+    @property
+    def archive(self) -> str:
+        return f"{self.source}_archive"
+
+    @property
+    def rollup(self) -> str:
+        return f"{self.source}_hourly"
+
+    @property
+    def archive_create_sql(self) -> str:
+        columns = ", ".join(self.table.columns)
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.archive} "
+            f"({columns}, PRIMARY KEY ({self.table.id_column}))"
+        )
+
+    @property
+    def rollup_column_names(self) -> list[str]:
+        names = ["admission_id", "hour", "n_readings"]
+        for measure in self.measures:
+            names.extend([f"{measure}_min", f"{measure}_avg", f"{measure}_max"])
+        return names
+
+    @property
+    def rollup_create_sql(self) -> str:
+        columns = ["admission_id TEXT NOT NULL", "hour TIMESTAMP NOT NULL", "n_readings INTEGER NOT NULL"]
+        columns.extend(f"{name} FLOAT" for name in self.rollup_column_names[3:])
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.rollup} "
+            f"({', '.join(columns)}, PRIMARY KEY (admission_id, hour))"
+        )
+
+    def rollup_insert_sql(self, dialect: str, admissions_sql: str) -> str:
+        """
+        Recompute the hourly aggregates of the admissions selected by
+        ``admissions_sql``, from hot and archived readings.
+        """
+        if dialect == "postgresql":
+            hour = "date_trunc('hour', recorded_at)"
+        else:
+            hour = "strftime('%Y-%m-%d %H:00:00', recorded_at)"
+        aggregates = ", ".join(
+            f"MIN({measure}), AVG({measure}), MAX({measure})" for measure in self.measures
+        )
+        columns = ", ".join(["admission_id", "recorded_at", *self.measures])
+        return f"""
+        INSERT INTO {self.rollup} ({', '.join(self.rollup_column_names)})
+        SELECT admission_id, {hour} AS hour, COUNT(*), {aggregates}
+        FROM (
+            SELECT {columns} FROM {self.source} WHERE admission_id IN ({admissions_sql})
+            UNION ALL
+            SELECT {columns} FROM {self.archive} WHERE admission_id IN ({admissions_sql})
+        ) readings
+        GROUP BY admission_id, {hour}
+        """
+
+    def apply(self, conn: "sa.Connection", admissions_sql: str, params: dict) -> int:
+        """
+        Roll up and archive the readings of the selected admissions.
+
+        :return: Number of readings moved to the archive.
+        """
+        n_readings = conn.execute(
+            sa.text(f"SELECT COUNT(*) FROM {self.source} WHERE admission_id IN ({admissions_sql})"),
+            params,
+        ).scalar()
+        if not n_readings:
+            return 0
+        names = ", ".join(self.table.column_names)
+        conn.execute(
+            sa.text(f"DELETE FROM {self.rollup} WHERE admission_id IN ({admissions_sql})"),
+            params,
+        )
+        conn.execute(sa.text(self.rollup_insert_sql(conn.dialect.name, admissions_sql)), params)
+        conn.execute(
+            sa.text(
+                f"INSERT INTO {self.archive} ({names}) "
+                f"SELECT {names} FROM {self.source} WHERE admission_id IN ({admissions_sql})"
+            ),
+            params,
+        )
+        conn.execute(
+            sa.text(f"DELETE FROM {self.source} WHERE admission_id IN ({admissions_sql})"),
+            params,
+        )
+        return n_readings
+
+
+VITAL_SIGN_RETENTION = Retention(
+    table=VITAL_SIGN_LATEST,
+    measures=(
+        "bp_systolic",
+        "bp_diastolic",
+        "heart_rate",
+        "temperature",
+        "fetal_heart_rate",
+        "oxygen_saturation",
+    ),
+)
+
+LABOR_PROGRESS_RETENTION = Retention(
+    table=LABOR_PROGRESS_LATEST,
+    measures=(
+        "cervical_dilation_cm",
+        "effacement_pct",
+        "station",
+        "contraction_freq",
+    ),
+)
+
+RETENTIONS: list[Retention] = [
+    VITAL_SIGN_RETENTION,
+    LABOR_PROGRESS_RETENTION,
+]
+
+#: Admissions whose readings are archived: discharged before the cutoff.
+EXPIRED_ADMISSIONS_SQL = (
+    "SELECT admission_id FROM admission "
+    "WHERE status = 'discharged' AND actual_discharge_time < :discharged_before"
+)
+
+
+def run_retention(
+    engine: "sa.Engine",
+    discharged_before: datetime,
+    retentions: T.Sequence[Retention] = tuple(RETENTIONS),
+    verbose: bool = True,
+) -> dict[str, int]:
+    """
+    Roll up and archive the readings of admissions discharged before
+    ``discharged_before``. Each table is handled in its own transaction.
+
+    :return: Number of archived readings per source table.
+    """
+    params = {"discharged_before": discharged_before}
+    summary = {}
+    for retention in retentions:
+        with engine.begin() as conn:
+            summary[retention.source] = retention.apply(conn, EXPIRED_ADMISSIONS_SQL, params)
+        if verbose:
+            print(
+                f"  {retention.source}: archived {summary[retention.source]} readings "
+                f"into {retention.archive}, hourly aggregates in {retention.rollup}"
+            )
+    return summary
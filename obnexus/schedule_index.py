@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+
+"""
+In-memory scheduling index for rooms and providers.
+
+``medical_order`` only stores a ``scheduled_time``; how long an order keeps
+its room and provider busy depends on the order type (see
+:data:`ORDER_DURATION_MINUTES`). :class:`ScheduleIndex` turns every open
+order into a busy interval per room and per provider, and every ``shift``
+row into an on-duty interval per provider, so that:
+
+- ``create_order`` can reject double bookings without extra SQL
+- the ``find_free_slots`` tool can return the next open windows of a room
+  and/or provider in well under a millisecond
+
+Like :class:`~obnexus.bed_index.BedIndex`, the index is loaded once, updated
+in place by our own writes and reloaded when older than ``reconcile_interval``.
+"""
+
+import bisect
+import time
+import typing as T
+import threading
+import dataclasses
+from datetime import date, datetime, timedelta
+
+import sqlalchemy as sa
+from tabulate import tabulate
+
+from .utils import to_naive_datetime
+
+#: How long each order type keeps its room and provider busy.
+ORDER_DURATION_MINUTES = {
+    "c_section": 120,
+    "induction": 60,
+    "epidural": 30,
+    "lab_test": 15,
+    "medication": 15,
+    "consult": 30,
+}
+DEFAULT_DURATION_MINUTES = 30
+
+#: Orders in these statuses no longer block their room and provider.
+CLOSED_ORDER_STATUSES = ("completed", "cancelled")
+
+#: On-duty hours of each shift type, as (start_hour, end_hour) on shift_date.
+#: End hours past 24 continue on the next day.
+SHIFT_HOURS = {
+    "day": (7, 19),
+    "evening": (15, 23),
+    "night": (19, 31),
+}
+DEFAULT_SHIFT_HOURS = (0, 24)
+
+ORDER_SQL = """
+SELECT order_id, order_type, scheduled_time, assigned_provider_id, assigned_room_id
+FROM medical_order
+WHERE status NOT IN :closed_statuses
+"""
+
+SHIFT_SQL = """
+SELECT shift_id, provider_id, shift_date, shift_type
+FROM shift
+"""
+
+
+def get_order_duration(order_type: str) -> timedelta:
+    return timedelta(minutes=ORDER_DURATION_MINUTES.get(order_type, DEFAULT_DURATION_MINUTES))
+
+
+def get_shift_interval(
+    shift_date: T.Union[str, date, datetime],
+    shift_type: str,
+) -> tuple[datetime, datetime]:
+    """
+    Convert a ``shift`` row to an on-duty ``(start, end)`` interval.
+    """
+    if isinstance(shift_date, datetime):
+        shift_date = shift_date.date()
+    elif isinstance(shift_date, str):
+        shift_date = date.fromisoformat(shift_date[:10])
+    start_hour, end_hour = SHIFT_HOURS.get(shift_type, DEFAULT_SHIFT_HOURS)
+    midnight = datetime(shift_date.year, shift_date.month, shift_date.day)
+    return midnight + timedelta(hours=start_hour), midnight + timedelta(hours=end_hour)
+
+
+@dataclasses.dataclass(frozen=True)
+class Interval:
+    """
+    Half-open time interval ``[start, end)`` with an attached label.
+    """
+
+    start: datetime
+    end: datetime
+    label: str = ""
+
+
+class IntervalIndex:
+    """
+    Static interval tree flattened into sorted arrays.
+
+    Intervals are kept sorted by start, together with the running maximum of
+    their end times. An overlap query bisects to the last interval starting
+    before the query end, then walks backwards only while the running max
+    end is still after the query start, so it costs ``O(log n + k)``.
+    """
+
+    def __init__(self, intervals: T.Iterable[Interval] = ()):
+        self._intervals: list[Interval] = sorted(intervals, key=lambda i: (i.start, i.end))
+        self._starts: list[datetime] = []
+        self._max_ends: list[datetime] = []
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __iter__(self) -> T.Iterator[Interval]:
+        return iter(self._intervals)
+
+    def _rebuild(self):
+        self._starts = [interval.start for interval in self._intervals]
+        self._max_ends = []
+        max_end = None
+        for interval in self._intervals:
+            if max_end is None or interval.end > max_end:
+                max_end = interval.end
+            self._max_ends.append(max_end)
+
+    def add(self, interval: Interval):
+        """Insert an interval, keeping the index sorted."""
+        index = bisect.bisect_right(self._starts, interval.start)
+        self._intervals.insert(index, interval)
+        self._rebuild()
+
+    def overlaps(self, start: datetime, end: datetime) -> list[Interval]:
+        """
+        Return all intervals overlapping ``[start, end)``, sorted by start.
+        """
+        result = []
+        i = bisect.bisect_left(self._starts, end) - 1
+        while i >= 0 and self._max_ends[i] > start:
+            interval = self._intervals[i]
+            if interval.end > start:
+                result.append(interval)
+            i -= 1
+        result.reverse()
+        return result
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """
+        True if ``[start, end)`` is fully inside the union of the intervals.
+        """
+        cursor = start
+        for interval in self.overlaps(start, end):
+            if interval.start > cursor:
+                return False
+            cursor = max(cursor, interval.end)
+            if cursor >= end:
+                return True
+        return cursor >= end
+
+
+def subtract_busy(
+    available: T.Sequence[tuple[datetime, datetime]],
+    busy: T.Sequence[Interval],
+    duration: timedelta,
+) -> T.Iterator[tuple[datetime, datetime]]:
+    """
+    Yield the gaps of ``available`` windows not covered by ``busy`` intervals
+    that are at least ``duration`` long, in chronological order.
+
+    :param available: Sorted, non-overlapping available windows.
+    :param busy: Busy intervals sorted by start.
+    """
+    for window_start, window_end in available:
+        cursor = window_start
+        for interval in busy:
+            if interval.end <= cursor or interval.start >= window_end:
+                continue
+            if interval.start - cursor >= duration:
+                yield cursor, interval.start
+            cursor = max(cursor, interval.end)
+        if window_end - cursor >= duration:
+            yield cursor, window_end
+
+
+class ScheduleIndex:
+    """
+    Busy intervals per room and provider, and on-duty intervals per provider.
+
+    :param engine: SQLAlchemy engine used to load and reconcile the index.
+    :param reconcile_interval: Reload from the database when the index is
+        older than this many seconds. ``0`` disables reconciliation.
+    """
+
+    def __init__(
+        self,
+        engine: "sa.Engine",
+        reconcile_interval: float = 60,
+    ):
+        self.engine = engine
+        self.reconcile_interval = reconcile_interval
+        self.loaded_at: float = 0.0
+        self._lock = threading.RLock()
+        self._rooms: dict[str, IntervalIndex] = {}
+        self._providers: dict[str, IntervalIndex] = {}
+        self._shifts: dict[str, IntervalIndex] = {}
+        self.reload()
+
+    def reload(self):
+        """
+        Rebuild the index from ``medical_order`` and ``shift``.
+        """
+        with self.engine.connect() as conn:
+            stmt = sa.text(ORDER_SQL).bindparams(
+                sa.bindparam("closed_statuses", expanding=True)
+            )
+            orders = conn.execute(
+                stmt, {"closed_statuses": list(CLOSED_ORDER_STATUSES)}
+            ).fetchall()
+            shifts = conn.execute(sa.text(SHIFT_SQL)).fetchall()
+
+        rooms: dict[str, list[Interval]] = {}
+        providers: dict[str, list[Interval]] = {}
+        for order in orders:
+            start = to_naive_datetime(order.scheduled_time)
+            interval = Interval(
+                start=start,
+                end=start + get_order_duration(order.order_type),
+                label=f"{order.order_type} order {order.order_id}",
+            )
+            providers.setdefault(order.assigned_provider_id, []).append(interval)
+            if order.assigned_room_id is not None:
+                rooms.setdefault(order.assigned_room_id, []).append(interval)
+
+        on_duty: dict[str, list[Interval]] = {}
+        for shift in shifts:
+            start, end = get_shift_interval(shift.shift_date, shift.shift_type)
+            on_duty.setdefault(shift.provider_id, []).append(
+                Interval(start=start, end=end, label=f"{shift.shift_type} shift {shift.shift_id}")
+            )
+
+        with self._lock:
+            self._rooms = {k: IntervalIndex(v) for k, v in rooms.items()}
+            self._providers = {k: IntervalIndex(v) for k, v in providers.items()}
+            self._shifts = {k: IntervalIndex(v) for k, v in on_duty.items()}
+            self.loaded_at = time.time()
+
+    def maybe_reconcile(self) -> bool:
+        """
+        Reload the index if it is older than ``reconcile_interval``.
+
+        :return: True if the index was reloaded.
+        """
+        if self.reconcile_interval and time.time() - self.loaded_at >= self.reconcile_interval:
+            self.reload()
+            return True
+        return False
+
+    def find_conflicts(
+        self,
+        scheduled_time: datetime,
+        order_type: str,
+        assigned_provider_id: str,
+        assigned_room_id: T.Optional[str] = None,
+    ) -> list[str]:
+        """
+        Describe every existing booking that overlaps a new order.
+
+        :return: Human readable conflict descriptions, empty if the slot is free.
+        """
+        self.maybe_reconcile()
+        start = to_naive_datetime(scheduled_time)
+        end = start + get_order_duration(order_type)
+        conflicts = []
+        with self._lock:
+            provider_index = self._providers.get(assigned_provider_id)
+            if provider_index is not None:
+                for interval in provider_index.overlaps(start, end):
+                    conflicts.append(
+                        f"provider {assigned_provider_id} is booked for {interval.label} "
+                        f"({interval.start.isoformat()} - {interval.end.isoformat()})"
+                    )
+            if assigned_room_id is not None:
+                room_index = self._rooms.get(assigned_room_id)
+                if room_index is not None:
+                    for interval in room_index.overlaps(start, end):
+                        conflicts.append(
+                            f"room {assigned_room_id} is booked for {interval.label} "
+                            f"({interval.start.isoformat()} - {interval.end.isoformat()})"
+                        )
+        return conflicts
+
+    def add_order(
+        self,
+        order_id: str,
+        order_type: str,
+        scheduled_time: datetime,
+        assigned_provider_id: str,
+        assigned_room_id: T.Optional[str] = None,
+    ):
+        """
+        Mirror a successful :func:`obnexus.write_operations.create_order`.
+        """
+        start = to_naive_datetime(scheduled_time)
+        interval = Interval(
+            start=start,
+            end=start + get_order_duration(order_type),
+            label=f"{order_type} order {order_id}",
+        )
+        with self._lock:
+            self._providers.setdefault(assigned_provider_id, IntervalIndex()).add(interval)
+            if assigned_room_id is not None:
+                self._rooms.setdefault(assigned_room_id, IntervalIndex()).add(interval)
+
+    def is_on_duty(
+        self,
+        provider_id: str,
+        start: datetime,
+        end: datetime,
+    ) -> T.Optional[bool]:
+        """
+        True if the provider's shifts cover ``[start, end)``.
+        None if the provider has no shift data at all.
+        """
+        with self._lock:
+            shifts = self._shifts.get(provider_id)
+            if shifts is None:
+                return None
+            return shifts.covers(to_naive_datetime(start), to_naive_datetime(end))
+
+    def find_free_slots(
+        self,
+        after: datetime,
+        order_type: str = "consult",
+        provider_id: T.Optional[str] = None,
+        room_id: T.Optional[str] = None,
+        n: int = 5,
+        horizon: timedelta = timedelta(days=7),
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Find the next ``n`` open windows long enough for an order.
+
+        A window is free when neither the provider nor the room is booked.
+        If the provider has shift data, windows are limited to their shifts.
+
+        :param after: Earliest window start.
+        :param order_type: Order type, decides the minimum window length.
+        :param provider_id: Provider that must be free (optional).
+        :param room_id: Room that must be free (optional).
+        :param n: Maximum number of windows to return.
+        :param horizon: How far after ``after`` to search.
+
+        :return: List of ``(start, end)`` windows, in chronological order.
+        """
+        self.maybe_reconcile()
+        start = to_naive_datetime(after)
+        end = start + horizon
+        duration = get_order_duration(order_type)
+
+        with self._lock:
+            busy: list[Interval] = []
+            if provider_id is not None and provider_id in self._providers:
+                busy.extend(self._providers[provider_id].overlaps(start, end))
+            if room_id is not None and room_id in self._rooms:
+                busy.extend(self._rooms[room_id].overlaps(start, end))
+            busy.sort(key=lambda i: i.start)
+
+            if provider_id is not None and provider_id in self._shifts:
+                available = []
+                for shift in self._shifts[provider_id].overlaps(start, end):
+                    window = (max(shift.start, start), min(shift.end, end))
+                    # merge back-to-back or overlapping shifts
+                    if available and window[0] <= available[-1][1]:
+                        available[-1] = (available[-1][0], max(available[-1][1], window[1]))
+                    else:
+                        available.append(window)
+            else:
+                available = [(start, end)]
+
+        slots = []
+        for slot in subtract_busy(available, busy, duration):
+            slots.append(slot)
+            if len(slots) >= n:
+                break
+        return slots
+
+
+def format_slots(slots: T.Sequence[tuple[datetime, datetime]]) -> str:
+    """
+    Format free windows as a Markdown table, same style as
+    :func:`obnexus.sql_utils.format_result`.
+    """
+    if len(slots) == 0:
+        return "No result"
+    columns = ["start", "end", "minutes"]
+    rows = [
+        [start.isoformat(), end.isoformat(), int((end - start).total_seconds() // 60)]
+        for start, end in slots
+    ]
+    return tabulate(rows, headers=columns, tablefmt="pipe")
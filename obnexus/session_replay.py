@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+
+"""
+Record and replay agent sessions.
+
+:class:`SessionRecorder` is a Strands hook provider that captures every user
+turn, model request / response and tool call / result of a session, and
+appends them to a JSONL file, one event per line::
+
+    {"type": "user", "turn": 0, "text": "..."}
+    {"type": "model_request", "turn": 0, "step": 0, "n_messages": 1, "last_message": {...}}
+    {"type": "model_response", "turn": 0, "step": 0, "message": {...}, "stop_reason": "tool_use", "seconds": 1.9}
+    {"type": "tool_call", "turn": 0, "step": 0, "tool_use": {...}, "result": {...}, "seconds": 0.01}
+
+:func:`replay_session` re-runs a recorded session against the current code,
+with the model replaced by a :class:`ReplayModel` that returns the recorded
+responses. Tools, SQL and formatting run for real, so tool / DB changes can
+be benchmarked against real traffic shapes without network access.
+
+Usage::
+
+    from obnexus.one.api import one
+    from obnexus.session_replay import record_session, load_session, ReplayModel, replay_session
+    from obnexus.benchmark import use_offline_backend
+
+    with record_session(one.agent, "tmp/sessions/assign_bed.jsonl"):
+        one.agent("...")
+
+    session = load_session("tmp/sessions/assign_bed.jsonl")
+    use_offline_backend(one, model=ReplayModel(session))
+    report = replay_session(one.agent, session)
+    print(report.to_markdown())
+"""
+
+import io
+import json
+import time
+import asyncio
+import typing as T
+import threading
+import contextlib
+import dataclasses
+from pathlib import Path
+
+from strands import Agent
+from strands.models import Model
+from strands.hooks import (
+    HookRegistry,
+    BeforeInvocationEvent,
+    BeforeModelCallEvent,
+    AfterModelCallEvent,
+    BeforeToolCallEvent,
+    AfterToolCallEvent,
+)
+from tabulate import tabulate
+
+from .tests.scripted_model import message_to_stream_events
+
+
+def _get_text(messages: T.Optional[T.Sequence[dict]]) -> str:
+    """Concatenate the text blocks of user messages."""
+    texts = []
+    for message in messages or []:
+        for block in message.get("content", []):
+            if "text" in block:
+                texts.append(block["text"])
+    return "\n".join(texts)
+
+
+class SessionRecorder:
+    """
+    Hook provider recording agent events in memory and, optionally, to JSONL.
+
+    :param path: JSONL file to append events to. If None, events are only
+        kept in :attr:`records`.
+    """
+
+    def __init__(self, path: T.Optional[T.Union[str, Path]] = None):
+        self.path = Path(path) if path is not None else None
+        self.records: list[dict] = []
+        self.closed = False
+        self.turn = -1
+        self.step = 0
+        self._model_started_at: float = 0.0
+        self._tool_started_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: T.Any):
+        registry.add_callback(BeforeInvocationEvent, self.before_invocation)
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self.before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self.after_tool_call)
+
+    def write(self, record: dict):
+        if self.closed:
+            return
+        with self._lock:
+            self.records.append(record)
+            if self.path is not None:
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+
+    def close(self):
+        """Stop recording. The hooks stay registered but become no-ops."""
+        self.closed = True
+
+    def before_invocation(self, event: BeforeInvocationEvent):
+        if self.closed:
+            return
+        self.turn += 1
+        self.step = 0
+        self.write({"type": "user", "turn": self.turn, "text": _get_text(event.messages)})
+
+    def before_model_call(self, event: BeforeModelCallEvent):
+        if self.closed:
+            return
+        messages = event.agent.messages
+        self._model_started_at = time.perf_counter()
+        self.write(
+            {
+                "type": "model_request",
+                "turn": self.turn,
+                "step": self.step,
+                "n_messages": len(messages),
+                "last_message": messages[-1] if messages else None,
+            }
+        )
+
+    def after_model_call(self, event: AfterModelCallEvent):
+        if self.closed or event.stop_response is None:
+            return
+        self.write(
+            {
+                "type": "model_response",
+                "turn": self.turn,
+                "step": self.step,
+                "message": event.stop_response.message,
+                "stop_reason": event.stop_response.stop_reason,
+                "seconds": time.perf_counter() - self._model_started_at,
+            }
+        )
+        self.step += 1
+
+    def before_tool_call(self, event: BeforeToolCallEvent):
+        self._tool_started_at[event.tool_use["toolUseId"]] = time.perf_counter()
+
+    def after_tool_call(self, event: AfterToolCallEvent):
+        started_at = self._tool_started_at.pop(event.tool_use["toolUseId"], time.perf_counter())
+        if self.closed:
+            return
+        self.write(
+            {
+                "type": "tool_call",
+                "turn": self.turn,
+                "step": self.step - 1,
+                "tool_use": event.tool_use,
+                "result": event.result,
+                "seconds": time.perf_counter() - started_at,
+            }
+        )
+
+
+@contextlib.contextmanager
+def record_session(
+    agent: Agent,
+    path: T.Union[str, Path],
+) -> T.Iterator[SessionRecorder]:
+    """
+    Record everything the agent does inside the ``with`` block to ``path``.
+    An existing file is overwritten.
+    """
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    recorder = SessionRecorder(path)
+    agent.hooks.add_hook(recorder)
+    try:
+        yield recorder
+    finally:
+        recorder.close()
+
+
+@dataclasses.dataclass
+class RecordedTurn:
+    """
+    One user turn of a recorded session.
+    """
+
+    text: str
+    model_responses: list[dict] = dataclasses.field(default_factory=list)
+    tool_calls: list[dict] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class RecordedSession:
+    """
+    A recorded session, grouped by turn.
+    """
+
+    turns: list[RecordedTurn]
+
+    @classmethod
+    def from_records(cls, records: T.Iterable[dict]) -> "RecordedSession":
+        turns: list[RecordedTurn] = []
+        for record in records:
+            if record["type"] == "user":
+                turns.append(RecordedTurn(text=record["text"]))
+            elif record["type"] == "model_response":
+                turns[record["turn"]].model_responses.append(record)
+            elif record["type"] == "tool_call":
+                turns[record["turn"]].tool_calls.append(record)
+        return cls(turns=turns)
+
+
+def load_session(path: T.Union[str, Path]) -> RecordedSession:
+    """Load a JSONL file written by :class:`SessionRecorder`."""
+    with Path(path).open("r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return RecordedSession.from_records(records)
+
+
+class ReplayModel(Model):
+    """
+    Strands model returning the recorded responses of a session, in order.
+
+    :param session: The recorded session.
+    :param latency_scale: Sleep ``recorded seconds * latency_scale`` before each
+        response. ``0`` (default) replays as fast as possible, ``1`` reproduces
+        the recorded model latency.
+    """
+
+    def __init__(
+        self,
+        session: RecordedSession,
+        latency_scale: float = 0.0,
+    ):
+        self.responses = [
+            response for turn in session.turns for response in turn.model_responses
+        ]
+        self.latency_scale = latency_scale
+        self.cursor = 0
+        self.config = {"model_id": "replay"}
+        self._lock = threading.Lock()
+
+    def update_config(self, **model_config: T.Any):
+        self.config.update(model_config)
+
+    def get_config(self) -> dict:
+        return self.config
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("ReplayModel does not support structured output")
+
+    def reset(self):
+        self.cursor = 0
+
+    async def stream(
+        self,
+        messages,
+        tool_specs=None,
+        system_prompt=None,
+        **kwargs,
+    ) -> T.AsyncGenerator[dict, None]:
+        with self._lock:
+            if self.cursor >= len(self.responses):
+                raise ValueError(
+                    f"Replay ran past the recording ({len(self.responses)} model responses)"
+                )
+            response = self.responses[self.cursor]
+            self.cursor += 1
+        if self.latency_scale:
+            await asyncio.sleep(response.get("seconds", 0.0) * self.latency_scale)
+        message = response["message"]
+        for event in message_to_stream_events(
+            message=message,
+            stop_reason=response["stop_reason"],
+            usage=message.get("metadata", {}).get("usage"),
+            latency_ms=int(response.get("seconds", 0.0) * 1000),
+        ):
+            yield event
+
+
+def _get_result_text(result: dict) -> str:
+    return "\n".join(
+        block.get("text", json.dumps(block.get("json"), default=str))
+        for block in result.get("content", [])
+    )
+
+
+@dataclasses.dataclass
+class TurnReplay:
+    """
+    Outcome of replaying one turn.
+
+    :param diffs: Human readable differences between the recorded and the
+        replayed tool calls (name, input, status or result text).
+    """
+
+    turn: int
+    text: str
+    seconds: float
+    recorded_tool_seconds: float
+    replayed_tool_seconds: float
+    n_tool_calls: int
+    diffs: list[str]
+
+
+@dataclasses.dataclass
+class ReplayReport:
+    """
+    Outcome of :func:`replay_session`.
+    """
+
+    turns: list[TurnReplay]
+
+    @property
+    def n_diffs(self) -> int:
+        return sum(len(turn.diffs) for turn in self.turns)
+
+    def to_markdown(self) -> str:
+        rows = [
+            [
+                turn.turn,
+                turn.text[:40],
+                turn.n_tool_calls,
+                round(turn.recorded_tool_seconds * 1000, 3),
+                round(turn.replayed_tool_seconds * 1000, 3),
+                round(turn.seconds * 1000, 3),
+                len(turn.diffs),
+            ]
+            for turn in self.turns
+        ]
+        headers = [
+            "turn",
+            "text",
+            "tool_calls",
+            "recorded_tool_ms",
+            "replayed_tool_ms",
+            "replayed_turn_ms",
+            "diffs",
+        ]
+        lines = [tabulate(rows, headers=headers, tablefmt="pipe")]
+        for turn in self.turns:
+            for diff in turn.diffs:
+                lines.append(f"- turn {turn.turn}: {diff}")
+        return "\n".join(lines)
+
+
+def _diff_tool_calls(
+    recorded: T.Sequence[dict],
+    replayed: T.Sequence[dict],
+) -> list[str]:
+    diffs = []
+    if len(recorded) != len(replayed):
+        diffs.append(f"{len(recorded)} tool calls recorded, {len(replayed)} replayed")
+    # concurrent tool calls may finish in any order
+    replayed_by_id = {call["tool_use"]["toolUseId"]: call for call in replayed}
+    for old in recorded:
+        tool_use = old["tool_use"]
+        new = replayed_by_id.get(tool_use["toolUseId"])
+        label = f"{tool_use['name']} ({tool_use['toolUseId']})"
+        if new is None:
+            diffs.append(f"{label}: not called")
+            continue
+        if new["result"].get("status") != old["result"].get("status"):
+            diffs.append(
+                f"{label}: status {old['result'].get('status')} -> {new['result'].get('status')}"
+            )
+        elif _get_result_text(new["result"]) != _get_result_text(old["result"]):
+            diffs.append(f"{label}: result changed")
+    return diffs
+
+
+def replay_session(
+    agent: Agent,
+    session: RecordedSession,
+) -> ReplayReport:
+    """
+    Re-run every user turn of ``session`` on ``agent`` and compare tool calls.
+
+    The agent's model must be a :class:`ReplayModel` built from the same
+    session. The agent's conversation history is cleared first.
+    """
+    if isinstance(agent.model, ReplayModel):
+        agent.model.reset()
+    agent.messages.clear()
+    recorder = SessionRecorder()
+    agent.hooks.add_hook(recorder)
+    turns = []
+    try:
+        for i, turn in enumerate(session.turns):
+            n_before = len(recorder.records)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent(turn.text)
+            seconds = time.perf_counter() - start
+            replayed = [
+                record
+                for record in recorder.records[n_before:]
+                if record["type"] == "tool_call"
+            ]
+            turns.append(
+                TurnReplay(
+                    turn=i,
+                    text=turn.text,
+                    seconds=seconds,
+                    recorded_tool_seconds=sum(c["seconds"] or 0.0 for c in turn.tool_calls),
+                    replayed_tool_seconds=sum(c["seconds"] or 0.0 for c in replayed),
+                    n_tool_calls=len(replayed),
+                    diffs=_diff_tool_calls(turn.tool_calls, replayed),
+                )
+            )
+    finally:
+        recorder.close()
+    return ReplayReport(turns=turns)
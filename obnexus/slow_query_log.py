@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+Slow-query log for agent-generated SQL.
+
+:func:`obnexus.sql_utils.execute_and_print_result` hands every query that
+took longer than ``threshold_seconds`` to a :class:`SlowQueryLog`, together
+with the query plan (``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on
+Postgres). Entries are kept in memory and, optionally, appended to a JSONL
+file that :mod:`obnexus.index_advisor` aggregates into index proposals::
+
+    {"sql": "SELECT ...", "seconds": 0.84, "n_rows": 12, "dialect": "sqlite",
+     "plan": ["SCAN vital_sign", "USE TEMP B-TREE FOR ORDER BY"], "logged_at": "..."}
+"""
+
+import json
+import typing as T
+import threading
+import collections
+import dataclasses
+from pathlib import Path
+from datetime import datetime, UTC
+
+import sqlalchemy as sa
+
+
+def explain_query(
+    conn: "sa.Connection",
+    sql: str,
+) -> list[str]:
+    """
+    Return the query plan of ``sql`` as a list of lines, or an empty list if
+    the dialect is not supported or the plan cannot be computed.
+    """
+    dialect = conn.dialect.name
+    try:
+        if dialect == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            # (id, parent, notused, detail)
+            return [row[-1] for row in rows]
+        elif dialect == "postgresql":
+            rows = conn.exec_driver_sql(f"EXPLAIN {sql}").fetchall()
+            return [row[0] for row in rows]
+    except Exception:  # pragma: no cover
+        return []
+    return []  # pragma: no cover
+
+
+@dataclasses.dataclass
+class SlowQuery:
+    """
+    One logged slow query.
+    """
+
+    sql: str
+    seconds: float
+    n_rows: int
+    dialect: str
+    plan: list[str] = dataclasses.field(default_factory=list)
+    logged_at: str = ""
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+class SlowQueryLog:
+    """
+    Collect queries slower than ``threshold_seconds``.
+
+    :param threshold_seconds: Queries taking at least this long are logged.
+    :param path: JSONL file to append entries to. If None, entries are only
+        kept in memory.
+    :param max_entries: Number of most recent entries kept in memory.
+    """
+
+    def __init__(
+        self,
+        threshold_seconds: float = 0.5,
+        path: T.Optional[T.Union[str, Path]] = None,
+        max_entries: int = 1000,
+    ):
+        self.threshold_seconds = threshold_seconds
+        self.path = Path(path) if path is not None else None
+        self.entries: collections.deque[SlowQuery] = collections.deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def maybe_record(
+        self,
+        conn: "sa.Connection",
+        sql: str,
+        seconds: float,
+        n_rows: int,
+    ) -> T.Optional[SlowQuery]:
+        """
+        Log the query (with its plan) if it was slow.
+
+        :return: The logged entry, or None if the query was fast enough.
+        """
+        if seconds < self.threshold_seconds:
+            return None
+        entry = SlowQuery(
+            sql=sql,
+            seconds=seconds,
+            n_rows=n_rows,
+            dialect=conn.dialect.name,
+            plan=explain_query(conn, sql),
+            logged_at=datetime.now(UTC).isoformat(),
+        )
+        with self._lock:
+            self.entries.append(entry)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry.to_dict(), ensure_ascii=False) + "\n")
+        return entry
+
+
+def load_slow_queries(path: T.Union[str, Path]) -> list[SlowQuery]:
+    """Load a JSONL file written by :class:`SlowQueryLog`."""
+    with Path(path).open("r", encoding="utf-8") as f:
+        return [SlowQuery(**json.loads(line)) for line in f if line.strip()]
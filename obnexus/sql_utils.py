@@ -1,11 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import time
 import typing as T
 
 import sqlalchemy as sa
 import sqlalchemy.exc as sa_exc
 from tabulate import tabulate
 
+from . import metrics
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .slow_query_log import SlowQueryLog
+    from .result_sets import ResultSet, ResultSetRegistry
+    from .result_cursors import ResultCursors, ResultCursor
+
 
 def format_result(
     result: T.Union["sa.CursorResult", "sa.Result"],
@@ -25,12 +33,20 @@ def format_result(
         - Balanced Readability: Maintains both machine parsability and human readability
             for seamless debugging and maintenance
     """
-    records = result.fetchall()
+    return format_records(columns=result.keys(), records=result.fetchall())
+
+
+def format_records(
+    columns: T.Sequence[str],
+    records: T.Sequence[T.Sequence[T.Any]],
+) -> str:
+    """
+    Format already fetched rows into a Markdown table, see :func:`format_result`.
+    """
     if len(records) == 0:
         return "No result"
 
     rows = list()
-    columns = result.keys()
     rows.append(columns)
     for record in records:
         rows.append(list(record))
@@ -44,6 +60,30 @@ def format_result(
     return text
 
 
+def format_page(
+    columns: T.Sequence[str],
+    records: T.Sequence[T.Sequence[T.Any]],
+    start: int,
+    cursor: T.Optional["ResultCursor"],
+    page_size: int,
+    result_set: T.Optional["ResultSet"] = None,
+) -> str:
+    """
+    Format a page of a result as a Markdown table, preceded by the line
+    citing the result set holding it (if any) and followed by the cursor line
+    (if rows are left).
+
+    :param start: 1-based row number of the page's first row.
+    """
+    text = format_records(columns=columns, records=records)
+    if result_set is not None:
+        text = f"{result_set.header}\n\n{text}"
+    if cursor is not None:
+        end = start + len(records) - 1
+        text = f"Rows {start}-{end}:\n\n{text}\n\n{cursor.describe(page_size)}"
+    return text
+
+
 def ensure_valid_select_query(query: str):
     """
     Ensure the query is a valid SELECT statement.
@@ -55,6 +95,10 @@ def ensure_valid_select_query(query: str):
 def execute_and_print_result(
     engine: "sa.Engine",
     sql: str,
+    slow_query_log: T.Optional["SlowQueryLog"] = None,
+    result_sets: T.Optional["ResultSetRegistry"] = None,
+    cursors: T.Optional["ResultCursors"] = None,
+    page_size: int = 20,
 ) -> str:
     """
     Execute a SQL query and print the result as a Markdown table.
@@ -64,6 +108,18 @@ def execute_and_print_result(
 
     :param engine: SQLAlchemy engine instance connected to the database.
     :param sql: Raw SQL query string to execute.
+    :param slow_query_log: If given, queries slower than its threshold are
+        logged together with their query plan.
+    :param result_sets: If given, a non-empty result is registered in it, and
+        the table is preceded by the line citing it, see :mod:`obnexus.result_sets`.
+        A paged result is registered whole (the rows kept by the cursor
+        included), so one placeholder shows all of it.
+    :param cursors: If given, only the first ``page_size`` rows of a longer
+        result are returned, the others are kept in a cursor of ``cursors``,
+        see :mod:`obnexus.result_cursors`. At most one row more than the
+        cursor keeps is fetched from the database, to tell whether the result
+        was truncated.
+    :param page_size: Rows per page when ``cursors`` is given.
 
     :return: The query result formatted as a Markdown table string.
     """
@@ -74,15 +130,61 @@ def execute_and_print_result(
 
     stmt = sa.text(sql)
     with engine.connect() as conn:
+        start = time.perf_counter()
         try:
             result = conn.execute(stmt)
+            columns = list(result.keys())
+            if cursors is None:
+                records = result.fetchall()
+            else:
+                records = result.fetchmany(page_size + cursors.max_rows + 1)
         except sa_exc.OperationalError as e:  # pragma: no cover
+            metrics.sql_queries_total.inc(status="error")
             return f"Error executing query: {e._message()}"
         except Exception as e:  # pragma: no cover
+            metrics.sql_queries_total.inc(status="error")
             return f"Error executing query: {e}"
+        seconds = time.perf_counter() - start
+        metrics.sql_queries_total.inc(status="success")
+        metrics.sql_query_duration_seconds.observe(seconds)
+        metrics.sql_rows_returned.observe(len(records))
+        if slow_query_log is not None:
+            slow_query_log.maybe_record(
+                conn=conn,
+                sql=sql,
+                seconds=seconds,
+                n_rows=len(records),
+            )
+
+        cursor = None
+        if cursors is not None and len(records) > page_size:
+            cursor = cursors.open(
+                sql=sql,
+                columns=columns,
+                records=records[page_size:],
+                offset=page_size,
+            )
+            records = records[:page_size]
+
+        result_set = None
+        if result_sets is not None and len(records) > 0:
+            result_set = result_sets.add(
+                sql=sql,
+                columns=columns,
+                records=records if cursor is None else [*records, *cursor.records],
+            )
+            if cursor is not None:
+                cursor.result_set = result_set
 
         try:
-            text = format_result(result)
+            text = format_page(
+                columns=columns,
+                records=records,
+                start=1,
+                cursor=cursor,
+                page_size=page_size,
+                result_set=result_set,
+            )
         except Exception as e:  # pragma: no cover
             return f"Error formatting result: {e}"
 
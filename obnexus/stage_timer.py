@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""
+Per-request stage timings.
+
+A :class:`StageTimer` accumulates wall-clock time per named stage of one
+``/api/chat`` request (parse, history load, model calls, tool calls, SSE
+encode). The timer of the current request lives in a context variable, so
+code deep inside the agent (hooks, tool executor threads) can add to it
+without passing it around. When no timer is active every call is a no-op.
+
+Finished timers are handed to listeners registered with :func:`add_listener`,
+which is how the benchmark harness collects them.
+
+If the timer is given a :class:`~obnexus.tracing.Trace`, every stage is also
+recorded as a span, and the trace is finished together with the timer.
+"""
+
+import time
+import typing as T
+import threading
+import contextlib
+import contextvars
+
+from strands.hooks import (
+    HookRegistry,
+    BeforeModelCallEvent,
+    AfterModelCallEvent,
+    BeforeToolCallEvent,
+    AfterToolCallEvent,
+)
+
+from .tracing import Trace, span, finish_trace
+
+
+class StageTimer:
+    """
+    Accumulated seconds and call counts per stage of one request.
+
+    :param trace: Optional trace that stages are also recorded in as spans.
+    """
+
+    def __init__(self, trace: T.Optional[Trace] = None):
+        self.trace = trace
+        self.started_at: float = time.perf_counter()
+        self.seconds: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._pending: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as one call of stage ``name``."""
+        start = time.perf_counter()
+        try:
+            with span(name):
+                yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def start(self, key: str):
+        """Start a measurement that is finished by :meth:`stop` from another callback."""
+        with self._lock:
+            self._pending[key] = time.perf_counter()
+
+    def stop(self, key: str, name: str):
+        with self._lock:
+            start = self._pending.pop(key, None)
+        if start is not None:
+            self.add(name, time.perf_counter() - start)
+
+    def timed_iter(self, name: str, iterable: T.Iterable) -> T.Iterator:
+        """
+        Wrap an iterator (e.g. an SSE generator) so that the time spent producing
+        its items is added to stage ``name``. Listeners are notified once the
+        iterator is exhausted.
+        """
+        iterator = iter(iterable)
+        # iterated outside the request context, so parent the span explicitly
+        iter_span = None
+        if self.trace is not None:
+            iter_span = self.trace.start_span(name, parent=self.trace.root)
+        n_items = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                if iter_span is not None:
+                    self.trace.end_span(iter_span, n_items=n_items)
+                self.finish()
+                return
+            self.add(name, time.perf_counter() - start)
+            n_items += 1
+            yield item
+
+    def finish(self):
+        """Record the total request time, finish the trace and notify listeners."""
+        with self._lock:
+            self.seconds["total"] = time.perf_counter() - self.started_at
+            self.counts["total"] = 1
+        if self.trace is not None:
+            finish_trace(self.trace)
+        for listener in list(_listeners):
+            listener(self)
+
+    def to_dict(self) -> dict[str, dict[str, float]]:
+        return {
+            name: {"seconds": seconds, "count": self.counts[name]}
+            for name, seconds in self.seconds.items()
+        }
+
+
+current_stage_timer: contextvars.ContextVar[T.Optional[StageTimer]] = contextvars.ContextVar(
+    "current_stage_timer",
+    default=None,
+)
+
+_listeners: list[T.Callable[[StageTimer], None]] = []
+
+
+def add_listener(listener: T.Callable[[StageTimer], None]):
+    """Call ``listener(timer)`` for every finished request."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener: T.Callable[[StageTimer], None]):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Time the enclosed block in the current request's timer, if any."""
+    timer = current_stage_timer.get()
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+
+class StageTimingHooks:
+    """
+    Strands hook provider adding model and tool call time to the current
+    request's :class:`StageTimer`.
+    """
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: T.Any):
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self.before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self.after_tool_call)
+
+    def before_model_call(self, event: BeforeModelCallEvent):
+        timer = current_stage_timer.get()
+        if timer is not None:
+            timer.start(f"model_call-{id(event.agent)}")
+
+    def after_model_call(self, event: AfterModelCallEvent):
+        timer = current_stage_timer.get()
+        if timer is not None:
+            timer.stop(f"model_call-{id(event.agent)}", "model_call")
+
+    def before_tool_call(self, event: BeforeToolCallEvent):
+        timer = current_stage_timer.get()
+        if timer is not None:
+            timer.start(f"tool_call-{event.tool_use['toolUseId']}")
+
+    def after_tool_call(self, event: AfterToolCallEvent):
+        timer = current_stage_timer.get()
+        if timer is not None:
+            timer.stop(f"tool_call-{event.tool_use['toolUseId']}", "tool_call")
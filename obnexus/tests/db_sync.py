@@ -7,8 +7,16 @@ This module provides functions to sync data between local SQLite and remote Post
 useful for resetting database state during testing.
 """
 
+from datetime import datetime
+
 import sqlalchemy as sa
 
+from ..migrations import MIGRATIONS_TABLE, apply_migrations
+from ..ward_views import WARD_VIEWS
+from ..latest_readings import PROJECTIONS
+from ..retention import RETENTIONS
+from ..partitioning import PARTITIONED_TABLES, ensure_partitions, next_month
+
 # Table insertion order based on foreign key dependencies.
 # Tables are inserted in this order to avoid FK constraint violations.
 # Drop order is the reverse.
@@ -45,6 +53,11 @@ def sync_sqlite_to_postgres(
     Sync local SQLite database to remote PostgreSQL database.
 
     This function is idempotent - it will drop all tables and recreate them.
+    Indexes and foreign key constraints are added afterwards by the
+    migrations in :mod:`obnexus.migrations`. The time-series tables are
+    created partitioned by month (see :mod:`obnexus.partitioning`), and the
+    archived readings and their hourly rollups are copied if the local
+    database has them.
 
     Args:
         local_engine: SQLAlchemy engine connected to local SQLite database.
@@ -52,7 +65,8 @@ def sync_sqlite_to_postgres(
         verbose: If True, print progress messages.
 
     Returns:
-        dict: Summary of the sync operation with row counts per table.
+        dict: Summary of the sync operation with row counts per table
+        the applied migration versions and the created partitions.
     """
 
     def log(msg: str):
@@ -73,7 +87,21 @@ def sync_sqlite_to_postgres(
     if missing_tables:
         raise ValueError(f"Missing tables in local database: {missing_tables}")
 
-    extra_tables = local_table_names - expected_tables
+    # migration bookkeeping and summary tables are rebuilt by the migrations,
+    # archive and rollup tables are copied after them
+    retention_tables = [
+        name
+        for retention in RETENTIONS
+        for name in [retention.archive, retention.rollup]
+    ]
+    extra_tables = (
+        local_table_names
+        - expected_tables
+        - {MIGRATIONS_TABLE}
+        - {view.name for view in WARD_VIEWS}
+        - {projection.name for projection in PROJECTIONS}
+        - set(retention_tables)
+    )
     if extra_tables:
         log(
             f"Warning: Extra tables in local database (will be ignored): {extra_tables}"
@@ -100,6 +128,10 @@ def sync_sqlite_to_postgres(
         for table_name in reversed(TABLE_INSERT_ORDER):
             conn.execute(sa.text(f"DROP TABLE IF EXISTS {table_name} CASCADE"))
             log(f"  Dropped: {table_name}")
+        # Recreated tables have no indexes, so all migrations must run again
+        conn.execute(sa.text(f"DROP TABLE IF EXISTS {MIGRATIONS_TABLE}"))
+        for table_name in retention_tables:
+            conn.execute(sa.text(f"DROP TABLE IF EXISTS {table_name}"))
 
     # Step 4: Create tables in remote database
     log("Creating tables in remote PostgreSQL...")
@@ -147,20 +179,38 @@ def sync_sqlite_to_postgres(
                 # PostgreSQL TEXT has same performance as VARCHAR
                 col_type = sa.Text()
 
+            # Postgres requires the partition key in the primary key
             new_col = sa.Column(
                 col.name,
                 col_type,
-                primary_key=col.primary_key,
+                primary_key=col.primary_key or col.name == PARTITIONED_TABLES.get(table_name),
                 nullable=col.nullable,
             )
             new_columns.append(new_col)
 
-        sa.Table(table_name, remote_metadata, *new_columns)
+        kwargs = {}
+        if table_name in PARTITIONED_TABLES:
+            kwargs["postgresql_partition_by"] = f"RANGE ({PARTITIONED_TABLES[table_name]})"
+        sa.Table(table_name, remote_metadata, *new_columns, **kwargs)
 
     # Create all tables
     remote_metadata.create_all(remote_engine)
     log("  All tables created.")
 
+    # Monthly partitions for the months in the data, up to next month
+    times = [
+        datetime.fromisoformat(str(row[column]))
+        for table_name, column in PARTITIONED_TABLES.items()
+        for row in local_data[table_name]["rows"]
+    ]
+    now = datetime.now()
+    partitions = ensure_partitions(
+        remote_engine,
+        start=min(times, default=now),
+        end=next_month(max([*times, now])),
+    )
+    log(f"  Created {len(partitions)} monthly partitions.")
+
     # Step 5: Identify boolean columns for data conversion
     boolean_columns = {}
     for table_name in TABLE_INSERT_ORDER:
@@ -235,8 +285,37 @@ def sync_sqlite_to_postgres(
                 )
         log(f"  Updated {len(admission_bed_mappings)} admission records.")
 
+    # Step 8: Create indexes and FK constraints (after load, so inserts are fast
+    # and the circular admission <-> bed reference is already consistent)
+    log("Applying schema migrations...")
+    migrations = apply_migrations(remote_engine, verbose=verbose)
+
+    # Step 9: Copy archived readings and hourly rollups (created by the migrations)
+    with local_engine.connect() as local_conn, remote_engine.begin() as remote_conn:
+        for table_name in retention_tables:
+            if table_name not in local_table_names:
+                continue
+            result = local_conn.execute(sa.text(f"SELECT * FROM {table_name}"))
+            columns = list(result.keys())
+            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+            if rows:
+                remote_conn.execute(
+                    sa.text(
+                        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join(f':{col}' for col in columns)})"
+                    ),
+                    rows,
+                )
+            log(f"  {table_name}: {len(rows)} rows")
+            summary[table_name] = len(rows)
+
     log("Sync completed successfully!")
-    return {"success": True, "tables": summary}
+    return {
+        "success": True,
+        "tables": summary,
+        "migrations": migrations,
+        "partitions": partitions,
+    }
 
 
 def reset_remote_database(verbose: bool = True) -> dict:
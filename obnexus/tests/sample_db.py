@@ -0,0 +1,565 @@
+# -*- coding: utf-8 -*-
+
+"""
+Small, deterministic sample database for unit tests.
+
+The real test database (see :mod:`obnexus.tests.db_helper`) is downloaded
+from GitHub and is not always available. This module creates the same
+11-table schema in a local SQLite file (or in memory) and fills it with a
+handful of hand-written rows, so logic that only needs "a ward" can be
+tested offline.
+
+Usage::
+
+    from obnexus.tests.sample_db import new_sample_engine
+
+    engine = new_sample_engine()
+
+Postgres-only behavior (locks, partitions) is tested against the server in
+``$OBNEXUS_TEST_POSTGRES_URL`` with :func:`new_sample_postgres_engine`; the
+tests are skipped when it is not set.
+"""
+
+import os
+import uuid
+import typing as T
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+import sqlalchemy.pool
+
+SCHEMA_DDL = [
+    """
+    CREATE TABLE patient (
+        patient_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        phone TEXT,
+        emergency_contact TEXT,
+        insurance_type TEXT
+    )
+    """,
+    """
+    CREATE TABLE provider (
+        provider_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        role TEXT NOT NULL,
+        department TEXT,
+        is_active BOOLEAN NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE room (
+        room_id TEXT PRIMARY KEY,
+        room_number TEXT NOT NULL,
+        room_type TEXT NOT NULL,
+        floor INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE ob_profile (
+        ob_id TEXT PRIMARY KEY,
+        patient_id TEXT NOT NULL REFERENCES patient(patient_id),
+        gravida INTEGER NOT NULL,
+        para INTEGER NOT NULL,
+        gestational_weeks REAL NOT NULL,
+        edd DATE NOT NULL,
+        fetus_count INTEGER NOT NULL,
+        prior_delivery_method TEXT,
+        planned_delivery_method TEXT NOT NULL,
+        risk_level TEXT NOT NULL,
+        complications TEXT,
+        gbs_status TEXT,
+        notes TEXT
+    )
+    """,
+    """
+    CREATE TABLE shift (
+        shift_id TEXT PRIMARY KEY,
+        provider_id TEXT NOT NULL REFERENCES provider(provider_id),
+        shift_date DATE NOT NULL,
+        shift_type TEXT NOT NULL,
+        assigned_room_ids TEXT
+    )
+    """,
+    """
+    CREATE TABLE admission (
+        admission_id TEXT PRIMARY KEY,
+        patient_id TEXT NOT NULL REFERENCES patient(patient_id),
+        ob_id TEXT NOT NULL REFERENCES ob_profile(ob_id),
+        admit_time DATETIME NOT NULL,
+        status TEXT NOT NULL,
+        delivery_method_actual TEXT,
+        delivery_time DATETIME,
+        predicted_los_hours INTEGER,
+        predicted_discharge_time DATETIME,
+        actual_discharge_time DATETIME,
+        current_bed_id TEXT,
+        attending_provider_id TEXT REFERENCES provider(provider_id),
+        primary_nurse_id TEXT REFERENCES provider(provider_id)
+    )
+    """,
+    """
+    CREATE TABLE alert (
+        alert_id TEXT PRIMARY KEY,
+        admission_id TEXT NOT NULL REFERENCES admission(admission_id),
+        alert_type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        message TEXT NOT NULL,
+        triggered_at DATETIME NOT NULL,
+        acknowledged BOOLEAN NOT NULL,
+        acknowledged_by TEXT REFERENCES provider(provider_id)
+    )
+    """,
+    """
+    CREATE TABLE bed (
+        bed_id TEXT PRIMARY KEY,
+        room_id TEXT NOT NULL REFERENCES room(room_id),
+        bed_label TEXT NOT NULL,
+        status TEXT NOT NULL,
+        current_admission_id TEXT REFERENCES admission(admission_id)
+    )
+    """,
+    """
+    CREATE TABLE labor_progress (
+        progress_id TEXT PRIMARY KEY,
+        admission_id TEXT NOT NULL REFERENCES admission(admission_id),
+        recorded_at DATETIME NOT NULL,
+        cervical_dilation_cm REAL NOT NULL,
+        effacement_pct INTEGER,
+        station INTEGER,
+        contraction_freq INTEGER,
+        membrane_status TEXT NOT NULL,
+        notes TEXT
+    )
+    """,
+    """
+    CREATE TABLE medical_order (
+        order_id TEXT PRIMARY KEY,
+        admission_id TEXT NOT NULL REFERENCES admission(admission_id),
+        order_type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        scheduled_time DATETIME NOT NULL,
+        assigned_provider_id TEXT NOT NULL REFERENCES provider(provider_id),
+        assigned_room_id TEXT REFERENCES room(room_id),
+        priority TEXT NOT NULL,
+        notes TEXT,
+        created_by TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE vital_sign (
+        vital_id TEXT PRIMARY KEY,
+        admission_id TEXT NOT NULL REFERENCES admission(admission_id),
+        recorded_at DATETIME NOT NULL,
+        bp_systolic INTEGER NOT NULL,
+        bp_diastolic INTEGER NOT NULL,
+        heart_rate INTEGER NOT NULL,
+        temperature REAL NOT NULL,
+        fetal_heart_rate INTEGER NOT NULL,
+        oxygen_saturation REAL NOT NULL
+    )
+    """,
+]
+
+#: "Now" of the sample ward. All timestamps are relative to it.
+NOW = datetime(2024, 1, 15, 8, 0, 0)
+
+
+def new_id(name: str) -> str:
+    """
+    Deterministic UUID for a sample row, so tests can refer to rows by name.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"obnexus-sample/{name}"))
+
+
+def fmt(dt: datetime) -> str:
+    """Format a datetime the way SQLite stores it."""
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _hours(hours: float) -> str:
+    return fmt(NOW + timedelta(hours=hours))
+
+
+# (name, room_number, room_type, floor, beds)
+ROOMS = [
+    ("triage", "T01", "triage", 1, ["triage-01", "triage-02"]),
+    ("labor-1", "201", "labor", 2, ["201-A"]),
+    ("labor-2", "202", "labor", 2, ["202-A"]),
+    ("delivery-1", "DR1", "delivery", 2, ["DR1-A"]),
+    ("postpartum-1", "301", "postpartum", 3, ["301-A", "301-B"]),
+    ("postpartum-2", "302", "postpartum", 3, ["302-A", "302-B"]),
+    ("nicu", "N01", "nicu", 3, ["nicu-01", "nicu-02"]),
+]
+
+# (name, role, department)
+PROVIDERS = [
+    ("dr-smith", "obstetrician", "obstetrics"),
+    ("dr-lee", "anesthesiologist", "anesthesiology"),
+    ("nurse-chen", "nurse", "obstetrics"),
+    ("nurse-zhao", "nurse", "obstetrics"),
+]
+
+# (name, age, gravida, para, weeks, fetus_count, planned, risk, complications,
+#  status, admit_hours, delivery_method, bed_label)
+ADMISSIONS = [
+    ("liu", 32, 2, 1, 37.5, 1, "vaginal", "high", "gestational_hypertension",
+     "in_labor", -10, None, "201-A"),
+    ("wang", 28, 1, 0, 39.0, 1, "vaginal", "low", None,
+     "in_labor", -6, None, "202-A"),
+    ("chen", 35, 1, 0, 39.5, 1, "c_section", "medium", None,
+     "postpartum", -30, "c_section", "301-A"),
+    ("zhou", 30, 2, 1, 34.0, 2, "c_section", "high", "twins",
+     "admitted", -3, None, "triage-01"),
+    ("sun", 26, 1, 0, 40.0, 1, "vaginal", "low", None,
+     "postpartum", -20, "vaginal", "301-B"),
+    ("zhang", 31, 3, 2, 39.0, 1, "vaginal", "low", None,
+     "discharged", -80, "vaginal", None),
+]
+
+# admission name -> list of (hours, sys, dia, hr, temp, fhr, spo2)
+VITALS = {
+    # BP trending up: 130 -> 138 -> 145
+    "liu": [
+        (-3, 130, 84, 88, 36.9, 140, 98.0),
+        (-2, 138, 88, 90, 37.0, 142, 98.0),
+        (-1, 145, 92, 92, 37.0, 145, 97.0),
+    ],
+    # normal
+    "wang": [
+        (-3, 118, 76, 80, 36.8, 140, 99.0),
+        (-2, 120, 78, 82, 36.9, 138, 99.0),
+        (-1, 119, 77, 81, 36.8, 141, 99.0),
+    ],
+    # fever
+    "chen": [
+        (-3, 120, 78, 90, 37.4, 140, 98.0),
+        (-2, 122, 80, 96, 37.9, 140, 98.0),
+        (-1, 121, 79, 104, 38.4, 140, 98.0),
+    ],
+    # fetal bradycardia
+    "zhou": [
+        (-2, 124, 80, 86, 36.9, 130, 98.0),
+        (-1, 125, 81, 88, 36.9, 95, 98.0),
+    ],
+    # single normal reading
+    "sun": [
+        (-1, 115, 75, 78, 36.7, 140, 99.0),
+    ],
+    # discharged, abnormal values must be ignored
+    "zhang": [
+        (-75, 170, 115, 110, 39.5, 190, 90.0),
+    ],
+}
+
+# admission name -> list of (hours, dilation, effacement, station, contraction_freq, membrane)
+LABOR_PROGRESS = {
+    "liu": [
+        (-8, 3.0, 50, -2, 3, "intact"),
+        (-4, 5.0, 70, -1, 4, "ruptured"),
+        (-1, 7.0, 90, 0, 5, "ruptured"),
+    ],
+    "wang": [
+        (-5, 2.0, 40, -3, 2, "intact"),
+        (-1, 4.0, 60, -2, 3, "intact"),
+    ],
+}
+
+# (name, admission, order_type, hours, provider, room, priority, status)
+ORDERS = [
+    ("order-1", "zhou", "c_section", 24, "dr-smith", "delivery-1", "urgent", "scheduled"),
+    ("order-2", "liu", "epidural", 2, "dr-lee", "labor-1", "routine", "scheduled"),
+    ("order-3", "chen", "lab_test", 4, "dr-smith", None, "routine", "scheduled"),
+    ("order-4", "sun", "lab_test", -5, "dr-smith", None, "routine", "completed"),
+]
+
+# (name, provider, day_offset, shift_type, room names)
+SHIFTS = [
+    ("shift-1", "dr-smith", 0, "day", ["delivery-1", "labor-1"]),
+    ("shift-2", "dr-lee", 0, "day", ["delivery-1"]),
+    ("shift-3", "nurse-chen", 0, "day", ["postpartum-1"]),
+    ("shift-4", "dr-smith", 1, "day", ["delivery-1"]),
+]
+
+# (name, admission, alert_type, severity, hours, acknowledged)
+ALERTS = [
+    ("alert-1", "zhou", "preterm_risk", "warning", -3, False),
+    ("alert-2", "sun", "fever", "warning", -15, True),
+]
+
+
+def create_schema(engine: "sa.Engine"):
+    """
+    Create the 11 ward tables (no data).
+    """
+    with engine.begin() as conn:
+        for ddl in SCHEMA_DDL:
+            conn.execute(sa.text(ddl))
+
+
+def insert_sample_data(engine: "sa.Engine"):
+    """
+    Insert the hand-written sample rows.
+    """
+    bed_to_admission = {}
+    for row in ADMISSIONS:
+        if row[-1] is not None:
+            bed_to_admission[row[-1]] = row[0]
+
+    with engine.begin() as conn:
+
+        def insert(table: str, rows: list[dict]):
+            if not rows:  # pragma: no cover
+                return
+            columns = list(rows[0])
+            sql = sa.text(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + c for c in columns)})"
+            )
+            conn.execute(sql, rows)
+
+        insert(
+            "room",
+            [
+                dict(
+                    room_id=new_id(name),
+                    room_number=number,
+                    room_type=room_type,
+                    floor=floor,
+                )
+                for name, number, room_type, floor, _ in ROOMS
+            ],
+        )
+        insert(
+            "provider",
+            [
+                dict(
+                    provider_id=new_id(name),
+                    name=name,
+                    role=role,
+                    department=department,
+                    is_active=True,
+                )
+                for name, role, department in PROVIDERS
+            ],
+        )
+        insert(
+            "patient",
+            [
+                dict(
+                    patient_id=new_id(f"patient-{row[0]}"),
+                    name=row[0].title(),
+                    age=row[1],
+                    phone=None,
+                    emergency_contact=None,
+                    insurance_type="public",
+                )
+                for row in ADMISSIONS
+            ],
+        )
+        insert(
+            "ob_profile",
+            [
+                dict(
+                    ob_id=new_id(f"ob-{row[0]}"),
+                    patient_id=new_id(f"patient-{row[0]}"),
+                    gravida=row[2],
+                    para=row[3],
+                    gestational_weeks=row[4],
+                    edd=(NOW + timedelta(weeks=40 - row[4])).strftime("%Y-%m-%d"),
+                    fetus_count=row[5],
+                    prior_delivery_method="vaginal" if row[3] else None,
+                    planned_delivery_method=row[6],
+                    risk_level=row[7],
+                    complications=row[8],
+                    gbs_status="negative",
+                    notes=None,
+                )
+                for row in ADMISSIONS
+            ],
+        )
+        insert(
+            "shift",
+            [
+                dict(
+                    shift_id=new_id(name),
+                    provider_id=new_id(provider),
+                    shift_date=(NOW + timedelta(days=day)).strftime("%Y-%m-%d"),
+                    shift_type=shift_type,
+                    assigned_room_ids=",".join(new_id(room) for room in rooms),
+                )
+                for name, provider, day, shift_type, rooms in SHIFTS
+            ],
+        )
+        insert(
+            "admission",
+            [
+                dict(
+                    admission_id=new_id(name),
+                    patient_id=new_id(f"patient-{name}"),
+                    ob_id=new_id(f"ob-{name}"),
+                    admit_time=_hours(admit),
+                    status=status,
+                    delivery_method_actual=delivery,
+                    delivery_time=_hours(admit + 6) if delivery else None,
+                    predicted_los_hours=None,
+                    predicted_discharge_time=None,
+                    actual_discharge_time=_hours(admit + 48) if status == "discharged" else None,
+                    current_bed_id=new_id(f"bed-{bed}") if bed else None,
+                    attending_provider_id=new_id("dr-smith"),
+                    primary_nurse_id=new_id("nurse-chen"),
+                )
+                for (name, *_, status, admit, delivery, bed) in ADMISSIONS
+            ],
+        )
+        insert(
+            "bed",
+            [
+                dict(
+                    bed_id=new_id(f"bed-{label}"),
+                    room_id=new_id(room_name),
+                    bed_label=label,
+                    status="occupied" if label in bed_to_admission else "available",
+                    current_admission_id=(
+                        new_id(bed_to_admission[label]) if label in bed_to_admission else None
+                    ),
+                )
+                for room_name, *_, labels in ROOMS
+                for label in labels
+            ],
+        )
+        insert(
+            "vital_sign",
+            [
+                dict(
+                    vital_id=new_id(f"vital-{name}-{i}"),
+                    admission_id=new_id(name),
+                    recorded_at=_hours(h),
+                    bp_systolic=sys_,
+                    bp_diastolic=dia,
+                    heart_rate=hr,
+                    temperature=temp,
+                    fetal_heart_rate=fhr,
+                    oxygen_saturation=spo2,
+                )
+                for name, readings in VITALS.items()
+                for i, (h, sys_, dia, hr, temp, fhr, spo2) in enumerate(readings)
+            ],
+        )
+        insert(
+            "labor_progress",
+            [
+                dict(
+                    progress_id=new_id(f"progress-{name}-{i}"),
+                    admission_id=new_id(name),
+                    recorded_at=_hours(h),
+                    cervical_dilation_cm=dilation,
+                    effacement_pct=effacement,
+                    station=station,
+                    contraction_freq=freq,
+                    membrane_status=membrane,
+                    notes=None,
+                )
+                for name, readings in LABOR_PROGRESS.items()
+                for i, (h, dilation, effacement, station, freq, membrane) in enumerate(readings)
+            ],
+        )
+        insert(
+            "medical_order",
+            [
+                dict(
+                    order_id=new_id(name),
+                    admission_id=new_id(admission),
+                    order_type=order_type,
+                    status=status,
+                    scheduled_time=_hours(h),
+                    assigned_provider_id=new_id(provider),
+                    assigned_room_id=new_id(room) if room else None,
+                    priority=priority,
+                    notes=None,
+                    created_by="staff",
+                )
+                for name, admission, order_type, h, provider, room, priority, status in ORDERS
+            ],
+        )
+        insert(
+            "alert",
+            [
+                dict(
+                    alert_id=new_id(name),
+                    admission_id=new_id(admission),
+                    alert_type=alert_type,
+                    severity=severity,
+                    message=f"{alert_type} ({severity})",
+                    triggered_at=_hours(h),
+                    acknowledged=acknowledged,
+                    acknowledged_by=new_id("nurse-chen") if acknowledged else None,
+                )
+                for name, admission, alert_type, severity, h, acknowledged in ALERTS
+            ],
+        )
+
+
+def new_sample_engine(
+    path: T.Optional[Path] = None,
+) -> "sa.Engine":
+    """
+    Create a SQLite engine with the sample ward loaded.
+
+    :param path: SQLite file to create (overwritten if it exists). If None,
+        use a private in-memory database shared by all connections of the
+        returned engine.
+    """
+    if path is None:
+        engine = sa.create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=sqlalchemy.pool.StaticPool,
+        )
+    else:
+        path = Path(path)
+        if path.exists():
+            path.unlink()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        engine = sa.create_engine(f"sqlite:///{path}")
+    create_schema(engine)
+    insert_sample_data(engine)
+    return engine
+
+
+TEST_POSTGRES_URL_ENV = "OBNEXUS_TEST_POSTGRES_URL"
+TEST_POSTGRES_SCHEMA = "obnexus_test"
+
+
+def new_sample_postgres_engine(
+    url: T.Optional[str] = None,
+    schema: str = TEST_POSTGRES_SCHEMA,
+) -> T.Optional["sa.Engine"]:
+    """
+    Create a Postgres engine with the sample ward loaded and migrated.
+
+    The sample is loaded with :func:`obnexus.tests.db_sync.sync_sqlite_to_postgres`
+    into ``schema``, which is dropped and recreated first, so the tests never
+    touch other data on the server.
+
+    :param url: Postgres URL. Defaults to ``$OBNEXUS_TEST_POSTGRES_URL``.
+    :param schema: Schema to (re)create and use as the search path.
+
+    :return: None if no URL is given and the environment variable is not set.
+    """
+    from .db_sync import sync_sqlite_to_postgres
+
+    url = url or os.environ.get(TEST_POSTGRES_URL_ENV)
+    if not url:
+        return None
+    engine = sa.create_engine(
+        url,
+        connect_args={"options": f"-csearch_path={schema}"},
+    )
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(sa.text(f"CREATE SCHEMA {schema}"))
+    sync_sqlite_to_postgres(new_sample_engine(), engine, verbose=False)
+    return engine
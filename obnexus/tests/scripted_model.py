@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+"""
+Deterministic Strands model stand-in for offline tests and benchmarks.
+
+:class:`ScriptedModel` replays a fixed sequence of assistant steps (tool
+calls or final text) instead of calling an LLM. The step to replay is derived
+from the conversation itself (the number of assistant messages since the
+last user text message), so the model is stateless and safe to share across
+concurrent requests.
+
+:func:`message_to_stream_events` turns any recorded assistant message back
+into stream events; :mod:`obnexus.session_replay` reuses it to replay real
+sessions.
+"""
+
+import json
+import asyncio
+import typing as T
+import dataclasses
+
+from strands.models import Model
+
+
+@dataclasses.dataclass
+class ScriptedToolCall:
+    """
+    One tool call the scripted model asks for.
+    """
+
+    name: str
+    input: dict = dataclasses.field(default_factory=dict)
+
+
+@dataclasses.dataclass
+class ScriptedStep:
+    """
+    One assistant message: optional text plus optional tool calls. A step
+    without tool calls ends the turn.
+    """
+
+    text: str = ""
+    tool_calls: list[ScriptedToolCall] = dataclasses.field(default_factory=list)
+
+
+def count_step(messages: T.Sequence[dict]) -> int:
+    """
+    Number of assistant messages since the last user message with text,
+    i.e. the index of the step to replay next.
+    """
+    n = 0
+    for message in reversed(messages):
+        if message["role"] == "assistant":
+            n += 1
+        elif any("text" in block for block in message["content"]):
+            break
+    return n
+
+
+def estimate_tokens(obj: T.Any) -> int:
+    """Rough token count (4 characters per token)."""
+    return max(1, len(json.dumps(obj, default=str)) // 4)
+
+
+def message_to_stream_events(
+    message: dict,
+    stop_reason: str,
+    usage: T.Optional[dict] = None,
+    latency_ms: int = 0,
+) -> T.Iterator[dict]:
+    """
+    Convert a complete assistant message back to the Bedrock-style stream
+    events a Strands model yields. Text, tool use and reasoning blocks are
+    supported, other blocks are skipped.
+    """
+    yield {"messageStart": {"role": "assistant"}}
+    for block in message["content"]:
+        if "text" in block:
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": block["text"]}}}
+            yield {"contentBlockStop": {}}
+        elif "toolUse" in block:
+            tool_use = block["toolUse"]
+            yield {
+                "contentBlockStart": {
+                    "start": {
+                        "toolUse": {"toolUseId": tool_use["toolUseId"], "name": tool_use["name"]}
+                    }
+                }
+            }
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(tool_use["input"])}}}}
+            yield {"contentBlockStop": {}}
+        elif "reasoningContent" in block:
+            reasoning = block["reasoningContent"].get("reasoningText", {})
+            yield {"contentBlockStart": {"start": {}}}
+            yield {
+                "contentBlockDelta": {
+                    "delta": {"reasoningContent": {"text": reasoning.get("text", "")}}
+                }
+            }
+            if reasoning.get("signature"):
+                yield {
+                    "contentBlockDelta": {
+                        "delta": {"reasoningContent": {"signature": reasoning["signature"]}}
+                    }
+                }
+            yield {"contentBlockStop": {}}
+    yield {"messageStop": {"stopReason": stop_reason}}
+    if usage is None:
+        usage = {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0}
+    yield {"metadata": {"usage": usage, "metrics": {"latencyMs": latency_ms}}}
+
+
+class ScriptedModel(Model):
+    """
+    Strands :class:`~strands.models.Model` that replays ``steps`` for every user turn.
+
+    :param steps: Assistant steps replayed in order. If the conversation goes
+        past the last step, the last step is repeated without tool calls.
+    :param latency: Seconds to sleep before each response, to simulate the
+        time spent in the real model.
+    """
+
+    def __init__(
+        self,
+        steps: T.Sequence[ScriptedStep],
+        latency: float = 0.0,
+    ):
+        if len(steps) == 0:
+            raise ValueError("steps must not be empty")
+        self.steps = list(steps)
+        self.latency = latency
+        self.config = {"model_id": "scripted"}
+
+    def update_config(self, **model_config: T.Any):
+        self.config.update(model_config)
+
+    def get_config(self) -> dict:
+        return self.config
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("ScriptedModel does not support structured output")
+
+    def get_step(self, messages: T.Sequence[dict]) -> ScriptedStep:
+        index = count_step(messages)
+        if index < len(self.steps):
+            return self.steps[index]
+        return ScriptedStep(text=self.steps[-1].text)
+
+    async def stream(
+        self,
+        messages,
+        tool_specs=None,
+        system_prompt=None,
+        **kwargs,
+    ) -> T.AsyncGenerator[dict, None]:
+        step = self.get_step(messages)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        content = []
+        if step.text:
+            content.append({"text": step.text})
+        for i, tool_call in enumerate(step.tool_calls):
+            content.append(
+                {
+                    "toolUse": {
+                        "toolUseId": f"tooluse-{len(messages)}-{i}",
+                        "name": tool_call.name,
+                        "input": tool_call.input,
+                    }
+                }
+            )
+        stop_reason = "tool_use" if step.tool_calls else "end_turn"
+        input_tokens = estimate_tokens([system_prompt, tool_specs, messages])
+        output_tokens = estimate_tokens(dataclasses.asdict(step))
+        usage = {
+            "inputTokens": input_tokens,
+            "outputTokens": output_tokens,
+            "totalTokens": input_tokens + output_tokens,
+        }
+        for event in message_to_stream_events(
+            message={"role": "assistant", "content": content},
+            stop_reason=stop_reason,
+            usage=usage,
+            latency_ms=int(self.latency * 1000),
+        ):
+            yield event
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tool execution strategy for the obnexus agent.
+
+When the model asks for several tools in a single step (e.g. census +
+available beds + active alerts), Strands hands all of them to a
+:class:`~strands.tools.executors.ToolExecutor`. This module provides an
+executor that:
+
+- runs consecutive **read-only** tool calls concurrently, bounded by
+  ``max_workers`` so we never exhaust the database connection pool
+- runs **write** tool calls one at a time, in the order the model asked for
+- keeps tool results in the same order as the tool calls
+
+A read that comes after a write in the same step waits for the write to
+finish, so it always sees the new state.
+"""
+
+import asyncio
+import typing as T
+
+from strands.tools.executors import ConcurrentToolExecutor
+from strands.tools.executors import SequentialToolExecutor
+
+from .metrics import tool_queue_depth
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from strands import Agent
+    from strands.types.tools import ToolUse, ToolResult
+
+
+def group_tool_uses(
+    tool_uses: list["ToolUse"],
+    read_only_tool_names: T.Collection[str],
+) -> list[tuple[bool, list["ToolUse"]]]:
+    """
+    Split tool calls into ordered batches.
+
+    Consecutive read-only tool calls are grouped into one batch that can run
+    concurrently. Every other tool call becomes its own batch.
+
+    :param tool_uses: Tool calls requested by the model, in order.
+    :param read_only_tool_names: Names of tools that never modify data.
+
+    :return: List of ``(is_read_only, tool_uses)`` tuples, in order.
+
+    Example:
+        >>> group_tool_uses(
+        ...     [{"name": "q"}, {"name": "q"}, {"name": "w"}, {"name": "q"}],
+        ...     read_only_tool_names={"q"},
+        ... )
+        [(True, [{'name': 'q'}, {'name': 'q'}]), (False, [{'name': 'w'}]), (True, [{'name': 'q'}])]
+    """
+    batches = []
+    for tool_use in tool_uses:
+        is_read_only = tool_use["name"] in read_only_tool_names
+        if is_read_only and batches and batches[-1][0]:
+            batches[-1][1].append(tool_use)
+        else:
+            batches.append((is_read_only, [tool_use]))
+    return batches
+
+
+class ReadWriteToolExecutor(ConcurrentToolExecutor):
+    """
+    Run read-only tools concurrently on a bounded pool and write tools serially.
+
+    Only the ``_execute`` extension point of Strands' executors is used: every
+    tool call of a read-only batch is started at once and waits on a semaphore
+    of ``max_workers`` slots, so a freed slot is taken by the next call right
+    away. Each call collects its result in a list of its own, appended to
+    ``tool_results`` in tool call order (Strands appends them in completion
+    order).
+
+    :param read_only_tool_names: Names of tools that are safe to run in parallel.
+    :param max_workers: Maximum number of read-only tools running at the same time.
+    """
+
+    def __init__(
+        self,
+        read_only_tool_names: T.Collection[str],
+        max_workers: int = 4,
+    ):
+        super().__init__()
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got: {max_workers}")
+        self.read_only_tool_names = frozenset(read_only_tool_names)
+        self.max_workers = max_workers
+        self._sequential = SequentialToolExecutor()
+
+    async def _execute_reads(
+        self,
+        agent: "Agent",
+        tool_uses: list["ToolUse"],
+        results: list[list["ToolResult"]],
+        cycle_trace,
+        cycle_span,
+        invocation_state: dict,
+        structured_output_context=None,
+    ):
+        """
+        Run read-only tool calls, at most ``max_workers`` at the same time.
+
+        Like Strands' concurrent executor, a tool call waits until its last
+        event has been yielded before it goes on.
+
+        :param results: One result list per tool call, filled in place.
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+        queue: asyncio.Queue = asyncio.Queue()
+        yielded = [asyncio.Event() for _ in tool_uses]
+        done = object()
+
+        async def run(n: int, tool_use: "ToolUse"):
+            queued = True
+            try:
+                async with semaphore:
+                    queued = False
+                    tool_queue_depth.dec()
+                    events = self._sequential._execute(
+                        agent,
+                        [tool_use],
+                        results[n],
+                        cycle_trace,
+                        cycle_span,
+                        invocation_state,
+                        structured_output_context,
+                    )
+                    async for event in events:
+                        queue.put_nowait((n, event))
+                        await yielded[n].wait()
+                        yielded[n].clear()
+            finally:
+                if queued:
+                    tool_queue_depth.dec()
+                queue.put_nowait((n, done))
+
+        tool_queue_depth.inc(len(tool_uses))
+        tasks = [
+            asyncio.create_task(run(n, tool_use))
+            for n, tool_use in enumerate(tool_uses)
+        ]
+        try:
+            running = len(tasks)
+            while running:
+                n, event = await queue.get()
+                if event is done:
+                    running -= 1
+                    continue
+                yield event
+                yielded[n].set()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _execute(
+        self,
+        agent: "Agent",
+        tool_uses: list["ToolUse"],
+        tool_results: list["ToolResult"],
+        cycle_trace,
+        cycle_span,
+        invocation_state: dict,
+        structured_output_context=None,
+    ):
+        batches = group_tool_uses(tool_uses, self.read_only_tool_names)
+        for is_read_only, batch in batches:
+            results: list[list["ToolResult"]] = [[] for _ in batch]
+            if is_read_only:
+                events = self._execute_reads(
+                    agent,
+                    batch,
+                    results,
+                    cycle_trace,
+                    cycle_span,
+                    invocation_state,
+                    structured_output_context,
+                )
+            else:
+                events = self._sequential._execute(
+                    agent,
+                    batch,
+                    results[0],
+                    cycle_trace,
+                    cycle_span,
+                    invocation_state,
+                    structured_output_context,
+                )
+
+            interrupted = False
+            async for event in events:
+                # the same check Strands' event loop does on tool events
+                if "tool_interrupt_event" in event:
+                    interrupted = True
+                yield event
+
+            for result in results:
+                tool_results.extend(result)
+            if interrupted:
+                return
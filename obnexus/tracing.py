@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lightweight per-request tracing.
+
+A :class:`Trace` is a tree of :class:`Span` objects for one ``/api/chat``
+request: request parse, history load, each model invocation (with token
+usage), each tool call, each SQL statement and the SSE emission. Spans use
+OpenTelemetry field names (``traceId``, ``spanId``, ``parentSpanId``,
+``startTimeUnixNano`` ...) so exported traces can be loaded by OTel tooling,
+but no OpenTelemetry SDK is needed.
+
+The active trace and span live in context variables, which Strands copies
+into its worker threads and tool tasks, so spans nest correctly without
+passing anything around. When no trace is active every call is a no-op.
+
+Finished traces go to :data:`exporter`, an in-process ring buffer that can
+dump them as JSON (and optionally append them to a JSONL file).
+"""
+
+import json
+import time
+import uuid
+import typing as T
+import threading
+import contextlib
+import contextvars
+import collections
+import dataclasses
+from pathlib import Path
+
+import sqlalchemy as sa
+from strands.hooks import (
+    HookRegistry,
+    AfterInvocationEvent,
+    BeforeModelCallEvent,
+    AfterModelCallEvent,
+    BeforeToolCallEvent,
+    AfterToolCallEvent,
+)
+
+from .metrics import get_usage, usage_since
+
+#: Maximum characters of a SQL statement kept on a span.
+MAX_STATEMENT_LENGTH = 1000
+
+
+@dataclasses.dataclass
+class Span:
+    """
+    One timed operation. Times are ``time.time_ns()`` values.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: T.Optional[str]
+    start_ns: int
+    end_ns: T.Optional[int] = None
+    attributes: dict[str, T.Any] = dataclasses.field(default_factory=dict)
+    status: str = "OK"
+
+    @property
+    def duration_ms(self) -> T.Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": self.duration_ms,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class Trace:
+    """
+    All spans of one request. The root span is started on creation.
+    """
+
+    def __init__(self, name: str, **attributes: T.Any):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+        self.root = self.start_span(name, parent=None, **attributes)
+
+    def start_span(
+        self,
+        name: str,
+        parent: T.Optional[Span] = None,
+        **attributes: T.Any,
+    ) -> Span:
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=uuid.uuid4().hex[:16],
+            parent_span_id=parent.span_id if parent is not None else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def end_span(
+        self,
+        span: Span,
+        status: T.Optional[str] = None,
+        **attributes: T.Any,
+    ):
+        span.end_ns = time.time_ns()
+        span.attributes.update(attributes)
+        if status is not None:
+            span.status = status
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        return {
+            "traceId": self.trace_id,
+            "name": self.root.name,
+            "durationMs": self.root.duration_ms,
+            "spans": [span.to_dict() for span in spans],
+        }
+
+
+current_trace: contextvars.ContextVar[T.Optional[Trace]] = contextvars.ContextVar(
+    "current_trace",
+    default=None,
+)
+current_span: contextvars.ContextVar[T.Optional[Span]] = contextvars.ContextVar(
+    "current_span",
+    default=None,
+)
+
+
+def start_trace(name: str, **attributes: T.Any) -> Trace:
+    """
+    Start a trace and make it (and its root span) current in this context.
+    """
+    trace = Trace(name, **attributes)
+    current_trace.set(trace)
+    current_span.set(trace.root)
+    return trace
+
+
+def finish_trace(trace: Trace, **attributes: T.Any):
+    """End the root span and hand the trace to :data:`exporter`."""
+    trace.end_span(trace.root, **attributes)
+    exporter.export(trace)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: T.Any) -> T.Iterator[T.Optional[Span]]:
+    """
+    Time the enclosed block as a child of the current span, if a trace is active.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+    child = trace.start_span(name, parent=current_span.get(), **attributes)
+    token = current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        trace.end_span(child, status="ERROR", error=repr(e))
+        raise
+    else:
+        trace.end_span(child)
+    finally:
+        current_span.reset(token)
+
+
+class InMemorySpanExporter:
+    """
+    Keep the last ``max_traces`` finished traces in memory.
+
+    :param path: If set, also append every finished trace to this JSONL file.
+    """
+
+    def __init__(
+        self,
+        max_traces: int = 100,
+        path: T.Optional[T.Union[str, Path]] = None,
+    ):
+        self.traces: collections.deque[Trace] = collections.deque(maxlen=max_traces)
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        with self._lock:
+            self.traces.append(trace)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+
+    def get_traces(self, limit: T.Optional[int] = None) -> list[dict]:
+        """Most recent traces first."""
+        with self._lock:
+            traces = list(self.traces)
+        traces.reverse()
+        if limit is not None:
+            traces = traces[:limit]
+        return [trace.to_dict() for trace in traces]
+
+    def to_json(self, limit: T.Optional[int] = None) -> str:
+        return json.dumps(self.get_traces(limit=limit), default=str, indent=2)
+
+    def clear(self):
+        with self._lock:
+            self.traces.clear()
+
+
+exporter = InMemorySpanExporter()
+
+
+class TracingHooks:
+    """
+    Strands hook provider adding a span per model call (with token usage)
+    and per tool call to the current trace.
+
+    The tool span becomes the current span while the tool runs, so SQL spans
+    emitted by the tool are nested under it.
+
+    Strands adds a model call's token usage to the agent's metrics only after
+    the ``AfterModelCallEvent``, so the usage attributes of a model span are
+    set at the next model call, or when the invocation ends.
+    """
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: T.Any):
+        registry.add_callback(AfterInvocationEvent, self.add_usage)
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self.before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self.after_tool_call)
+
+    def add_usage(self, event: T.Union[BeforeModelCallEvent, AfterInvocationEvent]):
+        """Set the token usage of the previous model span, once strands has recorded it."""
+        pending = event.invocation_state.pop("_model_span_usage", None)
+        if pending is None:
+            return
+        model_span, usage_before = pending
+        usage = usage_since(event.agent, usage_before)
+        model_span.attributes.update(
+            input_tokens=usage.get("inputTokens"),
+            output_tokens=usage.get("outputTokens"),
+            total_tokens=usage.get("totalTokens"),
+        )
+
+    def before_model_call(self, event: BeforeModelCallEvent):
+        self.add_usage(event)
+        trace = current_trace.get()
+        if trace is None:
+            return
+        event.invocation_state["_model_span"] = trace.start_span(
+            "model_call",
+            parent=current_span.get(),
+            n_messages=len(event.agent.messages),
+        )
+        event.invocation_state["_model_usage"] = get_usage(event.agent)
+
+    def after_model_call(self, event: AfterModelCallEvent):
+        trace = current_trace.get()
+        model_span = event.invocation_state.pop("_model_span", None)
+        usage_before = event.invocation_state.pop("_model_usage", None)
+        if trace is None or model_span is None:
+            return
+        if event.stop_response is None:
+            trace.end_span(model_span, status="ERROR", error=repr(event.exception))
+            return
+        trace.end_span(model_span, stop_reason=event.stop_response.stop_reason)
+        event.invocation_state["_model_span_usage"] = (model_span, usage_before)
+
+    def before_tool_call(self, event: BeforeToolCallEvent):
+        trace = current_trace.get()
+        if trace is None:
+            return
+        tool_span = trace.start_span(
+            "tool_call",
+            parent=current_span.get(),
+            tool_name=event.tool_use["name"],
+            tool_use_id=event.tool_use["toolUseId"],
+        )
+        # each tool runs in its own task, so this only affects that tool
+        current_span.set(tool_span)
+
+    def after_tool_call(self, event: AfterToolCallEvent):
+        trace = current_trace.get()
+        tool_span = current_span.get()
+        if trace is None or tool_span is None or tool_span.name != "tool_call":
+            return
+        status = event.result.get("status")
+        trace.end_span(
+            tool_span,
+            status="OK" if status == "success" else "ERROR",
+            tool_status=status,
+        )
+        parent = next(
+            (s for s in trace.spans if s.span_id == tool_span.parent_span_id),
+            None,
+        )
+        current_span.set(parent)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = current_trace.get()
+    if trace is None:
+        return
+    conn.info.setdefault("_sql_spans", []).append(
+        trace.start_span(
+            "sql",
+            parent=current_span.get(),
+            statement=statement[:MAX_STATEMENT_LENGTH],
+            executemany=executemany,
+            dialect=conn.dialect.name,
+        )
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = current_trace.get()
+    spans = conn.info.get("_sql_spans")
+    if trace is None or not spans:
+        return
+    trace.end_span(spans.pop(), rowcount=cursor.rowcount)
+
+
+def _handle_error(exception_context):
+    trace = current_trace.get()
+    conn = exception_context.connection
+    if trace is None or conn is None:
+        return
+    spans = conn.info.get("_sql_spans")
+    if spans:
+        trace.end_span(
+            spans.pop(),
+            status="ERROR",
+            error=repr(exception_context.original_exception),
+        )
+
+
+def instrument_sqlalchemy():
+    """
+    Emit a span for every SQL statement run by any SQLAlchemy engine.
+    Safe to call more than once.
+    """
+    if not sa.event.contains(sa.Engine, "before_cursor_execute", _before_cursor_execute):
+        sa.event.listen(sa.Engine, "before_cursor_execute", _before_cursor_execute)
+        sa.event.listen(sa.Engine, "after_cursor_execute", _after_cursor_execute)
+        sa.event.listen(sa.Engine, "handle_error", _handle_error)
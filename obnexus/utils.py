@@ -4,6 +4,7 @@ import typing as T
 import sys
 import re
 import textwrap
+from datetime import datetime
 
 
 def debug(s: str):
@@ -132,3 +133,20 @@ def dedent(text: str) -> str:
     :return: A dedented version of the input string.
     """
     return textwrap.dedent(text).strip()
+
+
+def to_naive_datetime(value: T.Union[str, datetime]) -> datetime:
+    """
+    Convert a datetime column value to a naive datetime.
+
+    SQLite returns datetime columns as ISO strings, PostgreSQL returns
+    ``datetime`` objects (possibly timezone aware).
+
+    :param value: ISO format string or datetime.
+    :return: A naive datetime (timezone info dropped, not converted).
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    return value
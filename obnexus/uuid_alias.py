@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+"""
+Short aliases for UUIDs in tool results and arguments.
+
+Every ``admission_id``, ``bed_id``, ``provider_id`` and ``room_id`` is a
+36-character UUID, about 20 tokens, and the same ids show up again and again
+in query results and in the write tool arguments the model generates.
+:class:`AliasTable` replaces them with short handles (``A482913``,
+``B070155``) before the model sees a tool result, and :class:`UuidAliasHooks`
+resolves the handles back to UUIDs before a tool runs, so tools and the
+database only ever see real ids.
+
+The alias prefix comes from the column (or JSON key) the UUID appears in:
+
+- ``A``: admission, ``B``: bed, ``P``: provider, ``R``: room
+- ``U``: any other UUID
+
+The digits are a hash of the UUID, not a counter, so a UUID gets the same
+alias on every instance and after a restart. Aliases must stay valid across
+the turns of a chat: the model refers to an admission it saw two requests
+ago. :class:`AliasStore` keeps one table per chat id, for a bounded number of
+recent chats. A table only resolves the aliases it issued: an alias from an
+evicted or restarted table is left as-is and matches no id, it never
+resolves to another UUID. Two UUIDs of a chat sharing the leading digits get
+aliases of different lengths.
+
+Aliases are only resolved where an id is expected: in tool parameters named
+``*_id`` / ``*_ids``, and in the ``sql`` parameter, in string literals
+compared with an ``*_id`` column (``admission_id = 'A482913'``,
+``bed_id IN ('B070155', ...)``). Free text, e.g. an alert message, is
+passed through unchanged.
+
+The API passes the chat's table to the agent in
+``invocation_state["uuid_aliases"]``; without it the hooks do nothing.
+"""
+
+import re
+import hashlib
+import typing as T
+import threading
+from collections import OrderedDict
+
+from strands.hooks import (
+    HookRegistry,
+    BeforeToolCallEvent,
+    AfterToolCallEvent,
+)
+
+UUID_PATTERN = re.compile(
+    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+)
+#: A UUID, optionally preceded by the JSON key it is the value of.
+JSON_UUID_PATTERN = re.compile(r'(?:"(?P<key>\w+)"\s*:\s*")?(?P<uuid>' + UUID_PATTERN.pattern + ")")
+#: Alias prefix per id column suffix, e.g. ``assigned_room_id`` -> ``R``.
+ALIAS_PREFIXES: dict[str, str] = {
+    "admission_id": "A",
+    "bed_id": "B",
+    "provider_id": "P",
+    "room_id": "R",
+}
+DEFAULT_PREFIX = "U"
+#: Number of hash digits of an alias, more on a collision.
+ALIAS_DIGITS = 6
+#: An alias in a SQL string literal.
+QUOTED_ALIAS_PATTERN = re.compile(r"'(?P<alias>[A-Z]\d+)'")
+#: String literals compared with an id column, e.g. ``a.admission_id = 'A1'``
+#: or ``bed_id NOT IN ('B1', 'B2')``.
+SQL_ID_COMPARISON_PATTERN = re.compile(
+    r"(?P<comparison>\b\w*_id\s*(?:=|!=|<>|(?:\bNOT\s+)?\bIN\s*\()\s*)"
+    r"(?P<literals>'[^']*'(?:\s*,\s*'[^']*')*)",
+    re.IGNORECASE,
+)
+#: Tool parameters holding SQL.
+SQL_PARAMETERS = frozenset({"sql"})
+
+
+def get_prefix(column: T.Optional[str]) -> str:
+    """Alias prefix of the UUIDs in ``column``."""
+    if column:
+        column = column.lower()
+        for suffix, prefix in ALIAS_PREFIXES.items():
+            if column.endswith(suffix):
+                return prefix
+    return DEFAULT_PREFIX
+
+
+def is_id_parameter(name: T.Optional[str]) -> bool:
+    """True if the tool parameter ``name`` holds ids, e.g. ``assigned_room_id``."""
+    return bool(name) and name.lower().endswith(("_id", "_ids"))
+
+
+def hash_digits(uuid: str) -> str:
+    """18 decimal digits derived from ``uuid`` (case-insensitive)."""
+    digest = hashlib.sha256(uuid.lower().encode("utf-8")).digest()
+    return str(int.from_bytes(digest[:8], "big") % 10**18).zfill(18)
+
+
+class AliasTable:
+    """
+    Two-way mapping between UUIDs and short aliases of one chat.
+    """
+
+    def __init__(self):
+        self.uuid_to_alias: dict[str, str] = {}
+        self.alias_to_uuid: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.uuid_to_alias)
+
+    def alias(self, uuid: str, column: T.Optional[str] = None) -> str:
+        """
+        Alias of ``uuid``, created on first use with the prefix of ``column``
+        and the first :data:`ALIAS_DIGITS` digits of :func:`hash_digits`, or
+        more if another UUID of this table has that alias. A UUID keeps its
+        first alias.
+        """
+        key = uuid.lower()
+        with self._lock:
+            alias = self.uuid_to_alias.get(key)
+            if alias is None:
+                prefix = get_prefix(column)
+                digits = hash_digits(key)
+                for n in range(ALIAS_DIGITS, len(digits) + 1):
+                    alias = f"{prefix}{digits[:n]}"
+                    if alias not in self.alias_to_uuid:
+                        break
+                else:  # pragma: no cover
+                    raise ValueError(f"No free alias for UUID {uuid}")
+                self.uuid_to_alias[key] = alias
+                self.alias_to_uuid[alias] = uuid
+            return alias
+
+    def resolve(self, value: str) -> str:
+        """
+        UUID of ``value`` if this table issued it as an alias, else ``value``
+        unchanged.
+        """
+        return self.alias_to_uuid.get(value.strip(), value)
+
+    def resolve_sql(self, sql: str) -> str:
+        """
+        Replace the aliases in string literals compared with an ``*_id``
+        column, e.g. ``WHERE admission_id = 'A482913'``, by their quoted UUID.
+        Other literals are left unchanged.
+        """
+        if not self.alias_to_uuid:
+            return sql
+
+        def replace_alias(match: re.Match) -> str:
+            uuid = self.alias_to_uuid.get(match.group("alias"))
+            if uuid is None:
+                return match.group(0)
+            return f"'{uuid}'"
+
+        def replace_literals(match: re.Match) -> str:
+            literals = QUOTED_ALIAS_PATTERN.sub(replace_alias, match.group("literals"))
+            return match.group("comparison") + literals
+
+        return SQL_ID_COMPARISON_PATTERN.sub(replace_literals, sql)
+
+    def resolve_input(self, data: T.Any, name: T.Optional[str] = None) -> T.Any:
+        """
+        Resolve aliases in a tool input: the values of id parameters and the
+        id comparisons of SQL parameters.
+
+        :param data: Tool input, or a value in it.
+        :param name: Name of the parameter ``data`` is the value of.
+        """
+        if isinstance(data, str):
+            if name in SQL_PARAMETERS:
+                return self.resolve_sql(data)
+            if is_id_parameter(name):
+                return self.resolve(data)
+            return data
+        if isinstance(data, dict):
+            return {key: self.resolve_input(value, key) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.resolve_input(value, name) for value in data]
+        return data
+
+    def _alias_line(self, line: str, column: T.Optional[str] = None) -> str:
+        def replace(match: re.Match) -> str:
+            alias = self.alias(match.group("uuid"), match.group("key") or column)
+            return match.group(0).replace(match.group("uuid"), alias)
+
+        return JSON_UUID_PATTERN.sub(replace, line)
+
+    def alias_text(self, text: str) -> str:
+        """
+        Replace the UUIDs in a tool result with aliases. Markdown tables take
+        the prefix from the column header, JSON from the key.
+        """
+        if not UUID_PATTERN.search(text):
+            return text
+        lines = []
+        header: T.Optional[list[str]] = None
+        for line in text.split("\n"):
+            if not line.startswith("|"):
+                header = None
+                lines.append(self._alias_line(line))
+                continue
+            cells = line.strip().strip("|").split("|")
+            if header is None:
+                header = [cell.strip() for cell in cells]
+                lines.append(line)
+            elif len(cells) != len(header):
+                lines.append(self._alias_line(line))
+            else:
+                cells = [
+                    self._alias_line(cell, column)
+                    for cell, column in zip(cells, header)
+                ]
+                lines.append("|" + "|".join(cells) + "|")
+        return "\n".join(lines)
+
+
+class AliasStore:
+    """
+    Alias tables of the most recent ``max_sessions`` chats.
+    """
+
+    def __init__(self, max_sessions: int = 1000):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.max_sessions = max_sessions
+        self._tables: OrderedDict[str, AliasTable] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def get(self, session_id: str) -> AliasTable:
+        """Alias table of a chat, created if needed."""
+        with self._lock:
+            table = self._tables.get(session_id)
+            if table is None:
+                table = self._tables[session_id] = AliasTable()
+                while len(self._tables) > self.max_sessions:
+                    self._tables.popitem(last=False)
+            else:
+                self._tables.move_to_end(session_id)
+            return table
+
+
+class UuidAliasHooks:
+    """
+    Strands hook provider resolving aliases in tool arguments and aliasing
+    UUIDs in tool results, using the :class:`AliasTable` in
+    ``invocation_state["uuid_aliases"]``.
+    """
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: T.Any):
+        registry.add_callback(BeforeToolCallEvent, self.before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self.after_tool_call)
+
+    def before_tool_call(self, event: BeforeToolCallEvent):
+        aliases: T.Optional[AliasTable] = event.invocation_state.get("uuid_aliases")
+        if aliases is None:
+            return
+        # a new dict: the assistant message keeps the aliases the model wrote
+        event.tool_use = {
+            **event.tool_use,
+            "input": aliases.resolve_input(event.tool_use["input"]),
+        }
+
+    def after_tool_call(self, event: AfterToolCallEvent):
+        aliases: T.Optional[AliasTable] = event.invocation_state.get("uuid_aliases")
+        if aliases is None:
+            return
+        event.result = {
+            **event.result,
+            "content": [
+                {**block, "text": aliases.alias_text(block["text"])} if "text" in block else block
+                for block in event.result["content"]
+            ],
+        }
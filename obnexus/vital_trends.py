@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+
+"""
+Vectorized vital-sign trend detection.
+
+Instead of letting the LLM eyeball raw ``vital_sign`` rows and notice
+"130 -> 138 -> 145", this module loads the vital signs of every active
+admission with a single query and scans the whole ward in one NumPy pass:
+
+- **Threshold crossings**: the latest reading of each admission is compared
+  against warning / critical limits (BP, fetal heart rate, temperature, SpO2).
+- **Trends**: a least-squares slope (units per hour) is fitted over the last
+  ``window`` readings of each admission, so a steady rise is flagged before
+  it crosses a hard limit.
+
+The result is a list of :class:`AlertCandidate` whose fields map 1:1 to the
+arguments of :func:`obnexus.write_operations.create_alert`.
+"""
+
+import typing as T
+import dataclasses
+from datetime import datetime
+
+import numpy as np
+import sqlalchemy as sa
+
+from .utils import to_naive_datetime
+
+
+@dataclasses.dataclass(frozen=True)
+class VitalRule:
+    """
+    Detection rule for one ``vital_sign`` column.
+
+    :param column: Column name in the ``vital_sign`` table.
+    :param label: Human readable name used in alert messages.
+    :param alert_type: ``alert.alert_type`` raised by this rule.
+    :param unit: Unit used in alert messages.
+    :param high_warning: Latest value >= this raises a warning.
+    :param high_critical: Latest value >= this raises a critical alert.
+    :param low_warning: Latest value <= this raises a warning.
+    :param low_critical: Latest value <= this raises a critical alert.
+    :param rising_slope: Slope (units per hour) >= this is a rising trend.
+    :param rising_floor: A rising trend only counts if the latest value >= this.
+    :param falling_slope: Slope (units per hour) <= this is a falling trend.
+    :param falling_floor: A falling trend only counts if the latest value <= this.
+    """
+
+    column: str
+    label: str
+    alert_type: str
+    unit: str = ""
+    high_warning: T.Optional[float] = None
+    high_critical: T.Optional[float] = None
+    low_warning: T.Optional[float] = None
+    low_critical: T.Optional[float] = None
+    rising_slope: T.Optional[float] = None
+    rising_floor: T.Optional[float] = None
+    falling_slope: T.Optional[float] = None
+    falling_floor: T.Optional[float] = None
+
+
+DEFAULT_RULES: tuple[VitalRule, ...] = (
+    VitalRule(
+        column="bp_systolic",
+        label="Systolic BP",
+        alert_type="high_bp",
+        unit="mmHg",
+        high_warning=140,
+        high_critical=160,
+        rising_slope=3.0,
+        rising_floor=130,
+    ),
+    VitalRule(
+        column="bp_diastolic",
+        label="Diastolic BP",
+        alert_type="high_bp",
+        unit="mmHg",
+        high_warning=90,
+        high_critical=110,
+        rising_slope=2.0,
+        rising_floor=85,
+    ),
+    VitalRule(
+        column="fetal_heart_rate",
+        label="Fetal heart rate",
+        alert_type="abnormal_fhr",
+        unit="bpm",
+        high_warning=160,
+        high_critical=180,
+        low_warning=110,
+        low_critical=100,
+    ),
+    VitalRule(
+        column="temperature",
+        label="Temperature",
+        alert_type="fever",
+        unit="C",
+        high_warning=38.0,
+        high_critical=39.0,
+        rising_slope=0.3,
+        rising_floor=37.5,
+    ),
+    VitalRule(
+        column="oxygen_saturation",
+        label="SpO2",
+        alert_type="low_spo2",
+        unit="%",
+        low_warning=95,
+        low_critical=92,
+        falling_slope=-1.0,
+        falling_floor=96,
+    ),
+)
+
+SEVERITY_RANK = {"warning": 1, "critical": 2}
+
+
+@dataclasses.dataclass
+class AlertCandidate:
+    """
+    A suggested alert, ready to be passed to ``create_alert``.
+    """
+
+    admission_id: str
+    alert_type: str
+    severity: str
+    message: str
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+@dataclasses.dataclass
+class VitalSignArrays:
+    """
+    Column-oriented vital sign readings, sorted by ``(admission_id, recorded_at)``.
+
+    :param admission_ids: Unique admission ids, one per group.
+    :param group: Group index (into ``admission_ids``) of each reading.
+    :param hours: Reading time in hours since the epoch.
+    :param values: Mapping of column name to reading values.
+    """
+
+    admission_ids: np.ndarray
+    group: np.ndarray
+    hours: np.ndarray
+    values: dict[str, np.ndarray]
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.admission_ids)
+
+
+def new_vital_sign_arrays(
+    rows: T.Sequence[T.Sequence],
+    columns: T.Sequence[str],
+) -> VitalSignArrays:
+    """
+    Build :class:`VitalSignArrays` from ``(admission_id, recorded_at, *columns)``
+    rows that are already sorted by ``(admission_id, recorded_at)``.
+    """
+    if len(rows) == 0:
+        return VitalSignArrays(
+            admission_ids=np.array([], dtype=object),
+            group=np.array([], dtype=np.int64),
+            hours=np.array([], dtype=np.float64),
+            values={column: np.array([], dtype=np.float64) for column in columns},
+        )
+
+    admission_ids = np.array([row[0] for row in rows], dtype=object)
+    # rows are sorted by admission_id, so a new group starts where the id changes
+    is_new_group = np.empty(len(rows), dtype=bool)
+    is_new_group[0] = True
+    is_new_group[1:] = admission_ids[1:] != admission_ids[:-1]
+    group = np.cumsum(is_new_group) - 1
+
+    epoch = datetime(1970, 1, 1)
+    hours = np.array(
+        [(to_naive_datetime(row[1]) - epoch).total_seconds() / 3600 for row in rows],
+        dtype=np.float64,
+    )
+    values = {
+        column: np.array([row[i + 2] for row in rows], dtype=np.float64)
+        for i, column in enumerate(columns)
+    }
+    return VitalSignArrays(
+        admission_ids=admission_ids[is_new_group],
+        group=group,
+        hours=hours,
+        values=values,
+    )
+
+
+def load_vital_sign_arrays(
+    engine: "sa.Engine",
+    columns: T.Sequence[str],
+) -> VitalSignArrays:
+    """
+    Load the vital signs of all non-discharged admissions in one query.
+    """
+    column_list = ", ".join(f"v.{column}" for column in columns)
+    sql = f"""
+        SELECT v.admission_id, v.recorded_at, {column_list}
+        FROM vital_sign v
+        JOIN admission a ON a.admission_id = v.admission_id
+        WHERE a.status != 'discharged'
+        ORDER BY v.admission_id, v.recorded_at
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text(sql)).fetchall()
+    return new_vital_sign_arrays(rows=rows, columns=columns)
+
+
+def compute_window_stats(
+    arrays: VitalSignArrays,
+    window: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Locate the latest reading of each admission and the trailing window mask.
+
+    :return: ``(last_index, in_window, n_window)`` where ``last_index`` is the
+        row index of the latest reading per group, ``in_window`` marks rows that
+        belong to the last ``window`` readings of their group and ``n_window``
+        is the number of such rows per group.
+    """
+    n_groups = arrays.n_groups
+    counts = np.bincount(arrays.group, minlength=n_groups)
+    last_index = np.cumsum(counts) - 1
+    rank_from_end = last_index[arrays.group] - np.arange(len(arrays.group))
+    in_window = rank_from_end < window
+    n_window = np.minimum(counts, window)
+    return last_index, in_window, n_window
+
+
+def compute_slopes(
+    arrays: VitalSignArrays,
+    values: np.ndarray,
+    in_window: np.ndarray,
+    last_index: np.ndarray,
+) -> np.ndarray:
+    """
+    Least-squares slope (units per hour) over the trailing window of every group.
+
+    Groups with fewer than two readings, or whose readings share the same
+    timestamp, get a slope of ``0``.
+    """
+    n_groups = arrays.n_groups
+    group = arrays.group[in_window]
+    # center time on the latest reading to keep the sums well conditioned
+    t = (arrays.hours - arrays.hours[last_index][arrays.group])[in_window]
+    y = values[in_window]
+
+    n = np.bincount(group, minlength=n_groups).astype(np.float64)
+    st = np.bincount(group, weights=t, minlength=n_groups)
+    sy = np.bincount(group, weights=y, minlength=n_groups)
+    stt = np.bincount(group, weights=t * t, minlength=n_groups)
+    sty = np.bincount(group, weights=t * y, minlength=n_groups)
+
+    denominator = n * stt - st * st
+    slopes = np.zeros(n_groups, dtype=np.float64)
+    ok = (n >= 2) & (np.abs(denominator) > 1e-12)
+    slopes[ok] = (n[ok] * sty[ok] - st[ok] * sy[ok]) / denominator[ok]
+    return slopes
+
+
+def _format_value(value: float) -> str:
+    return f"{value:g}"
+
+
+def detect_alert_candidates(
+    arrays: VitalSignArrays,
+    rules: T.Sequence[VitalRule] = DEFAULT_RULES,
+    window: int = 3,
+) -> list[AlertCandidate]:
+    """
+    Scan every admission for threshold crossings and concerning trends.
+
+    At most one candidate is returned per ``(admission_id, alert_type)``;
+    when several rules agree (e.g. systolic and diastolic BP) the highest
+    severity wins and the findings are joined in the message.
+
+    :param arrays: Vital signs loaded by :func:`load_vital_sign_arrays`.
+    :param rules: Detection rules to apply.
+    :param window: Number of trailing readings used for trend slopes.
+    """
+    if arrays.n_groups == 0:
+        return []
+
+    last_index, in_window, n_window = compute_window_stats(arrays, window)
+    window_rows = np.flatnonzero(in_window)
+    window_start = np.searchsorted(window_rows, last_index - n_window + 1)
+
+    # (admission index, alert_type) -> (severity, [findings])
+    findings: dict[tuple[int, str], tuple[str, list[str]]] = {}
+
+    def add(group_index: int, rule: VitalRule, severity: str, finding: str):
+        key = (group_index, rule.alert_type)
+        if key in findings:
+            old_severity, old_findings = findings[key]
+            if SEVERITY_RANK[severity] > SEVERITY_RANK[old_severity]:
+                old_severity = severity
+            old_findings.append(finding)
+            findings[key] = (old_severity, old_findings)
+        else:
+            findings[key] = (severity, [finding])
+
+    for rule in rules:
+        values = arrays.values[rule.column]
+        latest = values[last_index]
+        slopes = compute_slopes(arrays, values, in_window, last_index)
+
+        severity = np.zeros(arrays.n_groups, dtype=np.int8)
+        is_trend = np.zeros(arrays.n_groups, dtype=bool)
+        if rule.high_warning is not None:
+            severity[latest >= rule.high_warning] = 1
+        if rule.low_warning is not None:
+            severity[latest <= rule.low_warning] = 1
+        if rule.high_critical is not None:
+            severity[latest >= rule.high_critical] = 2
+        if rule.low_critical is not None:
+            severity[latest <= rule.low_critical] = 2
+        if rule.rising_slope is not None:
+            floor = -np.inf if rule.rising_floor is None else rule.rising_floor
+            is_trend |= (slopes >= rule.rising_slope) & (latest >= floor)
+        if rule.falling_slope is not None:
+            floor = np.inf if rule.falling_floor is None else rule.falling_floor
+            is_trend |= (slopes <= rule.falling_slope) & (latest <= floor)
+        is_trend &= n_window >= 2
+        severity[is_trend & (severity == 0)] = 1
+
+        for group_index in np.flatnonzero(severity):
+            rows = window_rows[window_start[group_index] : window_start[group_index] + n_window[group_index]]
+            series = " -> ".join(_format_value(v) for v in values[rows])
+            if is_trend[group_index]:
+                direction = "rising" if slopes[group_index] > 0 else "falling"
+                finding = (
+                    f"{rule.label} {direction} trend over {len(rows)} readings: "
+                    f"{series} {rule.unit} ({slopes[group_index]:+.1f} {rule.unit}/h)"
+                )
+            else:
+                finding = (
+                    f"{rule.label} {_format_value(latest[group_index])} {rule.unit} "
+                    f"out of range (recent: {series})"
+                )
+            level = "critical" if severity[group_index] == 2 else "warning"
+            add(int(group_index), rule, level, finding)
+
+    candidates = []
+    for (group_index, alert_type), (severity, messages) in findings.items():
+        candidates.append(
+            AlertCandidate(
+                admission_id=arrays.admission_ids[group_index],
+                alert_type=alert_type,
+                severity=severity,
+                message="; ".join(messages),
+            )
+        )
+    candidates.sort(
+        key=lambda c: (-SEVERITY_RANK[c.severity], c.admission_id, c.alert_type)
+    )
+    return candidates
+
+
+def load_open_alert_keys(engine: "sa.Engine") -> set[tuple[str, str]]:
+    """
+    Return ``(admission_id, alert_type)`` of all unacknowledged alerts.
+    """
+    sql = "SELECT admission_id, alert_type FROM alert WHERE acknowledged = :acknowledged"
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text(sql), {"acknowledged": False}).fetchall()
+    return {(row.admission_id, row.alert_type) for row in rows}
+
+
+def scan_ward(
+    engine: "sa.Engine",
+    rules: T.Sequence[VitalRule] = DEFAULT_RULES,
+    window: int = 3,
+    skip_open_alerts: bool = True,
+) -> list[AlertCandidate]:
+    """
+    Scan all active admissions and return alert candidates.
+
+    :param engine: SQLAlchemy engine instance.
+    :param rules: Detection rules to apply.
+    :param window: Number of trailing readings used for trend slopes.
+    :param skip_open_alerts: If True, drop candidates for which an
+        unacknowledged alert of the same type already exists.
+    """
+    columns = list(dict.fromkeys(rule.column for rule in rules))
+    arrays = load_vital_sign_arrays(engine=engine, columns=columns)
+    candidates = detect_alert_candidates(arrays=arrays, rules=rules, window=window)
+    if skip_open_alerts and candidates:
+        open_alerts = load_open_alert_keys(engine)
+        candidates = [
+            c for c in candidates if (c.admission_id, c.alert_type) not in open_alerts
+        ]
+    return candidates
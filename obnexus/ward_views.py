@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+
+"""
+Materialized ward-status summaries.
+
+Ward overview, bed board and high-risk questions all start from the same
+few aggregates. Instead of recomputing them from raw joins on every
+question, they are kept in small summary tables that the agent queries
+directly (a handful of pre-aggregated rows):
+
+- ``mv_census_by_status``: admissions and high-risk admissions per status
+- ``mv_bed_occupancy``: beds per room type and floor, by occupancy
+- ``mv_active_alerts``: unacknowledged alerts per admission
+
+Latest vital signs are not summarized here: ``vital_sign_latest`` (see
+:mod:`obnexus.latest_readings`) already keeps them, so the agent has one
+source.
+
+SQLite has no materialized views, so each summary is a plain table plus the
+SELECT that computes it, which works the same on SQLite and Postgres. The
+schema encoder presents them to the agent as ``MaterializedView`` objects.
+
+Freshness:
+
+- Our own writes (``write_operations``) call :meth:`WardViews.on_write` in
+  their transaction. Summaries keyed by admission are refreshed for that
+  admission only, the small ward-wide aggregates are recomputed.
+- Writes made by other systems are picked up by
+  :meth:`WardViews.maybe_refresh`, which recomputes everything when the last
+  full refresh is older than ``refresh_interval`` seconds, and by
+  ``scripts/refresh_ward_views.py`` for a scheduled refresh.
+
+The tables are created and first filled by migration ``0004`` (see
+:mod:`obnexus.migrations`). Until then :meth:`WardViews.on_write` is a no-op.
+
+Concurrency: a refresh deletes and re-inserts rows, so two transactions
+refreshing the same summary would insert the same primary keys. On Postgres
+each refresh first takes a transaction-level advisory lock per summary
+(released at commit), so concurrent writers refresh one after the other.
+Summaries are always locked in the same order, which rules out deadlocks
+between them. SQLite serializes write transactions itself.
+"""
+
+import time
+import zlib
+import weakref
+import typing as T
+import threading
+import dataclasses
+
+import sqlalchemy as sa
+
+
+@dataclasses.dataclass(frozen=True)
+class MaterializedView:
+    """
+    A summary table and the query that computes it.
+
+    :param name: Table name.
+    :param columns: Column definitions used in ``CREATE TABLE``.
+    :param primary_key: Primary key columns.
+    :param select_sql: Query returning the rows, with output columns named
+        and ordered like the table columns.
+    :param depends_on: Source tables; a write to any of them makes the view stale.
+    :param key_column: If set, the view can be refreshed for one value of this
+        column (an admission) instead of recomputed.
+    """
+
+    name: str
+    columns: tuple[str, ...]
+    primary_key: tuple[str, ...]
+    select_sql: str
+    depends_on: tuple[str, ...]
+    key_column: T.Optional[str] = None
+
+    @property
+    def column_names(self) -> list[str]:
+        return [column.split()[0] for column in self.columns]
+
+    @property
+    def create_sql(self) -> str:
+        columns = ", ".join(self.columns)
+        primary_key = ", ".join(self.primary_key)
+        return f"CREATE TABLE IF NOT EXISTS {self.name} ({columns}, PRIMARY KEY ({primary_key}))"
+
+    @property
+    def insert_sql(self) -> str:
+        return f"INSERT INTO {self.name} ({', '.join(self.column_names)}) {self.select_sql}"
+
+    @property
+    def lock_key(self) -> int:
+        """Postgres advisory lock id of this summary."""
+        return zlib.crc32(self.name.encode("utf-8"))
+
+    def lock(self, conn: "sa.Connection"):
+        """
+        Wait until no other transaction refreshes this summary, on Postgres.
+        The lock is held until the caller's transaction ends.
+        """
+        if conn.dialect.name == "postgresql":
+            conn.execute(
+                sa.text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": self.lock_key},
+            )
+
+    def refresh(self, conn: "sa.Connection"):
+        """Recompute all rows."""
+        self.lock(conn)
+        conn.execute(sa.text(f"DELETE FROM {self.name}"))
+        conn.execute(sa.text(self.insert_sql))
+
+    def refresh_key(self, conn: "sa.Connection", key: str):
+        """Recompute the rows of one ``key_column`` value."""
+        self.refresh_keys(conn, [key])
+
+    def refresh_keys(self, conn: "sa.Connection", keys: T.Collection[str]):
+        """Recompute the rows of several ``key_column`` values."""
+        if self.key_column is None:
+            raise ValueError(f"View {self.name} has no key column")
+        self.lock(conn)
+        names = ", ".join(self.column_names)
+        keys = sorted(set(keys))
+        conn.execute(
+            sa.text(
+                f"DELETE FROM {self.name} WHERE {self.key_column} IN :keys"
+            ).bindparams(sa.bindparam("keys", expanding=True)),
+            {"keys": keys},
+        )
+        conn.execute(
+            sa.text(
+                f"INSERT INTO {self.name} ({names}) "
+                f"SELECT {names} FROM ({self.select_sql}) src "
+                f"WHERE src.{self.key_column} IN :keys"
+            ).bindparams(sa.bindparam("keys", expanding=True)),
+            {"keys": keys},
+        )
+
+
+CENSUS_BY_STATUS = MaterializedView(
+    name="mv_census_by_status",
+    columns=(
+        "status TEXT NOT NULL",
+        "n_admissions INTEGER NOT NULL",
+        "n_high_risk INTEGER NOT NULL",
+    ),
+    primary_key=("status",),
+    select_sql="""
+    SELECT
+        a.status,
+        COUNT(*) AS n_admissions,
+        SUM(CASE WHEN o.risk_level = 'high' THEN 1 ELSE 0 END) AS n_high_risk
+    FROM admission a
+    JOIN ob_profile o ON o.ob_id = a.ob_id
+    GROUP BY a.status
+    """,
+    depends_on=("admission", "ob_profile"),
+)
+
+BED_OCCUPANCY = MaterializedView(
+    name="mv_bed_occupancy",
+    columns=(
+        "room_type TEXT NOT NULL",
+        "floor INTEGER NOT NULL",
+        "n_beds INTEGER NOT NULL",
+        "n_available INTEGER NOT NULL",
+        "n_occupied INTEGER NOT NULL",
+        "n_other INTEGER NOT NULL",
+    ),
+    primary_key=("room_type", "floor"),
+    select_sql="""
+    SELECT
+        r.room_type,
+        r.floor,
+        COUNT(*) AS n_beds,
+        SUM(CASE WHEN b.status = 'available' THEN 1 ELSE 0 END) AS n_available,
+        SUM(CASE WHEN b.status = 'occupied' THEN 1 ELSE 0 END) AS n_occupied,
+        SUM(CASE WHEN b.status NOT IN ('available', 'occupied') THEN 1 ELSE 0 END) AS n_other
+    FROM bed b
+    JOIN room r ON r.room_id = b.room_id
+    GROUP BY r.room_type, r.floor
+    """,
+    depends_on=("bed", "room"),
+)
+
+ACTIVE_ALERTS = MaterializedView(
+    name="mv_active_alerts",
+    columns=(
+        "admission_id TEXT NOT NULL",
+        "n_active INTEGER NOT NULL",
+        "n_critical INTEGER NOT NULL",
+        "latest_alert_type TEXT NOT NULL",
+        "latest_triggered_at TIMESTAMP NOT NULL",
+    ),
+    primary_key=("admission_id",),
+    select_sql="""
+    SELECT
+        admission_id, n_active, n_critical,
+        alert_type AS latest_alert_type,
+        triggered_at AS latest_triggered_at
+    FROM (
+        SELECT
+            admission_id,
+            COUNT(*) OVER (PARTITION BY admission_id) AS n_active,
+            SUM(CASE WHEN severity = 'critical' THEN 1 ELSE 0 END)
+                OVER (PARTITION BY admission_id) AS n_critical,
+            alert_type,
+            triggered_at,
+            ROW_NUMBER() OVER (
+                PARTITION BY admission_id ORDER BY triggered_at DESC, alert_id
+            ) AS rn
+        FROM alert
+        WHERE NOT acknowledged
+    ) ranked
+    WHERE rn = 1
+    """,
+    depends_on=("alert",),
+    key_column="admission_id",
+)
+
+WARD_VIEWS: list[MaterializedView] = [
+    CENSUS_BY_STATUS,
+    BED_OCCUPANCY,
+    ACTIVE_ALERTS,
+]
+
+
+class WardViews:
+    """
+    Keep the ward summary tables fresh.
+
+    :param views: The summaries to maintain.
+    :param refresh_interval: :meth:`maybe_refresh` recomputes all summaries when
+        the last full refresh is older than this many seconds. ``0`` disables it.
+    """
+
+    def __init__(
+        self,
+        views: T.Sequence[MaterializedView] = tuple(WARD_VIEWS),
+        refresh_interval: float = 300,
+    ):
+        self.views = list(views)
+        self.refresh_interval = refresh_interval
+        self.refreshed_at: float = 0.0
+        self._installed: weakref.WeakSet[sa.Engine] = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @property
+    def names(self) -> list[str]:
+        return [view.name for view in self.views]
+
+    def is_installed(self, conn: "sa.Connection") -> bool:
+        """
+        True if all summary tables exist.
+
+        Only a positive answer is cached per engine, so summaries start being
+        maintained as soon as migration ``0004`` is applied.
+        """
+        engine = conn.engine
+        if engine in self._installed:
+            return True
+        existing = set(sa.inspect(conn).get_table_names())
+        if not all(name in existing for name in self.names):
+            return False
+        self._installed.add(engine)
+        return True
+
+    def forget(self, engine: "sa.Engine"):
+        """Check again whether the summary tables exist, e.g. after a migration."""
+        self._installed.discard(engine)
+
+    def is_referenced(self, sql: str) -> bool:
+        """True if ``sql`` reads one of the summaries."""
+        sql = sql.lower()
+        return any(name in sql for name in self.names)
+
+    def refresh(self, engine: "sa.Engine") -> bool:
+        """
+        Recompute all summaries in one transaction.
+
+        :return: False if the summary tables do not exist (yet).
+        """
+        with self._lock:
+            with engine.begin() as conn:
+                if not self.is_installed(conn):
+                    return False
+                for view in self.views:
+                    view.refresh(conn)
+            self.refreshed_at = time.time()
+        return True
+
+    def maybe_refresh(self, engine: "sa.Engine") -> bool:
+        """
+        Recompute all summaries if the last full refresh is older than
+        ``refresh_interval``.
+
+        :return: True if the summaries were refreshed.
+        """
+        if self.refresh_interval and time.time() - self.refreshed_at >= self.refresh_interval:
+            return self.refresh(engine)
+        return False
+
+    def on_write(
+        self,
+        conn: "sa.Connection",
+        tables: T.Collection[str],
+        admission_id: T.Optional[str] = None,
+        admission_ids: T.Optional[T.Collection[str]] = None,
+    ) -> list[str]:
+        """
+        Refresh the summaries depending on ``tables``, inside the caller's
+        transaction.
+
+        :param conn: Connection of the write transaction.
+        :param tables: Tables modified by the write.
+        :param admission_id: If the write only touched one admission, summaries
+            keyed by admission are refreshed for it only.
+        :param admission_ids: Same for a write touching several admissions.
+
+        :return: Names of the refreshed summaries.
+        """
+        if not self.is_installed(conn):
+            return []
+        if admission_id is not None:
+            admission_ids = [admission_id]
+        refreshed = []
+        for view in self.views:
+            if not set(view.depends_on) & set(tables):
+                continue
+            if admission_ids is not None and view.key_column == "admission_id":
+                if not admission_ids:
+                    continue
+                view.refresh_keys(conn, admission_ids)
+            else:
+                view.refresh(conn)
+            refreshed.append(view.name)
+        return refreshed
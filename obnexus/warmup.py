@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+Eager warm-up of the lazy ``one`` singleton.
+
+Everything on :class:`~obnexus.one.one_00_main.One` is a ``cached_property``
+resolved on first access, so without warm-up the first chat request of a new
+worker pays for config loading, boto3 session and model client creation,
+agent construction, the first database connection, schema reflection and
+the in-memory indexes.
+
+:class:`Warmup` resolves them ahead of time, in stages: the steps of a stage
+run concurrently in threads, stages run in order so a step never races with
+the step that builds its dependency (e.g. ``engine`` before
+``database_schema_str``). The API starts it in the background at startup and
+reports its progress on ``/api/ready``.
+"""
+
+import time
+import typing as T
+import threading
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+#: Cached properties of ``one`` resolved by the warm-up, stage by stage.
+WARMUP_STAGES: list[list[str]] = [
+    ["config"],
+    ["model", "engine", "ward_views", "slow_query_log"],
+    ["complex_model", "database_schema_str", "bed_index", "schedule_index"],
+    ["agent"],
+]
+
+
+@dataclasses.dataclass
+class WarmupStep:
+    """
+    Progress of one warm-up step.
+
+    :param name: Attribute resolved by the step.
+    :param status: ``pending``, ``running``, ``ready`` or ``failed``.
+    :param seconds: Time taken, once finished.
+    :param error: Error message if the step failed.
+    """
+
+    name: str
+    status: str = "pending"
+    seconds: T.Optional[float] = None
+    error: T.Optional[str] = None
+
+
+class Warmup:
+    """
+    Resolve attributes of ``obj`` (cached properties) ahead of the first request.
+
+    A failed step does not stop the others; the attribute is then resolved
+    lazily again on first use, and :meth:`start` retries the warm-up.
+
+    :param obj: Object whose attributes are resolved, normally ``one``.
+    :param stages: Attribute names, stage by stage.
+    :param max_workers: Threads per stage.
+    """
+
+    def __init__(
+        self,
+        obj: T.Any,
+        stages: T.Sequence[T.Sequence[str]] = tuple(WARMUP_STAGES),
+        max_workers: int = 4,
+    ):
+        self.obj = obj
+        self.stages = [list(stage) for stage in stages]
+        self.max_workers = max_workers
+        self.steps: dict[str, WarmupStep] = {
+            name: WarmupStep(name=name) for stage in self.stages for name in stage
+        }
+        self.started_at: T.Optional[float] = None
+        self.finished_at: T.Optional[float] = None
+        self._thread: T.Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def is_ready(self) -> bool:
+        """True once every step succeeded."""
+        return self.is_done and all(step.status == "ready" for step in self.steps.values())
+
+    def _run_step(self, name: str):
+        step = self.steps[name]
+        step.status = "running"
+        step.error = None
+        start = time.perf_counter()
+        try:
+            getattr(self.obj, name)
+        except Exception as e:
+            step.status = "failed"
+            step.error = f"{type(e).__name__}: {e}"
+        else:
+            step.status = "ready"
+        step.seconds = time.perf_counter() - start
+
+    def run(self) -> bool:
+        """
+        Run all stages in the calling thread.
+
+        :return: True if every step succeeded.
+        """
+        self.started_at = time.time()
+        self.finished_at = None
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="warmup",
+        ) as executor:
+            for stage in self.stages:
+                list(executor.map(self._run_step, stage))
+        self.finished_at = time.time()
+        return self.is_ready
+
+    def start(self) -> threading.Thread:
+        """
+        Run the warm-up in a background thread. Calling it again returns the
+        running or finished thread, unless the last run failed: then it is
+        retried (resolved attributes are not resolved again).
+        """
+        with self._lock:
+            if self._thread is None or (self.is_done and not self.is_ready):
+                self.finished_at = None
+                self._thread = threading.Thread(
+                    target=self.run,
+                    name="warmup",
+                    daemon=True,
+                )
+                self._thread.start()
+        return self._thread
+
+    def wait(self, timeout: T.Optional[float] = None) -> bool:
+        """
+        Wait for a started warm-up to finish.
+
+        :return: True if every step succeeded.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.is_ready
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.is_ready,
+            "done": self.is_done,
+            "seconds": (
+                self.finished_at - self.started_at
+                if self.started_at is not None and self.finished_at is not None
+                else None
+            ),
+            "steps": [dataclasses.asdict(step) for step in self.steps.values()],
+        }
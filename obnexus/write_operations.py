@@ -8,17 +8,26 @@ All operations use transactions and parameterized queries to prevent SQL injecti
 Errors are raised as exceptions.
 """
 
+import io
+import csv
 import typing as T
 import uuid
 from datetime import datetime, UTC
 
 import sqlalchemy as sa
 
+from .latest_readings import LatestProjection, VITAL_SIGN_LATEST, LABOR_PROGRESS_LATEST
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .schedule_index import ScheduleIndex
+    from .ward_views import WardViews
+
 
 def assign_bed(
     engine: "sa.Engine",
     admission_id: str,
     bed_id: str,
+    ward_views: T.Optional["WardViews"] = None,
 ) -> dict:
     """
     Assign or transfer a patient to a bed.
@@ -40,6 +49,8 @@ def assign_bed(
     :param engine: SQLAlchemy engine instance.
     :param admission_id: UUID of the admission record.
     :param bed_id: UUID of the target bed.
+    :param ward_views: Optional :class:`~obnexus.ward_views.WardViews`. If given,
+        the bed occupancy summary is refreshed in the same transaction.
     :return: dict with success status and message.
     :raises ValueError: If admission or bed not found, or bed not available.
     """
@@ -93,6 +104,9 @@ def assign_bed(
             {"bed_id": bed_id, "admission_id": admission_id},
         )
 
+        if ward_views is not None:
+            ward_views.on_write(conn, tables=["bed"])
+
     return {"success": True, "message": f"Assigned admission {admission_id} to bed {bed_id}"}
 
 
@@ -168,12 +182,80 @@ def update_prediction(
     return {"success": True, "message": f"Updated prediction for admission {admission_id}"}
 
 
+def update_predictions(
+    engine: "sa.Engine",
+    predictions: T.Sequence[dict],
+) -> dict:
+    """
+    Update the length-of-stay predictions of many admissions in one transaction.
+
+    This is the batch version of :func:`update_prediction`, used to refresh
+    the whole ward at once (see :mod:`obnexus.los_model`). Admissions that
+    are not found or already discharged are skipped, not treated as errors.
+
+    :param engine: SQLAlchemy engine instance.
+    :param predictions: List of dicts with ``admission_id``,
+        ``predicted_los_hours`` (6-336) and ``predicted_discharge_time`` (datetime).
+    :return: dict with success status, message, number of updated admissions
+        and the list of skipped admission ids.
+    :raises ValueError: If any prediction is out of range. Nothing is written.
+    """
+    for prediction in predictions:
+        predicted_los_hours = prediction["predicted_los_hours"]
+        if not (6 <= predicted_los_hours <= 336):
+            raise ValueError(
+                f"Predicted LOS hours must be between 6 and 336, got: {predicted_los_hours} "
+                f"(admission {prediction['admission_id']})"
+            )
+
+    if len(predictions) == 0:
+        return {"success": True, "message": "Updated predictions for 0 admissions", "updated": 0, "skipped": []}
+
+    with engine.begin() as conn:
+        # Find which admissions can be updated, with one query
+        admission_ids = [prediction["admission_id"] for prediction in predictions]
+        stmt = sa.text(
+            "SELECT admission_id FROM admission WHERE admission_id IN :admission_ids AND status != 'discharged'"
+        ).bindparams(sa.bindparam("admission_ids", expanding=True))
+        active_ids = {row.admission_id for row in conn.execute(stmt, {"admission_ids": admission_ids})}
+
+        params = [
+            {
+                "los_hours": prediction["predicted_los_hours"],
+                "discharge_time": prediction["predicted_discharge_time"],
+                "admission_id": prediction["admission_id"],
+            }
+            for prediction in predictions
+            if prediction["admission_id"] in active_ids
+        ]
+        skipped = [admission_id for admission_id in admission_ids if admission_id not in active_ids]
+
+        # Update all predictions with executemany
+        if params:
+            conn.execute(
+                sa.text("""
+                    UPDATE admission
+                    SET predicted_los_hours = :los_hours, predicted_discharge_time = :discharge_time
+                    WHERE admission_id = :admission_id
+                """),
+                params,
+            )
+
+    return {
+        "success": True,
+        "message": f"Updated predictions for {len(params)} admissions",
+        "updated": len(params),
+        "skipped": skipped,
+    }
+
+
 def create_alert(
     engine: "sa.Engine",
     admission_id: str,
     alert_type: str,
     severity: str,
     message: str,
+    ward_views: T.Optional["WardViews"] = None,
 ) -> dict:
     """
     Create a high-risk alert for an admission.
@@ -193,13 +275,15 @@ def create_alert(
 
     :param engine: SQLAlchemy engine instance.
     :param admission_id: UUID of the admission record.
-    :param alert_type: Type of alert (high_bp, abnormal_fhr, fever, preterm_risk).
+    :param alert_type: Type of alert (high_bp, abnormal_fhr, fever, low_spo2, preterm_risk).
     :param severity: Severity level (warning, critical).
     :param message: Alert message describing the situation.
+    :param ward_views: Optional :class:`~obnexus.ward_views.WardViews`. If given,
+        the admission's active alert summary is refreshed in the same transaction.
     :return: dict with success status, message, and alert_id.
     :raises ValueError: If admission not found, not in hospital, or invalid alert_type/severity.
     """
-    valid_alert_types = {"high_bp", "abnormal_fhr", "fever", "preterm_risk"}
+    valid_alert_types = {"high_bp", "abnormal_fhr", "fever", "low_spo2", "preterm_risk"}
     valid_severities = {"warning", "critical"}
 
     if alert_type not in valid_alert_types:
@@ -240,6 +324,9 @@ def create_alert(
             },
         )
 
+        if ward_views is not None:
+            ward_views.on_write(conn, tables=["alert"], admission_id=admission_id)
+
     return {"success": True, "message": f"Created alert {alert_id}", "alert_id": alert_id}
 
 
@@ -252,6 +339,7 @@ def create_order(
     priority: str = "routine",
     assigned_room_id: T.Optional[str] = None,
     notes: str = "",
+    schedule_index: T.Optional["ScheduleIndex"] = None,
 ) -> dict:
     """
     Create a medical order (surgery, procedure, lab test, etc.).
@@ -281,8 +369,12 @@ def create_order(
     :param priority: Priority level (routine, urgent, emergency). Default: routine.
     :param assigned_room_id: UUID of the room (optional, required for surgeries).
     :param notes: Additional notes.
+    :param schedule_index: Optional :class:`~obnexus.schedule_index.ScheduleIndex`.
+        If given, reject the order when its provider or room is already booked
+        for an overlapping order, and record the new order in the index.
     :return: dict with success status, message, and order_id.
-    :raises ValueError: If admission/provider not found, or invalid order_type/priority.
+    :raises ValueError: If admission/provider not found, invalid order_type/priority,
+        or the order overlaps an existing booking.
     """
     valid_order_types = {"c_section", "induction", "epidural", "lab_test", "medication", "consult"}
     valid_priorities = {"routine", "urgent", "emergency"}
@@ -321,6 +413,17 @@ def create_order(
             if room_result.fetchone() is None:
                 raise ValueError(f"Room not found: {assigned_room_id}")
 
+        # Check provider and room are not double booked
+        if schedule_index is not None:
+            conflicts = schedule_index.find_conflicts(
+                scheduled_time=scheduled_time,
+                order_type=order_type,
+                assigned_provider_id=assigned_provider_id,
+                assigned_room_id=assigned_room_id,
+            )
+            if conflicts:
+                raise ValueError(f"Scheduling conflict: {'; '.join(conflicts)}")
+
         # Generate new order_id
         order_id = str(uuid.uuid4())
 
@@ -348,4 +451,463 @@ def create_order(
             },
         )
 
+    if schedule_index is not None:
+        schedule_index.add_order(
+            order_id=order_id,
+            order_type=order_type,
+            scheduled_time=scheduled_time,
+            assigned_provider_id=assigned_provider_id,
+            assigned_room_id=assigned_room_id,
+        )
+
     return {"success": True, "message": f"Created order {order_id}", "order_id": order_id}
+
+
+#: Plausible value range of each vital sign. Readings outside are rejected as
+#: entry or device errors.
+VITAL_SIGN_RANGES: dict[str, tuple[float, float]] = {
+    "bp_systolic": (50, 260),
+    "bp_diastolic": (20, 160),
+    "heart_rate": (20, 250),
+    "temperature": (30.0, 45.0),
+    "fetal_heart_rate": (50, 240),
+    "oxygen_saturation": (50.0, 100.0),
+}
+
+#: Plausible value range of each labor progress measurement.
+LABOR_PROGRESS_RANGES: dict[str, tuple[float, float]] = {
+    "cervical_dilation_cm": (0.0, 10.0),
+    "effacement_pct": (0, 100),
+    "station": (-5, 5),
+    "contraction_freq": (0, 10),
+}
+
+
+def _check_ranges(
+    values: dict[str, T.Any],
+    ranges: dict[str, tuple[float, float]],
+):
+    for name, (low, high) in ranges.items():
+        value = values.get(name)
+        if value is not None and not (low <= value <= high):
+            raise ValueError(f"{name} must be between {low} and {high}, got: {value}")
+
+
+def _check_vital_sign(values: dict[str, T.Any]):
+    """
+    Validate a vital sign reading: :data:`VITAL_SIGN_RANGES`, and the
+    diastolic pressure below the systolic.
+    """
+    _check_ranges(values, VITAL_SIGN_RANGES)
+    bp_systolic = values.get("bp_systolic")
+    bp_diastolic = values.get("bp_diastolic")
+    if bp_systolic is not None and bp_diastolic is not None and bp_diastolic >= bp_systolic:
+        raise ValueError(
+            f"bp_diastolic must be lower than bp_systolic, got: {bp_systolic}/{bp_diastolic}"
+        )
+
+
+def _check_labor_progress(values: dict[str, T.Any]):
+    """
+    Validate a labor progress assessment: :data:`LABOR_PROGRESS_RANGES`, and a
+    membrane status.
+    """
+    _check_ranges(values, LABOR_PROGRESS_RANGES)
+    if not values.get("membrane_status"):
+        raise ValueError("membrane_status is required")
+
+
+#: Python types accepted for each column type of the time-series tables.
+_COLUMN_TYPES: dict[str, tuple[type, ...]] = {
+    "TEXT": (str,),
+    "INTEGER": (int,),
+    "FLOAT": (int, float),
+    "TIMESTAMP": (str, datetime),
+}
+
+
+def _check_types(values: dict[str, T.Any], columns: T.Sequence[str]):
+    """
+    Check the type of each value against its column definition
+    (e.g. ``"heart_rate INTEGER NOT NULL"``), so malformed input is rejected
+    with a ValueError before it reaches comparisons or SQL.
+    """
+    for column in columns:
+        name, column_type = column.split()[:2]
+        value = values.get(name)
+        if value is None:
+            continue
+        types = _COLUMN_TYPES[column_type]
+        if isinstance(value, bool) or not isinstance(value, types):
+            expected = " or ".join(t.__name__ for t in types)
+            raise ValueError(f"{name} must be {expected}, got: {value!r}")
+
+
+def _check_admission_in_hospital(conn: "sa.Connection", admission_id: str):
+    admission_row = conn.execute(
+        sa.text("SELECT admission_id, status FROM admission WHERE admission_id = :admission_id"),
+        {"admission_id": admission_id},
+    ).fetchone()
+    if admission_row is None:
+        raise ValueError(f"Admission not found: {admission_id}")
+    if admission_row.status == "discharged":
+        raise ValueError(f"Cannot record readings for discharged patient: {admission_id}")
+
+
+def record_vital_sign(
+    engine: "sa.Engine",
+    admission_id: str,
+    recorded_at: datetime,
+    bp_systolic: int,
+    bp_diastolic: int,
+    heart_rate: int,
+    temperature: float,
+    fetal_heart_rate: int,
+    oxygen_saturation: float,
+    ward_views: T.Optional["WardViews"] = None,
+) -> dict:
+    """
+    Record a vital sign reading.
+
+    The reading is inserted into ``vital_sign`` and projected into
+    ``vital_sign_latest`` in the same transaction. A late reading (older than
+    the projected one) is stored but does not replace the projection.
+
+    :param engine: SQLAlchemy engine instance.
+    :param admission_id: UUID of the admission record.
+    :param recorded_at: Time of the measurement.
+    :param bp_systolic: Systolic blood pressure (mmHg).
+    :param bp_diastolic: Diastolic blood pressure (mmHg).
+    :param heart_rate: Maternal heart rate (bpm).
+    :param temperature: Body temperature (Celsius).
+    :param fetal_heart_rate: Fetal heart rate (bpm).
+    :param oxygen_saturation: SpO2 (%).
+    :param ward_views: Optional :class:`~obnexus.ward_views.WardViews`. If given,
+        the summaries depending on ``vital_sign`` are refreshed for the admission
+        in the same transaction.
+    :return: dict with success status, message, and vital_id.
+    :raises ValueError: If admission not found, discharged, a value is out of
+        :data:`VITAL_SIGN_RANGES`, or bp_diastolic is not lower than bp_systolic.
+    """
+    row = {
+        "admission_id": admission_id,
+        "recorded_at": recorded_at,
+        "bp_systolic": bp_systolic,
+        "bp_diastolic": bp_diastolic,
+        "heart_rate": heart_rate,
+        "temperature": temperature,
+        "fetal_heart_rate": fetal_heart_rate,
+        "oxygen_saturation": oxygen_saturation,
+    }
+    _check_vital_sign(row)
+
+    with engine.begin() as conn:
+        _check_admission_in_hospital(conn, admission_id)
+
+        vital_id = str(uuid.uuid4())
+        row["vital_id"] = vital_id
+        conn.execute(
+            sa.text("""
+                INSERT INTO vital_sign
+                (vital_id, admission_id, recorded_at, bp_systolic, bp_diastolic,
+                 heart_rate, temperature, fetal_heart_rate, oxygen_saturation)
+                VALUES
+                (:vital_id, :admission_id, :recorded_at, :bp_systolic, :bp_diastolic,
+                 :heart_rate, :temperature, :fetal_heart_rate, :oxygen_saturation)
+            """),
+            row,
+        )
+        VITAL_SIGN_LATEST.upsert(conn, [row])
+
+        if ward_views is not None:
+            ward_views.on_write(conn, tables=["vital_sign"], admission_id=admission_id)
+
+    return {"success": True, "message": f"Recorded vital sign {vital_id}", "vital_id": vital_id}
+
+
+def record_labor_progress(
+    engine: "sa.Engine",
+    admission_id: str,
+    recorded_at: datetime,
+    cervical_dilation_cm: float,
+    membrane_status: str,
+    effacement_pct: T.Optional[int] = None,
+    station: T.Optional[int] = None,
+    contraction_freq: T.Optional[int] = None,
+    notes: T.Optional[str] = None,
+) -> dict:
+    """
+    Record a labor progress assessment.
+
+    The assessment is inserted into ``labor_progress`` and projected into
+    ``labor_progress_latest`` in the same transaction. A late assessment
+    (older than the projected one) is stored but does not replace the projection.
+
+    :param engine: SQLAlchemy engine instance.
+    :param admission_id: UUID of the admission record.
+    :param recorded_at: Time of the assessment.
+    :param cervical_dilation_cm: Cervical dilation (0-10 cm).
+    :param membrane_status: Membrane status (e.g. intact, ruptured).
+    :param effacement_pct: Effacement (0-100 %).
+    :param station: Fetal station (-5 to +5).
+    :param contraction_freq: Contractions per 10 minutes.
+    :param notes: Free text notes.
+    :return: dict with success status, message, and progress_id.
+    :raises ValueError: If admission not found, discharged, or a value is out of
+        :data:`LABOR_PROGRESS_RANGES`.
+    """
+    row = {
+        "admission_id": admission_id,
+        "recorded_at": recorded_at,
+        "cervical_dilation_cm": cervical_dilation_cm,
+        "effacement_pct": effacement_pct,
+        "station": station,
+        "contraction_freq": contraction_freq,
+        "membrane_status": membrane_status,
+        "notes": notes,
+    }
+    _check_labor_progress(row)
+
+    with engine.begin() as conn:
+        _check_admission_in_hospital(conn, admission_id)
+
+        progress_id = str(uuid.uuid4())
+        row["progress_id"] = progress_id
+        conn.execute(
+            sa.text("""
+                INSERT INTO labor_progress
+                (progress_id, admission_id, recorded_at, cervical_dilation_cm, effacement_pct,
+                 station, contraction_freq, membrane_status, notes)
+                VALUES
+                (:progress_id, :admission_id, :recorded_at, :cervical_dilation_cm, :effacement_pct,
+                 :station, :contraction_freq, :membrane_status, :notes)
+            """),
+            row,
+        )
+        LABOR_PROGRESS_LATEST.upsert(conn, [row])
+
+    return {
+        "success": True,
+        "message": f"Recorded labor progress {progress_id}",
+        "progress_id": progress_id,
+    }
+
+
+def _to_naive_utc(value: T.Union[str, datetime]) -> datetime:
+    """
+    Parse a timestamp (ISO string or datetime). Aware timestamps are converted
+    to UTC and stored naive, like the rest of the ward database.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def _copy_rows(
+    conn: "sa.Connection",
+    table: str,
+    columns: list[str],
+    rows: list[dict],
+):
+    """
+    Bulk insert with Postgres ``COPY FROM STDIN``, inside the caller's transaction.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _ingest_readings(
+    engine: "sa.Engine",
+    projection: LatestProjection,
+    check: T.Callable[[dict[str, T.Any]], None],
+    readings: T.Sequence[dict],
+    ward_views: T.Optional["WardViews"] = None,
+) -> dict:
+    columns = projection.column_names
+    required = [
+        column.split()[0]
+        for column in projection.columns
+        if "NOT NULL" in column and column.split()[0] != projection.id_column
+    ]
+
+    # --- Validate every reading, without touching the database
+    rejected = []
+    valid: list[tuple[int, dict]] = []
+    for index, reading in enumerate(readings):
+        try:
+            missing = [name for name in required if reading.get(name) is None]
+            if missing:
+                raise ValueError(f"Missing fields: {missing}")
+            row = {name: reading.get(name) for name in columns}
+            _check_types(row, projection.columns)
+            row["recorded_at"] = _to_naive_utc(row["recorded_at"])
+            check(row)
+        except ValueError as e:
+            rejected.append({"index": index, "error": str(e)})
+            continue
+        valid.append((index, row))
+
+    n_inserted = 0
+    n_duplicates = 0
+    with engine.begin() as conn:
+        # --- Check all admissions with one query
+        admission_ids = sorted({row["admission_id"] for _, row in valid})
+        statuses = {}
+        if admission_ids:
+            stmt = sa.text(
+                "SELECT admission_id, status FROM admission WHERE admission_id IN :admission_ids"
+            ).bindparams(sa.bindparam("admission_ids", expanding=True))
+            statuses = {
+                row.admission_id: row.status
+                for row in conn.execute(stmt, {"admission_ids": admission_ids})
+            }
+
+        new_rows = []
+        keys = set()
+        for index, row in valid:
+            status = statuses.get(row["admission_id"])
+            if status is None:
+                rejected.append({"index": index, "error": f"Admission not found: {row['admission_id']}"})
+                continue
+            if status == "discharged":
+                rejected.append(
+                    {"index": index, "error": f"Admission is discharged: {row['admission_id']}"}
+                )
+                continue
+            # repeated within the batch: keep the first one
+            key = (row["admission_id"], row["recorded_at"])
+            if key in keys:
+                n_duplicates += 1
+                continue
+            keys.add(key)
+            row[projection.id_column] = str(uuid.uuid4())
+            new_rows.append(row)
+
+        if new_rows:
+            # readings already stored are skipped by the unique index of
+            # migration 0007, also when another writer stored them concurrently
+            names = ", ".join(columns)
+            on_conflict = "ON CONFLICT (admission_id, recorded_at) DO NOTHING"
+            if conn.dialect.name == "postgresql":
+                staging = f"staging_{projection.source}"
+                conn.execute(
+                    sa.text(
+                        f"CREATE TEMP TABLE {staging} "
+                        f"(LIKE {projection.source} INCLUDING DEFAULTS) ON COMMIT DROP"
+                    )
+                )
+                _copy_rows(conn, staging, columns, new_rows)
+                result = conn.execute(
+                    sa.text(
+                        f"INSERT INTO {projection.source} ({names}) "
+                        f"SELECT {names} FROM {staging} {on_conflict} "
+                        f"RETURNING {projection.id_column}"
+                    )
+                )
+                inserted_ids = set(result.scalars())
+            else:
+                values = ", ".join(f":{name}" for name in columns)
+                stmt = sa.text(
+                    f"INSERT INTO {projection.source} ({names}) VALUES ({values}) {on_conflict}"
+                )
+                inserted_ids = {
+                    row[projection.id_column]
+                    for row in new_rows
+                    if conn.execute(stmt, row).rowcount
+                }
+            n_duplicates += len(new_rows) - len(inserted_ids)
+            new_rows = [row for row in new_rows if row[projection.id_column] in inserted_ids]
+            n_inserted = len(new_rows)
+
+        if new_rows:
+            # only the newest reading of each admission can change the projection
+            latest = {}
+            for row in new_rows:
+                current = latest.get(row["admission_id"])
+                if current is None or row["recorded_at"] >= current["recorded_at"]:
+                    latest[row["admission_id"]] = row
+            projection.upsert(conn, list(latest.values()))
+
+            if ward_views is not None:
+                ward_views.on_write(conn, tables=[projection.source], admission_ids=list(latest))
+
+    rejected.sort(key=lambda item: item["index"])
+    return {
+        "success": not rejected,
+        "message": (
+            f"Inserted {n_inserted} of {len(readings)} readings into {projection.source} "
+            f"({n_duplicates} duplicates, {len(rejected)} rejected)"
+        ),
+        "n_inserted": n_inserted,
+        "n_duplicates": n_duplicates,
+        "rejected": rejected,
+    }
+
+
+def ingest_vital_signs(
+    engine: "sa.Engine",
+    readings: T.Sequence[dict],
+    ward_views: T.Optional["WardViews"] = None,
+) -> dict:
+    """
+    Insert a batch of vital sign readings, e.g. from bedside monitors.
+
+    The batch is validated in bulk (one query for all admissions), then
+    inserted in one transaction with ``COPY`` on Postgres or ``executemany``
+    elsewhere, and ``vital_sign_latest`` is updated with the newest reading of
+    each admission. Readings whose (admission_id, recorded_at) is already stored,
+    or repeated in the batch, are skipped, so a monitor can safely resend.
+    Invalid readings are rejected individually and do not fail the batch.
+
+    :param engine: SQLAlchemy engine instance.
+    :param readings: dicts with the ``vital_sign`` columns except ``vital_id``.
+        ``recorded_at`` may be a datetime or an ISO string.
+    :param ward_views: Optional :class:`~obnexus.ward_views.WardViews`. If given,
+        the summaries depending on ``vital_sign`` are refreshed for the batch's
+        admissions in the same transaction.
+    :return: dict with success status (False if any reading was rejected),
+        message, n_inserted, n_duplicates and rejected (index and error of each
+        rejected reading).
+    """
+    return _ingest_readings(
+        engine=engine,
+        projection=VITAL_SIGN_LATEST,
+        check=_check_vital_sign,
+        readings=readings,
+        ward_views=ward_views,
+    )
+
+
+def ingest_labor_progress(
+    engine: "sa.Engine",
+    readings: T.Sequence[dict],
+) -> dict:
+    """
+    Insert a batch of labor progress assessments.
+
+    Same behavior as :func:`ingest_vital_signs`, for ``labor_progress`` and
+    ``labor_progress_latest``.
+
+    :param engine: SQLAlchemy engine instance.
+    :param readings: dicts with the ``labor_progress`` columns except ``progress_id``.
+    :return: dict with success status, message, n_inserted, n_duplicates and rejected.
+    """
+    return _ingest_readings(
+        engine=engine,
+        projection=LABOR_PROGRESS_LATEST,
+        check=_check_labor_progress,
+        readings=readings,
+    )
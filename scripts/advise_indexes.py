@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+"""
+Propose indexes for the slow agent queries in ``tmp/slow-queries.jsonl`` and
+report before / after timings. Proposed indexes are only kept with ``--apply``.
+
+Usage:
+    .venv/bin/python scripts/advise_indexes.py
+    .venv/bin/python scripts/advise_indexes.py --local
+    .venv/bin/python scripts/advise_indexes.py --local --apply
+    .venv/bin/python scripts/advise_indexes.py --path tmp/other-log.jsonl --top 10
+"""
+
+import fire
+from obnexus.one.api import one
+from obnexus.paths import path_enum
+from obnexus.slow_query_log import load_slow_queries
+from obnexus.index_advisor import advise_indexes
+
+
+def main(
+    path: str = str(path_enum.path_slow_query_log),
+    local: bool = False,
+    apply: bool = False,
+    top: int = 5,
+    repeat: int = 3,
+):
+    """
+    :param path: Slow-query log written by the agent.
+    :param local: Use the local SQLite database instead of the remote one.
+    :param apply: Create the proposed indexes.
+    :param top: Evaluate at most this many index candidates.
+    :param repeat: Runs per statement when timing.
+    """
+    entries = load_slow_queries(path)
+    engine = one.local_sqlite_engine if local else one.engine
+    report = advise_indexes(
+        engine=engine,
+        entries=entries,
+        apply=apply,
+        top=top,
+        repeat=repeat,
+    )
+    print(report.to_markdown())
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+"""
+Apply pending schema migrations (indexes, FK constraints) to a database.
+The remote database is migrated by ``test_sync_data_to_remote_db.py`` anyway;
+use this for the local SQLite file or to migrate without a resync.
+
+Usage:
+    .venv/bin/python scripts/apply_migrations.py
+    .venv/bin/python scripts/apply_migrations.py --local
+    .venv/bin/python scripts/apply_migrations.py --local --target 1
+"""
+
+import typing as T
+
+import fire
+from obnexus.one.api import one
+from obnexus.migrations import apply_migrations
+
+
+def main(
+    local: bool = False,
+    target: T.Optional[int] = None,
+):
+    """
+    :param local: Migrate the local SQLite database instead of the remote one.
+    :param target: Stop after this migration version.
+    """
+    engine = one.local_sqlite_engine if local else one.engine
+    applied = apply_migrations(engine, target=target)
+    if not applied:
+        print("Database is up to date.")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""
+Offline throughput benchmark of ``/api/chat``: scripted model, in-memory
+SQLite sample ward, concurrent requests through the FastAPI app.
+
+Usage:
+    .venv/bin/python scripts/benchmark_chat.py
+    .venv/bin/python scripts/benchmark_chat.py --n_requests=500 --concurrency=16 --latency=0.2
+"""
+
+import os
+import sys
+import json
+
+import fire
+
+# Make ``api.index`` importable when running from the scripts folder
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from api.index import app
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, run_chat_benchmark
+
+
+def main(
+    n_requests: int = 200,
+    concurrency: int = 8,
+    latency: float = 0.0,
+    as_json: bool = False,
+):
+    use_offline_backend(one, latency=latency)
+    report = run_chat_benchmark(app, n_requests=n_requests, concurrency=concurrency)
+    if as_json:
+        print(json.dumps(report.summary(), indent=2))
+    else:
+        print(report.to_markdown())
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
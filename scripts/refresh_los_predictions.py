@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+"""
+Refresh the length-of-stay predictions of all active admissions.
+
+Usage:
+    .venv/bin/python scripts/refresh_los_predictions.py
+    .venv/bin/python scripts/refresh_los_predictions.py --local
+"""
+
+import json
+
+import fire
+from obnexus.los_model import refresh_predictions
+from obnexus.one.api import one
+
+
+def main(local: bool = False):
+    engine = one.local_sqlite_engine if local else one.engine
+    result = refresh_predictions(engine=engine)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
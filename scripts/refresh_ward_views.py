@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"""
+Recompute the ward summary tables (``mv_*``). Run it on a schedule to pick
+up writes made outside the agent, or after a bulk load.
+
+Usage:
+    .venv/bin/python scripts/refresh_ward_views.py
+    .venv/bin/python scripts/refresh_ward_views.py --local
+"""
+
+import time
+
+import fire
+from obnexus.one.api import one
+
+
+def main(local: bool = False):
+    """
+    :param local: Refresh the local SQLite database instead of the remote one.
+    """
+    engine = one.local_sqlite_engine if local else one.engine
+    start = time.perf_counter()
+    if not one.ward_views.refresh(engine):
+        print("Summary tables not found, run scripts/apply_migrations.py first.")
+        return
+    elapsed = time.perf_counter() - start
+    print(f"Refreshed {', '.join(one.ward_views.names)} in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
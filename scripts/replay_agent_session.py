@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""
+Replay a recorded agent session (see ``scripts/test_agent_*.py``) against the
+current code, with the model stubbed from the recording.
+
+Usage:
+    .venv/bin/python scripts/replay_agent_session.py assign_bed
+    .venv/bin/python scripts/replay_agent_session.py assign_bed --local
+    .venv/bin/python scripts/replay_agent_session.py tmp/sessions/assign_bed.jsonl --sample
+"""
+
+from pathlib import Path
+
+import fire
+from obnexus.one.api import one
+from obnexus.paths import path_enum
+from obnexus.benchmark import use_offline_backend
+from obnexus.tests.sample_db import new_sample_engine
+from obnexus.session_replay import load_session, ReplayModel, replay_session
+
+
+def main(
+    name: str,
+    local: bool = False,
+    sample: bool = False,
+    latency_scale: float = 0.0,
+):
+    """
+    :param name: Session name (file in ``tmp/sessions``) or path to a JSONL file.
+    :param local: Replay against the local SQLite database.
+    :param sample: Replay against the in-memory sample ward.
+    :param latency_scale: 1 reproduces the recorded model latency, 0 skips it.
+    """
+    path = Path(name)
+    if not path.exists():
+        path = path_enum.dir_sessions / f"{name}.jsonl"
+    session = load_session(path)
+
+    if sample:
+        engine = new_sample_engine()
+    elif local:
+        engine = one.local_sqlite_engine
+    else:
+        engine = one.engine
+    use_offline_backend(
+        one,
+        engine=engine,
+        model=ReplayModel(session, latency_scale=latency_scale),
+    )
+    report = replay_session(one.agent, session)
+    print(report.to_markdown())
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""
+Roll up and archive the time-series readings of admissions discharged more
+than ``config.retention_days`` ago (see :mod:`obnexus.retention`). On Postgres,
+also create the monthly partitions of the next months ahead of time (see
+:mod:`obnexus.partitioning`). Run it daily.
+
+Usage:
+    .venv/bin/python scripts/run_retention.py
+    .venv/bin/python scripts/run_retention.py --local --days 7
+"""
+
+from datetime import datetime, timedelta
+
+import fire
+from obnexus.one.api import one
+from obnexus.retention import run_retention
+from obnexus.partitioning import ensure_partitions, next_month
+
+
+def main(
+    local: bool = False,
+    days: int | None = None,
+    months_ahead: int = 2,
+):
+    """
+    :param local: Use the local SQLite database instead of the remote one.
+    :param days: Retention in days after discharge. Default: ``config.retention_days``.
+    :param months_ahead: Postgres partitions to create beyond the current month.
+    """
+    engine = one.local_sqlite_engine if local else one.engine
+    days = one.config.retention_days if days is None else days
+    now = datetime.now()
+
+    if engine.dialect.name == "postgresql":
+        end = now
+        for _ in range(months_ahead):
+            end = next_month(end)
+        partitions = ensure_partitions(engine, start=now, end=end)
+        print(f"Partitions up to {end:%Y-%m}: {len(partitions)}")
+
+    print(f"Archiving readings of admissions discharged more than {days} days ago...")
+    summary = run_retention(engine, discharged_before=now - timedelta(days=days))
+    print(f"Archived {sum(summary.values())} readings.")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -7,6 +7,8 @@ This script tests multi-turn conversations with the agent.
 """
 
 from obnexus.one.api import one
+from obnexus.paths import path_enum
+from obnexus.session_replay import record_session
 from obnexus.tests.db_sync import reset_remote_database
 from obnexus.agent_debugger import chat
 from obnexus.agent_debugger import print_summary
@@ -57,5 +59,7 @@ Verify the transfer was successful. Check:
 if __name__ == "__main__":
     reset_remote_database(verbose=False)
     print_multi_turn_conversation_headers(name="assign_bed", n_turns=3)
-    results = test_assign_bed_full(debug=False)
+    # Record the session for offline replay: scripts/replay_agent_session.py assign_bed
+    with record_session(one.agent, path_enum.dir_sessions / "assign_bed.jsonl"):
+        results = test_assign_bed_full(debug=False)
     print_summary(results)
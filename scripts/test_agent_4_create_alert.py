@@ -11,6 +11,8 @@ Usage:
 
 
 from obnexus.one.api import one
+from obnexus.paths import path_enum
+from obnexus.session_replay import record_session
 from obnexus.tests.db_sync import reset_remote_database
 from obnexus.agent_debugger import chat
 from obnexus.agent_debugger import print_summary
@@ -70,5 +72,7 @@ Verify the alert was created successfully. Query the alert table to show:
 if __name__ == "__main__":
     reset_remote_database(verbose=False)
     print_multi_turn_conversation_headers(name="create_alert", n_turns=3)
-    results = test_create_alert_full(debug=False)
+    # Record the session for offline replay: scripts/replay_agent_session.py create_alert
+    with record_session(one.agent, path_enum.dir_sessions / "create_alert.jsonl"):
+        results = test_create_alert_full(debug=False)
     print_summary(results)
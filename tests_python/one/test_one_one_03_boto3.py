@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from obnexus.config.conf_00_def import Config
+from obnexus.one.one_00_main import One
+
+
+def new_one() -> One:
+    one = One()
+    one.__dict__["config"] = Config(
+        aws_region="us-east-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        model_id="us.amazon.nova-micro-v1:0",
+        bedrock_max_pool_connections=8,
+    )
+    return one
+
+
+class TestBoto3Mixin:
+    def test_bedrock_runtime_client(self):
+        one = new_one()
+        client = one.bedrock_runtime_client
+        assert one.bedrock_runtime_client is client
+
+        config = client.meta.config
+        assert config.max_pool_connections == 8
+        assert config.tcp_keepalive is True
+        assert config.retries["mode"] == "adaptive"
+        assert config.connect_timeout == 5
+        assert config.read_timeout == 120
+
+        # the agent's model and chat sessions share the client
+        assert one.bedrock_model.client is client
+        session = one.new_chat_session(system=[{"text": "You are a nurse assistant."}])
+        assert session.client is client
+        assert session.model_id == "us.amazon.nova-micro-v1:0"
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.one.one_03_boto3",
+        preview=False,
+    )
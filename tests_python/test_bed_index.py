@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import sqlalchemy as sa
+
+from obnexus.tests.sample_db import new_sample_engine, new_id
+from obnexus.write_operations import assign_bed
+from obnexus.bed_index import BedIndex, format_beds
+
+
+class TestBedIndex:
+    def test_find(self):
+        engine = new_sample_engine()
+        index = BedIndex(engine, reconcile_interval=0)
+        assert len(index) == 11
+
+        labels = [bed.bed_label for bed in index.find_available()]
+        assert labels == ["302-A", "302-B", "DR1-A", "nicu-01", "nicu-02", "triage-02"]
+        assert [bed.bed_label for bed in index.find_available(room_type="postpartum")] == ["302-A", "302-B"]
+        assert [bed.bed_label for bed in index.find_available(floor=2)] == ["DR1-A"]
+        assert [bed.bed_label for bed in index.find_available(room_type="nicu", floor=3)] == ["nicu-01", "nicu-02"]
+        assert index.find_available(room_type="labor") == []
+        assert index.find_available(room_type="unknown") == []
+
+        assert index.summary()["postpartum"] == {"available": 2, "occupied": 2}
+        assert "302-A" in format_beds(index.find_available(room_type="postpartum"))
+        assert format_beds([]) == "No result"
+
+    def test_apply_assignment(self):
+        engine = new_sample_engine()
+        index = BedIndex(engine, reconcile_interval=0)
+
+        # transfer zhou from triage-01 to 302-A
+        admission_id = new_id("zhou")
+        bed_id = new_id("bed-302-A")
+        assign_bed(engine, admission_id, bed_id)
+        index.apply_assignment(admission_id=admission_id, bed_id=bed_id)
+
+        assert index.get(bed_id).status == "occupied"
+        assert index.get(bed_id).current_admission_id == admission_id
+        assert index.get(new_id("bed-triage-01")).status == "available"
+        assert [bed.bed_label for bed in index.find_available(room_type="triage")] == ["triage-01", "triage-02"]
+
+        # in-place updates agree with the database
+        assert index.reload() == 0
+
+    def test_reconcile(self):
+        engine = new_sample_engine()
+        index = BedIndex(engine, reconcile_interval=3600)
+        assert index.maybe_reconcile() is False
+
+        # a write made outside of the index
+        with engine.begin() as conn:
+            conn.execute(
+                sa.text("UPDATE bed SET status = 'cleaning' WHERE bed_id = :bed_id"),
+                {"bed_id": new_id("bed-302-A")},
+            )
+        assert len(index.find_available(room_type="postpartum")) == 2
+
+        index.reconcile_interval = 0.001
+        index.loaded_at -= 1
+        assert [bed.bed_label for bed in index.find_available(room_type="postpartum")] == ["302-B"]
+        assert index.summary()["postpartum"]["cleaning"] == 1
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.bed_index",
+        preview=False,
+    )
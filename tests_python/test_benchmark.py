@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from api.index import app
+from obnexus.one.api import one
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep, count_step
+from obnexus.benchmark import (
+    reset_cached_properties,
+    use_offline_backend,
+    new_chat_request_body,
+    run_chat_benchmark,
+)
+
+
+@pytest.fixture
+def offline_one():
+    use_offline_backend(one)
+    yield one
+    reset_cached_properties(one)
+
+
+def test_count_step():
+    messages = [
+        {"role": "user", "content": [{"text": "hi"}]},
+        {"role": "assistant", "content": [{"toolUse": {}}]},
+        {"role": "user", "content": [{"toolResult": {}}]},
+        {"role": "assistant", "content": [{"toolUse": {}}]},
+        {"role": "user", "content": [{"toolResult": {}}]},
+    ]
+    assert count_step(messages[:1]) == 0
+    assert count_step(messages) == 2
+    with pytest.raises(ValueError):
+        ScriptedModel(steps=[])
+    model = ScriptedModel(steps=[ScriptedStep(text="a")])
+    assert model.get_step(messages).text == "a"
+
+
+def test_run_chat_benchmark(offline_one):
+    report = run_chat_benchmark(app, n_requests=6, concurrency=3, warmup=1)
+    assert report.n_errors == 0
+    assert len(report.latencies) == 6
+    summary = report.summary()
+    assert summary["latency_ms"]["p50"] > 0
+    # the default script calls two read-only tools in one step, then answers
+    assert report.stages["tool_call"][0] > 0
+    assert len(report.stages["model_call"]) == 6
+    assert "| stage" in report.to_markdown()
+
+    messages = offline_one.agent.messages
+    assert messages[-1]["content"][0]["text"].endswith("rooms 201 and 202.")
+    tool_results = [
+        block["toolResult"]
+        for message in messages
+        for block in message["content"]
+        if "toolResult" in block
+    ]
+    assert [result["status"] for result in tool_results] == ["success", "success"]
+
+
+def test_use_offline_backend_resets_state(offline_one):
+    aliases = offline_one.alias_store.get("chat-1")
+    cursors = offline_one.cursor_store.get("chat-1")
+    use_offline_backend(offline_one)
+    assert offline_one.alias_store.get("chat-1") is not aliases
+    assert offline_one.cursor_store.get("chat-1") is not cursors
+
+
+def test_new_chat_request_body():
+    body = new_chat_request_body("b", history=[("user", "a"), ("assistant", "c")])
+    assert [m["role"] for m in body["messages"]] == ["user", "assistant", "user"]
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.benchmark",
+        preview=False,
+    )
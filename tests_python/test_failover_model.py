@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+import pytest
+from botocore.config import Config as BotocoreConfig
+from strands import Agent
+from strands.models import BedrockModel
+from strands.models.openai import OpenAIModel
+
+from obnexus.failover_model import (
+    CLOSED,
+    OPEN,
+    HALF_OPEN,
+    CircuitBreaker,
+    Provider,
+    FailoverModel,
+    model_provider_requests_total,
+    model_provider_hedged_total,
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for a model backend. The server's ``delay`` and ``fail``
+    attributes control the next responses.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.n_requests += 1
+        time.sleep(self.server.delay)
+        if self.server.fail:
+            self.send_json(500, {"message": "stub failure"})
+        else:
+            self.respond()
+
+    def send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class BedrockStubHandler(StubHandler):
+    """Bedrock Runtime ``Converse`` API."""
+
+    def send_json(self, status: int, body: dict, headers: dict = None):
+        if status >= 400:
+            headers = {"x-amzn-ErrorType": "InternalServerException"}
+        super().send_json(status, body, headers)
+
+    def respond(self):
+        self.send_json(
+            200,
+            {
+                "output": {
+                    "message": {"role": "assistant", "content": [{"text": "from bedrock"}]}
+                },
+                "stopReason": "end_turn",
+                "usage": {"inputTokens": 10, "outputTokens": 2, "totalTokens": 12},
+                "metrics": {"latencyMs": 1},
+            },
+        )
+
+
+class OpenAIStubHandler(StubHandler):
+    """OpenAI-compatible streamed chat completions, as served by GLM."""
+
+    def respond(self):
+        chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "glm"}
+        events = [
+            {
+                **chunk,
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": "from glm"},
+                        "finish_reason": None,
+                    }
+                ],
+            },
+            {**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+            {
+                **chunk,
+                "choices": [],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+            },
+        ]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for event in events:
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def start_server(handler: type) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.n_requests = 0
+    server.delay = 0.0
+    server.fail = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def bedrock_server():
+    server = start_server(BedrockStubHandler)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def glm_server():
+    server = start_server(OpenAIStubHandler)
+    yield server
+    server.shutdown()
+
+
+def new_failover_model(
+    bedrock_server: ThreadingHTTPServer,
+    glm_server: ThreadingHTTPServer,
+    first_token_seconds: float = 5.0,
+    failure_threshold: int = 3,
+) -> FailoverModel:
+    bedrock_model = BedrockModel(
+        boto_session=boto3.Session(
+            aws_access_key_id="stub",
+            aws_secret_access_key="stub",
+            region_name="us-east-1",
+        ),
+        boto_client_config=BotocoreConfig(retries={"max_attempts": 1, "mode": "standard"}),
+        endpoint_url=f"http://127.0.0.1:{bedrock_server.server_port}",
+        model_id="us.amazon.nova-micro-v1:0",
+        streaming=False,
+    )
+    glm_model = OpenAIModel(
+        client_args={
+            "api_key": "stub",
+            "base_url": f"http://127.0.0.1:{glm_server.server_port}/v1/",
+            "max_retries": 0,
+        },
+        model_id="glm-4.7",
+    )
+    return FailoverModel(
+        providers=[
+            Provider(
+                name="bedrock",
+                model=bedrock_model,
+                breaker=CircuitBreaker("bedrock", failure_threshold=failure_threshold),
+            ),
+            Provider(
+                name="glm",
+                model=glm_model,
+                breaker=CircuitBreaker("glm", failure_threshold=failure_threshold),
+            ),
+        ],
+        first_token_seconds=first_token_seconds,
+    )
+
+
+def ask(model: FailoverModel) -> str:
+    agent = Agent(model=model, callback_handler=None)
+    return str(agent("How many beds are free?"))
+
+
+def test_circuit_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=30, clock=lambda: now[0])
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    # one trial request after reset_seconds
+    now[0] = 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    # a failed trial opens the circuit again
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    now[0] = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+
+    with pytest.raises(ValueError):
+        CircuitBreaker("test", failure_threshold=0)
+
+
+def test_primary(bedrock_server, glm_server):
+    model = new_failover_model(bedrock_server, glm_server)
+    assert "from bedrock" in ask(model)
+    assert glm_server.n_requests == 0
+    assert model.get_config()["model_id"] == "us.amazon.nova-micro-v1:0"
+
+
+def test_failover_on_error(bedrock_server, glm_server):
+    model = new_failover_model(bedrock_server, glm_server, failure_threshold=2)
+    n_errors = model_provider_requests_total.get(provider="bedrock", outcome="error")
+    bedrock_server.fail = True
+
+    assert "from glm" in ask(model)
+    assert model_provider_requests_total.get(provider="bedrock", outcome="error") == n_errors + 1
+    assert model.providers[0].breaker.state == CLOSED
+
+    # the second failure opens the circuit: bedrock is skipped
+    assert "from glm" in ask(model)
+    assert model.providers[0].breaker.state == OPEN
+    n_requests = bedrock_server.n_requests
+    assert "from glm" in ask(model)
+    assert bedrock_server.n_requests == n_requests
+
+
+def test_hedge_on_slow_first_token(bedrock_server, glm_server):
+    model = new_failover_model(bedrock_server, glm_server, first_token_seconds=0.2)
+    n_hedged = model_provider_hedged_total.get(provider="glm")
+    n_cancelled = model_provider_requests_total.get(provider="bedrock", outcome="cancelled")
+    bedrock_server.delay = 3.0
+
+    start = time.perf_counter()
+    assert "from glm" in ask(model)
+    assert time.perf_counter() - start < 2.5
+    assert model_provider_hedged_total.get(provider="glm") == n_hedged + 1
+    assert (
+        model_provider_requests_total.get(provider="bedrock", outcome="cancelled")
+        == n_cancelled + 1
+    )
+    # a slow provider is not a failing one
+    assert model.providers[0].breaker.failures == 0
+
+
+def test_all_providers_fail(bedrock_server, glm_server):
+    model = new_failover_model(bedrock_server, glm_server)
+    bedrock_server.fail = True
+    glm_server.fail = True
+    with pytest.raises(Exception):
+        ask(model)
+
+    with pytest.raises(ValueError):
+        FailoverModel(providers=[])
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.failover_model",
+        preview=False,
+    )
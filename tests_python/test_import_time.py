@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+Import-time budget of the serverless entry point, measured with
+``python -X importtime`` in a fresh interpreter.
+"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+dir_project_root = Path(__file__).absolute().parent.parent
+
+#: Budget for ``import api.index``. About 1.2 s at the time of writing, 2.6 s
+#: when openai (for the GLM model) was imported eagerly.
+IMPORT_BUDGET_SECONDS = 2.0
+
+#: Heavy packages only needed by some code paths, imported on first use.
+DEFERRED_MODULES = [
+    "openai",  # glm_model
+    "rich",  # debug printing
+    "numpy",  # suggest_alerts, refresh_los_predictions
+]
+
+
+def measure_import(module: str) -> dict[str, float]:
+    """
+    Import ``module`` in a new interpreter.
+
+    :return: Cumulative import time in seconds of every imported module.
+    """
+    env = {**os.environ, "PYTHONPATH": str(dir_project_root)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=dir_project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+def test_import_time():
+    # the first run may include writing .pyc files
+    runs = [measure_import("api.index") for _ in range(2)]
+    times = runs[-1]
+
+    imported = {name.split(".")[0] for name in times}
+    for name in DEFERRED_MODULES:
+        assert name not in imported, f"{name} is imported on the cold start path"
+
+    seconds = min(run["api.index"] for run in runs)
+    assert seconds < IMPORT_BUDGET_SECONDS, (
+        f"import api.index took {seconds:.2f} s, budget {IMPORT_BUDGET_SECONDS} s"
+    )
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus",
+        preview=False,
+    )
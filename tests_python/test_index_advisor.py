@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import sqlalchemy as sa
+
+from obnexus.sql_utils import execute_and_print_result
+from obnexus.slow_query_log import SlowQuery, SlowQueryLog, load_slow_queries
+from obnexus.tests.sample_db import new_sample_engine
+from obnexus.index_advisor import (
+    get_schema_columns,
+    analyze_sql,
+    propose_indexes,
+    advise_indexes,
+)
+
+VITALS_SQL = (
+    "SELECT * FROM vital_sign WHERE admission_id = 'x' "
+    "ORDER BY recorded_at DESC LIMIT 5"
+)
+
+
+def test_slow_query_log(tmp_path):
+    engine = new_sample_engine()
+    path = tmp_path / "slow-queries.jsonl"
+
+    # fast enough: nothing logged
+    log = SlowQueryLog(threshold_seconds=60, path=path)
+    execute_and_print_result(engine, VITALS_SQL, slow_query_log=log)
+    assert len(log.entries) == 0
+    assert not path.exists()
+
+    log = SlowQueryLog(threshold_seconds=0, path=path)
+    execute_and_print_result(engine, VITALS_SQL, slow_query_log=log)
+    entry = log.entries[0]
+    assert entry.sql == VITALS_SQL
+    assert entry.dialect == "sqlite"
+    assert any("vital_sign" in line for line in entry.plan)
+    assert load_slow_queries(path) == [entry]
+
+
+def test_analyze_sql():
+    schema = get_schema_columns(new_sample_engine())
+
+    usages = analyze_sql(VITALS_SQL, schema)
+    assert usages["vital_sign"].index_columns() == ["admission_id", "recorded_at"]
+
+    usages = analyze_sql(
+        """
+        SELECT v.heart_rate
+        FROM vital_sign v
+        JOIN admission AS a ON a.admission_id = v.admission_id
+        WHERE a.status = 'in_labor' -- only active
+          AND v.recorded_at >= '2024-01-01 WHERE x = 1'
+        """,
+        schema,
+    )
+    assert usages["vital_sign"].equality == ["admission_id"]
+    assert usages["vital_sign"].range == ["recorded_at"]
+    assert usages["admission"].equality == ["admission_id", "status"]
+
+    usages = analyze_sql(
+        "SELECT severity, COUNT(*) FROM alert WHERE acknowledged = 0 GROUP BY severity",
+        schema,
+    )
+    assert usages["alert"].index_columns() == ["acknowledged"]
+
+
+def test_advise_indexes():
+    engine = new_sample_engine()
+    entries = [
+        SlowQuery(sql=VITALS_SQL, seconds=1.0, n_rows=0, dialect="sqlite"),
+        SlowQuery(sql=VITALS_SQL, seconds=2.0, n_rows=0, dialect="sqlite"),
+        # covered by the primary key
+        SlowQuery(
+            sql="SELECT * FROM admission WHERE admission_id = 'x' AND status = 'in_labor'",
+            seconds=5.0,
+            n_rows=0,
+            dialect="sqlite",
+        ),
+        SlowQuery(
+            sql="SELECT * FROM bed WHERE status = 'available'",
+            seconds=0.5,
+            n_rows=0,
+            dialect="sqlite",
+        ),
+    ]
+
+    candidates = propose_indexes(engine, entries)
+    assert [str(c) for c in candidates] == [
+        "vital_sign(admission_id, recorded_at)",
+        "bed(status)",
+    ]
+    assert candidates[0].n_queries == 2
+    assert candidates[0].total_seconds == 3.0
+    assert candidates[0].examples == [VITALS_SQL]
+
+    def index_names() -> set[str]:
+        return {ix["name"] for ix in sa.inspect(engine).get_indexes("vital_sign")}
+
+    # dry run: measured, then dropped
+    report = advise_indexes(engine, entries, top=1, repeat=1)
+    assert len(report.advices) == 1
+    assert report.advices[0].before_seconds > 0
+    assert report.advices[0].applied is False
+    assert "ix_vital_sign_admission_id_recorded_at" not in index_names()
+    assert "vital_sign(admission_id, recorded_at)" in report.to_markdown()
+
+    report = advise_indexes(engine, entries, apply=True, top=1, repeat=1)
+    assert "ix_vital_sign_admission_id_recorded_at" in index_names()
+    # now covered
+    assert [str(c) for c in propose_indexes(engine, entries)] == ["bed(status)"]
+    assert "No index proposed" in advise_indexes(engine, entries[:2]).to_markdown()
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.index_advisor",
+        preview=False,
+    )
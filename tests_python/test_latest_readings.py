@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from datetime import timedelta
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from api.index import app
+from obnexus import write_operations
+from obnexus.one.api import one
+from obnexus.migrations import apply_migrations
+from obnexus.tests.sample_db import new_sample_engine, new_sample_postgres_engine, new_id, NOW
+from obnexus.ward_views import WardViews, MaterializedView
+from obnexus.latest_readings import VITAL_SIGN_LATEST
+
+
+def query(engine: "sa.Engine", sql: str, **params) -> list[dict]:
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(sa.text(sql), params)]
+
+
+def new_migrated_engine() -> "sa.Engine":
+    engine = new_sample_engine()
+    apply_migrations(engine, verbose=False)
+    return engine
+
+
+def latest_vitals(engine: "sa.Engine", name: str) -> dict:
+    return query(
+        engine,
+        "SELECT * FROM vital_sign_latest WHERE admission_id = :admission_id",
+        admission_id=new_id(name),
+    )[0]
+
+
+def record_vitals(engine: "sa.Engine", name: str, hours: float, bp_systolic: int, **kwargs) -> dict:
+    return write_operations.record_vital_sign(
+        engine=engine,
+        admission_id=new_id(name),
+        recorded_at=NOW + timedelta(hours=hours),
+        bp_systolic=bp_systolic,
+        bp_diastolic=90,
+        heart_rate=88,
+        temperature=37.0,
+        fetal_heart_rate=140,
+        oxygen_saturation=98.0,
+        **kwargs,
+    )
+
+
+def test_initial_rebuild():
+    engine = new_migrated_engine()
+    n_admissions = query(engine, "SELECT COUNT(DISTINCT admission_id) AS n FROM vital_sign")[0]["n"]
+    assert len(query(engine, "SELECT * FROM vital_sign_latest")) == n_admissions
+    assert latest_vitals(engine, "liu")["bp_systolic"] == 145
+
+    progress = query(
+        engine,
+        "SELECT * FROM labor_progress_latest WHERE admission_id = :admission_id",
+        admission_id=new_id("liu"),
+    )
+    assert progress[0]["cervical_dilation_cm"] == 7.0
+
+    # rebuild is idempotent
+    with engine.begin() as conn:
+        VITAL_SIGN_LATEST.rebuild(conn)
+    assert latest_vitals(engine, "liu")["bp_systolic"] == 145
+
+
+def test_record_vital_sign():
+    engine = new_migrated_engine()
+    ward_views = WardViews()
+
+    result = record_vitals(engine, "liu", 0.5, 150, ward_views=ward_views)
+    latest = latest_vitals(engine, "liu")
+    assert latest["vital_id"] == result["vital_id"]
+    assert latest["bp_systolic"] == 150
+
+    # a late reading is stored but does not replace the newer one
+    result = record_vitals(engine, "liu", -0.5, 160)
+    assert latest_vitals(engine, "liu")["bp_systolic"] == 150
+    rows = query(
+        engine,
+        "SELECT * FROM vital_sign WHERE vital_id = :vital_id",
+        vital_id=result["vital_id"],
+    )
+    assert rows[0]["bp_systolic"] == 160
+
+    with pytest.raises(ValueError, match="discharged"):
+        record_vitals(engine, "zhang", 0, 120)
+    with pytest.raises(ValueError, match="not found"):
+        record_vitals(engine, "nobody", 0, 120)
+    with pytest.raises(ValueError, match="bp_systolic"):
+        record_vitals(engine, "liu", 0, 400)
+    with pytest.raises(ValueError, match="lower than"):
+        record_vitals(engine, "liu", 0, 80)
+
+
+def test_record_labor_progress():
+    engine = new_migrated_engine()
+
+    result = write_operations.record_labor_progress(
+        engine=engine,
+        admission_id=new_id("wang"),
+        recorded_at=NOW,
+        cervical_dilation_cm=6.0,
+        membrane_status="ruptured",
+        effacement_pct=80,
+        station=-1,
+    )
+    progress = query(
+        engine,
+        "SELECT * FROM labor_progress_latest WHERE admission_id = :admission_id",
+        admission_id=new_id("wang"),
+    )
+    assert progress[0]["progress_id"] == result["progress_id"]
+    assert progress[0]["cervical_dilation_cm"] == 6.0
+    assert progress[0]["contraction_freq"] is None
+
+    with pytest.raises(ValueError, match="cervical_dilation_cm"):
+        write_operations.record_labor_progress(
+            engine=engine,
+            admission_id=new_id("wang"),
+            recorded_at=NOW,
+            cervical_dilation_cm=12.0,
+            membrane_status="ruptured",
+        )
+
+
+def new_vitals(name: str, hours: float, bp_systolic: int) -> dict:
+    return {
+        "admission_id": new_id(name),
+        "recorded_at": (NOW + timedelta(hours=hours)).isoformat(),
+        "bp_systolic": bp_systolic,
+        "bp_diastolic": 85,
+        "heart_rate": 84,
+        "temperature": 36.9,
+        "fetal_heart_rate": 142,
+        "oxygen_saturation": 98.0,
+    }
+
+
+def test_ingest_vital_signs():
+    engine = new_migrated_engine()
+    n_before = query(engine, "SELECT COUNT(*) AS n FROM vital_sign")[0]["n"]
+    invalid = new_vitals("wang", 0.5, 120)
+    del invalid["heart_rate"]
+    readings = [
+        new_vitals("liu", 0.25, 150),
+        new_vitals("liu", 0.5, 148),
+        new_vitals("liu", 0.5, 148),  # repeated in the batch
+        new_vitals("liu", -1, 138),  # already stored (sample reading)
+        new_vitals("wang", 0.5, 300),  # out of range
+        invalid,
+        new_vitals("zhang", 0.5, 120),  # discharged
+        new_vitals("nobody", 0.5, 120),
+        new_vitals("wang", 0.5, 121),
+    ]
+    result = write_operations.ingest_vital_signs(
+        engine=engine,
+        readings=readings,
+        ward_views=WardViews(),
+    )
+    assert result["success"] is False
+    assert result["n_inserted"] == 3
+    assert result["n_duplicates"] == 2
+    assert [item["index"] for item in result["rejected"]] == [4, 5, 6, 7]
+    assert "heart_rate" in result["rejected"][1]["error"]
+    assert "discharged" in result["rejected"][2]["error"]
+    assert query(engine, "SELECT COUNT(*) AS n FROM vital_sign")[0]["n"] == n_before + 3
+
+    assert latest_vitals(engine, "liu")["bp_systolic"] == 148
+    assert latest_vitals(engine, "wang")["bp_systolic"] == 121
+
+    # resending the batch is a no-op
+    result = write_operations.ingest_vital_signs(engine=engine, readings=readings)
+    assert result["n_inserted"] == 0
+    assert result["n_duplicates"] == 5
+
+    # enforced by the unique index, not only by the ingest
+    with pytest.raises(sa.exc.IntegrityError):
+        record_vitals(engine, "liu", 0.5, 140)
+
+
+def test_concurrent_ingest_postgres():
+    """
+    A reading stored by another, uncommitted transaction: the ingest waits
+    for it to commit and counts the reading as a duplicate.
+    """
+    engine = new_sample_postgres_engine()
+    if engine is None:
+        pytest.skip("OBNEXUS_TEST_POSTGRES_URL is not set")
+    readings = [new_vitals("liu", 0.25, 150), new_vitals("liu", 0.5, 148)]
+    results = []
+
+    def ingest():
+        results.append(write_operations.ingest_vital_signs(engine=engine, readings=readings))
+
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "INSERT INTO vital_sign (vital_id, admission_id, recorded_at, bp_systolic, "
+                "bp_diastolic, heart_rate, temperature, fetal_heart_rate, oxygen_saturation) "
+                "VALUES ('other-writer', :admission_id, :recorded_at, 150, 85, 84, 36.9, 142, 98.0)"
+            ),
+            {"admission_id": new_id("liu"), "recorded_at": NOW + timedelta(hours=0.25)},
+        )
+        thread = threading.Thread(target=ingest)
+        thread.start()
+        thread.join(0.5)
+        assert thread.is_alive()
+    thread.join()
+    assert results[0]["n_inserted"] == 1
+    assert results[0]["n_duplicates"] == 1
+    rows = query(
+        engine,
+        "SELECT COUNT(*) AS n FROM vital_sign WHERE admission_id = :admission_id "
+        "AND recorded_at > :now",
+        admission_id=new_id("liu"),
+        now=NOW,
+    )
+    assert rows[0]["n"] == 2
+    assert latest_vitals(engine, "liu")["bp_systolic"] == 148
+    engine.dispose()
+
+
+def test_ingest_rejects_malformed_readings():
+    engine = new_migrated_engine()
+    readings = [
+        {**new_vitals("liu", 0.5, 150), "recorded_at": 12345},
+        {**new_vitals("liu", 0.5, 150), "admission_id": ["x"]},
+        {**new_vitals("liu", 0.5, 150), "admission_id": 5},
+        {**new_vitals("liu", 0.5, 150), "heart_rate": "fast"},
+        {**new_vitals("liu", 0.5, 150), "recorded_at": "yesterday"},
+        {**new_vitals("liu", 0.5, 120), "bp_diastolic": 120},  # same rule as record_vital_sign
+        new_vitals("liu", 0.5, 150),
+    ]
+    result = write_operations.ingest_vital_signs(engine=engine, readings=readings)
+    assert result["n_inserted"] == 1
+    errors = [item["error"] for item in result["rejected"]]
+    assert [item["index"] for item in result["rejected"]] == [0, 1, 2, 3, 4, 5]
+    assert errors[0] == "recorded_at must be str or datetime, got: 12345"
+    assert errors[1] == "admission_id must be str, got: ['x']"
+    assert errors[2] == "admission_id must be str, got: 5"
+    assert errors[3] == "heart_rate must be int, got: 'fast'"
+    assert "bp_diastolic must be lower than bp_systolic" in errors[5]
+
+
+def test_ingest_refreshes_summaries_per_admission():
+    engine = new_migrated_engine()
+    vital_count = MaterializedView(
+        name="mv_vital_count",
+        columns=("admission_id TEXT NOT NULL", "n_readings INTEGER NOT NULL"),
+        primary_key=("admission_id",),
+        select_sql="SELECT admission_id, COUNT(*) AS n_readings FROM vital_sign GROUP BY admission_id",
+        depends_on=("vital_sign",),
+        key_column="admission_id",
+    )
+    with engine.begin() as conn:
+        conn.execute(sa.text(vital_count.create_sql))
+        vital_count.refresh(conn)
+    counts = {row["admission_id"]: row["n_readings"] for row in query(engine, "SELECT * FROM mv_vital_count")}
+
+    # a reading written behind the summary's back: only a full refresh would see it
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "INSERT INTO vital_sign (vital_id, admission_id, recorded_at, bp_systolic, bp_diastolic, "
+                "heart_rate, temperature, fetal_heart_rate, oxygen_saturation) "
+                "VALUES ('v-chen', :admission_id, :recorded_at, 120, 80, 80, 36.8, 140, 98.0)"
+            ),
+            {"admission_id": new_id("chen"), "recorded_at": NOW},
+        )
+
+    result = write_operations.ingest_vital_signs(
+        engine=engine,
+        readings=[new_vitals("liu", 0.5, 150), new_vitals("wang", 0.5, 121)],
+        ward_views=WardViews(views=[vital_count]),
+    )
+    assert result["n_inserted"] == 2
+    after = {row["admission_id"]: row["n_readings"] for row in query(engine, "SELECT * FROM mv_vital_count")}
+    assert after[new_id("liu")] == counts[new_id("liu")] + 1
+    assert after[new_id("wang")] == counts[new_id("wang")] + 1
+    assert after[new_id("chen")] == counts[new_id("chen")]
+
+
+def test_ingest_labor_progress():
+    engine = new_migrated_engine()
+    result = write_operations.ingest_labor_progress(
+        engine=engine,
+        readings=[
+            {
+                "admission_id": new_id("liu"),
+                "recorded_at": NOW,
+                "cervical_dilation_cm": 9.0,
+                "membrane_status": "ruptured",
+            },
+        ],
+    )
+    assert result["success"] is True
+    progress = query(
+        engine,
+        "SELECT * FROM labor_progress_latest WHERE admission_id = :admission_id",
+        admission_id=new_id("liu"),
+    )
+    assert progress[0]["cervical_dilation_cm"] == 9.0
+
+
+def test_ingest_endpoint():
+    engine = new_migrated_engine()
+    one.__dict__["engine"] = engine
+    one.__dict__["ward_views"] = WardViews()
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/api/ingest/vital-signs",
+            json={"readings": [new_vitals("sun", 0.5, 118)]},
+        )
+        assert response.status_code == 200
+        assert response.json()["n_inserted"] == 1
+
+        response = client.post("/api/ingest/labor-progress", json={"readings": []})
+        assert response.json()["n_inserted"] == 0
+        response = client.post("/api/ingest/vital-signs", json={"rows": []})
+        assert response.status_code == 422
+    finally:
+        for name in ["engine", "ward_views"]:
+            one.__dict__.pop(name, None)
+    assert latest_vitals(engine, "sun")["bp_systolic"] == 118
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.latest_readings",
+        preview=False,
+    )
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+import sqlalchemy as sa
+
+from obnexus.tests.sample_db import new_sample_engine, new_id, NOW
+from obnexus.los_model import (
+    FEATURE_NAMES,
+    MIN_REMAINING_HOURS,
+    LosModel,
+    load_admission_features,
+    train_los_model,
+    predict_active_admissions,
+    refresh_predictions,
+)
+
+
+class TestLosModel:
+    def test_fit_and_predict(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(200, len(FEATURE_NAMES)))
+        true_coef = np.arange(len(FEATURE_NAMES), dtype=np.float64)
+        y = 60.0 + X @ true_coef
+        model = LosModel.fit(X, y, alpha=1e-6)
+        np.testing.assert_allclose(model.predict(X), np.clip(y, 6, 336), atol=1e-3)
+        assert model.n_samples == 200
+
+    def test_predict_is_clipped(self):
+        model = LosModel.baseline()
+        X = np.zeros((1, len(FEATURE_NAMES)))
+        assert model.predict(X)[0] == 48.0
+        model.intercept = 10_000.0
+        assert model.predict(X)[0] == 336
+
+
+def test_load_admission_features():
+    engine = new_sample_engine()
+    train = load_admission_features(engine, discharged=True)
+    assert train.admission_ids == [new_id("zhang")]
+    assert train.y[0] == pytest.approx(48.0)
+
+    active = load_admission_features(engine, discharged=False)
+    assert len(active) == 5
+    assert np.isnan(active.y).all()
+    row = active.X[active.admission_ids.index(new_id("liu"))]
+    features = dict(zip(FEATURE_NAMES, row))
+    assert features["max_dilation_cm"] == 7.0
+    assert features["is_high_risk"] == 1.0
+    assert features["has_complications"] == 1.0
+
+
+def test_refresh_predictions():
+    engine = new_sample_engine()
+    # not enough discharged admissions, falls back to the baseline model
+    model = train_los_model(engine)
+    assert model.n_samples == 0
+
+    predictions = predict_active_admissions(engine, model=model, now=NOW)
+    by_id = {p["admission_id"]: p for p in predictions}
+    # vaginal + high risk + complications
+    assert by_id[new_id("liu")]["predicted_los_hours"] == 78
+    # c-section is expected to stay longer than vaginal delivery
+    assert by_id[new_id("chen")]["predicted_los_hours"] > by_id[new_id("sun")]["predicted_los_hours"]
+
+    result = refresh_predictions(engine, model=model, now=NOW)
+    assert result["success"] is True
+    assert result["updated"] == 5
+    with engine.connect() as conn:
+        rows = conn.execute(
+            sa.text(
+                "SELECT admission_id, admit_time, predicted_los_hours, predicted_discharge_time "
+                "FROM admission WHERE status != 'discharged'"
+            )
+        ).fetchall()
+    for row in rows:
+        assert row.predicted_los_hours == by_id[row.admission_id]["predicted_los_hours"]
+        assert row.predicted_discharge_time > row.admit_time
+
+    # patients who already stayed longer than predicted get a few more hours
+    late = predict_active_admissions(engine, model=model, now=NOW + timedelta(days=10))
+    by_id = {p["admission_id"]: p for p in late}
+    # liu was admitted 10 hours before NOW
+    assert by_id[new_id("liu")]["predicted_los_hours"] == 10 * 24 + 10 + MIN_REMAINING_HOURS
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.los_model",
+        preview=False,
+    )
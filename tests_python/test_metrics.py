@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from fastapi.testclient import TestClient
+from strands import Agent, tool
+
+from api.index import app
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, new_chat_request_body, reset_cached_properties
+from obnexus.tests.sample_db import new_sample_engine
+from obnexus.sql_utils import execute_and_print_result
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep, ScriptedToolCall
+from obnexus.metrics import (
+    MetricsHooks,
+    model_tokens_total,
+    tool_call_duration_seconds,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    registry,
+    sql_queries_total,
+    sql_rows_returned,
+    db_pool_checkouts_total,
+    db_pool_checked_out,
+    instrument_pool,
+)
+
+
+def test_registry_render():
+    local_registry = MetricsRegistry()
+    counter = local_registry.counter("calls_total", "Calls.", ["tool"])
+    gauge = local_registry.gauge("depth", "Depth.")
+    histogram = local_registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+
+    counter.inc(tool='say "hi"')
+    counter.inc(2, tool='say "hi"')
+    gauge.inc(3)
+    gauge.dec()
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    with pytest.raises(ValueError):
+        counter.inc(-1, tool="x")
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        local_registry.counter("calls_total", "Again.")
+
+    assert isinstance(counter, Counter)
+    assert isinstance(gauge, Gauge)
+    assert isinstance(histogram, Histogram)
+    assert counter.get(tool='say "hi"') == 3
+    assert histogram.get_count() == 3
+    assert histogram.get_sum() == pytest.approx(5.55)
+
+    text = local_registry.render()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{tool="say \\"hi\\""} 3' in text
+    assert "depth 2" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+    local_registry.clear()
+    assert counter.get(tool='say "hi"') == 0
+
+
+def test_sql_and_pool_metrics():
+    instrument_pool()
+    instrument_pool()  # idempotent
+    engine = new_sample_engine()
+    n_queries = sql_queries_total.get(status="success")
+    n_rows = sql_rows_returned.get_sum()
+    n_checkouts = db_pool_checkouts_total.get()
+
+    execute_and_print_result(engine, "SELECT bed_id FROM bed LIMIT 3")
+
+    assert sql_queries_total.get(status="success") == n_queries + 1
+    assert sql_rows_returned.get_sum() == n_rows + 3
+    assert db_pool_checkouts_total.get() > n_checkouts
+    assert db_pool_checked_out.get() >= 0
+
+
+def test_hooks():
+    @tool
+    def count_beds() -> str:
+        """Count the beds."""
+        return "11"
+
+    agent = Agent(
+        model=ScriptedModel(
+            steps=[
+                ScriptedStep(tool_calls=[ScriptedToolCall(name="count_beds")]),
+                ScriptedStep(text="11 beds."),
+            ]
+        ),
+        tools=[count_beds],
+        hooks=[MetricsHooks()],
+        callback_handler=None,
+    )
+    n_input = model_tokens_total.get(type="input")
+    n_output = model_tokens_total.get(type="output")
+    n_tool_calls = tool_call_duration_seconds.get_count(tool="count_beds")
+
+    agent("How many beds?")
+
+    # the tokens reported by both model calls of the turn
+    usage = agent.event_loop_metrics.accumulated_usage
+    assert usage["inputTokens"] > 0
+    assert model_tokens_total.get(type="input") == n_input + usage["inputTokens"]
+    assert model_tokens_total.get(type="output") == n_output + usage["outputTokens"]
+    assert tool_call_duration_seconds.get_count(tool="count_beds") == n_tool_calls + 1
+
+
+def test_chat_metrics():
+    use_offline_backend(one)
+    try:
+        client = TestClient(app)
+        response = client.post("/api/chat", json=new_chat_request_body("Any labor beds?"))
+        assert response.status_code == 200
+        response = client.get("/api/metrics")
+    finally:
+        reset_cached_properties(one)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'obnexus_http_requests_total{method="POST",path="/api/chat",status="200"}' in text
+    assert 'obnexus_tool_calls_total{tool="find_available_beds",status="success"}' in text
+    assert 'obnexus_tool_call_duration_seconds_count{tool="execute_sql_query"}' in text
+    assert 'obnexus_model_tokens_total{type="input"}' in text
+    assert "obnexus_agent_steps_per_turn_count" in text
+    assert "obnexus_sql_rows_returned_count" in text
+    assert "obnexus_db_pool_checkouts_total" in text
+    assert "obnexus_tool_queue_depth" in text
+    assert registry.metrics["obnexus_agent_steps_per_turn"].get_sum() >= 2
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.metrics",
+        preview=False,
+    )
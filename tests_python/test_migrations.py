@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import sqlalchemy as sa
+
+from obnexus.tests.sample_db import new_sample_engine
+from obnexus.index_advisor import get_existing_indexes
+from obnexus.ward_views import WARD_VIEWS
+from obnexus.latest_readings import PROJECTIONS
+from obnexus.retention import RETENTIONS
+from obnexus.migrations import (
+    MIGRATIONS,
+    MIGRATIONS_TABLE,
+    Migration,
+    get_applied_versions,
+    apply_migrations,
+)
+
+
+def test_apply_migrations():
+    engine = new_sample_engine()
+    assert get_applied_versions(engine) == set()
+
+    assert apply_migrations(engine, target=1, verbose=False) == [1]
+    indexes = get_existing_indexes(engine)
+    assert ["admission_id", "recorded_at"] in indexes["vital_sign"]
+    assert ["admission_id", "recorded_at"] in indexes["labor_progress"]
+    assert ["status"] in indexes["bed"]
+    assert ["acknowledged", "severity"] in indexes["alert"]
+    assert ["admission_id"] not in indexes["medical_order"]
+
+    applied = apply_migrations(engine, verbose=False)
+    assert applied == [m.version for m in MIGRATIONS if m.version > 1]
+    assert ["admission_id"] in get_existing_indexes(engine)["medical_order"]
+    # nothing left to do
+    assert apply_migrations(engine, verbose=False) == []
+    assert get_applied_versions(engine) == {m.version for m in MIGRATIONS}
+    # latest vitals live in vital_sign_latest only
+    assert "mv_latest_vitals" not in sa.inspect(engine).get_table_names()
+
+    # FK constraints are Postgres only, SQLite declares them in CREATE TABLE
+    assert MIGRATIONS[2].get_statements("sqlite") == []
+    assert len(MIGRATIONS[2].get_statements("postgresql")) > 0
+
+    with engine.connect() as conn:
+        n = conn.execute(sa.text(f"SELECT COUNT(*) FROM {MIGRATIONS_TABLE}")).scalar()
+    assert n == len(MIGRATIONS)
+
+
+def test_migrations_match_table_definitions():
+    """
+    Migrations are frozen SQL: a changed table definition must ship with a
+    new migration, or the tables created by the migrations drift from it.
+    """
+    engine = new_sample_engine()
+    apply_migrations(engine, verbose=False)
+    inspector = sa.inspect(engine)
+    tables = {view.name: view.column_names for view in WARD_VIEWS}
+    tables.update({projection.name: projection.column_names for projection in PROJECTIONS})
+    for retention in RETENTIONS:
+        tables[retention.archive] = retention.table.column_names
+        tables[retention.rollup] = retention.rollup_column_names
+    for name, column_names in tables.items():
+        assert [column["name"] for column in inspector.get_columns(name)] == column_names, name
+
+
+def test_apply_migrations_rollback():
+    engine = new_sample_engine()
+    migrations = [
+        Migration(
+            version=1,
+            name="ok",
+            statements=["CREATE INDEX ix_bed_status ON bed (status)"],
+        ),
+        Migration(
+            version=2,
+            name="broken",
+            statements=["CREATE INDEX ix_x ON no_such_table (x)"],
+        ),
+    ]
+    with pytest.raises(sa.exc.OperationalError):
+        apply_migrations(engine, migrations=migrations, verbose=False)
+    # the broken migration is not recorded, so it is retried next time
+    assert get_applied_versions(engine) == {1}
+
+    with pytest.raises(ValueError):
+        apply_migrations(engine, migrations=migrations + migrations[:1], verbose=False)
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.migrations",
+        preview=False,
+    )
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from strands import Agent
+
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep
+from obnexus.model_router import (
+    ROUTE_LOOKUP,
+    ROUTE_COMPLEX,
+    Route,
+    ModelRouter,
+    ModelRouterHooks,
+    classify_turn,
+    get_user_text,
+    model_route_turns_total,
+)
+
+
+@pytest.mark.parametrize(
+    "text, route",
+    [
+        ("How many beds are free on floor 2?", ROUTE_LOOKUP),
+        ("Show Liu's latest blood pressure", ROUTE_LOOKUP),
+        ("Assign bed 203-A to Zhang", ROUTE_COMPLEX),
+        ("Schedule a C-section for tomorrow morning", ROUTE_COMPLEX),
+        ("Which patient should we prioritize for the next delivery room?", ROUTE_COMPLEX),
+        ("How many beds are free? And which nurses are on shift?", ROUTE_COMPLEX),
+        ("yes", ROUTE_COMPLEX),
+        ("Go ahead", ROUTE_COMPLEX),
+        ("", ROUTE_COMPLEX),
+    ],
+)
+def test_classify_turn(text: str, route: str):
+    assert classify_turn(text) == route
+
+
+def test_get_user_text():
+    messages = [
+        {"role": "user", "content": [{"text": "first"}]},
+        {"role": "assistant", "content": [{"text": "answer"}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "1", "content": []}}]},
+    ]
+    assert get_user_text(messages) == "first"
+    assert get_user_text(None) == ""
+
+
+def test_missing_route():
+    with pytest.raises(ValueError):
+        ModelRouter(routes=[Route(name=ROUTE_LOOKUP, model=None, model_id="m")])
+
+
+def test_hooks():
+    lookup_model = ScriptedModel(steps=[ScriptedStep(text="12 beds are free")])
+    complex_model = ScriptedModel(steps=[ScriptedStep(text="bed 203-A assigned")])
+    router = ModelRouter(
+        routes=[
+            Route(name=ROUTE_LOOKUP, model=lookup_model, model_id="us.amazon.nova-micro-v1:0"),
+            Route(name=ROUTE_COMPLEX, model=complex_model, model_id="us.amazon.nova-pro-v1:0"),
+        ]
+    )
+    agent = Agent(
+        model=lookup_model,
+        hooks=[ModelRouterHooks(router)],
+        callback_handler=None,
+    )
+    n_complex = model_route_turns_total.get(route=ROUTE_COMPLEX, model="us.amazon.nova-pro-v1:0")
+
+    assert "bed 203-A assigned" in str(agent("Assign bed 203-A to Zhang"))
+    assert agent.model is complex_model
+    usage = dict(agent.event_loop_metrics.accumulated_usage)
+    assert usage["inputTokens"] > 0
+    assert "12 beds are free" in str(agent("How many beds are free?"))
+    assert agent.model is lookup_model
+
+    stats = router.stats()
+    assert stats[ROUTE_LOOKUP]["turns"] == 1
+    assert stats[ROUTE_COMPLEX]["turns"] == 1
+    assert stats[ROUTE_COMPLEX]["avg_seconds"] >= 0
+    # tokens of the turn, from the agent's usage metrics
+    assert stats[ROUTE_COMPLEX]["input_tokens"] == usage["inputTokens"]
+    assert stats[ROUTE_COMPLEX]["output_tokens"] == usage["outputTokens"]
+    assert stats[ROUTE_LOOKUP]["input_tokens"] == (
+        agent.event_loop_metrics.accumulated_usage["inputTokens"] - usage["inputTokens"]
+    )
+    assert (
+        model_route_turns_total.get(route=ROUTE_COMPLEX, model="us.amazon.nova-pro-v1:0")
+        == n_complex + 1
+    )
+
+
+def test_estimate_cost():
+    route = Route(name=ROUTE_COMPLEX, model=None, model_id="us.amazon.nova-pro-v1:0")
+    assert route.estimate_cost(1_000_000, 1_000_000) == pytest.approx(4.0)
+    assert Route(name=ROUTE_LOOKUP, model=None, model_id="unknown").estimate_cost(10, 10) == 0
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.model_router",
+        preview=False,
+    )
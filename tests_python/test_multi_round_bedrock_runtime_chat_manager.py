@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+import json
+import asyncio
+
+import pytest
+
+from obnexus.multi_round_bedrock_runtime_chat_manager import (
+    ChatSession,
+    apply_history_window,
+)
+
+
+def user(text: str) -> dict:
+    return {"role": "user", "content": [{"text": text}]}
+
+
+def assistant(text: str) -> dict:
+    return {"role": "assistant", "content": [{"text": text}]}
+
+
+class FakeBedrockRuntimeClient:
+    """
+    Answers every turn with ``reply <n>``, streamed word by word. Records the
+    messages of each request.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.requests: list[list[dict]] = []
+
+    def reply(self, kwargs: dict) -> str:
+        if self.fail:
+            raise RuntimeError("throttled")
+        self.requests.append(list(kwargs["messages"]))
+        return f"reply {len(self.requests)}"
+
+    def converse(self, **kwargs) -> dict:
+        return {
+            "output": {"message": assistant(self.reply(kwargs))},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 10, "outputTokens": 2, "totalTokens": 12},
+            "metrics": {"latencyMs": 1},
+            "ResponseMetadata": {},
+        }
+
+    def converse_stream(self, **kwargs) -> dict:
+        words = self.reply(kwargs).split(" ")
+
+        def events():
+            yield {"messageStart": {"role": "assistant"}}
+            yield {"contentBlockStart": {"start": {}, "contentBlockIndex": 0}}
+            for i, word in enumerate(words):
+                yield {"contentBlockDelta": {"delta": {"text": word if i == 0 else f" {word}"}}}
+            yield {"contentBlockStop": {"contentBlockIndex": 0}}
+            yield {
+                "contentBlockStart": {
+                    "start": {"toolUse": {"toolUseId": "t1", "name": "get_beds"}},
+                    "contentBlockIndex": 1,
+                }
+            }
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": '{"floor":'}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": " 2}"}}}}
+            yield {"contentBlockStop": {"contentBlockIndex": 1}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            yield {
+                "metadata": {
+                    "usage": {"inputTokens": 10, "outputTokens": 4, "totalTokens": 14},
+                    "metrics": {"latencyMs": 1},
+                }
+            }
+
+        return {"stream": events()}
+
+
+def new_session(client=None, **kwargs) -> ChatSession:
+    return ChatSession(
+        client=client or FakeBedrockRuntimeClient(),
+        model_id="us.amazon.nova-micro-v1:0",
+        **kwargs,
+    )
+
+
+def test_apply_history_window():
+    tool_use = {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "x", "input": {}}}]}
+    tool_result = {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": []}}]}
+    messages = [user("q1"), tool_use, tool_result, assistant("a1"), user("q2"), assistant("a2")]
+    assert apply_history_window(messages, None) is messages
+    assert apply_history_window(messages, 6) is messages
+    # never start with a tool result or an assistant message
+    assert apply_history_window(messages, 4) == [user("q2"), assistant("a2")]
+    assert apply_history_window(messages, 2) == [user("q2"), assistant("a2")]
+    assert apply_history_window(messages, 1) == []
+
+
+def test_send_message(capsys):
+    session = new_session(max_history_messages=2)
+    response = session.send_text_message("How many beds are free?")
+    assert response.output.message.content[0].text == "reply 1"
+    session.send_text_message("And on floor 2?")
+    # the window keeps the last turn only
+    assert session.messages == [user("And on floor 2?"), assistant("reply 2")]
+    # logging is off by default
+    assert capsys.readouterr().err == ""
+
+    with pytest.raises(ValueError):
+        new_session(max_history_messages=0)
+
+
+def test_verbose_logging_is_capped(capsys):
+    session = new_session(verbose=True, log_max_chars=50)
+    session.send_text_message("x" * 1000)
+    err = capsys.readouterr().err
+    assert "Converse request" in err
+    assert "Converse response" in err
+    assert "x" * 100 not in err
+    assert "chars)" in err
+
+
+def test_stream_message():
+    session = new_session()
+    chunks = list(session.stream_text_message("Free beds on floor 2?"))
+    assert chunks == ["reply", " 1"]
+
+    result = session.last_stream_result
+    assert result.text == "reply 1"
+    assert result.stop_reason == "tool_use"
+    assert result.usage["outputTokens"] == 4
+    assert session.messages[-1] == result.message
+    tool_use = result.message["content"][1]["toolUse"]
+    assert tool_use == {"toolUseId": "t1", "name": "get_beds", "input": {"floor": 2}}
+    json.dumps(session.messages)
+
+
+def test_stream_message_rollback():
+    session = new_session()
+    session.send_text_message("first")
+    assert len(session.messages) == 2
+
+    # abandoned stream
+    stream = session.stream_text_message("second")
+    next(stream)
+    stream.close()
+    assert len(session.messages) == 2
+
+    # failed call
+    session.client.fail = True
+    with pytest.raises(RuntimeError):
+        list(session.stream_text_message("third"))
+    with pytest.raises(RuntimeError):
+        session.send_text_message("third")
+    assert len(session.messages) == 2
+
+
+def test_async():
+    session = new_session()
+
+    async def main():
+        chunks = [chunk async for chunk in session.astream_text_message("first")]
+        response = await session.asend_message([user("second")])
+        return chunks, response
+
+    chunks, response = asyncio.run(main())
+    assert chunks == ["reply", " 1"]
+    assert response.output.message.content[0].text == "reply 2"
+    assert len(session.messages) == 4
+
+    session.client.fail = True
+
+    async def fail():
+        async for _ in session.astream_text_message("third"):
+            pass
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+    assert len(session.messages) == 4
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.multi_round_bedrock_runtime_chat_manager",
+        preview=False,
+    )
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from strands import Agent
+from fastapi.testclient import TestClient
+
+from api.index import app
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, reset_cached_properties, new_chat_request_body
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep
+from obnexus.rate_limiter import (
+    RateLimiter,
+    RateLimitExceeded,
+    RateLimitHooks,
+    SHED_MESSAGE,
+    is_shed,
+    estimate_input_tokens,
+    model_rate_limit_shed_total,
+    model_rate_limit_wait_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def new_limiter(clock: FakeClock, **kwargs) -> RateLimiter:
+    return RateLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_requests_per_minute():
+    clock = FakeClock()
+    limiter = new_limiter(clock, requests_per_minute=60, max_wait_seconds=2.5)
+
+    # a minute's worth of burst, then one call per second
+    for _ in range(60):
+        assert limiter.acquire(tokens=100) == 0
+    assert limiter.reserve(tokens=100) == 1.0
+    # queued in arrival order: the next call waits behind the previous one
+    assert limiter.reserve(tokens=100) == 2.0
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve(tokens=100)
+    # a shed call reserves nothing
+    clock.now += 2
+    assert limiter.reserve(tokens=100) == 1.0
+
+
+def test_tokens_per_minute():
+    clock = FakeClock()
+    limiter = new_limiter(clock, tokens_per_minute=6000, max_wait_seconds=30)
+    n_waits = model_rate_limit_wait_seconds.get_count()
+
+    assert limiter.acquire(tokens=5000) == 0
+    # 1000 tokens left, 100 per second
+    assert limiter.acquire(tokens=2000) == 10.0
+    assert clock.slept == [10.0]
+    assert model_rate_limit_wait_seconds.get_count() == n_waits + 2
+
+    # the calls used fewer tokens than estimated: give them back
+    limiter.adjust(-3000)
+    assert limiter.reserve(tokens=3000) == 0
+
+    n_shed = model_rate_limit_shed_total.get()
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(tokens=6000)
+    assert model_rate_limit_shed_total.get() == n_shed + 1
+
+    # disabled quota
+    assert new_limiter(clock).acquire(tokens=10**9) == 0
+
+
+def test_estimate_input_tokens():
+    messages = [{"role": "user", "content": [{"text": "x" * 400}]}]
+    assert 100 < estimate_input_tokens(messages) < 120
+    assert estimate_input_tokens(messages, "y" * 400) > 200
+
+
+def test_hooks():
+    clock = FakeClock()
+    limiter = new_limiter(clock, requests_per_minute=1, tokens_per_minute=10**6, max_wait_seconds=1)
+    agent = Agent(
+        model=ScriptedModel(steps=[ScriptedStep(text="first"), ScriptedStep(text="second")]),
+        hooks=[RateLimitHooks(limiter, expected_output_tokens=10)],
+        callback_handler=None,
+    )
+    assert "first" in str(agent("hello"))
+    # the estimate was replaced by the actual usage at the end of the invocation
+    usage = agent.event_loop_metrics.accumulated_usage
+    assert usage["inputTokens"] > 0
+    assert limiter.tokens.level == 10**6 - usage["inputTokens"] - usage["outputTokens"]
+
+    # the second call would wait a minute: shed
+    with pytest.raises(RateLimitExceeded):
+        agent("hello again")
+
+
+def test_is_shed():
+    try:
+        try:
+            raise RateLimitExceeded("too many")
+        except RateLimitExceeded as e:
+            raise RuntimeError("wrapped") from e
+    except RuntimeError as e:
+        assert is_shed(e)
+    assert not is_shed(RuntimeError("other"))
+
+
+@pytest.fixture
+def offline_one():
+    use_offline_backend(one)
+    # one call per minute: the second model call of the default script is shed
+    one.__dict__["rate_limiter"] = RateLimiter(requests_per_minute=1, max_wait_seconds=1)
+    yield one
+    reset_cached_properties(one)
+
+
+def test_chat_shed(offline_one):
+    client = TestClient(app)
+    response = client.post("/api/chat", json=new_chat_request_body("Which beds are free?"))
+    assert response.status_code == 200
+    assert SHED_MESSAGE in response.text
+    assert offline_one.agent.messages[-1]["content"][0]["text"] == SHED_MESSAGE
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.rate_limiter",
+        preview=False,
+    )
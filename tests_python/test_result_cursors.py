@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+import dataclasses
+
+import pytest
+
+from obnexus import metrics
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, reset_cached_properties
+from obnexus.tests.sample_db import new_sample_engine
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep, ScriptedToolCall
+from obnexus.sql_utils import execute_and_print_result
+from obnexus.result_sets import ResultSetRegistry
+from obnexus.result_cursors import ResultCursors, CursorStore, fetch_more
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def new_records(n: int) -> list[tuple]:
+    return [(i, f"name {i}") for i in range(1, n + 1)]
+
+
+def test_open_and_fetch():
+    cursors = ResultCursors()
+    cursor = cursors.open(sql="SELECT 1", columns=["n", "name"], records=new_records(5), offset=20)
+    assert cursor.cursor_id == "C1"
+    assert "5 more rows" in cursor.describe(20)
+
+    page = cursors.fetch("C1", 2)
+    assert page.start == 21
+    assert page.records == [(1, "name 1"), (2, "name 2")]
+    assert len(cursors) == 1
+
+    page = cursors.fetch(" C1 ", 10)
+    assert page.start == 23
+    assert len(page.records) == 3
+    # the exhausted cursor is closed
+    assert page.cursor.describe(10) == "[No more rows.]"
+    assert len(cursors) == 0
+    with pytest.raises(ValueError):
+        cursors.fetch("C1", 1)
+    with pytest.raises(ValueError):
+        cursors.fetch("C1", 0)
+
+
+def test_bounds():
+    clock = FakeClock()
+    cursors = ResultCursors(ttl_seconds=60, max_cursors=2, max_rows=3, clock=clock)
+    first = cursors.open(sql="SELECT 1", columns=["n", "name"], records=new_records(10), offset=20)
+    assert first.truncated is True
+    assert len(first.records) == 3
+    assert "narrow the query" in first.describe(20)
+
+    # fetching keeps a cursor alive, idle ones expire
+    clock.now = 30
+    cursors.open(sql="SELECT 2", columns=["n", "name"], records=new_records(3), offset=20)
+    clock.now = 50
+    cursors.fetch("C1", 1)
+    clock.now = 100
+    assert len(cursors) == 1
+    cursors.fetch("C1", 1)
+    with pytest.raises(ValueError):
+        cursors.fetch("C2", 1)
+
+    # opening one more closes the oldest
+    cursors.open(sql="SELECT 3", columns=["n", "name"], records=new_records(3), offset=20)
+    cursors.open(sql="SELECT 4", columns=["n", "name"], records=new_records(3), offset=20)
+    assert len(cursors) == 2
+    assert "unknown or expired" in fetch_more(cursors, "C1", 1)
+
+    with pytest.raises(ValueError):
+        ResultCursors(max_cursors=0)
+
+
+def test_cursor_store():
+    store = CursorStore(max_sessions=2, ttl_seconds=60)
+    first = store.get("chat-1")
+    assert first.ttl_seconds == 60
+    store.get("chat-2")
+    store.get("chat-1")  # most recently used
+    store.get("chat-3")
+    assert len(store) == 2
+    assert store.get("chat-1") is first
+
+    with pytest.raises(ValueError):
+        CursorStore(max_sessions=0)
+
+
+def test_cursor_store_purges_all_chats():
+    clock = FakeClock()
+    store = CursorStore(ttl_seconds=60, clock=clock)
+    idle = store.get("chat-1")
+    idle.open(sql="SELECT 1", columns=["n", "name"], records=new_records(100), offset=20)
+    clock.now = 30
+    store.get("chat-2").open(sql="SELECT 2", columns=["n", "name"], records=new_records(3), offset=20)
+
+    # chat-1 never comes back: its expired cursor is released when another chat is accessed
+    clock.now = 70
+    store.get("chat-2")
+    assert idle._cursors == {}
+    assert len(store.get("chat-2")) == 1
+
+
+def test_execute_and_fetch_more():
+    engine = new_sample_engine()
+    sql = "SELECT recorded_at FROM vital_sign ORDER BY recorded_at"
+    cursors = ResultCursors()
+    result_sets = ResultSetRegistry()
+
+    text = execute_and_print_result(
+        engine=engine,
+        sql=sql,
+        result_sets=result_sets,
+        cursors=cursors,
+        page_size=5,
+    )
+    # the whole result is one result set, though only a page is shown
+    assert text.startswith("Rows 1-5:\n\n[Result set {{table:1}}: 13 rows]")
+    assert text.endswith('[Cursor C1: 8 more rows. Call fetch_more(cursor="C1", n=5) for the next rows.]')
+    assert len(result_sets.get(1).records) == 13
+
+    # paging reads the kept rows, the query is not executed again
+    n_queries = metrics.sql_queries_total.get(status="success")
+    text = fetch_more(cursors, "C1", 5, result_sets=result_sets)
+    # ... and cites the same result set
+    assert text.startswith("Rows 6-10:\n\n[Result set {{table:1}}: 13 rows]")
+    assert len(result_sets) == 1
+    # a later request registers the rows left once, in its own registry
+    later_result_sets = ResultSetRegistry()
+    text = fetch_more(cursors, "C1", 1, result_sets=later_result_sets)
+    assert text.startswith("Rows 11-11:\n\n[Result set {{table:1}}: 3 rows]")
+    text = fetch_more(cursors, "C1", 5, result_sets=later_result_sets)
+    assert text.startswith("Rows 12-13:\n\n[Result set {{table:1}}: 3 rows]")
+    assert len(later_result_sets) == 1
+    assert text.endswith("[No more rows.]")
+    assert metrics.sql_queries_total.get(status="success") == n_queries
+
+    # short results and calls without cursors are unchanged
+    text = execute_and_print_result(engine=engine, sql=sql, cursors=cursors, page_size=20)
+    assert "Cursor" not in text
+    assert len(cursors) == 0
+    text = execute_and_print_result(engine=engine, sql=sql, page_size=5)
+    assert text.count("\n") == 14
+
+
+def test_execute_fetches_bounded_rows():
+    engine = new_sample_engine()
+    sql = "SELECT recorded_at FROM vital_sign ORDER BY recorded_at"
+    n_fetched = metrics.sql_rows_returned.get_sum()
+    cursors = ResultCursors(max_rows=3)
+
+    # 13 rows: the page, the rows kept and one more to detect the truncation
+    text = execute_and_print_result(engine=engine, sql=sql, cursors=cursors, page_size=5)
+    assert "[Cursor C1: 3 more rows." in text
+    assert "narrow the query" in text
+    assert metrics.sql_rows_returned.get_sum() == n_fetched + 5 + 3 + 1
+
+    # exactly page and kept rows: nothing truncated
+    cursors = ResultCursors(max_rows=8)
+    text = execute_and_print_result(engine=engine, sql=sql, cursors=cursors, page_size=5)
+    assert "[Cursor C1: 8 more rows." in text
+    assert "narrow the query" not in text
+
+
+@pytest.fixture
+def offline_one():
+    model = ScriptedModel(
+        steps=[
+            ScriptedStep(
+                tool_calls=[
+                    ScriptedToolCall(
+                        name="execute_sql_query",
+                        input={"sql": "SELECT recorded_at FROM vital_sign ORDER BY recorded_at"},
+                    )
+                ]
+            ),
+            ScriptedStep(
+                tool_calls=[ScriptedToolCall(name="fetch_more", input={"cursor": "C1", "n": 10})]
+            ),
+            ScriptedStep(text="Done."),
+        ]
+    )
+    use_offline_backend(one, model=model)
+    one.__dict__["config"] = dataclasses.replace(one.config, result_page_size=5)
+    yield one
+    reset_cached_properties(one)
+
+
+def test_agent_fetch_more(offline_one):
+    cursors = offline_one.cursor_store.get("chat-1")
+    offline_one.agent(
+        "Show all vital signs",
+        invocation_state={"result_cursors": cursors},
+    )
+    messages = offline_one.agent.messages
+    first = messages[2]["content"][0]["toolResult"]["content"][0]["text"]
+    assert first.startswith("Rows 1-5:")
+    more = messages[4]["content"][0]["toolResult"]["content"][0]["text"]
+    assert more.startswith("Rows 6-13:")
+    assert len(cursors) == 0
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.result_cursors",
+        preview=False,
+    )
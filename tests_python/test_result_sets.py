@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.index import app
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, new_chat_request_body, reset_cached_properties
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep, ScriptedToolCall
+from obnexus.ai_sdk_adapter import ai_sdk_message_with_reasoning_generator
+from obnexus.result_sets import (
+    ResultSet,
+    ResultSetRegistry,
+    split_answer,
+    render_answer,
+)
+
+
+def parse_sse(chunks) -> list[dict]:
+    events = []
+    for chunk in chunks:
+        for line in chunk.splitlines():
+            if line.startswith("data: ") and line != "data: [DONE]":
+                events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+def new_registry() -> ResultSetRegistry:
+    result_sets = ResultSetRegistry(max_result_sets=2)
+    result_sets.add(
+        sql="SELECT name, admitted_at, weight_kg FROM patient",
+        columns=["name", "admitted_at", "weight_kg"],
+        records=[("Liu", datetime(2024, 1, 15, 8), Decimal("61.5"))],
+    )
+    return result_sets
+
+
+def test_registry():
+    result_sets = new_registry()
+    result_set = result_sets.get(1)
+    assert result_set.header == "[Result set {{table:1}}: 1 rows]"
+    assert result_set.to_dict() == {
+        "number": 1,
+        "columns": ["name", "admitted_at", "weight_kg"],
+        "rows": [["Liu", "2024-01-15T08:00:00", 61.5]],
+    }
+    json.dumps(result_set.to_dict())
+
+    result_sets.add(sql="SELECT 2", columns=["n"], records=[(2,)])
+    result_sets.add(sql="SELECT 3", columns=["n"], records=[(3,)])
+    # the oldest one is evicted
+    assert len(result_sets) == 2
+    assert result_sets.get(1) is None
+    assert result_sets.get(3).records == [(3,)]
+
+    with pytest.raises(ValueError):
+        ResultSetRegistry(max_result_sets=0)
+
+
+def test_split_and_render_answer():
+    result_sets = new_registry()
+    text = "Current patients:\n\n{{table:1}}\n\nSee also {{table:9}}."
+    segments = split_answer(text, result_sets)
+    assert segments[0] == "Current patients:\n\n"
+    assert isinstance(segments[1], ResultSet)
+    assert segments[2] == "\n\nSee also {{table:9}}."
+    assert split_answer("{{table:1}}", result_sets) == [result_sets.get(1)]
+
+    rendered = render_answer(text, result_sets)
+    assert "| Liu" in rendered
+    assert "{{table:9}}" in rendered
+
+
+def test_ai_sdk_generator():
+    events = parse_sse(
+        ai_sdk_message_with_reasoning_generator(
+            reasoning_text="",
+            output_text="Current patients:\n\n{{table:1}}\n\nLiu is stable.",
+            result_sets=new_registry(),
+        )
+    )
+    types = [event["type"] for event in events]
+    assert types == [
+        "text-start", "text-delta", "text-end",
+        "data-table",
+        "text-start", "text-delta", "text-end",
+        "finish",
+    ]
+    assert events[3]["data"]["rows"] == [["Liu", "2024-01-15T08:00:00", 61.5]]
+
+    # without a registry the placeholder is plain text
+    events = parse_sse(ai_sdk_message_with_reasoning_generator("", "{{table:1}}"))
+    assert events[1]["delta"] == "{{table:1}}"
+
+
+@pytest.fixture
+def offline_one():
+    model = ScriptedModel(
+        steps=[
+            ScriptedStep(
+                tool_calls=[
+                    ScriptedToolCall(
+                        name="execute_sql_query",
+                        input={"sql": "SELECT name FROM patient ORDER BY name"},
+                    )
+                ]
+            ),
+            ScriptedStep(text="Current patients:\n\n{{table:1}}"),
+        ]
+    )
+    use_offline_backend(one, model=model)
+    yield one
+    reset_cached_properties(one)
+
+
+def test_chat_streams_cited_table(offline_one):
+    client = TestClient(app)
+    response = client.post("/api/chat", json=new_chat_request_body("Show all patients"))
+    assert response.status_code == 200
+    events = parse_sse([response.text])
+    tables = [event for event in events if event["type"] == "data-table"]
+    assert len(tables) == 1
+    assert tables[0]["data"]["columns"] == ["name"]
+    assert len(tables[0]["data"]["rows"]) > 1
+    texts = "".join(event["delta"] for event in events if event["type"] == "text-delta")
+    assert "{{table:1}}" not in texts
+
+    # the model saw the table with the line citing it
+    tool_result = offline_one.agent.messages[2]["content"][0]["toolResult"]
+    assert tool_result["content"][0]["text"].startswith("[Result set {{table:1}}:")
+
+
+def test_chat_follow_up_with_cited_table(offline_one):
+    client = TestClient(app)
+    response = client.post("/api/chat", json=new_chat_request_body("Show all patients"))
+    events = parse_sse([response.text])
+
+    # the assistant message as the frontend keeps it and sends it back
+    parts = [{"type": "step-start"}]
+    for event in events:
+        if event["type"] == "text-delta":
+            parts.append({"type": "text", "text": event["delta"], "state": "done"})
+        elif event["type"] == "data-table":
+            parts.append({"type": "data-table", "id": event["id"], "data": event["data"]})
+    body = new_chat_request_body("Who was admitted first?", history=[("user", "Show all patients")])
+    user_message, follow_up = body["messages"]
+    assistant_message = {"id": "answer-1", "role": "assistant", "parts": parts}
+    body["messages"] = [user_message, assistant_message, follow_up]
+
+    response = client.post("/api/chat", json=body)
+    assert response.status_code == 200
+    assert any(event["type"] == "finish" for event in parse_sse([response.text]))
+
+    # the model sees the cited table as Markdown in the history
+    history = offline_one.agent.messages[1]
+    assert history["role"] == "assistant"
+    texts = [block["text"] for block in history["content"]]
+    assert texts[0] == "Current patients:\n\n"
+    assert texts[1].startswith("| name")
+    assert "{{table:1}}" not in "".join(texts)
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.result_sets",
+        preview=False,
+    )
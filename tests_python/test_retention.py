@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import dataclasses
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+
+from obnexus import write_operations
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, reset_cached_properties
+from obnexus.migrations import apply_migrations
+from obnexus.tests.sample_db import (
+    new_sample_engine,
+    new_sample_postgres_engine,
+    new_id,
+    NOW,
+)
+from obnexus.retention import run_retention
+from obnexus.partitioning import (
+    iter_months,
+    partition_name,
+    create_partition_sql,
+    ensure_partitions,
+    get_partitions,
+)
+
+
+def query(engine: "sa.Engine", sql: str, **params) -> list[dict]:
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(sa.text(sql), params)]
+
+
+def count(engine: "sa.Engine", table: str) -> int:
+    return query(engine, f"SELECT COUNT(*) AS n FROM {table}")[0]["n"]
+
+
+def test_run_retention():
+    engine = new_sample_engine()
+    apply_migrations(engine, verbose=False)
+    zhang = new_id("zhang")
+    # a second reading in the same hour as the sample one (discharged admissions
+    # no longer accept readings, so insert directly)
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "INSERT INTO vital_sign VALUES "
+                "('extra', :admission_id, :recorded_at, 150, 105, 100, 38.5, 170, 94.0)"
+            ),
+            {
+                "admission_id": zhang,
+                "recorded_at": (NOW - timedelta(hours=75) + timedelta(minutes=30)).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            },
+        )
+    n_vitals = count(engine, "vital_sign")
+
+    # zhang was discharged 32 hours ago: not expired yet with a 2-day retention
+    summary = run_retention(engine, discharged_before=NOW - timedelta(days=2), verbose=False)
+    assert summary == {"vital_sign": 0, "labor_progress": 0}
+
+    summary = run_retention(engine, discharged_before=NOW, verbose=False)
+    assert summary == {"vital_sign": 2, "labor_progress": 0}
+    assert count(engine, "vital_sign") == n_vitals - 2
+    assert count(engine, "vital_sign_archive") == 2
+
+    rollup = query(engine, "SELECT * FROM vital_sign_hourly")
+    assert len(rollup) == 1
+    assert rollup[0]["admission_id"] == zhang
+    assert rollup[0]["hour"] == (NOW - timedelta(hours=75)).strftime("%Y-%m-%d %H:00:00")
+    assert rollup[0]["n_readings"] == 2
+    assert rollup[0]["bp_systolic_min"] == 150
+    assert rollup[0]["bp_systolic_max"] == 170
+    assert rollup[0]["bp_systolic_avg"] == 160
+
+    # nothing left to archive
+    assert run_retention(engine, discharged_before=NOW, verbose=False)["vital_sign"] == 0
+    assert count(engine, "vital_sign_hourly") == 1
+
+    # current admissions are untouched
+    result = write_operations.ingest_vital_signs(
+        engine=engine,
+        readings=[
+            {
+                "admission_id": new_id("liu"),
+                "recorded_at": NOW,
+                "bp_systolic": 140,
+                "bp_diastolic": 90,
+                "heart_rate": 90,
+                "temperature": 37.0,
+                "fetal_heart_rate": 140,
+                "oxygen_saturation": 98.0,
+            }
+        ],
+    )
+    assert result["n_inserted"] == 1
+    assert run_retention(engine, discharged_before=NOW, verbose=False)["vital_sign"] == 0
+
+
+def test_partitions():
+    months = list(iter_months(datetime(2023, 11, 20), datetime(2024, 2, 1)))
+    assert months == [
+        datetime(2023, 11, 1),
+        datetime(2023, 12, 1),
+        datetime(2024, 1, 1),
+        datetime(2024, 2, 1),
+    ]
+    assert partition_name("vital_sign", months[1]) == "vital_sign_y2023m12"
+    assert create_partition_sql("vital_sign", months[1]) == (
+        "CREATE TABLE IF NOT EXISTS vital_sign_y2023m12 PARTITION OF vital_sign "
+        "FOR VALUES FROM ('2023-12-01') TO ('2024-01-01')"
+    )
+    with pytest.raises(ValueError, match="Postgres"):
+        ensure_partitions(new_sample_engine(), start=months[0], end=months[-1])
+
+
+def test_partitions_postgres():
+    engine = new_sample_postgres_engine()
+    if engine is None:
+        pytest.skip("OBNEXUS_TEST_POSTGRES_URL is not set")
+
+    # created by the sync for the months of the sample data
+    partitions = get_partitions(engine, "vital_sign")
+    assert "vital_sign_y2024m01" in partitions
+    assert "vital_sign_default" in partitions
+    assert "labor_progress_y2024m01" in get_partitions(engine, "labor_progress")
+    by_partition = query(
+        engine,
+        "SELECT tableoid::regclass::text AS name, COUNT(*) AS n FROM vital_sign GROUP BY 1",
+    )
+    assert [row["name"] for row in by_partition] == ["vital_sign_y2024m01"]
+    # indexes of the migrations are created on every partition
+    indexes = query(
+        engine,
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'vital_sign_y2024m01'",
+    )
+    assert len(indexes) > 1
+
+    # partitions ahead of time; a reading of that month lands in it (COPY ingest)
+    month = datetime(2031, 5, 1)
+    assert ensure_partitions(engine, start=month, end=month) == [
+        "vital_sign_y2031m05",
+        "labor_progress_y2031m05",
+    ]
+    assert ensure_partitions(engine, start=month, end=month) == [
+        "vital_sign_y2031m05",
+        "labor_progress_y2031m05",
+    ]
+    result = write_operations.ingest_vital_signs(
+        engine=engine,
+        readings=[
+            {
+                "admission_id": new_id("liu"),
+                "recorded_at": month + timedelta(days=3),
+                "bp_systolic": 140,
+                "bp_diastolic": 90,
+                "heart_rate": 90,
+                "temperature": 37.0,
+                "fetal_heart_rate": 140,
+                "oxygen_saturation": 98.0,
+            }
+        ],
+    )
+    assert result["n_inserted"] == 1
+    assert count(engine, "vital_sign_y2031m05") == 1
+    assert count(engine, "vital_sign_default") == 0
+
+    # retention moves the discharged admission's readings out of the partitions
+    summary = run_retention(engine, discharged_before=NOW, verbose=False)
+    assert summary == {"vital_sign": 1, "labor_progress": 0}
+    assert count(engine, "vital_sign_hourly") == 1
+    engine.dispose()
+
+
+def test_system_prompt():
+    use_offline_backend(one)
+    one.__dict__["config"] = dataclasses.replace(one.config, retention_days=7)
+    try:
+        assert "discharged more than 7 days ago" in one.system_prompt
+        assert "$" not in one.system_prompt
+        assert one.agent.system_prompt == one.system_prompt
+    finally:
+        reset_cached_properties(one)
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.retention",
+        preview=False,
+    )
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from obnexus.tests.sample_db import new_sample_engine, new_id, NOW
+from obnexus.schedule_index import (
+    Interval,
+    IntervalIndex,
+    get_shift_interval,
+    ScheduleIndex,
+    format_slots,
+)
+from obnexus.write_operations import create_order
+
+
+def dt(hour: int, minute: int = 0, day: int = 15) -> datetime:
+    return datetime(2024, 1, day, hour, minute)
+
+
+def test_interval_index():
+    index = IntervalIndex(
+        [
+            Interval(dt(9), dt(17), "long"),
+            Interval(dt(10), dt(11), "a"),
+            Interval(dt(12), dt(13), "b"),
+        ]
+    )
+    assert [i.label for i in index.overlaps(dt(12, 30), dt(14))] == ["long", "b"]
+    # half-open: touching intervals do not overlap
+    assert [i.label for i in index.overlaps(dt(11), dt(12))] == ["long"]
+    assert index.overlaps(dt(17), dt(18)) == []
+    assert index.overlaps(dt(7), dt(9)) == []
+
+    index.add(Interval(dt(8), dt(9, 30), "early"))
+    assert len(index) == 4
+    assert [i.label for i in index.overlaps(dt(7), dt(9))] == ["early"]
+
+    assert index.covers(dt(8), dt(17)) is True
+    assert IntervalIndex([Interval(dt(8), dt(9))]).covers(dt(8), dt(10)) is False
+    assert IntervalIndex().covers(dt(8), dt(9)) is False
+
+
+def test_get_shift_interval():
+    assert get_shift_interval("2024-01-15", "day") == (dt(7), dt(19))
+    assert get_shift_interval(dt(0), "night") == (dt(19), dt(7, day=16))
+    assert get_shift_interval("2024-01-15 00:00:00", "on_call") == (dt(0), dt(0, day=16))
+
+
+def test_schedule_index():
+    engine = new_sample_engine()
+    index = ScheduleIndex(engine, reconcile_interval=0)
+    dr_smith = new_id("dr-smith")
+    dr_lee = new_id("dr-lee")
+    delivery_1 = new_id("delivery-1")
+
+    # order-3: dr-smith lab_test 12:00 - 12:15
+    conflicts = index.find_conflicts(dt(12, 10), "consult", dr_smith)
+    assert len(conflicts) == 1
+    assert "lab_test order" in conflicts[0]
+    # order-1: dr-smith c_section in delivery-1 tomorrow 08:00 - 10:00
+    conflicts = index.find_conflicts(dt(9, day=16), "c_section", dr_lee, delivery_1)
+    assert len(conflicts) == 1
+    assert conflicts[0].startswith(f"room {delivery_1}")
+    # order-4 is completed and no longer blocks dr-smith
+    assert index.find_conflicts(NOW - timedelta(hours=5), "lab_test", dr_smith) == []
+
+    assert index.is_on_duty(dr_smith, dt(8), dt(9)) is True
+    assert index.is_on_duty(dr_smith, dt(18), dt(20)) is False
+    assert index.is_on_duty(new_id("dr-unknown"), dt(8), dt(9)) is None
+
+    # dr-smith is on day shift 07-19 today and tomorrow, busy 12:00 - 12:15
+    # today and 08:00 - 10:00 tomorrow
+    slots = index.find_free_slots(
+        after=NOW, order_type="c_section", provider_id=dr_smith, n=10
+    )
+    assert slots == [
+        (dt(8), dt(12)),
+        (dt(12, 15), dt(19)),
+        (dt(10, day=16), dt(19, day=16)),
+    ]
+    slots = index.find_free_slots(
+        after=dt(18, day=16), order_type="c_section", room_id=delivery_1, n=1
+    )
+    assert slots == [(dt(18, day=16), dt(18, day=23))]
+    assert "| start" in format_slots(slots)
+    assert format_slots([]) == "No result"
+
+
+def test_create_order_rejects_overlap():
+    engine = new_sample_engine()
+    index = ScheduleIndex(engine, reconcile_interval=0)
+    kwargs = dict(
+        engine=engine,
+        admission_id=new_id("wang"),
+        order_type="epidural",
+        assigned_provider_id=new_id("dr-lee"),
+        assigned_room_id=new_id("labor-2"),
+        schedule_index=index,
+    )
+    # order-2: dr-lee epidural 10:00 - 10:30
+    with pytest.raises(ValueError, match="Scheduling conflict"):
+        create_order(scheduled_time=dt(10, 15), **kwargs)
+
+    result = create_order(scheduled_time=dt(10, 30), **kwargs)
+    assert result["success"] is True
+    # the new order is visible without a reload
+    with pytest.raises(ValueError, match=result["order_id"]):
+        create_order(scheduled_time=dt(10, 45), **kwargs)
+
+    # the same order without an index is not checked
+    assert create_order(
+        **{**kwargs, "schedule_index": None, "scheduled_time": dt(10, 45)}
+    )["success"] is True
+
+    index.reload()
+    assert len(index.find_conflicts(dt(10, 45), "epidural", new_id("dr-lee"))) == 2
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.schedule_index",
+        preview=False,
+    )
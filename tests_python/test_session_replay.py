@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import sqlalchemy as sa
+
+from obnexus.one.one_00_main import One
+from obnexus.benchmark import use_offline_backend, DEFAULT_STEPS
+from obnexus.tests.sample_db import new_sample_engine
+from obnexus.tests.scripted_model import ScriptedModel
+from obnexus.session_replay import (
+    record_session,
+    load_session,
+    ReplayModel,
+    replay_session,
+)
+
+
+def test_record_and_replay(tmp_path):
+    path = tmp_path / "session.jsonl"
+
+    # --- record two turns with the scripted model
+    one = One()
+    use_offline_backend(one, model=ScriptedModel(steps=DEFAULT_STEPS))
+    with record_session(one.agent, path) as recorder:
+        one.agent("Any labor beds?")
+        one.agent("And now?")
+    one.agent("not recorded")
+    types = [record["type"] for record in recorder.records]
+    assert types[:6] == [
+        "user",
+        "model_request",
+        "model_response",
+        "tool_call",
+        "tool_call",
+        "model_request",
+    ]
+    tool_calls = [record for record in recorder.records if record["type"] == "tool_call"]
+    assert all(record["seconds"] >= 0 for record in tool_calls)
+
+    session = load_session(path)
+    assert [turn.text for turn in session.turns] == ["Any labor beds?", "And now?"]
+    assert [len(turn.model_responses) for turn in session.turns] == [2, 2]
+    assert [len(turn.tool_calls) for turn in session.turns] == [2, 2]
+
+    # --- replay against an identical database: no differences
+    replay_one = One()
+    use_offline_backend(replay_one, model=ReplayModel(session))
+    report = replay_session(replay_one.agent, session)
+    assert report.n_diffs == 0
+    assert [turn.n_tool_calls for turn in report.turns] == [2, 2]
+    assert "replayed_tool_ms" in report.to_markdown()
+    assert replay_one.agent.messages[-1]["content"][0]["text"] == DEFAULT_STEPS[-1].text
+
+    # --- replay against a changed database: the SQL result differs
+    engine = new_sample_engine()
+    with engine.begin() as conn:
+        conn.execute(sa.text("UPDATE admission SET status = 'postpartum' WHERE status = 'in_labor'"))
+    changed_one = One()
+    use_offline_backend(changed_one, engine=engine, model=ReplayModel(session))
+    report = replay_session(changed_one.agent, session)
+    assert report.n_diffs == 2
+    assert "execute_sql_query" in report.turns[0].diffs[0]
+    assert "result changed" in report.to_markdown()
+
+    # --- the recording only has four model responses
+    with pytest.raises(Exception):
+        changed_one.agent("one more")
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.session_replay",
+        preview=False,
+    )
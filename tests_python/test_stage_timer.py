@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+from strands import Agent, tool
+
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep, ScriptedToolCall
+from obnexus.stage_timer import (
+    StageTimer,
+    StageTimingHooks,
+    current_stage_timer,
+    add_listener,
+    remove_listener,
+    stage,
+)
+
+
+def test_stage_timer():
+    # no active timer: no-op
+    with stage("parse"):
+        pass
+
+    timer = StageTimer()
+    token = current_stage_timer.set(timer)
+    try:
+        with stage("parse"):
+            pass
+        with stage("parse"):
+            pass
+        timer.start("tool-1")
+        timer.stop("tool-1", "tool_call")
+        timer.stop("unknown", "tool_call")
+    finally:
+        current_stage_timer.reset(token)
+    assert timer.counts == {"parse": 2, "tool_call": 1}
+
+    finished = []
+    add_listener(finished.append)
+    try:
+        assert list(timer.timed_iter("sse_encode", ["a", "b"])) == ["a", "b"]
+    finally:
+        remove_listener(finished.append)
+    assert finished == [timer]
+    assert timer.counts["sse_encode"] == 3
+    assert set(timer.to_dict()) == {"parse", "tool_call", "sse_encode", "total"}
+
+
+def test_hooks():
+    @tool
+    def count_beds() -> str:
+        """Count the beds."""
+        return "11"
+
+    model = ScriptedModel(
+        steps=[
+            ScriptedStep(tool_calls=[ScriptedToolCall(name="count_beds")]),
+            ScriptedStep(text="11 beds."),
+        ]
+    )
+    agent = Agent(
+        model=model,
+        tools=[count_beds],
+        hooks=[StageTimingHooks()],
+        callback_handler=None,
+    )
+    timer = StageTimer()
+    token = current_stage_timer.set(timer)
+    try:
+        agent("How many beds?")
+    finally:
+        current_stage_timer.reset(token)
+    assert timer.counts == {"model_call": 2, "tool_call": 1}
+    assert timer.seconds["tool_call"] > 0
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.stage_timer",
+        preview=False,
+    )
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+
+from strands import Agent, tool
+from strands.models import BedrockModel
+from strands.telemetry.metrics import Trace
+
+from obnexus.metrics import tool_queue_depth
+from obnexus.tool_executor import group_tool_uses, ReadWriteToolExecutor
+
+
+def test_group_tool_uses():
+    tool_uses = [
+        {"name": "read"},
+        {"name": "read"},
+        {"name": "write"},
+        {"name": "write"},
+        {"name": "read"},
+    ]
+    batches = group_tool_uses(tool_uses, read_only_tool_names={"read"})
+    assert [(is_read_only, len(batch)) for is_read_only, batch in batches] == [
+        (True, 2),
+        (False, 1),
+        (False, 1),
+        (True, 1),
+    ]
+    assert group_tool_uses([], read_only_tool_names={"read"}) == []
+
+
+class TestReadWriteToolExecutor:
+    def test_execute(self):
+        events = []
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+        # the first two reads must run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        third_read_started = threading.Event()
+        waits = []
+
+        @tool(name="read")
+        def read(x: int) -> str:
+            """Read-only tool."""
+            with lock:
+                events.append(("read-start", x))
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            if x in (0, 1):
+                barrier.wait()
+            if x == 0:
+                # the third read takes the worker freed by the second one,
+                # without waiting for the first read to finish
+                waits.append(third_read_started.wait(timeout=5))
+            if x == 2:
+                third_read_started.set()
+            with lock:
+                in_flight[0] -= 1
+                events.append(("read-end", x))
+            return str(x)
+
+        @tool(name="write")
+        def write(x: int) -> str:
+            """Write tool."""
+            with lock:
+                events.append(("write", x))
+            return str(x)
+
+        executor = ReadWriteToolExecutor(read_only_tool_names=["read"], max_workers=2)
+        agent = Agent(
+            model=BedrockModel(region_name="us-east-1"),
+            tools=[read, write],
+            tool_executor=executor,
+        )
+        names = ["read", "read", "read", "write", "read"]
+        tool_uses = [
+            {"toolUseId": f"t{i}", "name": name, "input": {"x": i}}
+            for i, name in enumerate(names)
+        ]
+        tool_results = []
+
+        async def main():
+            async for _ in executor._execute(
+                agent, tool_uses, tool_results, Trace("cycle"), None, {}
+            ):
+                pass
+
+        asyncio.run(main())
+
+        # results keep the order of the tool calls, not the completion order
+        assert [r["toolUseId"] for r in tool_results] == ["t0", "t1", "t2", "t3", "t4"]
+        assert [r["status"] for r in tool_results] == ["success"] * 5
+        assert tool_queue_depth.get() == 0
+        # never more than max_workers reads at the same time
+        assert peak[0] == 2
+        assert waits == [True]
+        assert events.index(("read-start", 2)) < events.index(("read-end", 0))
+        # the write runs after all previous reads, the last read after the write
+        assert events.index(("write", 3)) > events.index(("read-end", 0))
+        assert events.index(("read-start", 4)) > events.index(("write", 3))
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.tool_executor",
+        preview=False,
+    )
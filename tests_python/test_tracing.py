@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from api.index import app
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, new_chat_request_body, reset_cached_properties
+from obnexus.tests.sample_db import new_sample_engine
+from obnexus.tracing import (
+    Trace,
+    current_trace,
+    current_span,
+    start_trace,
+    finish_trace,
+    span,
+    InMemorySpanExporter,
+    exporter,
+    instrument_sqlalchemy,
+)
+
+
+def test_span():
+    # no active trace: no-op
+    with span("noop") as s:
+        assert s is None
+
+    trace = start_trace("request", user="alice")
+    try:
+        with span("parse") as parse:
+            with span("inner", n=1):
+                pass
+        with pytest.raises(ValueError):
+            with span("fail"):
+                raise ValueError("boom")
+        finish_trace(trace)
+    finally:
+        current_trace.set(None)
+        current_span.set(None)
+
+    data = trace.to_dict()
+    spans = {s["name"]: s for s in data["spans"]}
+    assert spans["request"]["attributes"] == {"user": "alice"}
+    assert spans["parse"]["parentSpanId"] == spans["request"]["spanId"]
+    assert spans["inner"]["parentSpanId"] == parse.span_id
+    assert spans["inner"]["attributes"] == {"n": 1}
+    assert spans["fail"]["status"] == "ERROR"
+    assert all(s["durationMs"] is not None for s in data["spans"])
+    assert exporter.get_traces(limit=1)[0]["traceId"] == trace.trace_id
+
+
+def test_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    local_exporter = InMemorySpanExporter(max_traces=2, path=path)
+    traces = [Trace(f"t{i}") for i in range(3)]
+    for trace in traces:
+        local_exporter.export(trace)
+    assert [t["name"] for t in local_exporter.get_traces()] == ["t2", "t1"]
+    assert '"t2"' in local_exporter.to_json(limit=1)
+    assert len(path.read_text().splitlines()) == 3
+    local_exporter.clear()
+    assert local_exporter.get_traces() == []
+
+
+def test_sql_spans():
+    instrument_sqlalchemy()
+    instrument_sqlalchemy()  # idempotent
+    engine = new_sample_engine()
+    trace = start_trace("query")
+    try:
+        with engine.connect() as conn:
+            conn.execute(sa.text("SELECT COUNT(*) FROM bed")).fetchall()
+            with pytest.raises(sa.exc.OperationalError):
+                conn.execute(sa.text("SELECT * FROM no_such_table"))
+    finally:
+        current_trace.set(None)
+        current_span.set(None)
+    status = {s.attributes["statement"]: s.status for s in trace.spans if s.name == "sql"}
+    assert status["SELECT COUNT(*) FROM bed"] == "OK"
+    assert status["SELECT * FROM no_such_table"] == "ERROR"
+
+
+def test_chat_trace():
+    use_offline_backend(one)
+    try:
+        client = TestClient(app)
+        response = client.post("/api/chat", json=new_chat_request_body("Any labor beds?"))
+        assert response.status_code == 200
+        traces = client.get("/api/traces", params={"limit": 1}).json()
+        usage = dict(one.agent.event_loop_metrics.accumulated_usage)
+    finally:
+        reset_cached_properties(one)
+
+    spans = traces[0]["spans"]
+    names = [s["name"] for s in spans]
+    for name in ["POST /api/chat", "parse", "history_load", "agent", "model_call", "tool_call", "sql", "sse_encode"]:
+        assert name in names
+    by_id = {s["spanId"]: s for s in spans}
+    # the usage of every model call, from the agent's metrics
+    model_calls = [s for s in spans if s["name"] == "model_call"]
+    assert len(model_calls) == 2
+    assert all(s["attributes"]["total_tokens"] > 0 for s in model_calls)
+    assert sum(s["attributes"]["total_tokens"] for s in model_calls) == usage["totalTokens"]
+    sql = next(s for s in spans if s["name"] == "sql")
+    assert by_id[sql["parentSpanId"]]["name"] == "tool_call"
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.tracing",
+        preview=False,
+    )
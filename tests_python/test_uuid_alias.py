@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+from strands import Agent, tool
+
+from obnexus.tests.scripted_model import ScriptedModel, ScriptedStep, ScriptedToolCall
+from obnexus.sql_utils import format_records
+from obnexus.uuid_alias import (
+    UUID_PATTERN,
+    AliasTable,
+    AliasStore,
+    UuidAliasHooks,
+    get_prefix,
+    hash_digits,
+    is_id_parameter,
+)
+
+ADMISSION_ID = "0b6e6f5e-3c1d-4d3a-9a53-6f1b2c3d4e5f"
+BED_ID = "7f1c2d3e-4b5a-4c6d-8e7f-a1b2c3d4e5f6"
+ROOM_ID = "c2d3e4f5-a6b7-4c8d-9e0f-1a2b3c4d5e6f"
+
+
+def test_get_prefix():
+    assert get_prefix("admission_id") == "A"
+    assert get_prefix("assigned_room_id") == "R"
+    assert get_prefix("BED_ID") == "B"
+    assert get_prefix("alert_id") == "U"
+    assert get_prefix(None) == "U"
+
+
+def test_is_id_parameter():
+    assert is_id_parameter("admission_id")
+    assert is_id_parameter("Assigned_Room_ID")
+    assert is_id_parameter("bed_ids")
+    assert not is_id_parameter("message")
+    assert not is_id_parameter("sql")
+    assert not is_id_parameter(None)
+
+
+def test_alias_markdown_table():
+    aliases = AliasTable()
+    text = format_records(
+        columns=["admission_id", "name", "bed_id", "room_id"],
+        records=[
+            [ADMISSION_ID, "Liu", BED_ID, ROOM_ID],
+            [ADMISSION_ID.upper(), "Liu (again)", None, None],
+        ],
+    )
+    aliased = aliases.alias_text(text)
+    assert UUID_PATTERN.search(aliased) is None
+    assert len(aliased) < len(text)
+    a1 = "A" + hash_digits(ADMISSION_ID)[:6]
+    # the same UUID, in any case, keeps its alias
+    assert aliased.count(f" {a1} ") == 2
+    assert f" B{hash_digits(BED_ID)[:6]} " in aliased
+    assert f" R{hash_digits(ROOM_ID)[:6]} " in aliased
+    assert len(aliases) == 3
+    assert aliases.alias(ADMISSION_ID, "bed_id") == a1
+
+
+def test_alias_json():
+    aliases = AliasTable()
+    text = json.dumps({"candidates": [{"admission_id": ADMISSION_ID, "order_id": BED_ID}]})
+    data = json.loads(aliases.alias_text(text))
+    assert data["candidates"][0] == {
+        "admission_id": aliases.alias(ADMISSION_ID),
+        "order_id": aliases.alias(BED_ID),
+    }
+    assert data["candidates"][0]["order_id"].startswith("U")
+    assert aliases.alias_text("No result") == "No result"
+
+
+def test_alias_is_deterministic():
+    # another instance, or the same chat after a restart
+    first, second = AliasTable(), AliasTable()
+    first.alias(BED_ID, "bed_id")
+    assert first.alias(ADMISSION_ID, "admission_id") == second.alias(ADMISSION_ID, "admission_id")
+    # an alias the table did not issue is not resolved
+    assert second.resolve(first.alias(BED_ID)) == first.alias(BED_ID)
+
+
+def test_alias_collision(monkeypatch):
+    digits = {ADMISSION_ID: "123456000000000000", BED_ID: "123456700000000000"}
+    monkeypatch.setattr("obnexus.uuid_alias.hash_digits", lambda uuid: digits[uuid])
+    aliases = AliasTable()
+    assert aliases.alias(ADMISSION_ID, "admission_id") == "A123456"
+    assert aliases.alias(BED_ID, "admission_id") == "A1234567"
+    assert aliases.resolve("A123456") == ADMISSION_ID
+    assert aliases.resolve("A1234567") == BED_ID
+
+
+def test_resolve():
+    aliases = AliasTable()
+    a1 = "A" + hash_digits(ADMISSION_ID)[:6]
+    # nothing issued yet
+    assert aliases.resolve(a1) == a1
+    assert aliases.resolve_sql(f"SELECT '{a1}'") == f"SELECT '{a1}'"
+    assert aliases.alias(ADMISSION_ID, "admission_id") == a1
+    b1 = aliases.alias(BED_ID, "bed_id")
+    assert aliases.resolve(a1) == ADMISSION_ID
+    assert aliases.resolve(f" {b1} ") == BED_ID
+    assert aliases.resolve(ADMISSION_ID) == ADMISSION_ID
+
+    sql = (
+        f"SELECT * FROM vital_sign v WHERE v.admission_id IN ('{a1}', 'A2') "
+        f"AND note = '{a1}' AND bed_id NOT IN ('{b1}') AND room_id='{b1}'"
+    )
+    assert aliases.resolve_sql(sql) == (
+        f"SELECT * FROM vital_sign v WHERE v.admission_id IN ('{ADMISSION_ID}', 'A2') "
+        f"AND note = '{a1}' AND bed_id NOT IN ('{BED_ID}') AND room_id='{BED_ID}'"
+    )
+
+    # only id parameters and id comparisons in SQL are resolved
+    assert aliases.resolve_input(
+        {
+            "admission_id": a1,
+            "bed_ids": [b1],
+            "message": f"Check {a1}",
+            "notes": a1,
+            "sql": f"SELECT * FROM bed WHERE bed_id = '{b1}' AND label = '{b1}'",
+            "n": 3,
+        }
+    ) == {
+        "admission_id": ADMISSION_ID,
+        "bed_ids": [BED_ID],
+        "message": f"Check {a1}",
+        "notes": a1,
+        "sql": f"SELECT * FROM bed WHERE bed_id = '{BED_ID}' AND label = '{b1}'",
+        "n": 3,
+    }
+
+
+def test_alias_store():
+    store = AliasStore(max_sessions=2)
+    first = store.get("chat-1")
+    assert store.get("chat-1") is first
+    store.get("chat-2")
+    store.get("chat-1")  # most recently used
+    store.get("chat-3")
+    assert len(store) == 2
+    assert store.get("chat-1") is first
+    assert store.get("chat-2") is not None
+    assert len(store) == 2
+
+    with pytest.raises(ValueError):
+        AliasStore(max_sessions=0)
+
+
+def test_hooks():
+    received = []
+
+    @tool
+    def list_admissions() -> str:
+        """List the current admissions."""
+        return format_records(
+            columns=["admission_id", "bed_id"],
+            records=[[ADMISSION_ID, BED_ID]],
+        )
+
+    @tool
+    def assign_bed(admission_id: str, bed_id: str) -> str:
+        """Assign a bed."""
+        received.append((admission_id, bed_id))
+        return json.dumps({"success": True, "admission_id": admission_id})
+
+    # the aliases the model will see, the same in every table
+    expected = AliasTable()
+    a1 = expected.alias(ADMISSION_ID, "admission_id")
+    b1 = expected.alias(BED_ID, "bed_id")
+    model = ScriptedModel(
+        steps=[
+            ScriptedStep(tool_calls=[ScriptedToolCall(name="list_admissions")]),
+            ScriptedStep(
+                tool_calls=[
+                    ScriptedToolCall(
+                        name="assign_bed",
+                        input={"admission_id": a1, "bed_id": b1},
+                    )
+                ]
+            ),
+            ScriptedStep(text="Done."),
+        ]
+    )
+    agent = Agent(
+        model=model,
+        tools=[list_admissions, assign_bed],
+        hooks=[UuidAliasHooks()],
+        callback_handler=None,
+    )
+    aliases = AliasStore().get("chat-1")
+    agent("Assign Liu to the free bed", invocation_state={"uuid_aliases": aliases})
+
+    # the tool got the real ids, the model only saw aliases
+    assert received == [(ADMISSION_ID, BED_ID)]
+    history = json.dumps(agent.messages)
+    assert ADMISSION_ID not in history
+    assert BED_ID not in history
+    assert f'"{a1}"' in history
+
+    # without an alias table the hooks do nothing
+    received.clear()
+    agent.messages.clear()
+    agent("Assign Liu to the free bed")
+    assert received == [(a1, b1)]
+    assert ADMISSION_ID in json.dumps(agent.messages)
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.uuid_alias",
+        preview=False,
+    )
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import numpy as np
+
+from obnexus.tests.sample_db import new_sample_engine, new_id
+from obnexus.vital_trends import (
+    VitalRule,
+    new_vital_sign_arrays,
+    compute_window_stats,
+    compute_slopes,
+    detect_alert_candidates,
+    scan_ward,
+)
+
+
+def test_compute_slopes():
+    rows = [
+        ("a", "2024-01-01 00:00:00", 100),
+        ("a", "2024-01-01 01:00:00", 110),
+        ("a", "2024-01-01 02:00:00", 120),
+        ("a", "2024-01-01 03:00:00", 150),
+        ("b", datetime(2024, 1, 1, 0, 0), 100),
+        ("c", "2024-01-01 00:00:00", 100),
+        ("c", "2024-01-01 00:30:00", 90),
+    ]
+    arrays = new_vital_sign_arrays(rows=rows, columns=["x"])
+    assert list(arrays.admission_ids) == ["a", "b", "c"]
+    assert list(arrays.group) == [0, 0, 0, 0, 1, 2, 2]
+
+    last_index, in_window, n_window = compute_window_stats(arrays, window=3)
+    assert list(last_index) == [3, 4, 6]
+    assert list(in_window) == [False, True, True, True, True, True, True]
+    assert list(n_window) == [3, 1, 2]
+
+    slopes = compute_slopes(arrays, arrays.values["x"], in_window, last_index)
+    np.testing.assert_allclose(slopes, [20.0, 0.0, -20.0])
+
+
+def test_detect_alert_candidates():
+    rule = VitalRule(
+        column="x",
+        label="X",
+        alert_type="high_bp",
+        high_warning=140,
+        high_critical=160,
+        rising_slope=5,
+        rising_floor=120,
+    )
+    rows = [
+        ("rising", "2024-01-01 00:00:00", 110),
+        ("rising", "2024-01-01 01:00:00", 120),
+        ("rising", "2024-01-01 02:00:00", 130),
+        ("critical", "2024-01-01 02:00:00", 165),
+        ("normal", "2024-01-01 01:00:00", 120),
+        ("normal", "2024-01-01 02:00:00", 121),
+    ]
+    arrays = new_vital_sign_arrays(rows=rows, columns=["x"])
+    candidates = detect_alert_candidates(arrays, rules=[rule], window=3)
+    assert [(c.admission_id, c.severity) for c in candidates] == [
+        ("critical", "critical"),
+        ("rising", "warning"),
+    ]
+    assert "110 -> 120 -> 130" in candidates[1].message
+
+    empty = new_vital_sign_arrays(rows=[], columns=["x"])
+    assert detect_alert_candidates(empty, rules=[rule]) == []
+
+
+def test_scan_ward():
+    engine = new_sample_engine()
+    candidates = scan_ward(engine)
+    found = {(c.admission_id, c.alert_type): c for c in candidates}
+    assert set(found) == {
+        (new_id("liu"), "high_bp"),
+        (new_id("chen"), "fever"),
+        (new_id("zhou"), "abnormal_fhr"),
+    }
+    assert found[(new_id("zhou"), "abnormal_fhr")].severity == "critical"
+    assert "130 -> 138 -> 145" in found[(new_id("liu"), "high_bp")].message
+    # critical alerts first
+    assert candidates[0].severity == "critical"
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.vital_trends",
+        preview=False,
+    )
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+from obnexus import write_operations
+from obnexus.migrations import apply_migrations
+from obnexus.db_schema.api import new_schema_info, encode_schema_info
+from obnexus.tests.sample_db import new_sample_engine, new_sample_postgres_engine, new_id
+from obnexus.ward_views import WardViews
+
+
+def query(engine: "sa.Engine", sql: str, **params) -> list[dict]:
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(sa.text(sql), params)]
+
+
+def new_migrated_engine() -> "sa.Engine":
+    engine = new_sample_engine()
+    apply_migrations(engine, verbose=False)
+    return engine
+
+
+def test_initial_refresh():
+    engine = new_migrated_engine()
+
+    census = {
+        row["status"]: row
+        for row in query(engine, "SELECT * FROM mv_census_by_status")
+    }
+    assert census["in_labor"]["n_admissions"] == 2
+    assert census["in_labor"]["n_high_risk"] == 1
+    assert census["discharged"]["n_admissions"] == 1
+
+    occupancy = query(
+        engine,
+        "SELECT * FROM mv_bed_occupancy WHERE room_type = 'labor' AND floor = 2",
+    )
+    assert occupancy == [
+        {
+            "room_type": "labor",
+            "floor": 2,
+            "n_beds": 2,
+            "n_available": 0,
+            "n_occupied": 2,
+            "n_other": 0,
+        }
+    ]
+
+    alerts = query(engine, "SELECT * FROM mv_active_alerts")
+    assert [row["admission_id"] for row in alerts] == [new_id("zhou")]
+    assert alerts[0]["n_active"] == 1
+    assert alerts[0]["latest_alert_type"] == "preterm_risk"
+
+
+def test_refresh_on_write():
+    engine = new_migrated_engine()
+    ward_views = WardViews()
+
+    write_operations.create_alert(
+        engine=engine,
+        admission_id=new_id("liu"),
+        alert_type="high_bp",
+        severity="critical",
+        message="BP 145/92",
+        ward_views=ward_views,
+    )
+    alerts = query(
+        engine,
+        "SELECT * FROM mv_active_alerts WHERE admission_id = :admission_id",
+        admission_id=new_id("liu"),
+    )
+    assert alerts[0]["n_critical"] == 1
+    assert alerts[0]["latest_alert_type"] == "high_bp"
+    # other admissions are untouched
+    assert len(query(engine, "SELECT * FROM mv_active_alerts")) == 2
+
+    bed_id = query(engine, "SELECT bed_id FROM bed WHERE bed_label = '302-A'")[0]["bed_id"]
+    write_operations.assign_bed(
+        engine=engine,
+        admission_id=new_id("zhou"),
+        bed_id=bed_id,
+        ward_views=ward_views,
+    )
+    occupancy = {
+        (row["room_type"], row["floor"]): row
+        for row in query(engine, "SELECT * FROM mv_bed_occupancy")
+    }
+    assert occupancy[("postpartum", 3)]["n_occupied"] == 3
+    assert occupancy[("triage", 1)]["n_occupied"] == 0
+
+
+def test_not_installed():
+    engine = new_sample_engine()
+    ward_views = WardViews(refresh_interval=1)
+    with engine.begin() as conn:
+        assert ward_views.on_write(conn, tables=["alert"]) == []
+    assert ward_views.refresh(engine) is False
+    assert ward_views.maybe_refresh(engine) is False
+
+    # picked up without forget()
+    apply_migrations(engine, verbose=False)
+    with engine.begin() as conn:
+        conn.execute(sa.text("UPDATE bed SET status = 'cleaning'"))
+    assert ward_views.is_referenced("SELECT * FROM MV_BED_OCCUPANCY")
+    assert ward_views.maybe_refresh(engine) is True
+    # refreshed recently: no-op
+    assert ward_views.maybe_refresh(engine) is False
+    rows = query(engine, "SELECT SUM(n_other) AS n FROM mv_bed_occupancy")
+    assert rows[0]["n"] == 11
+
+    with engine.begin() as conn:
+        conn.execute(sa.text("DROP TABLE mv_bed_occupancy"))
+    ward_views.forget(engine)
+    with engine.begin() as conn:
+        assert ward_views.is_installed(conn) is False
+
+
+def test_schema_encoder():
+    engine = new_migrated_engine()
+    metadata = sa.MetaData()
+    metadata.reflect(bind=engine)
+    schema_info = new_schema_info(
+        engine=engine,
+        metadata=metadata,
+        exclude=["schema_migrations"],
+        materialized_view_names=WardViews().names,
+    )
+    text = encode_schema_info(schema_info)
+    assert "MaterializedView mv_census_by_status(" in text
+    assert "Table admission(" in text
+    assert "schema_migrations" not in text
+
+
+def test_concurrent_writers_postgres():
+    """
+    Two transactions refreshing the same summary: the second one waits for
+    the first to commit instead of inserting the same primary keys.
+    """
+    engine = new_sample_postgres_engine()
+    if engine is None:
+        pytest.skip("OBNEXUS_TEST_POSTGRES_URL is not set")
+    ward_views = WardViews()
+    errors = []
+
+    def write():
+        try:
+            with engine.begin() as conn:
+                ward_views.on_write(conn, tables=["admission", "alert"], admission_id=new_id("zhou"))
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    with engine.begin() as conn:
+        ward_views.on_write(conn, tables=["admission", "alert"], admission_id=new_id("zhou"))
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join(0.5)
+        assert thread.is_alive()
+    thread.join()
+    assert errors == []
+    census = query(engine, "SELECT SUM(n_admissions) AS n FROM mv_census_by_status")
+    assert census[0]["n"] == len(query(engine, "SELECT admission_id FROM admission"))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.ward_views",
+        preview=False,
+    )
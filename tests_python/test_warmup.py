@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from functools import cached_property
+
+from fastapi.testclient import TestClient
+
+from api.index import app, warmup
+from obnexus.one.api import one
+from obnexus.benchmark import use_offline_backend, reset_cached_properties
+from obnexus.warmup import Warmup
+
+
+class Lazy:
+    def __init__(self):
+        self.fail = True
+        self.threads = {}
+
+    def _record(self, name: str):
+        time.sleep(0.05)
+        self.threads[name] = threading.current_thread().name
+
+    @cached_property
+    def config(self):
+        self._record("config")
+        return "config"
+
+    @cached_property
+    def engine(self):
+        self._record("engine")
+        return f"engine({self.config})"
+
+    @cached_property
+    def model(self):
+        self._record("model")
+        if self.fail:
+            raise ConnectionError("no network")
+        return f"model({self.config})"
+
+
+def test_warmup():
+    lazy = Lazy()
+    warmup = Warmup(lazy, stages=[["config"], ["engine", "model"]])
+    assert warmup.to_dict()["steps"][0]["status"] == "pending"
+
+    assert warmup.run() is False
+    # engine and model are resolved concurrently
+    assert lazy.threads["engine"] != lazy.threads["model"]
+    assert "engine" in lazy.__dict__
+    status = warmup.to_dict()
+    assert status["done"] is True
+    assert status["ready"] is False
+    assert status["steps"][2] == {
+        "name": "model",
+        "status": "failed",
+        "seconds": status["steps"][2]["seconds"],
+        "error": "ConnectionError: no network",
+    }
+
+    # a failed warm-up is retried by start()
+    lazy.fail = False
+    thread = warmup.start()
+    assert warmup.wait(timeout=5) is True
+    assert warmup.start() is thread
+    assert warmup.steps["model"].error is None
+    assert lazy.model == "model(config)"
+
+
+def test_ready_endpoint():
+    use_offline_backend(one)
+    try:
+        with TestClient(app) as client:
+            assert warmup.wait(timeout=30) is True
+            response = client.get("/api/ready")
+    finally:
+        reset_cached_properties(one)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert {step["name"] for step in body["steps"]} >= {"agent", "engine", "database_schema_str"}
+
+
+if __name__ == "__main__":
+    from obnexus.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "obnexus.warmup",
+        preview=False,
+    )